@@ -48,6 +48,7 @@ class BackupManager:
         # バックアップ対象ファイル定義
         self.backup_targets = {
             "youtube_knowledge": "youtube_knowledge_system/data/unified_knowledge_db.json",
+            "youtube_knowledge_journal": "youtube_knowledge_system/data/unified_knowledge_db.journal.jsonl",
             "user_preferences": "data/user_preferences.json",
             "conversation_context": "data/conversation_context.json",
             "multi_turn_conversations": "data/multi_turn_conversations.json",
@@ -8,10 +8,141 @@
 import json
 import os
 import hashlib
+import math
 import time
+from collections import defaultdict
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 
+
+class CharacterJaccardIndex:
+    """文字集合Jaccard類似度の近傍検索インデックス
+    
+    プレフィックスフィルタ方式（AllPairs/PPJoin）で候補を絞り込む。
+    閾値以上の類似度を持つエントリは必ず候補に含まれるため、
+    線形スキャンと同じヒット結果をサブリニアな計算量で得られる。
+    """
+    
+    # 浮動小数点誤差吸収用（プレフィックスが長くなる側に倒す）
+    _EPSILON = 1e-9
+    
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.token_rank: Dict[str, int] = {}
+        self.postings: Dict[str, set] = defaultdict(set)
+        # key -> (文字集合, 挿入順序, プレフィックス文字)
+        self.entries: Dict[str, Tuple[frozenset, int, List[str]]] = {}
+        self.empty_keys: set = set()
+        self._next_seq = 0
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def build(self, texts: List[Tuple[str, str]]):
+        """(key, text) の列から再構築（文字の出現頻度順序もここで確定）"""
+        self.postings.clear()
+        self.entries.clear()
+        self.empty_keys.clear()
+        self._next_seq = 0
+        
+        char_sets = [(key, frozenset(text.lower())) for key, text in texts]
+        
+        # 出現頻度の低い文字を先頭に並べるとポスティングが短くなる
+        frequency: Dict[str, int] = defaultdict(int)
+        for _, chars in char_sets:
+            for char in chars:
+                frequency[char] += 1
+        ordered = sorted(frequency, key=lambda c: (frequency[c], c))
+        self.token_rank = {char: rank for rank, char in enumerate(ordered)}
+        
+        for key, chars in char_sets:
+            self._insert(key, chars, self._allocate_seq())
+    
+    def add(self, key: str, text: str):
+        """エントリ追加（既存キーは挿入順序を維持したまま更新）"""
+        existing = self.entries.get(key)
+        if existing is not None:
+            seq = existing[1]
+            self.remove(key)
+        else:
+            seq = self._allocate_seq()
+        self._insert(key, frozenset(text.lower()), seq)
+    
+    def remove(self, key: str):
+        """エントリ削除"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        chars, _, prefix = entry
+        if not chars:
+            self.empty_keys.discard(key)
+            return
+        for char in prefix:
+            posting = self.postings.get(char)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self.postings[char]
+    
+    def clear(self):
+        """全エントリ削除"""
+        self.build([])
+    
+    def similar_keys(self, text: str) -> List[str]:
+        """類似度が閾値以上のキーを挿入順で返す"""
+        query_chars = frozenset(text.lower())
+        if not query_chars:
+            return sorted(self.empty_keys, key=lambda key: self.entries[key][1])
+        
+        size = len(query_chars)
+        min_size = self.threshold * size - self._EPSILON
+        max_size = size / self.threshold + self._EPSILON if self.threshold > 0 else float("inf")
+        
+        candidate_keys = set()
+        for char in self._prefix(query_chars):
+            posting = self.postings.get(char)
+            if posting:
+                candidate_keys.update(posting)
+        
+        matched = []
+        for key in candidate_keys:
+            chars, seq, _ = self.entries[key]
+            # サイズフィルタ: |B| ∈ [t|A|, |A|/t]
+            if not min_size <= len(chars) <= max_size:
+                continue
+            intersection = len(query_chars & chars)
+            if intersection / (size + len(chars) - intersection) >= self.threshold:
+                matched.append((seq, key))
+        
+        matched.sort()
+        return [key for _, key in matched]
+    
+    def _allocate_seq(self) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+    
+    def _order_key(self, char: str):
+        rank = self.token_rank.get(char)
+        # 構築後に初出の文字は最も稀な文字として扱う（順序は固定）
+        return (0, 0, char) if rank is None else (1, rank, char)
+    
+    def _prefix(self, chars: frozenset) -> List[str]:
+        size = len(chars)
+        prefix_length = size - math.ceil(self.threshold * size - self._EPSILON) + 1
+        return sorted(chars, key=self._order_key)[:max(1, prefix_length)]
+    
+    def _insert(self, key: str, chars: frozenset, seq: int):
+        if not chars:
+            self.entries[key] = (chars, seq, [])
+            self.empty_keys.add(key)
+            return
+        prefix = self._prefix(chars)
+        self.entries[key] = (chars, seq, prefix)
+        for char in prefix:
+            self.postings[char].add(key)
+
+
 class ResponseCache:
     """応答パターンキャッシュシステム"""
     
@@ -27,6 +158,7 @@ class ResponseCache:
         
         # メモリキャッシュ
         self.memory_cache: Dict[str, Dict] = {}
+        self.similarity_index = CharacterJaccardIndex(self.similarity_threshold)
         self.cache_stats = {
             "hits": 0,
             "misses": 0,
@@ -65,11 +197,30 @@ class ResponseCache:
         
         # 期限切れキャッシュの削除
         self._cleanup_expired_cache()
+        
+        # 類似検索インデックス構築
+        self._rebuild_similarity_index()
+    
+    def _rebuild_similarity_index(self):
+        """類似検索インデックスをメモリキャッシュから再構築"""
+        self.similarity_index.threshold = self.similarity_threshold
+        self.similarity_index.build([
+            (key, cache_entry.get("original_input", ""))
+            for key, cache_entry in self.memory_cache.items()
+        ])
     
-    def _generate_cache_key(self, user_input: str) -> str:
-        """入力テキストからキャッシュキーを生成"""
+    def _ensure_similarity_index(self):
+        """閾値変更・外部からのキャッシュ操作を検出して再構築"""
+        if (self.similarity_index.threshold != self.similarity_threshold or
+                len(self.similarity_index) != len(self.memory_cache)):
+            self._rebuild_similarity_index()
+    
+    def _generate_cache_key(self, user_input: str, context_key: Optional[str] = None) -> str:
+        """入力テキスト（と応答が依存する文脈の指紋）からキャッシュキーを生成"""
         # 正規化（小文字化、空白削除）
         normalized = user_input.lower().strip()
+        if context_key:
+            normalized = f"{normalized}\x00{context_key}"
         
         # ハッシュ生成
         return hashlib.md5(normalized.encode('utf-8')).hexdigest()
@@ -88,11 +239,17 @@ class ResponseCache:
         
         return intersection / union if union > 0 else 0.0
     
-    def get_cached_response(self, user_input: str) -> Optional[str]:
-        """キャッシュから応答を取得"""
+    def get_cached_response(self, user_input: str, context_key: Optional[str] = None) -> Optional[str]:
+        """
+        キャッシュから応答を取得
+        
+        Args:
+            user_input: ユーザー入力
+            context_key: 応答が依存する文脈の指紋（一致するエントリのみヒット）
+        """
         self.cache_stats["total_requests"] += 1
         
-        cache_key = self._generate_cache_key(user_input)
+        cache_key = self._generate_cache_key(user_input, context_key)
         
         # 完全一致チェック
         if cache_key in self.memory_cache:
@@ -104,9 +261,13 @@ class ResponseCache:
                 print(f"✅ キャッシュヒット（完全一致）")
                 return cache_entry["response"]
         
-        # 類似度ベースの検索
-        for key, cache_entry in self.memory_cache.items():
-            if not self._is_cache_valid(cache_entry):
+        # 類似度ベースの検索（インデックスで絞り込み、挿入順に有効性を確認）
+        self._ensure_similarity_index()
+        for key in self.similarity_index.similar_keys(user_input):
+            cache_entry = self.memory_cache.get(key)
+            if cache_entry is None or not self._is_cache_valid(cache_entry):
+                continue
+            if cache_entry.get("context_key") != context_key:
                 continue
             
             similarity = self._calculate_similarity(user_input, cache_entry["original_input"])
@@ -122,12 +283,20 @@ class ResponseCache:
         print(f"❌ キャッシュミス")
         return None
     
-    def cache_response(self, user_input: str, response: str):
-        """応答をキャッシュに保存"""
-        cache_key = self._generate_cache_key(user_input)
+    def cache_response(self, user_input: str, response: str, context_key: Optional[str] = None):
+        """
+        応答をキャッシュに保存
+        
+        Args:
+            user_input: ユーザー入力
+            response: 応答テキスト
+            context_key: 応答生成時の文脈の指紋
+        """
+        cache_key = self._generate_cache_key(user_input, context_key)
         
         cache_entry = {
             "original_input": user_input,
+            "context_key": context_key,
             "response": response,
             "created_at": datetime.now().isoformat(),
             "last_used": datetime.now().isoformat(),
@@ -135,6 +304,7 @@ class ResponseCache:
         }
         
         self.memory_cache[cache_key] = cache_entry
+        self.similarity_index.add(cache_key, user_input)
         self.cache_stats["cache_size"] = len(self.memory_cache)
         
         # キャッシュサイズ制限
@@ -162,6 +332,7 @@ class ResponseCache:
         
         for key in expired_keys:
             del self.memory_cache[key]
+            self.similarity_index.remove(key)
         
         if expired_keys:
             print(f"🗑️ 期限切れキャッシュ削除: {len(expired_keys)}件")
@@ -180,6 +351,7 @@ class ResponseCache:
             if i < len(sorted_cache):
                 key = sorted_cache[i][0]
                 del self.memory_cache[key]
+                self.similarity_index.remove(key)
         
         print(f"🗑️ 古いキャッシュ削除: {remove_count}件")
     
@@ -211,6 +383,7 @@ class ResponseCache:
     def clear_cache(self):
         """キャッシュクリア"""
         self.memory_cache.clear()
+        self.similarity_index.clear()
         self.cache_stats = {
             "hits": 0,
             "misses": 0,
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ContextStageExecutor - 応答前コンテキスト収集の並列実行
+独立した収集段階をスレッドプールで同時に実行し、段階ごとの期限を超えたものは
+既定値に置き換えてプロンプトから外す（応答生成は止めない）
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ContextStage:
+    """コンテキスト収集段階の定義"""
+    name: str
+    func: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    default: Any = None           # 期限超過・エラー時に使う値
+    deadline: Optional[float] = None  # 秒（Noneは実行器の既定値）
+
+
+@dataclass
+class StageResult:
+    """段階の実行結果"""
+    name: str
+    value: Any
+    status: str                   # "ok", "timeout", "error", "busy"
+    latency: float                # 呼び出し側が待った時間（秒）
+    error: Optional[str] = None
+
+
+class ContextStageExecutor:
+    """コンテキスト収集段階の並列実行器"""
+
+    def __init__(self, max_workers: int = 6, default_deadline: float = 3.0,
+                 deadlines: Optional[Dict[str, float]] = None, history_size: int = 200):
+        """
+        初期化
+
+        Args:
+            max_workers: 同時実行数（0以下なら直列・期限なしで実行）
+            default_deadline: 段階の既定期限（秒）
+            deadlines: 段階名ごとの期限（秒）
+            history_size: 段階ごとに保持するレイテンシ件数
+        """
+        self.max_workers = max_workers
+        self.default_deadline = default_deadline
+        self.deadlines = dict(deadlines or {})
+        self._executor = None
+        if max_workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                thread_name_prefix="context_stage")
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = defaultdict(int)
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=history_size))
+        self._status_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _deadline_for(self, stage: ContextStage) -> float:
+        if stage.deadline is not None:
+            return stage.deadline
+        return self.deadlines.get(stage.name, self.default_deadline)
+
+    def _record(self, name: str, status: str, latency: Optional[float] = None):
+        with self._lock:
+            self._status_counts[name][status] += 1
+            if latency is not None:
+                self._latencies[name].append(latency)
+
+    def _invoke(self, stage: ContextStage):
+        """ワーカー上で段階を実行（期限超過後に完了した場合も実測値を記録）"""
+        start_time = time.perf_counter()
+        try:
+            return stage.func(*stage.args)
+        finally:
+            with self._lock:
+                self._running[stage.name] -= 1
+                self._latencies[stage.name].append(time.perf_counter() - start_time)
+
+    def run(self, stages: List[ContextStage]) -> Dict[str, StageResult]:
+        """
+        段階をまとめて実行
+
+        Args:
+            stages: 実行する段階のリスト
+
+        Returns:
+            Dict[str, StageResult]: 段階名ごとの結果（期限超過・エラー時は既定値）
+        """
+        if self._executor is None:
+            return self._run_inline(stages)
+
+        start_time = time.perf_counter()
+        futures = {}
+        results = {}
+
+        for stage in stages:
+            with self._lock:
+                # 前回の呼び出しがまだ終わっていない段階はワーカーを占有し続けないよう諦める
+                if self._running[stage.name] > 0:
+                    busy = True
+                else:
+                    busy = False
+                    self._running[stage.name] += 1
+            if busy:
+                results[stage.name] = StageResult(stage.name, stage.default, "busy", 0.0)
+                self._record(stage.name, "busy")
+                continue
+            futures[stage.name] = (stage, self._executor.submit(self._invoke, stage))
+
+        # 期限の短い順に待つ（全段階は開始時刻を共有しているので待ち時間は最長期限まで）
+        for name, (stage, future) in sorted(futures.items(), key=lambda item: self._deadline_for(item[1][0])):
+            remaining = self._deadline_for(stage) - (time.perf_counter() - start_time)
+            wait([future], timeout=max(0.0, remaining))
+            latency = time.perf_counter() - start_time
+
+            if not future.done():
+                results[name] = StageResult(name, stage.default, "timeout", latency)
+                with self._lock:
+                    self._status_counts[name]["timeout"] += 1
+                continue
+
+            error = future.exception()
+            if error is not None:
+                results[name] = StageResult(name, stage.default, "error", latency, str(error))
+                with self._lock:
+                    self._status_counts[name]["error"] += 1
+            else:
+                results[name] = StageResult(name, future.result(), "ok", latency)
+                with self._lock:
+                    self._status_counts[name]["ok"] += 1
+
+        return {stage.name: results[stage.name] for stage in stages}
+
+    def _run_inline(self, stages: List[ContextStage]) -> Dict[str, StageResult]:
+        """直列実行（並列化無効時・デバッグ用）"""
+        results = {}
+        for stage in stages:
+            start_time = time.perf_counter()
+            try:
+                value = stage.func(*stage.args)
+                status, error = "ok", None
+            except Exception as e:
+                value, status, error = stage.default, "error", str(e)
+            latency = time.perf_counter() - start_time
+            results[stage.name] = StageResult(stage.name, value, status, latency, error)
+            self._record(stage.name, status, latency)
+        return results
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        段階別レイテンシ統計
+
+        Returns:
+            Dict: 段階名 → {"count", "p50_ms", "p95_ms", "max_ms", "statuses"}
+        """
+        stats = {}
+        with self._lock:
+            names = set(self._latencies) | set(self._status_counts)
+            for name in sorted(names):
+                samples = sorted(self._latencies.get(name, ()))
+                entry = {
+                    "count": len(samples),
+                    "p50_ms": 0.0,
+                    "p95_ms": 0.0,
+                    "max_ms": 0.0,
+                    "statuses": dict(self._status_counts.get(name, {}))
+                }
+                if samples:
+                    entry["p50_ms"] = samples[int(0.50 * (len(samples) - 1))] * 1000
+                    entry["p95_ms"] = samples[int(0.95 * (len(samples) - 1))] * 1000
+                    entry["max_ms"] = samples[-1] * 1000
+                stats[name] = entry
+        return stats
+
+    @staticmethod
+    def format_report(results: Dict[str, StageResult]) -> str:
+        """1リクエスト分の段階結果を1行に整形"""
+        parts = []
+        for name, result in results.items():
+            mark = "" if result.status == "ok" else f"({result.status})"
+            parts.append(f"{name} {result.latency * 1000:.0f}ms{mark}")
+        return ", ".join(parts)
+
+    def shutdown(self, wait_for_running: bool = False):
+        """スレッドプールを停止"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait_for_running)
+            self._executor = None
@@ -23,6 +23,8 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from core.knowledge_db_snapshot import get_knowledge_db_provider
+
 # Windowsパス設定
 if os.name == 'nt':
     DATA_DIR = Path("D:/setsuna_bot/data")
@@ -551,14 +553,12 @@ class DataConsistencyChecker:
         
         try:
             knowledge_db_path = YOUTUBE_DATA_DIR / "unified_knowledge_db.json"
-            if knowledge_db_path.exists():
-                with open(knowledge_db_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    if "videos" in data:
-                        for video in data["videos"]:
-                            if "video_id" in video:
-                                video_ids.add(video["video_id"])
+            data = get_knowledge_db_provider().get_data(knowledge_db_path)
+            if data is not None:
+                if "videos" in data:
+                    for video in data["videos"]:
+                        if "video_id" in video:
+                            video_ids.add(video["video_id"])
         
         except Exception as e:
             print(f"[整合性チェック] 動画ID抽出エラー: {e}")
@@ -619,22 +619,20 @@ class DataConsistencyChecker:
         
         try:
             knowledge_db_path = YOUTUBE_DATA_DIR / "unified_knowledge_db.json"
-            if knowledge_db_path.exists():
-                with open(knowledge_db_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+            data = get_knowledge_db_provider().get_data(knowledge_db_path)
+            if data is not None:
+                if "videos" in data:
+                    videos_by_title = defaultdict(list)
+                    
+                    for video in data["videos"]:
+                        title = video.get("title", "").strip().lower()
+                        if title:
+                            videos_by_title[title].append(video.get("video_id", "unknown"))
                     
-                    if "videos" in data:
-                        videos_by_title = defaultdict(list)
-                        
-                        for video in data["videos"]:
-                            title = video.get("title", "").strip().lower()
-                            if title:
-                                videos_by_title[title].append(video.get("video_id", "unknown"))
-                        
-                        # 重複グループを検出
-                        for title, video_ids in videos_by_title.items():
-                            if len(video_ids) > 1:
-                                duplicates.append(video_ids)
+                    # 重複グループを検出
+                    for title, video_ids in videos_by_title.items():
+                        if len(video_ids) > 1:
+                            duplicates.append(video_ids)
         
         except Exception as e:
             print(f"[整合性チェック] 重複検出エラー: {e}")
@@ -83,9 +83,14 @@ class KnowledgeEntity:
 class KnowledgeDatabase:
     """知識データベースメインクラス"""
     
-    def __init__(self):
-        """初期化"""
-        self.knowledge_dir = DATA_DIR / "knowledge_graph"
+    def __init__(self, data_dir: Optional[Path] = None):
+        """
+        初期化
+        
+        Args:
+            data_dir: データ保存先（省略時は DATA_DIR）
+        """
+        self.knowledge_dir = Path(data_dir or DATA_DIR) / "knowledge_graph"
         self.knowledge_dir.mkdir(parents=True, exist_ok=True)
         
         # データファイル
@@ -102,6 +107,14 @@ class KnowledgeDatabase:
         self.relationships: List[Dict] = []
         self.categories: Dict[str, List[str]] = defaultdict(list)
         
+        # グラフ索引（読み込み時に構築し、store_entity / store_relationship で更新）
+        self._entity_name_index: Dict[str, str] = {}  # 小文字化した名前・別名 -> entity_id
+        self._adjacency: Dict[str, List[Dict]] = defaultdict(list)  # entity_id -> 接続する関係性（保存順）
+        self._relationship_index: Dict[Tuple[str, str, str], Dict] = {}  # (source, target, type) -> 関係性
+        
+        # FTS5全文検索（SQLiteがtrigramトークナイザーに対応している場合のみ有効）
+        self.fts_enabled = False
+        
         # 設定
         self.config = {
             "max_knowledge_items": 10000,
@@ -174,6 +187,29 @@ class KnowledgeDatabase:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_entity_type ON entities(type)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_relationship_source ON relationships(source_entity)")
             
+            # カテゴリ絞り込み用テーブル（知識アイテム × カテゴリ）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS knowledge_item_categories (
+                    item_id TEXT,
+                    category TEXT,
+                    PRIMARY KEY (item_id, category)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_item_category ON knowledge_item_categories(category)")
+            
+            # キーワード・エンティティ照合用テーブル（小文字化済み・要素ごとに1行）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS knowledge_item_terms (
+                    item_id TEXT,
+                    kind TEXT,
+                    position INTEGER,
+                    term TEXT,
+                    PRIMARY KEY (item_id, kind, position)
+                )
+            """)
+            
+            self._initialize_fts_index(cursor)
+            
             conn.commit()
             conn.close()
             
@@ -182,6 +218,71 @@ class KnowledgeDatabase:
         except Exception as e:
             print(f"[知識DB] ❌ データベース初期化失敗: {e}")
     
+    def _initialize_fts_index(self, cursor):
+        """
+        知識アイテムの全文検索インデックス（FTS5）を初期化
+        
+        knowledge_items と同じ rowid で小文字化済みの本文・キーワード・エンティティを保持し、
+        trigram トークナイザーで部分一致検索を行う。既存DBには初回のみ一括登録する
+        """
+        self.fts_enabled = False
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'knowledge_fts'")
+            exists = cursor.fetchone() is not None
+            
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts USING fts5(
+                    content, keywords, entities,
+                    tokenize = 'trigram case_sensitive 1'
+                )
+            """)
+            
+            if not exists:
+                cursor.execute("""
+                    SELECT rowid, item_id, content, categories, keywords, entities FROM knowledge_items
+                """)
+                rows = cursor.fetchall()
+                self.fts_enabled = True
+                for rowid, item_id, content, categories, keywords, entities in rows:
+                    self._index_knowledge_row(cursor, rowid, item_id, content,
+                                              json.loads(categories or "[]"),
+                                              json.loads(keywords or "[]"),
+                                              json.loads(entities or "[]"))
+                if rows:
+                    print(f"[知識DB] 🔎 全文検索インデックス構築: {len(rows)}件")
+            
+            self.fts_enabled = True
+            
+        except sqlite3.OperationalError as e:
+            print(f"[知識DB] ⚠️ FTS5全文検索が利用できません（メモリ内検索を使用）: {e}")
+            self.fts_enabled = False
+    
+    def _index_knowledge_row(self, cursor, rowid: int, item_id: str, content: str,
+                             categories: List[str], keywords: List[str], entities: List[str]):
+        """
+        知識アイテム1件分の検索用行（カテゴリ・キーワード/エンティティ・FTS）を登録
+        
+        小文字化は検索時の query.lower() と同じく Python 側で行う
+        """
+        cursor.execute("DELETE FROM knowledge_item_categories WHERE item_id = ?", (item_id,))
+        cursor.execute("DELETE FROM knowledge_item_terms WHERE item_id = ?", (item_id,))
+        cursor.executemany(
+            "INSERT OR IGNORE INTO knowledge_item_categories (item_id, category) VALUES (?, ?)",
+            [(item_id, category) for category in categories]
+        )
+        cursor.executemany(
+            "INSERT INTO knowledge_item_terms (item_id, kind, position, term) VALUES (?, ?, ?, ?)",
+            [(item_id, "keyword", i, keyword.lower()) for i, keyword in enumerate(keywords)] +
+            [(item_id, "entity", i, entity.lower()) for i, entity in enumerate(entities)]
+        )
+        if self.fts_enabled:
+            cursor.execute(
+                "INSERT INTO knowledge_fts (rowid, content, keywords, entities) VALUES (?, ?, ?, ?)",
+                (rowid, content.lower(),
+                 "\n".join(keyword.lower() for keyword in keywords),
+                 "\n".join(entity.lower() for entity in entities))
+            )
+    
     def _load_existing_data(self):
         """既存データの読み込み"""
         try:
@@ -213,6 +314,38 @@ class KnowledgeDatabase:
             
         except Exception as e:
             print(f"[知識DB] ⚠️ 既存データ読み込み失敗: {e}")
+        
+        self._build_graph_indexes()
+    
+    def _build_graph_indexes(self):
+        """エンティティ名・別名の索引と関係性の隣接リストを全件から構築"""
+        self._entity_name_index = {}
+        self._adjacency = defaultdict(list)
+        self._relationship_index = {}
+        
+        for entity in self.entities.values():
+            self._index_entity_names(entity)
+        for relationship in self.relationships:
+            self._index_relationship(relationship)
+    
+    def _index_entity_names(self, entity: KnowledgeEntity):
+        """エンティティの名前・別名を索引に登録（同名は先に登録されたエンティティを優先）"""
+        self._entity_name_index.setdefault(entity.name.lower(), entity.entity_id)
+        for alias in entity.aliases:
+            self._entity_name_index.setdefault(alias.lower(), entity.entity_id)
+    
+    def _index_relationship(self, relationship: Dict):
+        """関係性を隣接リストと重複判定用の索引に登録"""
+        source = relationship["source_entity"]
+        target = relationship["target_entity"]
+        self._relationship_index.setdefault((source, target, relationship["relationship_type"]), relationship)
+        self._adjacency[source].append(relationship)
+        if target != source:
+            self._adjacency[target].append(relationship)
+    
+    def _find_entity_id(self, name: str) -> Optional[str]:
+        """名前または別名（大文字小文字無視）からエンティティIDを取得"""
+        return self._entity_name_index.get(name.lower())
     
     def store_knowledge_item(self, 
                            session_id: str,
@@ -288,6 +421,13 @@ class KnowledgeDatabase:
             conn = sqlite3.connect(self.db_file)
             cursor = conn.cursor()
             
+            # 置き換え前の行をFTS・カテゴリ表から外す（INSERT OR REPLACE で rowid が変わるため）
+            if self.fts_enabled:
+                cursor.execute("SELECT rowid FROM knowledge_items WHERE item_id = ?", (item.item_id,))
+                previous = cursor.fetchone()
+                if previous is not None:
+                    cursor.execute("DELETE FROM knowledge_fts WHERE rowid = ?", previous)
+            
             cursor.execute("""
                 INSERT OR REPLACE INTO knowledge_items 
                 (item_id, session_id, layer, content, categories, keywords, entities,
@@ -307,6 +447,9 @@ class KnowledgeDatabase:
                 item.updated_at.isoformat()
             ))
             
+            self._index_knowledge_row(cursor, cursor.lastrowid, item.item_id, item.content,
+                                      item.categories, item.keywords, item.entities)
+            
             conn.commit()
             conn.close()
             
@@ -338,11 +481,7 @@ class KnowledgeDatabase:
         """
         try:
             # 既存エンティティチェック
-            entity_id = None
-            for eid, entity in self.entities.items():
-                if entity.name.lower() == name.lower() or name.lower() in [alias.lower() for alias in entity.aliases]:
-                    entity_id = eid
-                    break
+            entity_id = self._find_entity_id(name)
             
             if entity_id:
                 # 既存エンティティ更新
@@ -373,6 +512,7 @@ class KnowledgeDatabase:
                 )
                 
                 self.entities[entity_id] = entity
+                self._index_entity_names(entity)
                 print(f"[知識DB] ✨ 新規エンティティ: {name}")
             
             # SQLite保存
@@ -438,13 +578,7 @@ class KnowledgeDatabase:
             relationship_id = f"rel_{source_entity}_{target_entity}_{relationship_type}"
             
             # 既存関係性チェック
-            existing_rel = None
-            for rel in self.relationships:
-                if (rel["source_entity"] == source_entity and 
-                    rel["target_entity"] == target_entity and
-                    rel["relationship_type"] == relationship_type):
-                    existing_rel = rel
-                    break
+            existing_rel = self._relationship_index.get((source_entity, target_entity, relationship_type))
             
             if existing_rel:
                 # 既存関係性強化
@@ -468,6 +602,7 @@ class KnowledgeDatabase:
                 }
                 
                 self.relationships.append(relationship)
+                self._index_relationship(relationship)
                 print(f"[知識DB] ✨ 新規関係性: {source_entity} -{relationship_type}-> {target_entity}")
             
             # SQLite保存
@@ -523,86 +658,241 @@ class KnowledgeDatabase:
             results = []
             query_lower = query.lower()
             
-            for item_id, item in self.knowledge_items.items():
-                # 層フィルタ
-                if layer and item.layer != layer:
-                    continue
-                
-                # 重要度フィルタ
-                if item.importance_score < min_importance:
-                    continue
-                
-                # カテゴリフィルタ
-                if categories and not any(cat in item.categories for cat in categories):
-                    continue
-                
-                # テキスト検索
-                relevance_score = 0.0
-                
-                # コンテンツ内検索
-                if query_lower in item.content.lower():
-                    relevance_score += 0.8
-                
-                # キーワード検索
-                for keyword in item.keywords:
-                    if query_lower in keyword.lower():
-                        relevance_score += 0.6
-                
-                # エンティティ検索
-                for entity in item.entities:
-                    if query_lower in entity.lower():
-                        relevance_score += 0.7
-                
-                if relevance_score > 0:
-                    results.append({
-                        "item": asdict(item),
-                        "relevance_score": relevance_score,
-                        "combined_score": relevance_score * item.importance_score
-                    })
-            
-            # スコア順でソート
+            if self.fts_enabled:
+                # SQL側で絞り込みと一致数の集計を行い、上位分だけアイテムを復元
+                for rowid, item_id, importance_score, content_hit, keyword_hits, entity_hits in \
+                        self._query_knowledge_matches(query_lower, layer, categories, min_importance):
+                    relevance_score = self._relevance_from_hits(content_hit, keyword_hits, entity_hits)
+                    if relevance_score > 0:
+                        results.append({
+                            "item": (rowid, item_id),
+                            "relevance_score": relevance_score,
+                            "combined_score": relevance_score * importance_score
+                        })
+            else:
+                for item in self._filter_knowledge_items_in_memory(layer, categories, min_importance):
+                    relevance_score = self._calculate_knowledge_relevance(item, query_lower)
+                    if relevance_score > 0:
+                        results.append({
+                            "item": item,
+                            "relevance_score": relevance_score,
+                            "combined_score": relevance_score * item.importance_score
+                        })
+            
+            # スコア順でソート（辞書化は返却する上位分のみ）
             results.sort(key=lambda x: x["combined_score"], reverse=True)
+            results = results[:limit]
+            if self.fts_enabled:
+                items = self._load_knowledge_items([result["item"] for result in results])
+                for result, item in zip(results, items):
+                    result["item"] = item
+            for result in results:
+                result["item"] = asdict(result["item"])
             
-            print(f"[知識DB] 🔍 検索結果: {len(results[:limit])}件 (クエリ: {query})")
-            return results[:limit]
+            print(f"[知識DB] 🔍 検索結果: {len(results)}件 (クエリ: {query})")
+            return results
             
         except Exception as e:
             print(f"[知識DB] ❌ 知識検索失敗: {e}")
             return []
     
-    def get_entity_knowledge_graph(self, entity_name: str, depth: int = 2) -> Dict:
+    @staticmethod
+    def _relevance_from_hits(content_hit: bool, keyword_hits: int, entity_hits: int) -> float:
+        """一致状況から関連度を計算（本文 0.8 / キーワード1件ごと 0.6 / エンティティ1件ごと 0.7）"""
+        relevance_score = 0.0
+        
+        # コンテンツ内検索
+        if content_hit:
+            relevance_score += 0.8
+        
+        # キーワード検索
+        for _ in range(keyword_hits):
+            relevance_score += 0.6
+        
+        # エンティティ検索
+        for _ in range(entity_hits):
+            relevance_score += 0.7
+        
+        return relevance_score
+    
+    def _calculate_knowledge_relevance(self, item: KnowledgeItem, query_lower: str) -> float:
+        """知識アイテムとクエリ（小文字化済み）の関連度を計算"""
+        return self._relevance_from_hits(
+            query_lower in item.content.lower(),
+            sum(1 for keyword in item.keywords if query_lower in keyword.lower()),
+            sum(1 for entity in item.entities if query_lower in entity.lower())
+        )
+    
+    def _filter_knowledge_items_in_memory(self, layer: Optional[str], categories: List[str],
+                                          min_importance: float) -> List[KnowledgeItem]:
+        """メモリ内の知識アイテムを層・カテゴリ・重要度で絞り込み（FTS5非対応時）"""
+        candidates = []
+        for item in self.knowledge_items.values():
+            # 層フィルタ
+            if layer and item.layer != layer:
+                continue
+            
+            # 重要度フィルタ
+            if item.importance_score < min_importance:
+                continue
+            
+            # カテゴリフィルタ
+            if categories and not any(cat in item.categories for cat in categories):
+                continue
+            
+            candidates.append(item)
+        return candidates
+    
+    def _query_knowledge_matches(self, query_lower: str, layer: Optional[str],
+                                 categories: List[str], min_importance: float) -> List[Tuple]:
+        """
+        SQLiteで層・カテゴリ・重要度の絞り込みとテキスト照合を行い、アイテムごとの一致数を取得
+        
+        Returns:
+            (rowid, item_id, importance_score, 本文一致, キーワード一致数, エンティティ一致数) のリスト（保存順）
+        """
+        conditions = ["k.importance_score >= :min_importance"]
+        params: Dict[str, Any] = {"min_importance": min_importance, "query": query_lower}
+        
+        if layer:
+            conditions.append("k.layer = :layer")
+            params["layer"] = layer
+        
+        if categories:
+            names = [f":category_{i}" for i in range(len(categories))]
+            conditions.append(f"""EXISTS (
+                SELECT 1 FROM knowledge_item_categories c
+                WHERE c.item_id = k.item_id AND c.category IN ({", ".join(names)}))""")
+            params.update({name[1:]: category for name, category in zip(names, categories)})
+        
+        if len(query_lower) >= 3:
+            # trigram: 3文字以上は本文・キーワード・エンティティを連結した上での部分一致で候補を絞る
+            conditions.append("k.rowid IN (SELECT rowid FROM knowledge_fts WHERE knowledge_fts MATCH :match)")
+            params["match"] = '"' + query_lower.replace('"', '""') + '"'
+        elif query_lower:
+            # 1〜2文字はtrigramで引けないためFTS表を直接照合
+            conditions.append("""(instr(f.content, :query) > 0 OR instr(f.keywords, :query) > 0
+                OR instr(f.entities, :query) > 0)""")
+        
+        conn = sqlite3.connect(self.db_file)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT k.rowid, k.item_id, k.importance_score,
+                       instr(f.content, :query) > 0,
+                       (SELECT count(*) FROM knowledge_item_terms t
+                        WHERE t.item_id = k.item_id AND t.kind = 'keyword' AND instr(t.term, :query) > 0),
+                       (SELECT count(*) FROM knowledge_item_terms t
+                        WHERE t.item_id = k.item_id AND t.kind = 'entity' AND instr(t.term, :query) > 0)
+                FROM knowledge_items k
+                JOIN knowledge_fts f ON f.rowid = k.rowid
+                WHERE {" AND ".join(conditions)}
+                ORDER BY k.rowid
+            """, params)
+            return cursor.fetchall()
+        finally:
+            conn.close()
+    
+    def _load_knowledge_items(self, keys: List[Tuple[int, str]]) -> List[KnowledgeItem]:
+        """
+        (rowid, item_id) の順に知識アイテムを取得
+        
+        今回のセッションで保存したアイテムはメモリ内の完全なオブジェクトを使い、
+        それ以外（過去セッション分）だけをSQLiteの行から復元する
+        """
+        missing = [rowid for rowid, item_id in keys if item_id not in self.knowledge_items]
+        hydrated = {}
+        if missing:
+            conn = sqlite3.connect(self.db_file)
+            try:
+                cursor = conn.cursor()
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    cursor.execute(f"""
+                        SELECT rowid, item_id, session_id, layer, content, categories, keywords, entities,
+                               reliability_score, importance_score, created_at, updated_at
+                        FROM knowledge_items WHERE rowid IN ({", ".join("?" for _ in chunk)})
+                    """, chunk)
+                    for row in cursor.fetchall():
+                        hydrated[row[0]] = self._knowledge_item_from_row(row[1:])
+            finally:
+                conn.close()
+        
+        return [self.knowledge_items.get(item_id) or hydrated[rowid] for rowid, item_id in keys]
+    
+    @staticmethod
+    def _knowledge_item_from_row(row: Tuple) -> KnowledgeItem:
+        """SQLiteの行から知識アイテムを復元"""
+        (item_id, session_id, layer, content, categories, keywords, entities,
+         reliability_score, importance_score, created_at, updated_at) = row
+        return KnowledgeItem(
+            item_id=item_id,
+            session_id=session_id,
+            layer=layer,
+            content=content,
+            reliability_score=reliability_score,
+            importance_score=importance_score,
+            categories=json.loads(categories or "[]"),
+            keywords=json.loads(keywords or "[]"),
+            entities=json.loads(entities or "[]"),
+            created_at=datetime.fromisoformat(created_at) if created_at else None,
+            updated_at=datetime.fromisoformat(updated_at) if updated_at else None
+        )
+    
+    def get_entity_knowledge_graph(self, entity_name: str, depth: int = 2, max_nodes: int = 200) -> Dict:
         """
         エンティティ中心の知識グラフ取得
         
+        中心エンティティから関係性を幅優先でたどり、depth ホップ以内の関係性を集める。
+        処理量は近傍の大きさに比例し、エンティティ数が max_nodes に達した時点で打ち切る
+        
         Args:
             entity_name: エンティティ名
-            depth: 関係性の深度
+            depth: 関係性の深度（ホップ数）
+            max_nodes: 収集するエンティティ数の上限
             
         Returns:
             知識グラフデータ
         """
         try:
             # エンティティ検索
-            target_entity = None
-            for entity in self.entities.values():
-                if (entity.name.lower() == entity_name.lower() or 
-                    entity_name.lower() in [alias.lower() for alias in entity.aliases]):
-                    target_entity = entity
-                    break
+            target_id = self._find_entity_id(entity_name)
+            target_entity = self.entities.get(target_id) if target_id else None
             
             if not target_entity:
                 return {"error": f"エンティティ未発見: {entity_name}"}
             
-            # 関係性抽出
-            connected_entities = set()
+            # 関係性抽出（幅優先探索）
+            hops = {target_entity.entity_id: 0}
+            frontier = [target_entity.entity_id]
+            connected_entities = {}  # entity_id -> None（発見順を保持）
             relationships = []
-            
-            for rel in self.relationships:
-                if (rel["source_entity"] == target_entity.entity_id or 
-                    rel["target_entity"] == target_entity.entity_id):
-                    relationships.append(rel)
-                    connected_entities.add(rel["source_entity"])
-                    connected_entities.add(rel["target_entity"])
+            seen_relationships = set()
+            truncated = False
+            
+            for hop in range(1, max(depth, 0) + 1):
+                next_frontier = []
+                for entity_id in frontier:
+                    for rel in self._adjacency.get(entity_id, ()):
+                        if id(rel) in seen_relationships:
+                            continue
+                        
+                        neighbor = rel["target_entity"] if rel["source_entity"] == entity_id else rel["source_entity"]
+                        if neighbor not in hops:
+                            if len(hops) >= max_nodes:
+                                truncated = True
+                                continue
+                            hops[neighbor] = hop
+                            next_frontier.append(neighbor)
+                        
+                        seen_relationships.add(id(rel))
+                        relationships.append(rel)
+                        connected_entities.setdefault(rel["source_entity"])
+                        connected_entities.setdefault(rel["target_entity"])
+                
+                frontier = next_frontier
+                if not frontier:
+                    break
             
             # 関連エンティティ情報
             entities_info = {}
@@ -615,10 +905,13 @@ class KnowledgeDatabase:
                 "connected_entities": entities_info,
                 "relationships": relationships,
                 "total_connections": len(relationships),
-                "entity_count": len(connected_entities)
+                "entity_count": len(connected_entities),
+                "entity_hops": {entity_id: hops[entity_id] for entity_id in connected_entities},
+                "depth": depth,
+                "truncated": truncated
             }
             
-            print(f"[知識DB] 🕸️ 知識グラフ生成: {entity_name} ({len(relationships)}関係)")
+            print(f"[知識DB] 🕸️ 知識グラフ生成: {entity_name} ({len(relationships)}関係, 深度{depth})")
             return knowledge_graph
             
         except Exception as e:
@@ -772,6 +1065,9 @@ class KnowledgeDatabase:
                 del self.knowledge_items[item_id]
                 removed_count += 1
             
+            # SQLite側（検索対象）からも同じ条件で削除
+            removed_count += self._delete_old_knowledge_items_from_db(cutoff_date, set(items_to_remove))
+            
             print(f"[知識DB] 🗑️ クリーンアップ完了: {removed_count}件削除")
             return removed_count
             
@@ -779,6 +1075,37 @@ class KnowledgeDatabase:
             print(f"[知識DB] ❌ クリーンアップ失敗: {e}")
             return 0
     
+    def _delete_old_knowledge_items_from_db(self, cutoff_date: datetime, already_removed: set) -> int:
+        """
+        古い低重要度の知識アイテムをSQLite（本体・FTS・カテゴリ表）から削除
+        
+        Returns:
+            メモリ内に無かった削除件数
+        """
+        try:
+            conn = sqlite3.connect(self.db_file)
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT rowid, item_id FROM knowledge_items
+                WHERE created_at < ? AND importance_score < 0.3
+            """, (cutoff_date.isoformat(),))
+            rows = cursor.fetchall()
+            
+            if self.fts_enabled:
+                cursor.executemany("DELETE FROM knowledge_fts WHERE rowid = ?", [(rowid,) for rowid, _ in rows])
+            cursor.executemany("DELETE FROM knowledge_item_categories WHERE item_id = ?", [(item_id,) for _, item_id in rows])
+            cursor.executemany("DELETE FROM knowledge_item_terms WHERE item_id = ?", [(item_id,) for _, item_id in rows])
+            cursor.executemany("DELETE FROM knowledge_items WHERE rowid = ?", [(rowid,) for rowid, _ in rows])
+            
+            conn.commit()
+            conn.close()
+            
+            return sum(1 for _, item_id in rows if item_id not in already_removed)
+            
+        except Exception as e:
+            print(f"[知識DB] ⚠️ SQLiteクリーンアップ失敗: {e}")
+            return 0
+    
     def get_database_statistics(self) -> Dict:
         """データベース統計情報"""
         return {
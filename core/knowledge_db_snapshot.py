@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KnowledgeDBSnapshotProvider - 知識DB(JSON)のプロセス共有スナップショット
+unified_knowledge_db.json を1回だけ解析し、mtime/サイズ/SHA1で鮮度を判定した
+読み取り専用の共有データを各モジュールへ配布する（再ロード時は購読者へ通知）
+
+youtube_knowledge_system の UnifiedStorage は保存のたびに変更分だけを
+unified_knowledge_db.journal.jsonl へ追記するため、読み込み時はスナップショットに
+ジャーナルを再適用した内容を返す（鮮度判定・指紋もジャーナルを含む）。
+共有データを変更して保存する書き込み側は load_knowledge_db で独立した複製を取得し、
+save_knowledge_db で変更した動画・プレイリストだけを同じジャーナルへ追記する。
+スナップショットの書き直しと journal_generation の更新（ジャーナルの圧縮）は UnifiedStorage だけが行う。
+
+共有データの最上位は types.MappingProxyType で書き込みを拒否する。その下の
+"videos" などの辞書・リストは解析結果をそのまま共有するため、読み取り側は
+変更してはならない（変更が必要なら copy.deepcopy した複製に対して行う）
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import types
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+# せつなBot側の書き込みが追記したジャーナル行の印（UnifiedStorage は圧縮前にこの行を取り込む）
+JOURNAL_SOURCE = "setsuna_bot"
+
+# ジャーナルで表せない（スナップショットに直接保存する）最上位の項目を判定するための既知の項目
+_DATABASE_KEYS = frozenset({
+    'videos', 'playlists', 'creator_index', 'tag_index', 'theme_index', 'last_updated',
+    'total_videos', 'total_playlists', 'database_version', 'journal_generation'
+})
+
+
+def journal_path_for(path: Union[str, Path]) -> Path:
+    """知識DBファイルに対応するUnifiedStorageのジャーナルファイルのパス"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.journal.jsonl")
+
+
+def stat_signature(path: Union[str, Path]) -> Optional[Tuple[int, int, int, int]]:
+    """
+    知識DBファイルとジャーナルの (mtime_ns, size, journal_mtime_ns, journal_size)
+
+    Returns:
+        知識DBファイルが存在しない場合はNone（ジャーナルが無い場合はその項目を0とする）
+    """
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    try:
+        journal_stat = journal_path_for(path).stat()
+        journal_mtime_ns, journal_size = journal_stat.st_mtime_ns, journal_stat.st_size
+    except FileNotFoundError:
+        journal_mtime_ns, journal_size = 0, 0
+    return stat.st_mtime_ns, stat.st_size, journal_mtime_ns, journal_size
+
+
+def _read_files(path: Union[str, Path]) -> Optional[Tuple[bytes, bytes, Tuple[int, int, int, int], str]]:
+    """知識DBファイル・ジャーナル（完結した行のみ）の内容・stat・指紋を読み込み"""
+    signature = stat_signature(path)
+    if signature is None:
+        return None
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        with open(journal_path_for(path), 'rb') as f:
+            journal_raw = f.read()
+    except FileNotFoundError:
+        journal_raw = b""
+    # 書き込み途中の末尾行は含めない
+    journal_raw = journal_raw[:journal_raw.rfind(b"\n") + 1]
+
+    fingerprint = hashlib.sha1(raw)
+    fingerprint.update(journal_raw)
+    return raw, journal_raw, signature, fingerprint.hexdigest()
+
+
+def _parse(raw: bytes, journal_raw: bytes) -> Dict[str, Any]:
+    """スナップショットを解析し、未圧縮のジャーナルを再適用"""
+    data = json.loads(raw.decode('utf-8'))
+    replay_journal(data, journal_raw)
+    return data
+
+
+def replay_journal(data: Dict[str, Any], journal_raw: bytes) -> int:
+    """
+    UnifiedStorageのジャーナルを辞書形式の知識DBへ再適用
+
+    スナップショットの journal_generation より古い行は圧縮済みなので読み飛ばす。
+    journal_generation は変更しない（進めるのはジャーナルを圧縮する UnifiedStorage のみで、
+    ここで進めると稼働中の UnifiedStorage が以降に追記する行が読み飛ばされる）
+
+    Args:
+        data: unified_knowledge_db.json を解析した辞書（その場で更新）
+        journal_raw: ジャーナルファイルの内容
+
+    Returns:
+        int: 適用した変更件数
+    """
+    generation = data.get('journal_generation', 0)
+    videos = data.setdefault('videos', {})
+    playlists = data.setdefault('playlists', {})
+
+    applied = 0
+    for line in journal_raw.splitlines():
+        try:
+            entry = json.loads(line.decode('utf-8'))
+        except ValueError:
+            break
+        if entry.get('generation', 0) < generation:
+            continue
+
+        op = entry.get('op')
+        if op == 'put_video':
+            videos[entry['id']] = entry['data']
+        elif op == 'delete_video':
+            videos.pop(entry['id'], None)
+        elif op == 'put_playlist':
+            playlists[entry['id']] = entry['data']
+        else:
+            continue
+        applied += 1
+
+    if applied:
+        data['total_videos'] = len(videos)
+        data['total_playlists'] = len(playlists)
+    return applied
+
+
+def load_knowledge_db(path: Union[str, Path]) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    共有スナップショットとは独立した変更可能な知識DBを読み込み（書き込み側用）
+
+    Args:
+        path: 知識DBファイルのパス
+
+    Returns:
+        (ジャーナル適用済みの辞書, 内容の指紋)。ファイルが存在しない場合はNone
+
+    Raises:
+        OSError, ValueError: 読み込み・JSON解析に失敗した場合
+    """
+    files = _read_files(path)
+    if files is None:
+        return None
+    raw, journal_raw, _, fingerprint = files
+    return _parse(raw, journal_raw), fingerprint
+
+
+def _record_fingerprint(record: Any) -> str:
+    return hashlib.sha1(json.dumps(record, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def record_fingerprints(data: Mapping[str, Any]) -> Dict[Tuple[str, str], str]:
+    """
+    動画・プレイリストごとの内容の指紋（save_knowledge_db で変更を検出する基準）
+
+    Args:
+        data: load_knowledge_db で読み込んだ辞書
+
+    Returns:
+        {("video"|"playlist", id): 指紋}
+    """
+    fingerprints = {}
+    for kind, key in (("video", 'videos'), ("playlist", 'playlists')):
+        for item_id, record in data.get(key, {}).items():
+            fingerprints[(kind, item_id)] = _record_fingerprint(record)
+    return fingerprints
+
+
+def _write_json(path: Path, data: Mapping[str, Any]):
+    """一時ファイル経由でJSONを書き出して置き換え"""
+    temp_file = path.with_name(path.name + ".tmp")
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, path)
+
+
+def save_knowledge_db(path: Union[str, Path], data: Mapping[str, Any],
+                      base: Dict[Tuple[str, str], str]) -> Dict[Tuple[str, str], str]:
+    """
+    書き込み側の保存: 読み込み時から変わった動画・プレイリストをジャーナルへ追記
+
+    スナップショット自体は書き直さないため、UnifiedStorage が同じジャーナルへ追記した変更
+    （読み込み後のGUIでの分析結果など）も失われず、同じ動画への変更は追記順に後勝ちとなる。
+    ジャーナルで表せない最上位の項目（entities など）が変わった場合のみ、
+    スナップショットのその項目を世代を変えずに書き換える。知識DBファイルが無い場合は全体を書き出す
+
+    Args:
+        path: 知識DBファイルのパス
+        data: 保存する辞書（load_knowledge_db で読み込んで変更したもの）
+        base: 読み込み時（前回保存時）の record_fingerprints
+
+    Returns:
+        次回の保存で使う record_fingerprints
+
+    Raises:
+        OSError, ValueError: 読み込み・書き込みに失敗した場合
+    """
+    path = Path(path)
+    current = record_fingerprints(data)
+    if not path.exists():
+        _write_json(path, data)
+        return current
+
+    with open(path, 'rb') as f:
+        snapshot = json.loads(f.read().decode('utf-8'))
+    generation = snapshot.get('journal_generation', 0)
+
+    lines = []
+    for (kind, item_id), fingerprint in current.items():
+        if base.get((kind, item_id)) != fingerprint:
+            record = data['videos' if kind == "video" else 'playlists'][item_id]
+            lines.append({'generation': generation, 'id': item_id, 'op': f"put_{kind}",
+                          'data': record, 'source': JOURNAL_SOURCE})
+    for kind, item_id in base.keys() - current.keys():
+        if kind == "video":
+            lines.append({'generation': generation, 'id': item_id, 'op': "delete_video",
+                          'source': JOURNAL_SOURCE})
+
+    if lines:
+        with open(journal_path_for(path), 'ab') as f:
+            f.write("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    extras = {key: value for key, value in data.items() if key not in _DATABASE_KEYS}
+    if any(snapshot.get(key) != value for key, value in extras.items()):
+        snapshot.update(extras)
+        _write_json(path, snapshot)
+    return current
+
+
+@dataclass(frozen=True)
+class KnowledgeDBSnapshot:
+    """解析済み知識DBのスナップショット"""
+    path: str
+    data: Mapping[str, Any]       # 全モジュールで共有（最上位は読み取り専用、下位も変更禁止）
+    fingerprint: str              # ファイル・ジャーナル内容のSHA1
+    mtime_ns: int
+    size: int
+    version: int                  # 内容が変わるたびに増加
+    loaded_at: float
+    journal_mtime_ns: int = 0
+    journal_size: int = 0
+
+    @property
+    def signature(self) -> Tuple[int, int, int, int]:
+        """stat_signature と比較できる鮮度情報"""
+        return self.mtime_ns, self.size, self.journal_mtime_ns, self.journal_size
+
+
+class KnowledgeDBSnapshotProvider:
+    """知識DBスナップショットの共有・再ロード管理"""
+
+    def __init__(self):
+        """初期化"""
+        self._lock = threading.RLock()
+        self._snapshots: Dict[str, KnowledgeDBSnapshot] = {}
+        self._subscribers: Dict[str, List[Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self.parse_count = 0
+
+    @staticmethod
+    def _key(path: Union[str, Path]) -> str:
+        return str(Path(path).resolve())
+
+    def get(self, path: Union[str, Path]) -> Optional[KnowledgeDBSnapshot]:
+        """
+        最新のスナップショットを取得（ファイルが変わっていなければ解析しない）
+
+        Args:
+            path: 知識DBファイルのパス
+
+        Returns:
+            Optional[KnowledgeDBSnapshot]: ファイルが存在しない場合はNone
+
+        Raises:
+            OSError, ValueError: 読み込み・JSON解析に失敗した場合
+        """
+        key = self._key(path)
+        with self._lock:
+            signature = stat_signature(key)
+            if signature is None:
+                return None
+
+            current = self._snapshots.get(key)
+            if current and current.signature == signature:
+                return current
+
+            files = _read_files(key)
+            if files is None:
+                return None
+            raw, journal_raw, signature, fingerprint = files
+
+            if current and current.fingerprint == fingerprint:
+                # 内容が同じ（touch・同一内容の上書き）なら解析済みデータを使い回す
+                snapshot = KnowledgeDBSnapshot(key, current.data, fingerprint, signature[0], signature[1],
+                                               current.version, current.loaded_at, signature[2], signature[3])
+                self._snapshots[key] = snapshot
+                return snapshot
+
+            data = types.MappingProxyType(_parse(raw, journal_raw))
+            self.parse_count += 1
+            version = self._versions.get(key, 0) + 1
+            self._versions[key] = version
+            snapshot = KnowledgeDBSnapshot(key, data, fingerprint, signature[0], signature[1],
+                                           version, time.time(), signature[2], signature[3])
+            self._snapshots[key] = snapshot
+            callbacks = self._live_callbacks(key) if current else []
+
+        # 初回ロードは通知せず、内容の変わった再ロードのみ通知（ロック外で呼び出す）
+        for callback in callbacks:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[知識DBスナップショット] ⚠️ 購読者通知エラー: {e}")
+        return snapshot
+
+    def get_data(self, path: Union[str, Path]) -> Optional[Mapping[str, Any]]:
+        """共有データ本体を取得（読み取り専用ビュー、ファイルが存在しない場合はNone）"""
+        snapshot = self.get(path)
+        return snapshot.data if snapshot else None
+
+    def refresh(self, path: Union[str, Path]) -> Optional[KnowledgeDBSnapshot]:
+        """書き込み側が保存直後に呼び、変更を即座に購読者へ反映する"""
+        return self.get(path)
+
+    def invalidate(self, path: Optional[Union[str, Path]] = None):
+        """スナップショットを破棄（次回getで再解析）"""
+        with self._lock:
+            if path is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(self._key(path), None)
+
+    def subscribe(self, path: Union[str, Path], callback: Callable[[KnowledgeDBSnapshot], None]):
+        """
+        再ロード通知を購読
+
+        Args:
+            path: 知識DBファイルのパス
+            callback: 新しいスナップショットを受け取る関数
+                      （バウンドメソッドは弱参照で保持し、インスタンスの解放を妨げない）
+        """
+        if hasattr(callback, "__self__") and hasattr(callback, "__func__"):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        with self._lock:
+            self._subscribers.setdefault(self._key(path), []).append(ref)
+
+    def unsubscribe(self, path: Union[str, Path], callback: Callable[[KnowledgeDBSnapshot], None]):
+        """購読解除"""
+        with self._lock:
+            key = self._key(path)
+            self._subscribers[key] = [ref for ref in self._subscribers.get(key, [])
+                                      if ref() is not None and ref() != callback]
+
+    def _live_callbacks(self, key: str) -> List[Callable[[KnowledgeDBSnapshot], None]]:
+        refs = [ref for ref in self._subscribers.get(key, []) if ref() is not None]
+        self._subscribers[key] = refs
+        return [ref() for ref in refs]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """保持中のスナップショット情報"""
+        with self._lock:
+            return {
+                "parse_count": self.parse_count,
+                "snapshots": {key: {"version": snapshot.version, "size": snapshot.size,
+                                    "fingerprint": snapshot.fingerprint}
+                              for key, snapshot in self._snapshots.items()},
+                "subscribers": {key: len(refs) for key, refs in self._subscribers.items()}
+            }
+
+
+# グローバルプロバイダーインスタンス
+_global_provider = None
+_global_provider_lock = threading.Lock()
+
+
+def get_knowledge_db_provider() -> KnowledgeDBSnapshotProvider:
+    """プロセス共有の知識DBスナップショットプロバイダーを取得"""
+    global _global_provider
+    with _global_provider_lock:
+        if _global_provider is None:
+            _global_provider = KnowledgeDBSnapshotProvider()
+        return _global_provider
@@ -8,10 +8,11 @@
 import json
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Set
+from typing import Dict, List, Any, Optional, Tuple, Set, Iterable
 from dataclasses import dataclass, asdict
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, deque
 from datetime import datetime
 import hashlib
 import math
@@ -24,6 +25,9 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from core.knowledge_db_snapshot import get_knowledge_db_provider
+from core.video_similarity_engine import VideoSimilarityEngine, SCIPY_AVAILABLE
+
 # Windowsパス設定
 if os.name == 'nt':
     DATA_DIR = Path("D:/setsuna_bot/youtube_knowledge_system/data")
@@ -71,11 +75,19 @@ class GraphCluster:
 class KnowledgeGraphSystem:
     """知識グラフシステムクラス"""
     
+    # 概念ノードの作成条件: (最低動画数, 動画1件あたりの関連度)
+    CONCEPT_RULES = {
+        "artist": (1, 0.2),
+        "genre": (2, 0.15),
+        "theme": (2, 0.1)
+    }
+    
     def __init__(self):
         """初期化"""
         self.knowledge_db_path = DATA_DIR / "unified_knowledge_db.json"
         self.graph_data_path = GRAPH_DIR / "knowledge_graph.json"
         self.clusters_path = GRAPH_DIR / "graph_clusters.json"
+        self.graph_journal_path = GRAPH_DIR / "knowledge_graph.journal.jsonl"
         self.conversation_history_path = CONVERSATION_DIR / "video_conversation_history.json"
         
         # ネットワークグラフ
@@ -106,9 +118,20 @@ class KnowledgeGraphSystem:
             "total_edges": 0,
             "clusters_count": 0,
             "last_rebuild": None,
+            "last_incremental_update": None,
             "coverage_rate": 0.0
         }
         
+        # 差分保存（スナップショット＋ジャーナル）
+        self.journal_compact_entries = 5000  # 圧縮するジャーナル件数
+        self.journal_compact_ratio = 0.5  # 圧縮するジャーナルサイズ（スナップショット比）
+        self._journal_generation = 0  # スナップショットの世代（これより古いジャーナル行は適用済み）
+        self._journal_entries = 0
+        self._pending_changes: Dict[Tuple[str, str], None] = {}  # (種類, ID) 未保存の変更
+        
+        # 差分更新用の索引（初回の差分更新時に構築）
+        self._reset_incremental_indexes()
+        
         self._load_data()
         self._initialize_graph()
         
@@ -118,9 +141,10 @@ class KnowledgeGraphSystem:
         """データロード"""
         # YouTube知識データベース
         try:
-            if self.knowledge_db_path.exists():
-                with open(self.knowledge_db_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_db = json.load(f)
+            # 他モジュールと共有する解析済みスナップショット（読み取り専用）
+            knowledge_db = get_knowledge_db_provider().get_data(self.knowledge_db_path)
+            if knowledge_db is not None:
+                self.knowledge_db = knowledge_db
                 video_count = len(self.knowledge_db.get("videos", {}))
                 print(f"[知識グラフ] 📊 {video_count}件の動画データをロード")
         except Exception as e:
@@ -136,14 +160,22 @@ class KnowledgeGraphSystem:
         except Exception as e:
             print(f"[知識グラフ] ⚠️ 会話履歴ロードエラー: {e}")
         
-        # 既存グラフデータ
+        # 既存グラフデータ（スナップショット＋差分ジャーナル）
         try:
             if self.graph_data_path.exists():
                 with open(self.graph_data_path, 'r', encoding='utf-8') as f:
                     graph_data = json.load(f)
                     self.knowledge_nodes = {nid: KnowledgeNode(**node) for nid, node in graph_data.get("nodes", {}).items()}
                     self.knowledge_edges = {eid: KnowledgeEdge(**edge) for eid, edge in graph_data.get("edges", {}).items()}
+                self._journal_generation = graph_data.get("metadata", {}).get("journal_generation", 0)
+                if self.clusters_path.exists():
+                    with open(self.clusters_path, 'r', encoding='utf-8') as f:
+                        cluster_data = json.load(f)
+                    self.clusters = {cid: GraphCluster(**cluster) for cid, cluster in cluster_data.get("clusters", {}).items()}
                 print(f"[知識グラフ] 🔗 既存グラフデータをロード")
+                replayed = self._replay_graph_journal()
+                if replayed:
+                    print(f"[知識グラフ] 📝 ジャーナルから{replayed}件の変更を復元")
         except Exception as e:
             print(f"[知識グラフ] ⚠️ グラフデータロードエラー: {e}")
     
@@ -167,10 +199,19 @@ class KnowledgeGraphSystem:
         # 統計更新
         self._update_statistics()
     
-    def build_knowledge_graph(self, force_rebuild: bool = False):
-        """知識グラフ構築"""
+    def build_knowledge_graph(self, force_rebuild: bool = False, incremental: bool = False):
+        """
+        知識グラフ構築
+        
+        Args:
+            force_rebuild: 既存グラフがあっても全体を再構築する
+            incremental: 既存グラフがあれば知識DB・会話履歴との差分だけを反映する
+        """
         if not force_rebuild and self.knowledge_nodes:
-            print("[知識グラフ] 既存グラフを使用します（force_rebuild=Trueで再構築）")
+            if incremental:
+                self.update_knowledge_graph()
+                return
+            print("[知識グラフ] 既存グラフを使用します（force_rebuild=Trueで再構築、incremental=Trueで差分更新）")
             return
         
         print("[知識グラフ] 📊 知識グラフを構築中...")
@@ -179,6 +220,8 @@ class KnowledgeGraphSystem:
         self.graph.clear()
         self.knowledge_nodes.clear()
         self.knowledge_edges.clear()
+        self.clusters.clear()
+        self._reset_incremental_indexes()
         
         # Phase 1: 動画ノード作成
         self._create_video_nodes()
@@ -202,43 +245,713 @@ class KnowledgeGraphSystem:
         self._update_statistics()
         
         print(f"[知識グラフ] ✅ グラフ構築完了: {len(self.knowledge_nodes)}ノード, {len(self.knowledge_edges)}エッジ")
+
+    # ===== 差分更新 =====
     
-    def _create_video_nodes(self):
-        """動画ノード作成"""
+    def update_knowledge_graph(self, video_ids: Optional[Iterable[str]] = None,
+                               conversation_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        知識グラフの差分更新（追加・変更・削除された動画/会話の周辺だけを再計算し、変更分だけを保存）
+        
+        Args:
+            video_ids: 追加・変更・削除された動画ID（None=知識DBと比較して検出）
+            conversation_ids: 追加・変更・削除された会話ID（None=会話履歴と比較して検出）
+        
+        Returns:
+            Dict[str, Any]: 更新の概要
+        """
+        if not self.knowledge_nodes:
+            self.build_knowledge_graph(force_rebuild=True)
+            return {"rebuilt": True}
+        
+        start_time = time.perf_counter()
+        if video_ids is None or conversation_ids is None:
+            self._reload_sources()
+        changed_videos = self._detect_changed_videos() if video_ids is None else set(video_ids)
+        changed_conversations = (self._detect_changed_conversations() if conversation_ids is None
+                                 else set(conversation_ids))
+        
+        summary = {
+            "rebuilt": False,
+            "videos": len(changed_videos),
+            "conversations": len(changed_conversations),
+            "changes": 0,
+            "clusters_changed": 0,
+            "elapsed_ms": 0.0
+        }
+        if not changed_videos and not changed_conversations:
+            print("[知識グラフ] 変更はありません")
+            return summary
+        
+        self._get_cluster_labels()  # エッジの増減をクラスターの次数合計へ反映するため先に構築
+        seeds: Set[str] = set()  # クラスター再計算の起点
+        removed: Set[str] = set()
+        linked_videos, affected_concepts = self._update_video_nodes(changed_videos, seeds, removed)
+        self._link_similar_videos(linked_videos)
+        self._update_concept_nodes(affected_concepts, linked_videos, seeds, removed)
+        self._update_conversation_nodes(changed_conversations, linked_videos, seeds, removed)
+        summary["clusters_changed"] = self._refresh_clusters_locally(seeds, removed)
+        summary["changes"] = len(self._pending_changes)
+        
+        self._save_graph_delta()
+        self._update_statistics(incremental=True)
+        
+        summary["elapsed_ms"] = (time.perf_counter() - start_time) * 1000
+        print(f"[知識グラフ] ⚡ 差分更新完了: 動画{summary['videos']}件, 会話{summary['conversations']}件 → "
+              f"{summary['changes']}件の変更, {summary['clusters_changed']}クラスター ({summary['elapsed_ms']:.1f}ms)")
+        return summary
+    
+    def _reset_incremental_indexes(self):
+        """差分更新用の索引を破棄（全体再構築・再読み込み時）"""
+        self._concept_index: Optional[Dict[Tuple[str, str], Dict[str, int]]] = None  # 概念 → {動画ノードID: 出現数}
+        self._video_concepts: Optional[Dict[str, Counter]] = None  # 動画ノードID → 概念の出現数
+        self._cluster_labels: Optional[Dict[str, str]] = None  # ノードID → クラスターラベル
+        self._cluster_members: Optional[Dict[str, Set[str]]] = None  # クラスターラベル → ノードID
+        self._label_degree: Dict[str, float] = {}  # クラスターラベル → 所属ノードの重み付き次数の合計
+        self._label_internal_edges: Dict[str, int] = {}  # クラスターラベル → クラスター内エッジ数
+        self._total_edge_weight = 0.0
+        self._next_cluster_number = 0
+    
+    def _reload_sources(self):
+        """差分検出のため知識DB・会話履歴を再取得（知識DBは変更がなければ共有スナップショットのまま）"""
+        try:
+            knowledge_db = get_knowledge_db_provider().get_data(self.knowledge_db_path)
+            if knowledge_db is not None:
+                self.knowledge_db = knowledge_db
+        except Exception as e:
+            print(f"[知識グラフ] ⚠️ 動画データ再取得エラー: {e}")
+        
+        try:
+            if self.conversation_history_path.exists():
+                with open(self.conversation_history_path, 'r', encoding='utf-8') as f:
+                    self.conversation_history = json.load(f)
+        except Exception as e:
+            print(f"[知識グラフ] ⚠️ 会話履歴再取得エラー: {e}")
+    
+    def _detect_changed_videos(self) -> Set[str]:
+        """ノードと内容が異なる・ノードがない・知識DBから消えた動画ID"""
         videos = self.knowledge_db.get("videos", {})
+        changed = set()
         
         for video_id, video_data in videos.items():
-            metadata = video_data.get("metadata", {})
-            custom_info = video_data.get("custom_info", {})
-            creative_insight = video_data.get("creative_insight", {})
+            node = self.knowledge_nodes.get(f"video_{video_id}")
+            if (node is None or node.attributes != self._video_attributes(video_data) or
+                    node.relevance_score != self._calculate_video_relevance(video_data.get("metadata", {}))):
+                changed.add(video_id)
+        
+        for node in self.knowledge_nodes.values():
+            if node.node_type == "video" and node.node_id[len("video_"):] not in videos:
+                changed.add(node.node_id[len("video_"):])
+        
+        return changed
+    
+    def _detect_changed_conversations(self) -> Set[str]:
+        """ノードと内容が異なる・ノードがない・会話履歴から消えた会話ID"""
+        conversations = self.conversation_history.get("conversations", {})
+        changed = set()
+        
+        for conv_id, conv_data in conversations.items():
+            node = self.knowledge_nodes.get(f"conversation_{conv_id}")
+            if not conv_data.get("video_ids"):
+                if node is not None:
+                    changed.add(conv_id)
+            elif node is None or node.attributes != self._conversation_attributes(conv_data):
+                changed.add(conv_id)
+        
+        for node in self.knowledge_nodes.values():
+            if node.node_type == "conversation" and node.node_id[len("conversation_"):] not in conversations:
+                changed.add(node.node_id[len("conversation_"):])
+        
+        return changed
+    
+    def _video_concept_keys(self, attributes: Dict[str, Any]) -> Counter:
+        """動画が属する概念 (種類, 名前) と出現数（_create_concept_nodes と同じ規則）"""
+        keys = Counter()
+        artist = attributes.get("artist", "")
+        if artist:
+            keys[("artist", artist)] += 1
+        for genre in attributes.get("genres", []):
+            if genre.strip():
+                keys[("genre", genre.strip())] += 1
+        for theme in attributes.get("themes", []):
+            if theme.strip():
+                keys[("theme", theme.strip())] += 1
+        return keys
+    
+    @staticmethod
+    def _concept_node_id(node_type: str, title: str) -> str:
+        return f"{node_type}_{hashlib.md5(title.encode()).hexdigest()[:8]}"
+    
+    def _get_concept_index(self) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """概念 → 所属動画の索引（作成条件に満たない概念も含む）"""
+        if self._concept_index is None:
+            self._concept_index = defaultdict(dict)
+            self._video_concepts = {}
+            for node_id, node in self.knowledge_nodes.items():
+                if node.node_type == "video":
+                    keys = self._video_concept_keys(node.attributes)
+                    self._video_concepts[node_id] = keys
+                    for key, count in keys.items():
+                        self._concept_index[key][node_id] = count
+        return self._concept_index
+    
+    def _put_node(self, node: KnowledgeNode):
+        """ノードを追加・更新（差分保存の対象にする）"""
+        self.knowledge_nodes[node.node_id] = node
+        self.graph.add_node(node.node_id, **asdict(node))
+        self._pending_changes[("node", node.node_id)] = None
+    
+    def _remove_node(self, node_id: str):
+        """ノードと接続エッジを削除"""
+        self._remove_incident_edges(node_id)
+        self.knowledge_nodes.pop(node_id, None)
+        if node_id in self.graph:
+            self.graph.remove_node(node_id)
+        self._pending_changes[("node", node_id)] = None
+    
+    def _put_edge(self, edge: KnowledgeEdge):
+        """エッジを追加・更新"""
+        previous = self.graph.get_edge_data(edge.source_id, edge.target_id)
+        self._adjust_label_degree(edge.source_id, edge.target_id,
+                                  edge.strength - (previous.get("weight", 1.0) if previous else 0.0),
+                                  0 if previous else 1)
+        self.knowledge_edges[edge.edge_id] = edge
+        self.graph.add_edge(
+            edge.source_id, 
+            edge.target_id, 
+            weight=edge.strength,
+            relationship_type=edge.relationship_type,
+            edge_data=edge
+        )
+        self._pending_changes[("edge", edge.edge_id)] = None
+    
+    def _remove_edge_between(self, node_id1: str, node_id2: str):
+        """2ノード間のエッジを削除"""
+        edge_attrs = self.graph.get_edge_data(node_id1, node_id2, {})
+        self._adjust_label_degree(node_id1, node_id2, -edge_attrs.get("weight", 1.0), -1)
+        edge = edge_attrs.get("edge_data")
+        if edge is not None:
+            self.knowledge_edges.pop(edge.edge_id, None)
+            self._pending_changes[("edge", edge.edge_id)] = None
+        self.graph.remove_edge(node_id1, node_id2)
+    
+    def _remove_incident_edges(self, node_id: str, neighbor_types: Optional[Set[str]] = None):
+        """ノードの接続エッジを削除（neighbor_types 指定時は該当する種類の隣接ノードとのエッジのみ）"""
+        if node_id not in self.graph:
+            return
+        for neighbor in list(self.graph.neighbors(node_id)):
+            neighbor_node = self.knowledge_nodes.get(neighbor)
+            if neighbor_types is None or (neighbor_node is not None and neighbor_node.node_type in neighbor_types):
+                self._remove_edge_between(node_id, neighbor)
+    
+    def _update_video_nodes(self, changed_videos: Set[str], seeds: Set[str],
+                            removed: Set[str]) -> Tuple[List[str], Set[Tuple[str, str]]]:
+        """変更された動画ノードを作り直す（接続エッジは外し、再接続する動画ノードIDと影響する概念を返す）"""
+        videos = self.knowledge_db.get("videos", {})
+        concept_index = self._get_concept_index()
+        linked_videos = []
+        affected_concepts = set()
+        
+        for video_id in changed_videos:
+            node_id = f"video_{video_id}"
+            old_node = self.knowledge_nodes.get(node_id)
+            if old_node is not None:
+                seeds.update(self.graph.neighbors(node_id))
+                for key in self._video_concepts.pop(node_id, {}):
+                    affected_concepts.add(key)
+                    concept_index[key].pop(node_id, None)
+                self._remove_incident_edges(node_id)
             
-            # ノード属性
-            attributes = {
-                "title": custom_info.get("manual_title") or metadata.get("title", ""),
-                "artist": custom_info.get("manual_artist") or metadata.get("channel_title", ""),
-                "duration": metadata.get("duration", ""),
-                "view_count": metadata.get("view_count", 0),
-                "published_at": metadata.get("published_at", ""),
-                "themes": creative_insight.get("themes", []),
-                "genres": custom_info.get("manual_genre", "").split(",") if custom_info.get("manual_genre") else [],
-                "mood": custom_info.get("manual_mood", ""),
-                "tags": metadata.get("tags", []),
-                "creators": creative_insight.get("creators", [])
-            }
+            video_data = videos.get(video_id)
+            if video_data is None:
+                if old_node is not None:
+                    self._remove_node(node_id)
+                    removed.add(node_id)
+                continue
+            
+            node = self._create_video_node(video_id, video_data)
+            if old_node is not None:
+                node.created_at = old_node.created_at
+            self._put_node(node)
+            seeds.add(node_id)
+            linked_videos.append(node_id)
+            
+            keys = self._video_concept_keys(node.attributes)
+            self._video_concepts[node_id] = keys
+            for key, count in keys.items():
+                affected_concepts.add(key)
+                concept_index[key][node_id] = count
+        
+        return linked_videos, affected_concepts
+    
+    def _link_similar_videos(self, linked_videos: List[str]):
+        """再接続する動画と他の全動画の類似度エッジを構築"""
+        if not linked_videos:
+            return
+        
+        video_nodes = [n for n in self.knowledge_nodes.values() if n.node_type == "video"]
+        positions = {video.node_id: i for i, video in enumerate(video_nodes)}
+        query_indices = [positions[node_id] for node_id in linked_videos]
+        threshold = 0.3  # 閾値（_build_video_relationships と同じ）
+        
+        if SCIPY_AVAILABLE:
+            engine = VideoSimilarityEngine(self.relationship_weights, threshold=threshold)
+            similar_pairs = engine.find_similar_pairs([video.attributes for video in video_nodes], query_indices)
+        else:
+            similar_pairs = self._find_similar_video_pairs(video_nodes, threshold, query_indices)
+        
+        created_at = datetime.now().isoformat()
+        for i, j, similarity in similar_pairs:
+            self._put_edge(self._create_video_similarity_edge(video_nodes[i], video_nodes[j], similarity, created_at))
+    
+    def _update_concept_nodes(self, affected_concepts: Set[Tuple[str, str]], linked_videos: List[str],
+                              seeds: Set[str], removed: Set[str]):
+        """所属動画が変わった概念ノードと、その動画-概念・概念間エッジを更新"""
+        concept_index = self._get_concept_index()
+        linked = set(linked_videos)
+        updated = []
+        
+        for key in affected_concepts:
+            node_type, title = key
+            node_id = self._concept_node_id(node_type, title)
+            members = concept_index.get(key, {})
+            old_node = self.knowledge_nodes.get(node_id)
+            min_videos, relevance_per_video = self.CONCEPT_RULES[node_type]
+            video_count = sum(members.values())
             
-            # 関連度スコア（再生数、いいね数等から算出）
-            relevance_score = self._calculate_video_relevance(metadata)
+            if video_count < min_videos:
+                if old_node is not None:
+                    seeds.update(self.graph.neighbors(node_id))
+                    self._remove_node(node_id)
+                    removed.add(node_id)
+                if not members:
+                    concept_index.pop(key, None)
+                continue
             
+            now = datetime.now().isoformat()
             node = KnowledgeNode(
-                node_id=f"video_{video_id}",
-                node_type="video",
-                title=attributes["title"],
-                attributes=attributes,
-                relevance_score=relevance_score,
-                created_at=datetime.now().isoformat(),
-                updated_at=datetime.now().isoformat()
+                node_id=node_id,
+                node_type=node_type,
+                title=title,
+                attributes={
+                    "video_count": video_count,
+                    "associated_videos": [vid for vid, count in members.items() for _ in range(count)]
+                },
+                relevance_score=min(1.0, video_count * relevance_per_video),
+                created_at=old_node.created_at if old_node is not None else now,
+                updated_at=now
             )
+            self._put_node(node)
+            seeds.add(node_id)
+            updated.append((key, node))
+            
+            # 動画-概念エッジ（新しい概念は全所属動画、既存の概念は接続を外した動画のみ）
+            for video_id in (members if old_node is None else [vid for vid in members if vid in linked]):
+                self._link_video_to_concept(self.knowledge_nodes[video_id], node)
+        
+        self._link_similar_concepts(updated)
+    
+    def _link_video_to_concept(self, video: KnowledgeNode, concept: KnowledgeNode):
+        """動画-概念エッジ（_build_video_concept_relationships と同じ条件）"""
+        strength = self._calculate_video_concept_strength(video, concept)
+        if strength > 0.5:  # 閾値
+            self._put_edge(KnowledgeEdge(
+                edge_id=f"edge_{video.node_id}_{concept.node_id}",
+                source_id=video.node_id,
+                target_id=concept.node_id,
+                relationship_type=f"belongs_to_{concept.node_type}",
+                strength=strength,
+                evidence=[f"動画が{concept.node_type}: {concept.title}に属する"],
+                created_at=datetime.now().isoformat()
+            ))
+    
+    def _link_similar_concepts(self, updated: List[Tuple[Tuple[str, str], KnowledgeNode]]):
+        """更新された概念の概念間エッジを作り直す（所属動画を共有する概念だけを比較）"""
+        if not updated:
+            return
+        
+        concept_types = set(self.CONCEPT_RULES)
+        concept_index = self._get_concept_index()
+        positions = {node_id: i for i, node_id in enumerate(self.knowledge_nodes)}
+        compared = set()
+        
+        for key, concept in updated:
+            self._remove_incident_edges(concept.node_id, concept_types)
+        
+        for key, concept in updated:
+            members = concept_index[key]
+            
+            # 共有する所属動画数（Jaccard係数の分子）
+            shared_counts = Counter()
+            for video_id in members:
+                for other_key in self._video_concepts.get(video_id, {}):
+                    if other_key != key:
+                        shared_counts[other_key] += 1
+            
+            for other_key, shared in shared_counts.items():
+                other = self.knowledge_nodes.get(self._concept_node_id(*other_key))
+                pair = frozenset((concept.node_id, other.node_id)) if other is not None else None
+                if other is None or other.node_id == concept.node_id or pair in compared:
+                    continue
+                compared.add(pair)
+                
+                strength = shared / (len(members) + len(concept_index[other_key]) - shared)
+                if strength > 0.4:  # 閾値（_build_concept_relationships と同じ）
+                    concept1, concept2 = sorted((concept, other), key=lambda node: positions[node.node_id])
+                    self._put_edge(KnowledgeEdge(
+                        edge_id=f"edge_{concept1.node_id}_{concept2.node_id}",
+                        source_id=concept1.node_id,
+                        target_id=concept2.node_id,
+                        relationship_type="conceptual_similarity",
+                        strength=strength,
+                        evidence=[f"{concept1.node_type}と{concept2.node_type}の概念的類似性"],
+                        created_at=datetime.now().isoformat()
+                    ))
+    
+    def _update_conversation_nodes(self, changed_conversations: Set[str], linked_videos: List[str],
+                                   seeds: Set[str], removed: Set[str]):
+        """変更された会話ノードと、再接続する動画を言及している会話のエッジを更新"""
+        conversations = self.conversation_history.get("conversations", {})
+        
+        for conv_id in changed_conversations:
+            node_id = f"conversation_{conv_id}"
+            old_node = self.knowledge_nodes.get(node_id)
+            if old_node is not None:
+                seeds.update(self.graph.neighbors(node_id))
+                self._remove_incident_edges(node_id)
             
+            node = self._create_conversation_node(conv_id, conversations.get(conv_id, {}))
+            if node is None:
+                if old_node is not None:
+                    self._remove_node(node_id)
+                    removed.add(node_id)
+                continue
+            
+            if old_node is not None:
+                node.created_at = old_node.created_at
+            self._put_node(node)
+            seeds.add(node_id)
+            for video_id in node.attributes.get("video_ids", []):
+                self._link_conversation_to_video(node, f"video_{video_id}")
+        
+        linked = set(linked_videos)
+        if linked:
+            for conv in [n for n in self.knowledge_nodes.values() if n.node_type == "conversation"]:
+                for video_id in conv.attributes.get("video_ids", []):
+                    if f"video_{video_id}" in linked:
+                        self._link_conversation_to_video(conv, f"video_{video_id}")
+    
+    def _link_conversation_to_video(self, conv: KnowledgeNode, video_node_id: str):
+        """会話-動画エッジ（_build_conversation_relationships と同じ内容）"""
+        if video_node_id not in self.knowledge_nodes:
+            return
+        self._put_edge(KnowledgeEdge(
+            edge_id=f"edge_{conv.node_id}_{video_node_id}",
+            source_id=conv.node_id,
+            target_id=video_node_id,
+            relationship_type="discussed_in_conversation",
+            strength=0.8,
+            evidence=["会話で言及された動画"],
+            created_at=datetime.now().isoformat()
+        ))
+    
+    def _get_cluster_labels(self) -> Tuple[Dict[str, str], Dict[str, Set[str]]]:
+        """ノード → クラスターラベルの対応（クラスター外のノードは自身のIDをラベルにする）"""
+        if self._cluster_labels is None:
+            labels = {node_id: node_id for node_id in self.graph.nodes}
+            for cluster_id, cluster in self.clusters.items():
+                for node_id in cluster.node_ids:
+                    if node_id in labels:
+                        labels[node_id] = cluster_id
+            
+            members = defaultdict(set)
+            label_degree = defaultdict(float)
+            internal_edges = defaultdict(int)
+            for node_id, label in labels.items():
+                members[label].add(node_id)
+                label_degree[label] += self.graph.degree(node_id, weight="weight")
+            for node_id1, node_id2 in self.graph.edges:
+                if node_id1 != node_id2 and labels[node_id1] == labels[node_id2]:
+                    internal_edges[labels[node_id1]] += 1
+            
+            self._cluster_labels = labels
+            self._cluster_members = members
+            self._label_degree = label_degree
+            self._label_internal_edges = internal_edges
+            self._total_edge_weight = self.graph.size(weight="weight")
+            numbers = [int(cid.rsplit("_", 1)[-1]) for cid in self.clusters if cid.rsplit("_", 1)[-1].isdigit()]
+            self._next_cluster_number = max(numbers, default=-1) + 1
+        return self._cluster_labels, self._cluster_members
+    
+    def _cluster_label(self, node_id: str) -> str:
+        """ノードのクラスターラベル（未割り当てのノードは単独のラベルにする）"""
+        label = self._cluster_labels.get(node_id)
+        if label is None:
+            label = self._cluster_labels[node_id] = node_id
+            self._cluster_members[label].add(node_id)
+        return label
+    
+    def _adjust_label_degree(self, node_id1: str, node_id2: str, delta: float, edge_delta: int):
+        """エッジの追加・削除・重み変更をクラスターの次数合計・内部エッジ数に反映（差分更新中のみ）"""
+        if self._cluster_labels is None:
+            return
+        label1 = self._cluster_label(node_id1)
+        label2 = self._cluster_label(node_id2)
+        self._label_degree[label1] += delta
+        self._label_degree[label2] += delta
+        self._total_edge_weight += delta
+        if label1 == label2 and node_id1 != node_id2:
+            self._label_internal_edges[label1] += edge_delta
+    
+    def _refresh_clusters_locally(self, seeds: Set[str], removed: Set[str]) -> int:
+        """
+        変更箇所の周辺だけクラスターを更新（Louvain法の局所移動）
+        
+        変更されたノードとその隣接ノードから始め、各ノードをモジュラリティが最も増える隣接クラスターへ
+        移す（大きなクラスターほど次数合計の分だけ不利になるため、ハブ経由で1つに飲み込まれない）。
+        移ったノードの隣接ノードだけを再評価する（変化がなくなるまで、または評価回数の上限まで）
+        
+        Returns:
+            int: 追加・更新・削除したクラスター数
+        """
+        labels, members = self._get_cluster_labels()
+        touched = set()
+        
+        for node_id in removed:
+            label = labels.pop(node_id, None)
+            if label is not None:
+                members[label].discard(node_id)
+                touched.add(label)
+        
+        queue = deque(node_id for node_id in seeds if node_id in self.graph)
+        for node_id in queue:
+            touched.add(self._cluster_label(node_id))
+        queued = set(queue)
+        max_steps = 20 * len(queue) + 100
+        
+        steps = 0
+        while queue and steps < max_steps:
+            node_id = queue.popleft()
+            queued.discard(node_id)
+            steps += 1
+            
+            current = labels[node_id]
+            degree = self.graph.degree(node_id, weight="weight")
+            two_m = 2 * self._total_edge_weight
+            links = defaultdict(float)
+            link_counts = Counter()
+            for neighbor, edge_attrs in self.graph[node_id].items():
+                if neighbor != node_id:
+                    neighbor_label = self._cluster_label(neighbor)
+                    links[neighbor_label] += edge_attrs.get("weight", 1.0)
+                    link_counts[neighbor_label] += 1
+            
+            def gain(label: str) -> float:
+                other_degree = self._label_degree.get(label, 0.0) - (degree if label == current else 0.0)
+                return links.get(label, 0.0) - (degree * other_degree / two_m if two_m > 0 else 0.0)
+            
+            candidates = set(links)
+            if current != node_id and not members.get(node_id):
+                candidates.add(node_id)  # 単独に戻る
+            best_label, best_gain = current, gain(current) + 1e-9
+            for label in sorted(candidates):
+                label_gain = gain(label)
+                if label_gain > best_gain:
+                    best_label, best_gain = label, label_gain
+            
+            if best_label == current:
+                continue
+            members[current].discard(node_id)
+            members[best_label].add(node_id)
+            labels[node_id] = best_label
+            self._label_degree[current] -= degree
+            self._label_degree[best_label] += degree
+            self._label_internal_edges[current] -= link_counts[current]
+            self._label_internal_edges[best_label] += link_counts[best_label]
+            touched.update((current, best_label))
+            for neighbor in self.graph.neighbors(node_id):
+                if neighbor not in queued:
+                    queue.append(neighbor)
+                    queued.add(neighbor)
+        
+        # ラベル構成が変わったクラスターを作り直す（最小クラスターサイズは _perform_clustering と同じ）
+        changed = 0
+        for label in touched:
+            community = members.get(label, set())
+            if len(community) >= 3:
+                cluster_id = label
+                if label not in self.clusters and not label.startswith("cluster_"):
+                    cluster_id = f"cluster_{self._next_cluster_number}"
+                    self._next_cluster_number += 1
+                    for node_id in community:
+                        labels[node_id] = cluster_id
+                    members[cluster_id] = members.pop(label)
+                    self._label_degree[cluster_id] = self._label_degree.pop(label, 0.0)
+                    self._label_internal_edges[cluster_id] = self._label_internal_edges.pop(label, 0)
+                cluster_type = self._determine_cluster_type(community)
+                self.clusters[cluster_id] = GraphCluster(
+                    cluster_id=cluster_id,
+                    cluster_type=cluster_type,
+                    node_ids=list(community),
+                    central_concepts=self._extract_central_concepts(community),
+                    # _calculate_cluster_cohesion と同じ値（各エッジを両端から2回数える）を内部エッジ数から求める
+                    cohesion_score=2 * self._label_internal_edges.get(cluster_id, 0) / (len(community) * (len(community) - 1) / 2),
+                    description=f"{cluster_type}クラスター（{len(community)}ノード）"
+                )
+                self._pending_changes[("cluster", cluster_id)] = None
+                changed += 1
+            else:
+                if label in self.clusters:
+                    del self.clusters[label]
+                    self._pending_changes[("cluster", label)] = None
+                    changed += 1
+                if not community:
+                    members.pop(label, None)
+                    self._label_degree.pop(label, None)
+                    self._label_internal_edges.pop(label, None)
+        
+        return changed
+    
+    def _save_graph_delta(self):
+        """未保存の変更をジャーナルへ追記（スナップショットがなければ全体を保存）"""
+        if not self._pending_changes:
+            return
+        if not self.graph_data_path.exists():
+            self._save_graph_data()
+            return
+        
+        try:
+            self._append_graph_journal()
+        except Exception as e:
+            print(f"[知識グラフ] ❌ ジャーナル書き込みエラー: {e}")
+            return
+        
+        if self._needs_compaction():
+            self._save_graph_data()
+    
+    def _append_graph_journal(self) -> int:
+        """未保存の変更をジャーナルへ追記（変更件数に比例したI/Oのみ）"""
+        lines = []
+        for kind, item_id in self._pending_changes:
+            entry = {"generation": self._journal_generation, "id": item_id}
+            if kind == "node":
+                item = self.knowledge_nodes.get(item_id)
+            elif kind == "edge":
+                item = self.knowledge_edges.get(item_id)
+            else:
+                item = self.clusters.get(item_id)
+            entry.update({"op": f"put_{kind}", "data": asdict(item)} if item is not None else {"op": f"remove_{kind}"})
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        
+        with open(self.graph_journal_path, 'a', encoding='utf-8') as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        self._pending_changes.clear()
+        self._journal_entries += len(lines)
+        return len(lines)
+    
+    def _replay_graph_journal(self) -> int:
+        """スナップショット以降のジャーナルを再適用（書き込み途中で途切れた末尾は破棄）"""
+        self._journal_entries = 0
+        if not self.graph_journal_path.exists():
+            return 0
+        
+        applied = 0
+        valid_bytes = 0
+        with open(self.graph_journal_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                
+                # 圧縮済み（スナップショットに反映済み）の世代は読み飛ばす
+                if entry.get("generation", 0) < self._journal_generation:
+                    continue
+                self._journal_entries += 1
+                op = entry.get("op")
+                if op == "put_node":
+                    self.knowledge_nodes[entry["id"]] = KnowledgeNode(**entry["data"])
+                elif op == "remove_node":
+                    self.knowledge_nodes.pop(entry["id"], None)
+                elif op == "put_edge":
+                    self.knowledge_edges[entry["id"]] = KnowledgeEdge(**entry["data"])
+                elif op == "remove_edge":
+                    self.knowledge_edges.pop(entry["id"], None)
+                elif op == "put_cluster":
+                    self.clusters[entry["id"]] = GraphCluster(**entry["data"])
+                elif op == "remove_cluster":
+                    self.clusters.pop(entry["id"], None)
+                else:
+                    continue
+                applied += 1
+        
+        if valid_bytes < self.graph_journal_path.stat().st_size:
+            print("[知識グラフ] ⚠️ ジャーナル末尾の不完全な書き込みを破棄しました")
+            with open(self.graph_journal_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+        
+        return applied
+    
+    def _needs_compaction(self) -> bool:
+        """ジャーナルが圧縮の閾値を超えたか"""
+        if self._journal_entries >= self.journal_compact_entries:
+            return True
+        try:
+            journal_size = self.graph_journal_path.stat().st_size
+            snapshot_size = self.graph_data_path.stat().st_size
+        except OSError:
+            return False
+        return journal_size > snapshot_size * self.journal_compact_ratio
+    
+    def _create_video_node(self, video_id: str, video_data: Dict[str, Any]) -> KnowledgeNode:
+        """動画ノード作成（1件）"""
+        metadata = video_data.get("metadata", {})
+        attributes = self._video_attributes(video_data)
+        
+        # 関連度スコア（再生数、いいね数等から算出）
+        relevance_score = self._calculate_video_relevance(metadata)
+        
+        return KnowledgeNode(
+            node_id=f"video_{video_id}",
+            node_type="video",
+            title=attributes["title"],
+            attributes=attributes,
+            relevance_score=relevance_score,
+            created_at=datetime.now().isoformat(),
+            updated_at=datetime.now().isoformat()
+        )
+    
+    def _video_attributes(self, video_data: Dict[str, Any]) -> Dict[str, Any]:
+        """動画ノード属性"""
+        metadata = video_data.get("metadata", {})
+        custom_info = video_data.get("custom_info", {})
+        creative_insight = video_data.get("creative_insight", {})
+        
+        return {
+            "title": custom_info.get("manual_title") or metadata.get("title", ""),
+            "artist": custom_info.get("manual_artist") or metadata.get("channel_title", ""),
+            "duration": metadata.get("duration", ""),
+            "view_count": metadata.get("view_count", 0),
+            "published_at": metadata.get("published_at", ""),
+            "themes": creative_insight.get("themes", []),
+            "genres": custom_info.get("manual_genre", "").split(",") if custom_info.get("manual_genre") else [],
+            "mood": custom_info.get("manual_mood", ""),
+            "tags": metadata.get("tags", []),
+            "creators": creative_insight.get("creators", [])
+        }
+    
+    def _create_video_nodes(self):
+        """動画ノード作成"""
+        videos = self.knowledge_db.get("videos", {})
+        
+        for video_id, video_data in videos.items():
+            node = self._create_video_node(video_id, video_data)
             self.knowledge_nodes[node.node_id] = node
             self.graph.add_node(node.node_id, **asdict(node))
     
@@ -327,27 +1040,37 @@ class KnowledgeGraphSystem:
         conversations = self.conversation_history.get("conversations", {})
         
         for conv_id, conv_data in conversations.items():
-            if not conv_data.get("video_ids"):
+            node = self._create_conversation_node(conv_id, conv_data)
+            if node is None:
                 continue
             
-            node = KnowledgeNode(
-                node_id=f"conversation_{conv_id}",
-                node_type="conversation",
-                title=f"会話_{conv_id}",
-                attributes={
-                    "video_ids": conv_data.get("video_ids", []),
-                    "context": conv_data.get("context", ""),
-                    "user_preferences": conv_data.get("user_preferences", {}),
-                    "timestamp": conv_data.get("timestamp", "")
-                },
-                relevance_score=0.3,  # 会話の基本重要度
-                created_at=datetime.now().isoformat(),
-                updated_at=datetime.now().isoformat()
-            )
-            
             self.knowledge_nodes[node.node_id] = node
             self.graph.add_node(node.node_id, **asdict(node))
     
+    def _create_conversation_node(self, conv_id: str, conv_data: Dict[str, Any]) -> Optional[KnowledgeNode]:
+        """会話ノード作成（1件、動画を言及していない会話はNone）"""
+        if not conv_data.get("video_ids"):
+            return None
+        
+        return KnowledgeNode(
+            node_id=f"conversation_{conv_id}",
+            node_type="conversation",
+            title=f"会話_{conv_id}",
+            attributes=self._conversation_attributes(conv_data),
+            relevance_score=0.3,  # 会話の基本重要度
+            created_at=datetime.now().isoformat(),
+            updated_at=datetime.now().isoformat()
+        )
+    
+    def _conversation_attributes(self, conv_data: Dict[str, Any]) -> Dict[str, Any]:
+        """会話ノード属性"""
+        return {
+            "video_ids": conv_data.get("video_ids", []),
+            "context": conv_data.get("context", ""),
+            "user_preferences": conv_data.get("user_preferences", {}),
+            "timestamp": conv_data.get("timestamp", "")
+        }
+    
     def _build_relationships(self):
         """関連性エッジ構築"""
         print("[知識グラフ] 🔗 関連性エッジを構築中...")
@@ -367,33 +1090,54 @@ class KnowledgeGraphSystem:
     def _build_video_relationships(self):
         """動画間関連性構築"""
         video_nodes = [n for n in self.knowledge_nodes.values() if n.node_type == "video"]
-        
+        threshold = 0.3  # 閾値
+        
+        # 共有する属性がある候補ペアだけを行列演算で評価（scipyがなければ全ペアを順に比較）
+        if SCIPY_AVAILABLE:
+            engine = VideoSimilarityEngine(self.relationship_weights, threshold=threshold)
+            similar_pairs = engine.find_similar_pairs([video.attributes for video in video_nodes])
+        else:
+            similar_pairs = self._find_similar_video_pairs(video_nodes, threshold)
+        
+        created_at = datetime.now().isoformat()
+        for i, j, similarity in similar_pairs:
+            edge = self._create_video_similarity_edge(video_nodes[i], video_nodes[j], similarity, created_at)
+            
+            self.knowledge_edges[edge.edge_id] = edge
+            self.graph.add_edge(
+                edge.source_id, 
+                edge.target_id, 
+                weight=edge.strength,
+                relationship_type=edge.relationship_type,
+                edge_data=edge
+            )
+    
+    def _create_video_similarity_edge(self, video1: KnowledgeNode, video2: KnowledgeNode, similarity: float,
+                                      created_at: str) -> KnowledgeEdge:
+        """動画間エッジ作成"""
+        return KnowledgeEdge(
+            edge_id=f"edge_{video1.node_id}_{video2.node_id}",
+            source_id=video1.node_id,
+            target_id=video2.node_id,
+            relationship_type=self._determine_video_relationship_type(video1, video2),
+            strength=similarity,
+            evidence=self._get_similarity_evidence(video1, video2),
+            created_at=created_at
+        )
+    
+    def _find_similar_video_pairs(self, video_nodes: List[KnowledgeNode], threshold: float,
+                                  query_indices: Optional[List[int]] = None) -> List[Tuple[int, int, float]]:
+        """全ペアを比較して類似度が閾値を超える動画ペアを抽出（(i, j) の昇順、query_indices 指定時はその動画を含むペアのみ）"""
+        similar_pairs = []
+        queries = set(range(len(video_nodes)) if query_indices is None else query_indices)
         for i, video1 in enumerate(video_nodes):
-            for video2 in video_nodes[i+1:]:
-                similarity = self._calculate_video_similarity(video1, video2)
-                
-                if similarity > 0.3:  # 閾値
-                    relationship_type = self._determine_video_relationship_type(video1, video2)
-                    evidence = self._get_similarity_evidence(video1, video2)
-                    
-                    edge = KnowledgeEdge(
-                        edge_id=f"edge_{video1.node_id}_{video2.node_id}",
-                        source_id=video1.node_id,
-                        target_id=video2.node_id,
-                        relationship_type=relationship_type,
-                        strength=similarity,
-                        evidence=evidence,
-                        created_at=datetime.now().isoformat()
-                    )
-                    
-                    self.knowledge_edges[edge.edge_id] = edge
-                    self.graph.add_edge(
-                        edge.source_id, 
-                        edge.target_id, 
-                        weight=edge.strength,
-                        relationship_type=edge.relationship_type,
-                        edge_data=edge
-                    )
+            for j in range(i + 1, len(video_nodes)):
+                if i not in queries and j not in queries:
+                    continue
+                similarity = self._calculate_video_similarity(video1, video_nodes[j])
+                if similarity > threshold:
+                    similar_pairs.append((i, j, similarity))
+        return similar_pairs
     
     def _build_video_concept_relationships(self):
         """動画-概念間関連性構築"""
@@ -497,7 +1241,7 @@ class KnowledgeGraphSystem:
         return (view_score * 0.7 + like_score * 0.3)
     
     def _calculate_video_similarity(self, video1: KnowledgeNode, video2: KnowledgeNode) -> float:
-        """動画間類似度計算"""
+        """動画間類似度計算（式を変える場合は VideoSimilarityEngine._similarity も合わせる）"""
         attrs1 = video1.attributes
         attrs2 = video2.attributes
         
@@ -603,6 +1347,7 @@ class KnowledgeGraphSystem:
     def _perform_clustering(self):
         """クラスタリング実行"""
         print("[知識グラフ] 🎯 クラスタリング実行中...")
+        self._cluster_labels = None
         
         if len(self.graph.nodes) < 3:
             return
@@ -657,14 +1402,13 @@ class KnowledgeGraphSystem:
         if len(community) < 2:
             return 0.0
         
-        # クラスター内エッジ数
-        internal_edges = 0
-        total_possible_edges = len(community) * (len(community) - 1) / 2
-        
-        for node1 in community:
-            for node2 in community:
-                if node1 != node2 and self.graph.has_edge(node1, node2):
-                    internal_edges += 1
+        # クラスター内エッジ数（両端のノードから数えるため1本を2回数える。隣接ノードだけを走査）
+        members = set(community)
+        total_possible_edges = len(members) * (len(members) - 1) / 2
+        internal_edges = sum(
+            1 for node1 in members if node1 in self.graph
+            for node2 in self.graph.neighbors(node1) if node2 != node1 and node2 in members
+        )
         
         return internal_edges / total_possible_edges if total_possible_edges > 0 else 0.0
     
@@ -693,45 +1437,62 @@ class KnowledgeGraphSystem:
         return "mixed_cluster"
     
     def _save_graph_data(self):
-        """グラフデータ保存"""
+        """グラフデータ保存（全体のスナップショットを書き出し、差分ジャーナルを空にする）"""
         try:
+            generation = self._journal_generation + 1
             graph_data = {
                 "nodes": {nid: asdict(node) for nid, node in self.knowledge_nodes.items()},
                 "edges": {eid: asdict(edge) for eid, edge in self.knowledge_edges.items()},
                 "metadata": {
                     "created_at": datetime.now().isoformat(),
                     "node_count": len(self.knowledge_nodes),
-                    "edge_count": len(self.knowledge_edges)
+                    "edge_count": len(self.knowledge_edges),
+                    "journal_generation": generation
                 }
             }
             
-            with open(self.graph_data_path, 'w', encoding='utf-8') as f:
-                json.dump(graph_data, f, ensure_ascii=False, indent=2)
-            
-            # クラスターデータ保存
+            # クラスターデータ保存（クラスターのジャーナル操作は再適用しても同じ結果になるため先に置き換える）
             cluster_data = {
                 "clusters": {cid: asdict(cluster) for cid, cluster in self.clusters.items()},
                 "metadata": {
                     "created_at": datetime.now().isoformat(),
-                    "cluster_count": len(self.clusters)
+                    "cluster_count": len(self.clusters),
+                    "journal_generation": generation
                 }
             }
             
-            with open(self.clusters_path, 'w', encoding='utf-8') as f:
-                json.dump(cluster_data, f, ensure_ascii=False, indent=2)
+            self._write_json_atomic(self.clusters_path, cluster_data)
+            self._write_json_atomic(self.graph_data_path, graph_data)
+            
+            # 置き換え後に中断しても、旧世代のジャーナル行は次回読み込み時に読み飛ばされる
+            self._journal_generation = generation
+            with open(self.graph_journal_path, 'w', encoding='utf-8'):
+                pass
+            self._journal_entries = 0
+            self._pending_changes.clear()
             
             print("[知識グラフ] 💾 グラフデータを保存しました")
             
         except Exception as e:
             print(f"[知識グラフ] ❌ データ保存エラー: {e}")
     
-    def _update_statistics(self):
+    @staticmethod
+    def _write_json_atomic(path: Path, data: Dict[str, Any]):
+        """一時ファイル経由でJSONを書き出して置き換え"""
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    def _update_statistics(self, incremental: bool = False):
         """統計情報更新"""
         self.graph_statistics.update({
             "total_nodes": len(self.knowledge_nodes),
             "total_edges": len(self.knowledge_edges),
             "clusters_count": len(self.clusters),
-            "last_rebuild": datetime.now().isoformat(),
+            "last_incremental_update" if incremental else "last_rebuild": datetime.now().isoformat(),
             "coverage_rate": self._calculate_coverage_rate()
         })
     
@@ -24,6 +24,8 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from core.knowledge_db_snapshot import get_knowledge_db_provider
+
 # 関連システム
 try:
     from core.real_time_knowledge_updater import NewInformation, KnowledgeUpdate
@@ -160,13 +162,20 @@ class KnowledgeValidationSystem:
                 with open(self.validation_log_path, 'r', encoding='utf-8') as f:
                     self.validation_log = json.load(f)
             
-            if self.knowledge_db_path.exists():
-                with open(self.knowledge_db_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_db = json.load(f)
+            # 他モジュールと共有する解析済みスナップショット（読み取り専用・更新時に差し替え）
+            provider = get_knowledge_db_provider()
+            knowledge_db = provider.get_data(self.knowledge_db_path)
+            if knowledge_db is not None:
+                self.knowledge_db = knowledge_db
+            provider.subscribe(self.knowledge_db_path, self._on_knowledge_db_reloaded)
                     
         except Exception as e:
             print(f"[知識検証] データ読み込みエラー: {e}")
     
+    def _on_knowledge_db_reloaded(self, snapshot):
+        """知識DB再ロード通知"""
+        self.knowledge_db = snapshot.data
+    
     def _save_data(self):
         """データ保存"""
         try:
@@ -13,6 +13,8 @@ from pathlib import Path
 import re
 from collections import defaultdict, Counter
 
+from core.knowledge_db_snapshot import get_knowledge_db_provider
+
 class PreferenceAnalyzer:
     def __init__(self):
         """好み推測システムの初期化"""
@@ -49,8 +51,8 @@ class PreferenceAnalyzer:
                 print(f"[好み分析] ⚠️ YouTubeデータベースが見つかりません: {self.youtube_db_path}")
                 return {}
             
-            with open(self.youtube_db_path, 'r', encoding='utf-8') as f:
-                youtube_data = json.load(f)
+            # 他モジュールと共有する解析済みスナップショット（読み取り専用）
+            youtube_data = get_knowledge_db_provider().get_data(self.youtube_db_path) or {}
             
             videos = youtube_data.get("videos", {})
             if not videos:
@@ -23,6 +23,10 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from core.knowledge_db_snapshot import (
+    get_knowledge_db_provider, load_knowledge_db, record_fingerprints, save_knowledge_db
+)
+
 # 関連システム
 try:
     from core.knowledge_graph_system import KnowledgeGraphSystem
@@ -100,6 +104,7 @@ class RealTimeKnowledgeUpdater:
         
         # データ
         self.knowledge_db = {}
+        self._knowledge_db_records = {}  # 読み込み時点の動画・プレイリストの指紋（保存時の変更検出用）
         self.new_information = deque(maxlen=1000)
         self.pending_updates = {}
         self.conflict_resolutions = {}
@@ -211,9 +216,11 @@ class RealTimeKnowledgeUpdater:
         """既存データロード"""
         # 知識データベース
         try:
-            if self.knowledge_db_path.exists():
-                with open(self.knowledge_db_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_db = json.load(f)
+            # UnifiedStorageのジャーナルも適用済みの複製（更新して保存するため共有スナップショットは使わない）
+            loaded = load_knowledge_db(self.knowledge_db_path)
+            if loaded is not None:
+                self.knowledge_db = loaded[0]
+                self._knowledge_db_records = record_fingerprints(self.knowledge_db)
                 print(f"[リアルタイム更新] 📊 知識データベースをロード")
         except Exception as e:
             print(f"[リアルタイム更新] ⚠️ 知識データベースロードエラー: {e}")
@@ -976,9 +983,13 @@ class RealTimeKnowledgeUpdater:
     def save_updated_knowledge(self):
         """更新済み知識保存"""
         try:
-            # 知識データベース保存
-            with open(self.knowledge_db_path, 'w', encoding='utf-8') as f:
-                json.dump(self.knowledge_db, f, ensure_ascii=False, indent=2)
+            # 知識データベース保存（変更した動画・プレイリストのみUnifiedStorageのジャーナルへ追記）
+            self._knowledge_db_records = save_knowledge_db(
+                self.knowledge_db_path, self.knowledge_db, self._knowledge_db_records
+            )
+            
+            # 共有スナップショットを更新し、読み取り側へ再ロードを通知
+            get_knowledge_db_provider().refresh(self.knowledge_db_path)
             
             # 新情報保存
             self._save_new_information()
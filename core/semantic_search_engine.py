@@ -13,9 +13,13 @@ from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
 import re
 import math
-from collections import defaultdict, Counter
+import bisect
+import threading
+import time
+from collections import defaultdict, Counter, OrderedDict
 from datetime import datetime
 import hashlib
+import numpy as np
 
 # プロジェクトルートをパスに追加
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,6 +27,8 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from core.knowledge_db_snapshot import get_knowledge_db_provider, stat_signature
+
 # Windowsパス設定
 if os.name == 'nt':
     DATA_DIR = Path("D:/setsuna_bot/youtube_knowledge_system/data")
@@ -56,15 +62,228 @@ class SemanticQuery:
     target_attributes: List[str]  # "title", "artist", "genre", "mood", "theme"
     temporal_context: Optional[str]  # "recent", "classic", "trending"
 
+class PersistentSearchCache:
+    """LRU上限・TTL付き検索キャッシュ（追記型ログで永続化）
+    
+    検索ごとにキャッシュ全体を書き直さず、1件分のレコードをログへ追記する。
+    ログが肥大化したらバックグラウンドで有効エントリのみのスナップショットへ
+    圧縮する。知識DBのフィンガープリントが変わったキャッシュは破棄する。
+    """
+    
+    def __init__(self, log_path: Path, max_entries: int = 500,
+                 ttl_seconds: float = 24 * 60 * 60, compaction_ratio: float = 2.0):
+        self.log_path = log_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.compaction_ratio = compaction_ratio
+        
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.db_fingerprint: Optional[str] = None
+        self.statistics: Optional[Dict[str, Any]] = None
+        self._log_records = 0
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._compaction_pending: Optional[List[Dict[str, Any]]] = None  # 圧縮中に追記されたレコード
+        self._snapshot_generation = 0  # 同期的なスナップショット書き直しの回数
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+    
+    def load(self, db_fingerprint: Optional[str]):
+        """ログを再生してキャッシュを復元（フィンガープリント不一致なら破棄）"""
+        with self._lock:
+            self.entries.clear()
+            self._log_records = 0
+            stored_fingerprint = None
+            
+            if self.log_path.exists():
+                with open(self.log_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # 書き込み途中で中断した末尾行
+                        self._log_records += 1
+                        self._apply_record(record)
+                        if record.get("op") == "meta":
+                            stored_fingerprint = record.get("db_fingerprint")
+            
+            self._expire()
+            
+            if stored_fingerprint != db_fingerprint:
+                self.entries.clear()
+            self.db_fingerprint = db_fingerprint
+            
+            # 復元した状態で書き直し、以降は追記のみ
+            self._write_snapshot()
+    
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """キャッシュ取得（期限切れはミス扱い、ヒット時はLRU順を更新）"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry):
+                self.delete(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry["results"]
+    
+    def put(self, key: str, results: List[Dict[str, Any]], statistics: Optional[Dict[str, Any]] = None):
+        """キャッシュ登録（1レコード追記）"""
+        with self._lock:
+            record = {"op": "put", "key": key, "results": results, "created_at": time.time()}
+            if statistics is not None:
+                record["statistics"] = statistics
+            self._apply_record(record)
+            self._append(record)
+            
+            while len(self.entries) > self.max_entries:
+                oldest_key = next(iter(self.entries))
+                self.delete(oldest_key)
+            
+            self._maybe_compact()
+    
+    def delete(self, key: str):
+        """キャッシュ削除"""
+        with self._lock:
+            if key in self.entries:
+                del self.entries[key]
+                self._append({"op": "delete", "key": key})
+    
+    def clear(self):
+        """全削除（ログもスナップショットで置き換え）"""
+        with self._lock:
+            self.entries.clear()
+            self._write_snapshot()
+    
+    def invalidate(self, db_fingerprint: Optional[str]):
+        """知識DB変更に伴う全破棄"""
+        with self._lock:
+            self.db_fingerprint = db_fingerprint
+            self.clear()
+    
+    def wait_for_compaction(self, timeout: Optional[float] = None):
+        """バックグラウンド圧縮の完了待ち"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _apply_record(self, record: Dict[str, Any]):
+        op = record.get("op")
+        if op == "put":
+            key = record["key"]
+            self.entries.pop(key, None)
+            self.entries[key] = {"results": record["results"], "created_at": record["created_at"]}
+        elif op == "delete":
+            self.entries.pop(record.get("key"), None)
+        elif op == "clear":
+            self.entries.clear()
+        if "statistics" in record:
+            self.statistics = record["statistics"]
+    
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry["created_at"] > self.ttl_seconds
+    
+    def _expire(self):
+        for key in [key for key, entry in self.entries.items() if self._is_expired(entry)]:
+            del self.entries[key]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def _append(self, record: Dict[str, Any]):
+        try:
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._log_records += 1
+            if self._compaction_pending is not None:
+                self._compaction_pending.append(record)
+        except Exception as e:
+            print(f"[セマンティック検索] ⚠️ キャッシュログ追記エラー: {e}")
+    
+    def _maybe_compact(self):
+        """ログレコード数が有効エントリ数に対して過大なら圧縮を開始"""
+        threshold = max(self.max_entries, len(self.entries)) * self.compaction_ratio
+        if self._log_records <= threshold:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self._compact, daemon=True)
+        self._compaction_thread.start()
+    
+    def _compact(self):
+        """バックグラウンド圧縮（ファイル書き込み中はロックを保持しない）"""
+        with self._lock:
+            self._expire()
+            records = self._snapshot_records()
+            generation = self._snapshot_generation
+            self._compaction_pending = []
+        
+        temp_path = self.log_path.with_suffix(self.log_path.suffix + ".compact.tmp")
+        try:
+            self._write_records(temp_path, records)
+            with self._lock:
+                # 圧縮中にclear/loadでログが書き直された場合は結果を捨てる
+                if generation != self._snapshot_generation:
+                    temp_path.unlink(missing_ok=True)
+                    return
+                # 圧縮中に追記されたレコードを引き継いでから置換
+                pending = self._compaction_pending
+                with open(temp_path, 'a', encoding='utf-8') as f:
+                    for record in pending:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                os.replace(temp_path, self.log_path)
+                self._log_records = len(records) + len(pending)
+        except Exception as e:
+            print(f"[セマンティック検索] ⚠️ キャッシュ圧縮エラー: {e}")
+        finally:
+            with self._lock:
+                self._compaction_pending = None
+    
+    def _snapshot_records(self) -> List[Dict[str, Any]]:
+        """有効エントリのみのログレコード"""
+        records = [{"op": "meta", "db_fingerprint": self.db_fingerprint,
+                    "statistics": self.statistics}]
+        for key, entry in self.entries.items():
+            records.append({"op": "put", "key": key, **entry})
+        return records
+    
+    @staticmethod
+    def _write_records(path: Path, records: List[Dict[str, Any]]):
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    def _write_snapshot(self):
+        """有効エントリのみのログを一時ファイルに書き、アトミックに置換"""
+        temp_path = self.log_path.with_suffix(self.log_path.suffix + ".tmp")
+        try:
+            records = self._snapshot_records()
+            self._write_records(temp_path, records)
+            os.replace(temp_path, self.log_path)
+            self._log_records = len(records)
+            self._snapshot_generation += 1
+        except Exception as e:
+            print(f"[セマンティック検索] ⚠️ キャッシュ圧縮エラー: {e}")
+
+
 class SemanticSearchEngine:
     """セマンティック検索エンジンクラス"""
     
     def __init__(self):
         """初期化"""
         self.knowledge_db_path = DATA_DIR / "unified_knowledge_db.json"
-        self.search_cache_path = CACHE_DIR / "semantic_search_cache.json"
+        self.search_cache_path = CACHE_DIR / "semantic_search_cache.jsonl"
         self.knowledge_db = {}
-        self.search_cache = {}
+        self.knowledge_db_fingerprint: Optional[str] = None
+        self._knowledge_db_signature: Optional[Tuple[int, int, int, int]] = None  # DB・ジャーナルのstat
+        self.search_cache = PersistentSearchCache(self.search_cache_path)
+        
+        # ベクトル化スコアリング用の特徴量（_load_knowledge_dbで構築）
+        self.video_features: Dict[str, Any] = {}
         
         # 意味解析用辞書とパターン
         self.semantic_patterns = self._build_semantic_patterns()
@@ -164,40 +383,312 @@ class SemanticSearchEngine:
     def _load_knowledge_db(self):
         """知識データベースをロード"""
         try:
-            if self.knowledge_db_path.exists():
-                with open(self.knowledge_db_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_db = json.load(f)
+            # 他モジュールと共有する解析済みスナップショット（読み取り専用）
+            snapshot = get_knowledge_db_provider().get(self.knowledge_db_path)
+            if snapshot is not None:
+                self._knowledge_db_signature = snapshot.signature
+                self.knowledge_db = snapshot.data
+                self.knowledge_db_fingerprint = snapshot.fingerprint
                 video_count = len(self.knowledge_db.get("videos", {}))
                 print(f"[セマンティック検索] 📊 {video_count}件の動画データをロード")
             else:
                 print(f"[セマンティック検索] ⚠️ データベースファイルが見つかりません: {self.knowledge_db_path}")
         except Exception as e:
             print(f"[セマンティック検索] ❌ データベースロードエラー: {e}")
+        
+        self._build_feature_matrix()
+    
+    # 部分一致判定用コーパスの区切り文字（動画をまたぐ一致を防ぐ）
+    _CORPUS_SEPARATOR = "\x00"
+    
+    def _build_feature_matrix(self):
+        """関連性スコア計算用の特徴量を全動画分事前計算"""
+        videos = self.knowledge_db.get("videos", {})
+        video_ids = list(videos.keys())
+        
+        titles, channels, video_texts, theme_texts = [], [], [], []
+        has_title, has_channel, has_themes = [], [], []
+        title_words, channel_words = [], []
+        temporal_kinds, naive_dates, trending_scores = [], [], []
+        
+        for video_data in videos.values():
+            metadata = video_data.get("metadata", {})
+            creative_insight = video_data.get("creative_insight", {})
+            
+            title = metadata.get("title", "")
+            channel_title = metadata.get("channel_title", "")
+            has_title.append(bool(title))
+            has_channel.append(bool(channel_title))
+            titles.append(title.lower())
+            channels.append(channel_title.lower())
+            title_words.append(set(title.lower().split()))
+            channel_words.append(set(channel_title.lower().split()))
+            
+            # キーワード一致判定対象テキスト（タイトル・説明文・タグ）
+            video_texts.append(" ".join([
+                metadata.get("title", ""),
+                metadata.get("description", ""),
+                " ".join(metadata.get("tags", []))
+            ]).lower())
+            
+            # テーマテキスト（テーマが無い動画は常に0点）
+            themes = creative_insight.get("themes", []) if creative_insight else []
+            has_themes.append(bool(themes))
+            theme_texts.append(" ".join(themes).lower() if themes else "")
+            
+            kind, naive_date, trending_score = self._parse_temporal_features(metadata)
+            temporal_kinds.append(kind)
+            naive_dates.append(naive_date)
+            trending_scores.append(trending_score)
+        
+        self.video_features = {
+            "source": videos,
+            "video_ids": video_ids,
+            "count": len(video_ids),
+            "has_title": np.array(has_title, dtype=bool),
+            "has_channel": np.array(has_channel, dtype=bool),
+            "title_corpus": self._build_corpus(titles),
+            "channel_corpus": self._build_corpus(channels),
+            "title_words": self._build_word_bag(title_words),
+            "channel_words": self._build_word_bag(channel_words),
+            "video_text_corpus": self._build_corpus(video_texts),
+            "theme_corpus": self._build_corpus(theme_texts),
+            "has_themes": np.array(has_themes, dtype=bool),
+            "temporal_kind": np.array(temporal_kinds, dtype=np.int8),
+            "naive_dates": np.array(
+                [d if d is not None else np.datetime64("NaT") for d in naive_dates],
+                dtype="datetime64[us]"
+            ),
+            "trending_score": np.array(trending_scores, dtype=np.float64),
+            "keyword_columns": {},
+            "theme_columns": {}
+        }
+        
+        # 抽出され得るキーワード語彙の一致列を事前計算
+        vocabulary = set(self.keyword_synonyms) | set(self.genre_mappings) | set(self.mood_indicators)
+        vocabulary.update(["アーティスト", "歌手", "バンド", "グループ", "ソロ", "デュオ"])
+        for keyword in vocabulary:
+            self._keyword_column(keyword)
+            self._theme_column(keyword)
+    
+    # 時間的関連性の分類（0.5固定 / タイムゾーン無し日時）
+    _TEMPORAL_NEUTRAL = 0
+    _TEMPORAL_NAIVE = 1
+    
+    def _parse_temporal_features(self, metadata: Dict) -> Tuple[int, Optional[datetime], float]:
+        """公開日時を事前解析（_calculate_temporal_relevanceと同じ分岐を再現）"""
+        published_at = metadata.get("published_at", "")
+        if not published_at:
+            return self._TEMPORAL_NEUTRAL, None, 0.5
+        
+        try:
+            pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
+        except:
+            return self._TEMPORAL_NEUTRAL, None, 0.5
+        
+        # タイムゾーン付き日時はdatetime.now()との差分計算で例外となり0.5になる
+        if pub_date.tzinfo is not None and pub_date.utcoffset() is not None:
+            return self._TEMPORAL_NEUTRAL, None, 0.5
+        
+        try:
+            view_count = metadata.get("view_count", 0)
+            if view_count > 100000:
+                trending_score = 1.0
+            elif view_count > 10000:
+                trending_score = 0.7
+            else:
+                trending_score = 0.3
+        except:
+            trending_score = 0.5
+        
+        return self._TEMPORAL_NAIVE, pub_date, trending_score
+    
+    def _build_corpus(self, texts: List[str]) -> Dict[str, Any]:
+        """区切り文字で連結した部分一致判定用コーパス"""
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + 1
+        return {
+            "text": self._CORPUS_SEPARATOR.join(texts),
+            "offsets": offsets,
+            "texts": texts
+        }
+    
+    def _substring_mask(self, corpus: Dict[str, Any], pattern: str) -> np.ndarray:
+        """各動画テキストにpatternが含まれるかのブール配列"""
+        texts = corpus["texts"]
+        if not pattern:
+            return np.ones(len(texts), dtype=bool)
+        if self._CORPUS_SEPARATOR in pattern:
+            return np.array([pattern in text for text in texts], dtype=bool)
+        
+        mask = np.zeros(len(texts), dtype=bool)
+        text = corpus["text"]
+        offsets = corpus["offsets"]
+        position = text.find(pattern)
+        while position != -1:
+            index = bisect.bisect_right(offsets, position) - 1
+            mask[index] = True
+            # 同じ動画内の以降の一致は不要なので次の動画の先頭から再検索
+            if index + 1 >= len(offsets):
+                break
+            position = text.find(pattern, offsets[index + 1])
+        return mask
+    
+    def _build_word_bag(self, word_sets: List[set]) -> Dict[str, Any]:
+        """単語集合の転置インデックス（Jaccard係数計算用）"""
+        postings = defaultdict(list)
+        for index, words in enumerate(word_sets):
+            for word in words:
+                postings[word].append(index)
+        return {
+            "postings": {word: np.array(indices, dtype=np.int64) for word, indices in postings.items()},
+            "sizes": np.array([len(words) for words in word_sets], dtype=np.int64)
+        }
+    
+    def _text_similarity_vector(self, corpus: Dict[str, Any], word_bag: Dict[str, Any],
+                                present: np.ndarray, query: str) -> np.ndarray:
+        """_calculate_text_similarityの全動画一括版"""
+        count = len(present)
+        if not query:
+            return np.zeros(count, dtype=np.float64)
+        
+        query_lower = query.lower()
+        query_words = set(query_lower.split())
+        
+        # 部分一致（単語Jaccard）
+        scores = np.zeros(count, dtype=np.float64)
+        if query_words:
+            intersection = np.zeros(count, dtype=np.int64)
+            for word in query_words:
+                indices = word_bag["postings"].get(word)
+                if indices is not None:
+                    intersection[indices] += 1
+            union = word_bag["sizes"] + len(query_words) - intersection
+            nonempty = word_bag["sizes"] > 0
+            scores[nonempty] = intersection[nonempty] / union[nonempty]
+        
+        # 完全一致
+        scores[self._substring_mask(corpus, query_lower)] = 1.0
+        
+        scores[~present] = 0.0
+        return scores
+    
+    def _keyword_column(self, keyword: str) -> np.ndarray:
+        """キーワード（同義語含む）がタイトル・説明文・タグに含まれるかの列"""
+        columns = self.video_features["keyword_columns"]
+        if keyword not in columns:
+            corpus = self.video_features["video_text_corpus"]
+            column = self._substring_mask(corpus, keyword.lower())
+            for synonym in self.keyword_synonyms.get(keyword, []):
+                column = column | self._substring_mask(corpus, synonym.lower())
+            columns[keyword] = column
+        return columns[keyword]
+    
+    def _theme_column(self, keyword: str) -> np.ndarray:
+        """キーワードがテーマに含まれるかの列"""
+        columns = self.video_features["theme_columns"]
+        if keyword not in columns:
+            column = self._substring_mask(self.video_features["theme_corpus"], keyword.lower())
+            columns[keyword] = column & self.video_features["has_themes"]
+        return columns[keyword]
+    
+    def _temporal_relevance_vector(self, temporal_context: Optional[str]) -> np.ndarray:
+        """_calculate_temporal_relevanceの全動画一括版"""
+        features = self.video_features
+        scores = np.full(features["count"], 0.5, dtype=np.float64)
+        if not temporal_context:
+            return scores
+        
+        naive = features["temporal_kind"] == self._TEMPORAL_NAIVE
+        if not naive.any():
+            return scores
+        
+        now = np.datetime64(datetime.now(), "us")
+        days_ago = (now - features["naive_dates"][naive]) // np.timedelta64(1, "D")
+        
+        if temporal_context == "recent":
+            scores[naive] = np.maximum(0.0, 1.0 - days_ago / 365)
+        elif temporal_context == "classic":
+            scores[naive] = np.minimum(1.0, days_ago / 365)
+        elif temporal_context == "trending":
+            scores[naive] = features["trending_score"][naive]
+        
+        return scores
+    
+    def _calculate_relevance_scores(self, semantic_query: SemanticQuery) -> np.ndarray:
+        """全動画の関連性スコアを一括計算（_calculate_relevance_scoreと同一結果）"""
+        # データベースが差し替えられた場合は特徴量を再構築
+        videos = self.knowledge_db.get("videos", {})
+        if (self.video_features.get("source") is not videos or
+                self.video_features.get("count") != len(videos)):
+            self._build_feature_matrix()
+        
+        features = self.video_features
+        count = features["count"]
+        keywords = semantic_query.extracted_keywords
+        
+        title_scores = self._text_similarity_vector(
+            features["title_corpus"], features["title_words"],
+            features["has_title"], semantic_query.normalized_query
+        )
+        artist_scores = self._text_similarity_vector(
+            features["channel_corpus"], features["channel_words"],
+            features["has_channel"], semantic_query.normalized_query
+        )
+        
+        keyword_scores = np.zeros(count, dtype=np.float64)
+        theme_scores = np.zeros(count, dtype=np.float64)
+        if keywords:
+            keyword_matches = np.zeros(count, dtype=np.int64)
+            theme_matches = np.zeros(count, dtype=np.int64)
+            for keyword in keywords:
+                keyword_matches += self._keyword_column(keyword)
+                theme_matches += self._theme_column(keyword)
+            keyword_scores = keyword_matches / len(keywords)
+            theme_scores = theme_matches / len(keywords)
+        
+        temporal_scores = self._temporal_relevance_vector(semantic_query.temporal_context)
+        
+        # 加算順序は_calculate_relevance_scoreと同一（浮動小数点結果を一致させる）
+        total_scores = np.zeros(count, dtype=np.float64)
+        max_score = 0.0
+        for component_scores, weight in ((title_scores, 0.3), (artist_scores, 0.2),
+                                         (keyword_scores, 0.25), (theme_scores, 0.15),
+                                         (temporal_scores, 0.1)):
+            total_scores += component_scores * weight
+            max_score += weight
+        
+        return total_scores / max_score if max_score > 0 else np.zeros(count, dtype=np.float64)
     
     def _load_search_cache(self):
         """検索キャッシュをロード"""
         try:
-            if self.search_cache_path.exists():
-                with open(self.search_cache_path, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    self.search_cache = cache_data.get("searches", {})
-                    self.search_statistics = cache_data.get("statistics", self.search_statistics)
-                print(f"[セマンティック検索] 💾 {len(self.search_cache)}件のキャッシュをロード")
+            self.search_cache.load(self.knowledge_db_fingerprint)
+            if self.search_cache.statistics:
+                statistics = dict(self.search_cache.statistics)
+                statistics["query_types"] = defaultdict(int, statistics.get("query_types", {}))
+                self.search_statistics.update(statistics)
+            print(f"[セマンティック検索] 💾 {len(self.search_cache)}件のキャッシュをロード")
         except Exception as e:
             print(f"[セマンティック検索] ⚠️ キャッシュロードエラー: {e}")
     
-    def _save_search_cache(self):
-        """検索キャッシュを保存"""
+    def _check_knowledge_db_changes(self):
+        """知識DBファイル・ジャーナルの更新を検出し、内容が変わっていれば再ロードとキャッシュ破棄"""
         try:
-            cache_data = {
-                "searches": self.search_cache,
-                "statistics": dict(self.search_statistics),
-                "last_updated": datetime.now().isoformat()
-            }
-            with open(self.search_cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"[セマンティック検索] ⚠️ キャッシュ保存エラー: {e}")
+            signature = stat_signature(self.knowledge_db_path)
+        except OSError:
+            return
+        if signature is None or signature == self._knowledge_db_signature:
+            return
+        
+        previous_fingerprint = self.knowledge_db_fingerprint
+        self._load_knowledge_db()
+        if self.knowledge_db_fingerprint != previous_fingerprint:
+            self.search_cache.invalidate(self.knowledge_db_fingerprint)
+            print("[セマンティック検索] 🔄 知識DB更新を検出: キャッシュを破棄しました")
     
     def parse_semantic_query(self, query: str) -> SemanticQuery:
         """クエリをセマンティック解析"""
@@ -304,10 +795,11 @@ class SemanticSearchEngine:
         """セマンティック検索実行"""
         # キャッシュチェック
         if use_cache:
+            self._check_knowledge_db_changes()
             cache_key = self._generate_cache_key(query, max_results)
-            if cache_key in self.search_cache:
+            cached_results = self.search_cache.get(cache_key)
+            if cached_results is not None:
                 self.search_statistics["cache_hits"] += 1
-                cached_results = self.search_cache[cache_key]
                 return [SearchResult(**result) for result in cached_results]
         
         # セマンティック解析
@@ -323,8 +815,9 @@ class SemanticSearchEngine:
         # キャッシュ保存
         if use_cache:
             cache_key = self._generate_cache_key(query, max_results)
-            self.search_cache[cache_key] = [asdict(result) for result in search_results]
-            self._save_search_cache()
+            statistics = dict(self.search_statistics)
+            statistics["query_types"] = dict(statistics["query_types"])
+            self.search_cache.put(cache_key, [asdict(result) for result in search_results], statistics)
         
         return search_results
     
@@ -335,25 +828,34 @@ class SemanticSearchEngine:
     
     def _execute_semantic_search(self, semantic_query: SemanticQuery, max_results: int) -> List[SearchResult]:
         """セマンティック検索実行"""
-        results = []
+        if max_results <= 0:
+            return []
+        
         videos = self.knowledge_db.get("videos", {})
         
-        for video_id, video_data in videos.items():
-            # 関連性スコア計算
-            relevance_score = self._calculate_relevance_score(video_data, semantic_query)
-            
-            if relevance_score > 0.1:  # 最小閾値
-                # 検索結果作成
-                result = self._create_search_result(
-                    video_id, video_data, semantic_query, relevance_score
-                )
-                results.append(result)
+        # 関連性スコアを全動画一括で計算
+        scores = self._calculate_relevance_scores(semantic_query)
+        candidates = np.flatnonzero(scores > 0.1)  # 最小閾値
+        
+        # 上位候補の選択（境界の同点は全て残し、安定ソートで元の順序を維持）
+        if max_results < len(candidates):
+            candidate_scores = scores[candidates]
+            kth_index = np.argpartition(candidate_scores, -max_results)[-max_results]
+            candidates = candidates[candidate_scores >= candidate_scores[kth_index]]
         
         # スコア順でソート
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
         
         # 結果数制限
-        return results[:max_results]
+        video_ids = self.video_features["video_ids"]
+        results = []
+        for index in candidates[:max_results]:
+            video_id = video_ids[index]
+            results.append(self._create_search_result(
+                video_id, videos[video_id], semantic_query, float(scores[index])
+            ))
+        
+        return results
     
     def _calculate_relevance_score(self, video_data: Dict, semantic_query: SemanticQuery) -> float:
         """関連性スコア計算"""
@@ -590,7 +1092,6 @@ class SemanticSearchEngine:
     def clear_cache(self):
         """キャッシュクリア"""
         self.search_cache.clear()
-        self._save_search_cache()
         print("[セマンティック検索] 🗑️ キャッシュをクリアしました")
     
     def suggest_related_queries(self, query: str) -> List[str]:
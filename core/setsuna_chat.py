@@ -8,6 +8,8 @@ OpenAI GPT統合・キャラクター維持・軽量実装
 import openai
 import os
 import json
+import asyncio
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 import sys
@@ -23,10 +25,17 @@ from memory_system import SimpleMemorySystem
 from enhanced_memory.personality_memory import PersonalityMemory
 from enhanced_memory.collaboration_memory import CollaborationMemory
 from enhanced_memory.memory_integration import MemoryIntegrationSystem
+from core.context_stage_executor import ContextStage, ContextStageExecutor
 
 class SetsunaChat:
-    def __init__(self, memory_mode="normal"):
-        """せつなチャットシステムの初期化"""
+    def __init__(self, memory_mode="normal", enable_response_cache=False):
+        """
+        せつなチャットシステムの初期化
+        
+        Args:
+            memory_mode: 記憶モード ("normal": 通常, "test": テスト)
+            enable_response_cache: 応答キャッシュを有効にするか（文脈の指紋付きキーで照合）
+        """
         # ログシステム初期化
         self.logger = get_logger()
         self.monitor = get_monitor()
@@ -63,6 +72,11 @@ class SetsunaChat:
         # OpenAIクライアント初期化
         self.client = openai.OpenAI(api_key=self.api_key)
         
+        # ストリーミング応答用（非同期クライアントは実行中のイベントループごとに生成）
+        self.async_client = None
+        self._async_client_loop = None
+        self._streaming_cancelled = threading.Event()
+        
         # 新しいプロンプト管理システム初期化
         try:
             self.prompt_manager = PromptManager()
@@ -91,11 +105,14 @@ class SetsunaChat:
         # 応答パターン
         self.response_patterns = {}
         
-        # キャッシュシステム初期化（一時的に無効化）
+        # キャッシュシステム初期化（既定は無効）
         try:
-            # self.response_cache = ResponseCache()
-            self.response_cache = None  # キャッシュを無効化
-            print("[チャット] ⚠️ 応答キャッシュシステム無効化（デバッグ用）")
+            if enable_response_cache:
+                self.response_cache = ResponseCache()
+                print("[チャット] ✅ 応答キャッシュシステム初期化完了")
+            else:
+                self.response_cache = None  # キャッシュを無効化
+                print("[チャット] ⚠️ 応答キャッシュシステム無効化（デバッグ用）")
         except Exception as e:
             print(f"[チャット] ⚠️ キャッシュシステム初期化失敗: {e}")
             self.response_cache = None
@@ -234,6 +251,23 @@ class SetsunaChat:
             print(f"[チャット] ⚠️ 新一貫性チェックシステム初期化失敗: {e}")
             self.new_consistency_checker = None
         
+        # 応答前コンテキスト収集の並列実行器（段階ごとの期限超過はその段階だけ省略）
+        self.context_stage_executor = ContextStageExecutor(
+            max_workers=8,
+            default_deadline=2.0,
+            deadlines={
+                "proactive": 1.0,
+                "conversation_context": 0.5,
+                "knowledge": 4.0,
+                "video": 8.0,
+                "project": 2.0,
+                "memory": 1.0,
+                "personality": 1.0,
+                "collaboration": 1.0,
+                "memory_integration": 2.0
+            }
+        )
+        
         print("[チャット] ✅ せつなチャットシステム初期化完了")
     
     def _load_character_settings(self):
@@ -522,409 +556,747 @@ class SetsunaChat:
         
         summary["total_cost"] = total_cost
         return summary
+    
+    def _response_cache_context(self, mode):
+        """
+        応答キャッシュ用の文脈の指紋を作成
+        
+        応答が依存する状態（モード・永続記憶の内容・動画DBの内容）を畳み込み、
+        いずれかが変わった後は以前の応答にヒットしないようにする。
+        応答キャッシュはディスクに保存されるため、プロセスごとに初期化される
+        カウンタではなく保存内容そのものの指紋を使う
+        
+        Args:
+            mode: レスポンスモード
+            
+        Returns:
+            str: 文脈の指紋
+        """
+        memory_fingerprint = ""
+        if self.memory_system and hasattr(self.memory_system, "get_content_fingerprint"):
+            memory_fingerprint = self.memory_system.get_content_fingerprint()
+        
+        video_db_fingerprint = ""
+        knowledge_manager = getattr(self.context_builder, "knowledge_manager", None) if self.context_builder else None
+        if knowledge_manager is not None and hasattr(knowledge_manager, "get_content_fingerprint"):
+            video_db_fingerprint = knowledge_manager.get_content_fingerprint()
+        
+        return f"mode={mode}|memory={memory_fingerprint}|video_db={video_db_fingerprint}"
+    
+    def _gather_context_stages(self, user_input, mode, is_video_query):
+        """
+        応答前のコンテキスト収集段階を並列実行
+        
+        各段階は互いに独立しており、期限を超えた段階やエラーになった段階は
+        既定値（None / 空文字）に置き換えて、そのプロンプト節を省略する
+        
+        Args:
+            user_input: ユーザーの入力テキスト
+            mode: レスポンスモード
+            is_video_query: 動画関連の入力かどうか
+            
+        Returns:
+            dict: 段階名 → 収集結果
+        """
+        def video_stage():
+            print(f"[チャット] 🔍 YouTube知識検索実行中...")
+            video_context = self.context_builder.process_user_input(user_input)
+            return video_context, getattr(self.context_builder, 'last_built_context', None)
+        
+        def project_stage():
+            print(f"[チャット] 🎯 プロジェクト文脈分析実行中...")
+            project_analysis = self.conversation_project_context.analyze_project_relevance(user_input, "")
+            project_relevance = project_analysis.get("overall_relevance", 0.0)
+            if project_relevance > 0.3:
+                print(f"[チャット] 🎯 プロジェクト関連度: {project_relevance:.2f}")
+                return project_analysis, self.conversation_project_context.get_current_project_context()
+            print(f"[チャット] 🚫 プロジェクト関連度低: {project_relevance:.2f}")
+            return project_analysis, ""
+        
+        def integration_stage():
+            # 高速モードでは関連性のみ、通常モードでは完全統合
+            context_type = "relevant" if mode == "fast_response" else "full"
+            return self.memory_integration.generate_integrated_context(
+                user_input=user_input, context_type=context_type
+            )
+        
+        stages = [
+            ContextStage("proactive", self._check_proactive_opportunity, (user_input, mode)),
+            ContextStage("conversation_context", self._build_conversation_context, (user_input, mode),
+                         default={"user_input": user_input, "mode": mode})
+        ]
+        if self.knowledge_provider:
+            stages.append(ContextStage("knowledge", self.knowledge_provider.get_knowledge_context,
+                                       (user_input, mode)))
+        if self.context_builder and is_video_query and mode == "full_search":
+            stages.append(ContextStage("video", video_stage, default=(None, None)))
+        if self.conversation_project_context and mode == "full_search":
+            stages.append(ContextStage("project", project_stage, default=(None, "")))
+        elif mode == "fast_response":
+            print(f"[チャット] ⚡ 高速モード: プロジェクト分析スキップ")
+        if self.memory_system:
+            stages.append(ContextStage("memory", self.memory_system.get_memory_context))
+        if self.personality_memory:
+            stages.append(ContextStage("personality",
+                                       self.personality_memory.get_personality_context_for_prompt))
+        if self.collaboration_memory:
+            stages.append(ContextStage("collaboration",
+                                       self.collaboration_memory.get_collaboration_context_for_prompt))
+        if self.memory_integration:
+            stages.append(ContextStage("memory_integration", integration_stage))
+        
+        results = self.context_stage_executor.run(stages)
+        
+        for name, result in results.items():
+            if result.status == "timeout":
+                print(f"[チャット] ⏰ {name}段階が期限超過: プロンプトから省略")
+            elif result.status == "busy":
+                print(f"[チャット] ⏰ {name}段階は前回分が処理中: プロンプトから省略")
+            elif result.status == "error":
+                print(f"[チャット] ⚠️ {name}段階エラー: {result.error}")
+        print(f"[チャット] ⏱️ コンテキスト収集: {ContextStageExecutor.format_report(results)}")
+        
+        self.logger.info("setsuna_chat", "_gather_context_stages", "コンテキスト収集完了", {
+            name: {"status": result.status, "latency_ms": round(result.latency * 1000, 1)}
+            for name, result in results.items()
+        })
+        
+        stage_values = {
+            "proactive": None,
+            "conversation_context": {"user_input": user_input, "mode": mode},
+            "knowledge": None,
+            "video": (None, None),
+            "project": (None, ""),
+            "memory": None,
+            "personality": None,
+            "collaboration": None,
+            "memory_integration": None
+        }
+        stage_values.update({name: result.value for name, result in results.items()})
+        return stage_values
+    
+    def get_context_stage_stats(self):
+        """
+        コンテキスト収集段階ごとのレイテンシ統計を取得
+        
+        Returns:
+            dict: 段階名 → {"count", "p50_ms", "p95_ms", "max_ms", "statuses"}
+        """
+        return self.context_stage_executor.get_latency_stats()
 
-    @get_monitor().monitor_function("get_response")
-    def get_response(self, user_input, mode="full_search", memory_mode=None):
+    def _begin_response_turn(self, user_input, mode, caller):
         """
-        ユーザー入力に対するせつなの応答を生成 - 2段階アプローチ
+        応答生成の開始ログと早期キャッシュ確認（get_response / stream_response 共通）
+        
+        キャッシュヒット時はコンテキスト収集をすべて省略できるよう、会話履歴への追加まで行う
         
         Args:
             user_input: ユーザーの入力テキスト
-            mode: レスポンスモード ("full_search": 通常モード, "fast_response": 高速モード)
-            memory_mode: 記憶モード ("normal": 通常, "test": テスト)
+            mode: レスポンスモード
+            caller: ログに記録する呼び出し元メソッド名
             
         Returns:
-            str: せつなの応答テキスト
+            tuple: (キャッシュ済み応答 or None, 応答キャッシュの文脈キー)
         """
-        if not user_input.strip():
-            return "何か話してくれますか？"
+        mode_display = "高速モード" if mode == "fast_response" else "通常モード" 
+        print(f"[チャット] 🤔 考え中 ({mode_display}): '{user_input}'")
         
-        try:
-            mode_display = "高速モード" if mode == "fast_response" else "通常モード" 
-            print(f"[チャット] 🤔 考え中 ({mode_display}): '{user_input}'")
+        self.logger.info("setsuna_chat", caller, f"応答生成開始 ({mode_display})", {
+            "user_input": user_input,
+            "mode": mode,
+            "input_length": len(user_input)
+        })
+        
+        response_cache_context = None
+        if self.response_cache:
+            response_cache_context = self._response_cache_context(mode)
+            cached_response = self.response_cache.get_cached_response(
+                user_input, context_key=response_cache_context
+            )
+            if cached_response:
+                print(f"[チャット] ⚡ キャッシュから高速応答 ({mode}モード)")
+                self.last_context_data = None
+                self._add_to_conversation_history(user_input, cached_response)
+                return cached_response, response_cache_context
+        
+        return None, response_cache_context
+    
+    def _prepare_response_turn(self, user_input, mode, response_cache_context=None):
+        """
+        コンテキスト収集からAPIに渡すメッセージ組み立てまで（get_response / stream_response 共通）
+        
+        ユーザー入力は会話履歴に追加される
+        
+        Args:
+            user_input: ユーザーの入力テキスト
+            mode: レスポンスモード
+            response_cache_context: 応答キャッシュの文脈キー
             
-            self.logger.info("setsuna_chat", "get_response", f"応答生成開始 ({mode_display})", {
-                "user_input": user_input,
+        Returns:
+            dict: messages, model と、応答後の処理で使う収集結果
+        """
+        # === Stage 0〜1.5: 独立したコンテキスト収集を並列実行 ===
+        # 動画関連判定はキーワード照合のみなので先に行い、検索の要否を決める
+        is_video_query = False
+        video_context = None
+        if self.context_builder:
+            is_video_query = self.context_builder.is_video_related_query(user_input)
+            print(f"[チャット] 📊 動画関連判定結果: {is_video_query}")
+        
+        stage_values = self._gather_context_stages(user_input, mode, is_video_query)
+        knowledge_context = stage_values["knowledge"]
+        project_analysis, project_context = stage_values["project"]
+        
+        # Phase 4: 知識プロバイダーによるコンテキスト取得結果
+        if knowledge_context:
+            print(f"[チャット] 🧠 知識コンテキスト取得: {knowledge_context['has_knowledge']}")
+            if knowledge_context.get("processing_time"):
+                print(f"[チャット] ⏱️ 知識処理時間: {knowledge_context['processing_time']:.2f}秒")
+        
+        # 既存のYouTube動画関連処理（互換性維持）
+        if self.context_builder:
+            if is_video_query and mode == "full_search":
+                video_context, video_context_data = stage_values["video"]
+                
+                # コンテキストデータを保存（URL表示用）
+                self.last_context_data = video_context_data
+                if video_context_data:
+                    print(f"[チャット] 🔗 コンテキストデータ保存: DB={len(video_context_data.get('videos', []))}件, 外部={len(video_context_data.get('external_videos', []))}件")
+            elif is_video_query and mode == "fast_response":
+                print(f"[チャット] ⚡ 高速モード: YouTube検索スキップ")
+                self.last_context_data = None
+            else:
+                print(f"[チャット] 🚫 非動画関連: YouTube検索スキップ")
+                self.last_context_data = None
+        
+        # 会話履歴に追加
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_input
+        })
+        
+        # コンテキスト分析
+        context_info = self._analyze_context(user_input)
+        
+        # Stage 2: GPT応答生成（動的プロンプトシステム + Phase 4知識統合）
+        # 新しいプロンプト管理システムを使用
+        if self.prompt_manager:
+            context_info_dict = {
+                "is_video_query": is_video_query,
                 "mode": mode,
-                "input_length": len(user_input)
-            })
+                "user_input": user_input,
+                "project_context": project_context,
+                "project_relevance": project_analysis.get("overall_relevance", 0.0) if project_analysis else 0.0
+            }
+            if is_video_query and video_context:
+                context_info_dict["video_context"] = video_context
             
-            # === Stage 0: プロアクティブ応答判定 ===
-            proactive_suggestion = self._check_proactive_opportunity(user_input, mode)
+            # Phase 4: 知識コンテキストを追加
+            if knowledge_context and knowledge_context.get("has_knowledge"):
+                context_info_dict["knowledge_context"] = knowledge_context
             
-            # === Stage 0.5: 会話コンテキスト構築 ===
-            conversation_context = self._build_conversation_context(user_input, mode)
+            # === Stage 1.7: 主体性判定・意見生成コンテキスト ===
+            opinion_context = self._generate_opinion_context(user_input, context_info_dict)
+            if opinion_context:
+                context_info_dict["opinion_context"] = opinion_context
             
-            # Stage 1: 知識コンテキスト取得（Phase 4統合）
-            knowledge_context = None
-            is_video_query = False
-            video_context_data = None
+            system_prompt = self.prompt_manager.generate_dynamic_prompt(mode, context_info_dict)
+        else:
+            # フォールバック
+            system_prompt = self.fallback_character_prompt
+        
+        # Phase 4: 知識コンテキスト注入
+        if knowledge_context and knowledge_context.get("has_knowledge"):
+            context_injection = knowledge_context.get("context_injection_text", "")
+            if context_injection:
+                system_prompt += f"\n\n【検索・分析知識】\n{context_injection}"
+                print(f"[チャット] 🧠 知識コンテキスト注入完了")
+        
+        # 動画関連の場合、取得済みのコンテキストを追加
+        if is_video_query and video_context:
+            system_prompt += f"\n\n【YouTube動画知識】\n{video_context}"
+            system_prompt += f"\n\n【厳重注意】上記の動画情報のみを使用し、存在しない動画や楽曲について話してはいけません。不明な点は「詳しくは分からないけど」と正直に答えてください。"
+        elif is_video_query and not video_context:
+            # 動画関連だが情報なし - 既存のプロンプト設定を維持
+            system_prompt += f"\n\n【動画・楽曲情報】\n"
+            system_prompt += f"データベースに該当する情報がありません。\n"
+            system_prompt += f"しかし、YouTube知識データベース活用ルールに従い、短く簡潔に自分の音楽的体験や感想を述べてください。\n"
+            system_prompt += f"架空の楽曲は作成せず、「その動画は知らないな」「聞いたことないかも」と正直に答えることも可能です。"
+        
+        # 記憶コンテキストを追加（並列収集済み・期限超過時は省略）
+        memory_context = stage_values["memory"]
+        if memory_context:
+            system_prompt += f"\n\n【記憶・経験】\n{memory_context}"
+        
+        # 個人記憶コンテキストを追加
+        personality_context = stage_values["personality"]
+        if personality_context:
+            system_prompt += f"\n\n【個人的記憶・成長】\n{personality_context}"
+        
+        # 協働記憶コンテキストを追加
+        collaboration_context = stage_values["collaboration"]
+        if collaboration_context:
+            system_prompt += f"\n\n【協働パートナーシップ】\n{collaboration_context}"
+        
+        # 統合記憶コンテキストを追加
+        integrated_context = stage_values["memory_integration"]
+        if integrated_context:
+            system_prompt += f"\n\n【統合記憶分析】\n{integrated_context}"
+        
+        # 長期プロジェクト文脈を追加
+        if project_context:
+            system_prompt += f"\n\n【長期プロジェクト文脈】\n{project_context}"
+        
+        # 基本プロジェクト情報も追加（プロジェクト文脈がない場合）
+        if not project_context and self.project_system:
+            basic_project_context = self.project_system.get_project_context()
+            if basic_project_context:
+                system_prompt += f"\n\n【創作プロジェクト】\n{basic_project_context}"
+        
+        if context_info:
+            system_prompt += f"\n\n【現在の会話コンテキスト】\n{context_info}"
+        
+        messages = [
+            {"role": "system", "content": system_prompt}
+        ]
+        
+        # デバッグ: プロンプトの内容確認
+        print(f"[チャット] 🔍 使用プロンプト確認:")
+        print(f"  - 長さ: {len(system_prompt)}文字")
+        print(f"  - 消極的表現禁止: {'私が直接おすすめできる曲はないけれど' not in system_prompt}")
+        print(f"  - 具体的楽曲推薦: {'私は〜という曲が好きで' in system_prompt}")
+        print(f"  - 質問禁止: {'応答を質問で終わらせることは絶対に禁止' in system_prompt}")
+        if "私が直接おすすめできる曲はないけれど" in system_prompt:
+            print("  ⚠️ 禁止表現が含まれています！")
+        if "私がおすすめできる具体的な曲はないけれど" in system_prompt:
+            print("  ⚠️ 禁止表現が含まれています！")
+        
+        # 最近の会話履歴を追加（最大5往復）
+        recent_history = self.conversation_history[-10:]  # 最新10メッセージ
+        messages.extend(recent_history)
+        
+        return {
+            "messages": messages,
+            "model": self._select_optimal_model(user_input, mode),  # 動的モデル選択
+            "mode": mode,
+            "proactive_suggestion": stage_values["proactive"],
+            "conversation_context": stage_values["conversation_context"],
+            "project_analysis": project_analysis,
+            "response_cache_context": response_cache_context
+        }
+    
+    def _completion_options(self, mode):
+        """
+        モード別の生成パラメーター（get_response / stream_response 共通）
+        
+        Args:
+            mode: レスポンスモード
             
-            # Phase 4: 知識プロバイダーによるコンテキスト取得
-            if self.knowledge_provider:
-                try:
-                    knowledge_context = self.knowledge_provider.get_knowledge_context(user_input, mode)
-                    print(f"[チャット] 🧠 知識コンテキスト取得: {knowledge_context['has_knowledge']}")
-                    if knowledge_context.get("processing_time"):
-                        print(f"[チャット] ⏱️ 知識処理時間: {knowledge_context['processing_time']:.2f}秒")
-                except Exception as e:
-                    print(f"[チャット] ⚠️ 知識コンテキスト取得エラー: {e}")
-            
-            # 既存のYouTube動画関連処理（互換性維持）
-            if self.context_builder:
-                is_video_query = self.context_builder.is_video_related_query(user_input)
-                print(f"[チャット] 📊 動画関連判定結果: {is_video_query}")
-                
-                # 動画関連の場合のみコンテキスト検索実行
-                if is_video_query and mode == "full_search":
-                    print(f"[チャット] 🔍 YouTube知識検索実行中...")
-                    video_context = self.context_builder.process_user_input(user_input)
-                    
-                    # コンテキストデータを保存（URL表示用）
-                    if hasattr(self.context_builder, 'last_built_context'):
-                        video_context_data = self.context_builder.last_built_context
-                        self.last_context_data = video_context_data
-                        print(f"[チャット] 🔗 コンテキストデータ保存: DB={len(video_context_data.get('videos', []))}件, 外部={len(video_context_data.get('external_videos', []))}件")
-                elif is_video_query and mode == "fast_response":
-                    print(f"[チャット] ⚡ 高速モード: YouTube検索スキップ")
-                    video_context = None
-                    self.last_context_data = None
-                else:
-                    print(f"[チャット] 🚫 非動画関連: YouTube検索スキップ")
-                    video_context = None
-                    self.last_context_data = None
+        Returns:
+            dict: chat.completions.create に渡す max_tokens / temperature / timeout
+        """
+        if mode == "ultra_fast":
+            # 超高速モード: 短い完結応答
+            return {
+                "max_tokens": 100,  # 90→100: 超短縮で完結性重視
+                "temperature": 0.3,  # 最安定
+                "timeout": 5  # 最短タイムアウト
+            }
+        if mode == "fast_response":
+            # 高速モード: せつなの標準的な会話長
+            return {
+                "max_tokens": 120,  # 110→120: 短縮で完結性重視
+                "temperature": 0.5,  # より安定したレスポンス
+                "timeout": 10  # 短縮（15→10秒）
+            }
+        # 通常モード: せつなの自然で完全な表現
+        return {
+            "max_tokens": 150,  # 140→150: 適度な短縮で完結性重視
+            "temperature": 0.6,  # 0.7→0.6に調整
+            "timeout": 30  # APIタイムアウト時間（元に戻す）
+        }
+    
+    def _review_response(self, user_input, setsuna_response, turn, allow_correction=True):
+        """
+        生成した応答の一貫性チェック・修正とプロアクティブ要素の追加
+        
+        Args:
+            user_input: ユーザーの入力テキスト
+            setsuna_response: 生成した応答
+            turn: _prepare_response_turn の結果
+            allow_correction: 一貫性チェックによる書き換えを許可するか
+                              （ストリーミングでは読み上げ済みのため False）
             
-            # キャッシュチェック（パフォーマンス向上）
-            cached_response = None
-            if self.response_cache:
-                cache_key = f"{user_input}_{mode}"  # モード別キャッシュ
-                cached_response = self.response_cache.get_cached_response(cache_key)
-                if cached_response:
-                    print(f"[チャット] ⚡ キャッシュから高速応答 ({mode}モード)")
-                    self._add_to_conversation_history(user_input, cached_response)
-                    return cached_response
+        Returns:
+            str: 最終的な応答
+        """
+        # キャラクター一貫性チェック（デバッグ時のみ）
+        if self.consistency_checker:
+            try:
+                consistency_result = self.consistency_checker.check_response_consistency(
+                    user_input, setsuna_response, turn["mode"]
+                )
+                if consistency_result["overall_score"] < 0.6:
+                    print(f"[チャット] ⚠️ 一貫性スコア低下: {consistency_result['overall_score']:.2f}")
+                    if consistency_result["issues"]:
+                        print(f"[チャット] 主な問題: {', '.join(consistency_result['issues'][:2])}")
+            except Exception as e:
+                print(f"[チャット] ⚠️ 一貫性チェックエラー: {e}")
+        
+        # === Stage 2.5: 新一貫性チェック・修正 ===
+        if self.new_consistency_checker:
+            try:
+                consistency_result = self.new_consistency_checker.check_response_consistency(
+                    user_input, setsuna_response, turn["conversation_context"]
+                )
+                
+                if consistency_result.get("needs_correction", False):
+                    if allow_correction:
+                        print(f"[チャット] 🔧 主体性一貫性修正実行中...")
+                        original_response = setsuna_response
+                        setsuna_response = self.new_consistency_checker.correct_response_if_needed(
+                            setsuna_response, consistency_result
+                        )
+                        if setsuna_response != original_response:
+                            print(f"[チャット] ✅ 応答修正完了")
+                    else:
+                        print(f"[チャット] 🔧 主体性一貫性: 送信済みの応答のため修正をスキップ")
+                
+                print(f"[チャット] 📊 主体性スコア: {consistency_result.get('overall_score', 0):.2f}")
+                
+            except Exception as e:
+                print(f"[チャット] ⚠️ 新一貫性チェックエラー: {e}")
+        
+        # === Stage 2.7: プロアクティブ要素の追加 ===
+        if turn["proactive_suggestion"]:
+            setsuna_response = self._enhance_response_with_proactive_elements(
+                setsuna_response, turn["proactive_suggestion"]
+            )
+        
+        return setsuna_response
+    
+    def _record_response_turn(self, user_input, setsuna_response, turn):
+        """
+        応答を会話履歴・キャッシュ・各記憶システムに記録（get_response / stream_response 共通）
+        
+        Args:
+            user_input: ユーザーの入力テキスト
+            setsuna_response: 最終的な応答
+            turn: _prepare_response_turn の結果
+        """
+        # Phase 1: URL表示機能 - SetsunaChat内では処理をスキップ
+        # （重複を避けるため、呼び出し元で処理される）
+        
+        # 会話履歴に追加
+        self.conversation_history.append({
+            "role": "assistant", 
+            "content": setsuna_response
+        })
+        
+        # 新しい応答をキャッシュに保存（生成時の文脈の指紋で登録）
+        if self.response_cache:
+            self.response_cache.cache_response(
+                user_input, setsuna_response, context_key=turn["response_cache_context"]
+            )
+        
+        # 会話履歴を即座に保存
+        self._save_conversation_immediately(user_input, setsuna_response)
+        
+        # 記憶システムに会話を記録
+        if self.memory_system:
+            self.memory_system.process_conversation(user_input, setsuna_response)
+        
+        # 個人記憶システムで会話を分析・記録
+        if self.personality_memory:
+            self.personality_memory.analyze_conversation_for_experience(user_input, setsuna_response)
+        
+        # 協働記憶システムで会話を分析
+        if self.collaboration_memory:
+            # 応答品質評価（簡易版）
+            response_quality = self._assess_response_quality(setsuna_response)
+            understanding_level = self._assess_understanding_level(user_input, setsuna_response)
+            self.collaboration_memory.analyze_communication_style(
+                user_input, response_quality, understanding_level
+            )
+        
+        # 記憶統合分析（新しい関係性発見）
+        if self.memory_integration:
+            # 定期的な記憶関係性分析（10回に1回）
+            if len(self.conversation_history) % 20 == 0:  # 10往復に1回
+                print("[統合記憶] 🔍 記憶関係性分析実行中...")
+                analysis_stats = self.memory_integration.analyze_memory_relationships()
+                if analysis_stats.get("total_relationships", 0) > 0:
+                    print(f"[統合記憶] ✅ 新たな関係性を発見: {analysis_stats['total_relationships']}件")
+                    # 新発見の関係性を保存
+                    self.memory_integration.save_integration_data()
+        
+        # プロジェクト関連会話を分析
+        if self.project_system:
+            self.project_system.analyze_conversation_for_projects(user_input, setsuna_response)
+        
+        # 会話プロジェクト文脈を更新
+        if self.conversation_project_context:
+            project_analysis = turn["project_analysis"]
+            try:
+                # プロジェクト分析結果を使って文脈更新
+                update_success = self.conversation_project_context.update_conversation_context(
+                    user_input, setsuna_response, project_analysis
+                )
+                if update_success:
+                    print("[プロジェクト文脈] ✅ 会話文脈更新完了")
+                    # 文脈データを保存
+                    self.conversation_project_context.save_context_data()
+                
+                # 長期プロジェクト記憶への記録
+                if self.long_term_memory and project_analysis and project_analysis.get("overall_relevance", 0) > 0.5:
+                    # プロジェクト関連の会話として記憶に記録
+                    active_matches = project_analysis.get("active_project_matches", [])
+                    for match in active_matches[:1]:  # 最も関連度の高いプロジェクトのみ
+                        project_id = match["project_id"]
+                        
+                        # 文脈スナップショット保存
+                        snapshot_success = self.long_term_memory.capture_context_snapshot(
+                            project_id, "conversation"
+                        )
+                        if snapshot_success:
+                            print(f"[長期記憶] ✅ プロジェクト文脈スナップショット保存: {project_id}")
             
-            # 会話履歴に追加
+            except Exception as e:
+                print(f"[プロジェクト文脈] ⚠️ 文脈更新エラー: {e}")
+    
+    def _record_interrupted_turn(self, user_input, partial_response):
+        """
+        中断したストリーミング応答を会話履歴に記録（キャッシュ・記憶システムには記録しない）
+        
+        Args:
+            user_input: ユーザーの入力テキスト
+            partial_response: 中断までに受信した応答
+        """
+        partial_response = partial_response.strip()
+        if partial_response:
             self.conversation_history.append({
-                "role": "user",
-                "content": user_input
+                "role": "assistant",
+                "content": partial_response
             })
+            print(f"[チャット] ✋ 応答中断: 受信済みの{len(partial_response)}文字を会話履歴に記録")
+        elif self.conversation_history and self.conversation_history[-1] == {"role": "user", "content": user_input}:
+            # 応答が届く前の中断はユーザー入力ごと取り消す
+            self.conversation_history.pop()
+            print("[チャット] ✋ 応答中断: 応答受信前のため会話履歴から除外")
+    
+    def _fallback_response(self):
+        """エラー時のフォールバック応答"""
+        fallback_responses = [
+            "すみません、ちょっと考えがまとまらなくて...",
+            "うーん、今うまく答えられないかも。",
+            "少し調子が悪いみたいです。もう一度聞いてもらえますか？"
+        ]
+        
+        import random
+        return random.choice(fallback_responses)
+
+    @get_monitor().monitor_function("get_response")
+    def get_response(self, user_input, mode="full_search", memory_mode=None):
+        """
+        ユーザー入力に対するせつなの応答を生成 - 2段階アプローチ
+        
+        Args:
+            user_input: ユーザーの入力テキスト
+            mode: レスポンスモード ("full_search": 通常モード, "fast_response": 高速モード)
+            memory_mode: 記憶モード ("normal": 通常, "test": テスト)
             
-            # Stage 1.5: プロジェクト文脈分析
-            project_context = ""
-            project_analysis = None
-            
-            if self.conversation_project_context and mode == "full_search":
-                print(f"[チャット] 🎯 プロジェクト文脈分析実行中...")
-                try:
-                    project_analysis = self.conversation_project_context.analyze_project_relevance(user_input, "")
-                    project_relevance = project_analysis.get("overall_relevance", 0.0)
-                    
-                    if project_relevance > 0.3:
-                        project_context = self.conversation_project_context.get_current_project_context()
-                        print(f"[チャット] 🎯 プロジェクト関連度: {project_relevance:.2f}")
-                    else:
-                        print(f"[チャット] 🚫 プロジェクト関連度低: {project_relevance:.2f}")
-                        
-                except Exception as e:
-                    print(f"[チャット] ⚠️ プロジェクト文脈分析エラー: {e}")
-            elif mode == "fast_response":
-                print(f"[チャット] ⚡ 高速モード: プロジェクト分析スキップ")
+        Returns:
+            str: せつなの応答テキスト
+        """
+        if not user_input.strip():
+            return "何か話してくれますか？"
+        
+        try:
+            # === 早期キャッシュ確認: ヒット時はコンテキスト収集をすべて省略 ===
+            cached_response, response_cache_context = self._begin_response_turn(user_input, mode, "get_response")
+            if cached_response:
+                return cached_response
             
-            # コンテキスト分析
-            context_info = self._analyze_context(user_input)
+            # === Stage 0〜2: コンテキスト収集・プロンプト構築 ===
+            turn = self._prepare_response_turn(user_input, mode, response_cache_context)
             
-            # Stage 2: GPT応答生成（動的プロンプトシステム + Phase 4知識統合）
-            # 新しいプロンプト管理システムを使用
-            if self.prompt_manager:
-                context_info_dict = {
-                    "is_video_query": is_video_query,
-                    "mode": mode,
-                    "user_input": user_input,
-                    "project_context": project_context,
-                    "project_relevance": project_analysis.get("overall_relevance", 0.0) if project_analysis else 0.0
-                }
-                if is_video_query and video_context:
-                    context_info_dict["video_context"] = video_context
-                
-                # Phase 4: 知識コンテキストを追加
-                if knowledge_context and knowledge_context.get("has_knowledge"):
-                    context_info_dict["knowledge_context"] = knowledge_context
-                
-                # === Stage 1.7: 主体性判定・意見生成コンテキスト ===
-                opinion_context = self._generate_opinion_context(user_input, context_info_dict)
-                if opinion_context:
-                    context_info_dict["opinion_context"] = opinion_context
-                
-                system_prompt = self.prompt_manager.generate_dynamic_prompt(mode, context_info_dict)
-            else:
-                # フォールバック - プロンプトマネージャーのフォールバックを使用
-                if self.prompt_manager:
-                    system_prompt = self.prompt_manager._get_fallback_prompt()
-                else:
-                    system_prompt = self.fallback_character_prompt
+            # OpenAI API呼び出し（高速モードでは設定を最適化）
+            start_time = datetime.now()
+            response = self.client.chat.completions.create(
+                model=turn["model"],
+                messages=turn["messages"],
+                **self._completion_options(mode)
+            )
             
-            # Phase 4: 知識コンテキスト注入
-            if knowledge_context and knowledge_context.get("has_knowledge"):
-                context_injection = knowledge_context.get("context_injection_text", "")
-                if context_injection:
-                    system_prompt += f"\n\n【検索・分析知識】\n{context_injection}"
-                    print(f"[チャット] 🧠 知識コンテキスト注入完了")
+            # 応答取得
+            setsuna_response = response.choices[0].message.content.strip()
             
-            # 動画関連の場合、取得済みのコンテキストを追加
-            if is_video_query and video_context:
-                system_prompt += f"\n\n【YouTube動画知識】\n{video_context}"
-                system_prompt += f"\n\n【厳重注意】上記の動画情報のみを使用し、存在しない動画や楽曲について話してはいけません。不明な点は「詳しくは分からないけど」と正直に答えてください。"
-            elif is_video_query and not video_context:
-                # 動画関連だが情報なし - 既存のプロンプト設定を維持
-                system_prompt += f"\n\n【動画・楽曲情報】\n"
-                system_prompt += f"データベースに該当する情報がありません。\n"
-                system_prompt += f"しかし、YouTube知識データベース活用ルールに従い、短く簡潔に自分の音楽的体験や感想を述べてください。\n"
-                system_prompt += f"架空の楽曲は作成せず、「その動画は知らないな」「聞いたことないかも」と正直に答えることも可能です。"
+            # コスト追跡
+            self._track_api_usage(turn["model"], response)
             
-            # 記憶コンテキストを追加
-            if self.memory_system:
-                memory_context = self.memory_system.get_memory_context()
-                if memory_context:
-                    system_prompt += f"\n\n【記憶・経験】\n{memory_context}"
+            # === Stage 2.5〜2.7: 一貫性チェック・修正、プロアクティブ要素の追加 ===
+            setsuna_response = self._review_response(user_input, setsuna_response, turn)
             
-            # 個人記憶コンテキストを追加
-            if self.personality_memory:
-                personality_context = self.personality_memory.get_personality_context_for_prompt()
-                if personality_context:
-                    system_prompt += f"\n\n【個人的記憶・成長】\n{personality_context}"
-            
-            # 協働記憶コンテキストを追加
-            if self.collaboration_memory:
-                collaboration_context = self.collaboration_memory.get_collaboration_context_for_prompt()
-                if collaboration_context:
-                    system_prompt += f"\n\n【協働パートナーシップ】\n{collaboration_context}"
-            
-            # 統合記憶コンテキストを追加
-            if self.memory_integration:
-                # 高速モードでは関連性のみ、通常モードでは完全統合
-                context_type = "relevant" if mode == "fast_response" else "full"
-                integrated_context = self.memory_integration.generate_integrated_context(
-                    user_input=user_input, context_type=context_type
-                )
-                if integrated_context:
-                    system_prompt += f"\n\n【統合記憶分析】\n{integrated_context}"
+            # 応答時間計算
+            response_time = (datetime.now() - start_time).total_seconds()
+            print(f"[チャット] ✅ 応答生成完了: {response_time:.2f}s")
             
-            # 長期プロジェクト文脈を追加
-            if project_context:
-                system_prompt += f"\n\n【長期プロジェクト文脈】\n{project_context}"
+            self._record_response_turn(user_input, setsuna_response, turn)
             
-            # 基本プロジェクト情報も追加（プロジェクト文脈がない場合）
-            if not project_context and self.project_system:
-                basic_project_context = self.project_system.get_project_context()
-                if basic_project_context:
-                    system_prompt += f"\n\n【創作プロジェクト】\n{basic_project_context}"
+            return setsuna_response
             
-            if context_info:
-                system_prompt += f"\n\n【現在の会話コンテキスト】\n{context_info}"
+        except Exception as e:
+            error_msg = f"[チャット] ❌ エラー: {e}"
+            print(error_msg)
             
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
+            # エラー時のフォールバック応答
+            return self._fallback_response()
+    
+    def _get_async_client(self):
+        """
+        実行中のイベントループ用の非同期OpenAIクライアント
+        
+        接続プールはイベントループに紐づくため、ループが変わった場合は作り直す
+        （接続先・APIキーは同期クライアントと同じ）
+        """
+        loop = asyncio.get_running_loop()
+        if self.async_client is None or self._async_client_loop is not loop:
+            self.async_client = openai.AsyncOpenAI(api_key=self.client.api_key, base_url=self.client.base_url)
+            self._async_client_loop = loop
+        return self.async_client
+    
+    async def stream_response(self, user_input, mode="full_search"):
+        """
+        ユーザー入力に対するせつなの応答をトークン単位で生成（非同期ジェネレーター）
+        
+        プロンプト構築・記録処理は get_response と共通で、同期的なコンテキスト収集と記録処理は
+        イベントループを止めないようエグゼキューターで実行する。
+        cancel_streaming_response() またはタスクのキャンセルで中断でき、中断時は受信済みの
+        部分応答だけを会話履歴に残す（キャッシュ・記憶システムには記録しない）。
+        送信済みの本文は書き換えられないため一貫性チェックによる修正は行わず、
+        プロアクティブ要素は本文の後に続けて返す
+        
+        Args:
+            user_input: ユーザーの入力テキスト
+            mode: レスポンスモード ("full_search", "fast_response", "ultra_fast")
             
-            # デバッグ: プロンプトの内容確認
-            print(f"[チャット] 🔍 使用プロンプト確認:")
-            print(f"  - 長さ: {len(system_prompt)}文字")
-            print(f"  - 消極的表現禁止: {'私が直接おすすめできる曲はないけれど' not in system_prompt}")
-            print(f"  - 具体的楽曲推薦: {'私は〜という曲が好きで' in system_prompt}")
-            print(f"  - 質問禁止: {'応答を質問で終わらせることは絶対に禁止' in system_prompt}")
-            if "私が直接おすすめできる曲はないけれど" in system_prompt:
-                print("  ⚠️ 禁止表現が含まれています！")
-            if "私がおすすめできる具体的な曲はないけれど" in system_prompt:
-                print("  ⚠️ 禁止表現が含まれています！")
-            
-            # GPT応答生成（キャッシュがある場合はスキップ）
+        Yields:
+            str: 受信した応答テキストの断片
+        """
+        if not user_input.strip():
+            yield "何か話してくれますか？"
+            return
+        
+        loop = asyncio.get_running_loop()
+        self._streaming_cancelled.clear()
+        
+        turn = None
+        prepare_future = None
+        stream = None
+        stream_finished = False
+        recorded = False
+        received_parts = []
+        try:
+            # === 早期キャッシュ確認: ヒット時はキャッシュ済み応答をそのまま返す ===
+            cached_response, response_cache_context = await loop.run_in_executor(
+                None, self._begin_response_turn, user_input, mode, "stream_response"
+            )
             if cached_response:
-                setsuna_response = cached_response
-                print(f"[チャット] ⚡ キャッシュ応答使用、YouTube検索のみ実行")
-            else:
-                # 最近の会話履歴を追加（最大5往復）
-                recent_history = self.conversation_history[-10:]  # 最新10メッセージ
-                messages.extend(recent_history)
-                
-                # OpenAI API呼び出し（高速モードでは設定を最適化）
-                start_time = datetime.now()
-                
-                # 動的モデル選択
-                selected_model = self._select_optimal_model(user_input, mode)
-                
-                if mode == "ultra_fast":
-                    # 超高速モード: 短い完結応答
-                    response = self.client.chat.completions.create(
-                        model=selected_model,
-                        messages=messages,
-                        max_tokens=100,  # 90→100: 超短縮で完結性重視
-                        temperature=0.3,  # 最安定
-                        timeout=5  # 最短タイムアウト
-                    )
-                elif mode == "fast_response":
-                    # 高速モード: せつなの標準的な会話長
-                    response = self.client.chat.completions.create(
-                        model=selected_model,
-                        messages=messages,
-                        max_tokens=120,  # 110→120: 短縮で完結性重視
-                        temperature=0.5,  # より安定したレスポンス
-                        timeout=10  # 短縮（15→10秒）
-                    )
-                else:
-                    # 通常モード: せつなの自然で完全な表現
-                    response = self.client.chat.completions.create(
-                        model=selected_model,
-                        messages=messages,
-                        max_tokens=150,  # 140→150: 適度な短縮で完結性重視
-                        temperature=0.6,  # 0.7→0.6に調整
-                        timeout=30  # APIタイムアウト時間（元に戻す）
-                    )
-                
-                # 応答取得
-                setsuna_response = response.choices[0].message.content.strip()
-                
-                # コスト追跡
-                self._track_api_usage(selected_model, response)
-                
-                # キャラクター一貫性チェック（デバッグ時のみ）
-                if self.consistency_checker:
-                    try:
-                        consistency_result = self.consistency_checker.check_response_consistency(
-                            user_input, setsuna_response, mode
-                        )
-                        if consistency_result["overall_score"] < 0.6:
-                            print(f"[チャット] ⚠️ 一貫性スコア低下: {consistency_result['overall_score']:.2f}")
-                            if consistency_result["issues"]:
-                                print(f"[チャット] 主な問題: {', '.join(consistency_result['issues'][:2])}")
-                    except Exception as e:
-                        print(f"[チャット] ⚠️ 一貫性チェックエラー: {e}")
-                
-                # === Stage 2.5: 新一貫性チェック・修正 ===
-                if self.new_consistency_checker:
-                    try:
-                        consistency_result = self.new_consistency_checker.check_response_consistency(
-                            user_input, setsuna_response, conversation_context
-                        )
-                        
-                        if consistency_result.get("needs_correction", False):
-                            print(f"[チャット] 🔧 主体性一貫性修正実行中...")
-                            original_response = setsuna_response
-                            setsuna_response = self.new_consistency_checker.correct_response_if_needed(
-                                setsuna_response, consistency_result
-                            )
-                            if setsuna_response != original_response:
-                                print(f"[チャット] ✅ 応答修正完了")
-                        
-                        print(f"[チャット] 📊 主体性スコア: {consistency_result.get('overall_score', 0):.2f}")
-                        
-                    except Exception as e:
-                        print(f"[チャット] ⚠️ 新一貫性チェックエラー: {e}")
-                
-                # === Stage 2.7: プロアクティブ要素の追加 ===
-                if proactive_suggestion:
-                    setsuna_response = self._enhance_response_with_proactive_elements(
-                        setsuna_response, proactive_suggestion
-                    )
-                
-                # 応答時間計算
-                response_time = (datetime.now() - start_time).total_seconds()
-                print(f"[チャット] ✅ 応答生成完了: {response_time:.2f}s")
-            
-            # Phase 1: URL表示機能 - SetsunaChat内では処理をスキップ
-            # （重複を避けるため、呼び出し元で処理される）
-            
-            # 会話履歴に追加（キャッシュヒット時は既に追加済みのためスキップ）
-            if not cached_response:
-                self.conversation_history.append({
-                    "role": "assistant", 
-                    "content": setsuna_response
-                })
-                
-                # 新しい応答をキャッシュに保存（モード別キャッシュ）
-                if self.response_cache:
-                    cache_key = f"{user_input}_{mode}"
-                    self.response_cache.cache_response(cache_key, setsuna_response)
-                
-                # 会話履歴を即座に保存
-                self._save_conversation_immediately(user_input, setsuna_response)
+                yield cached_response
+                return
             
-            # 記憶システムに会話を記録
-            if self.memory_system:
-                self.memory_system.process_conversation(user_input, setsuna_response)
-            
-            # 個人記憶システムで会話を分析・記録
-            if self.personality_memory:
-                self.personality_memory.analyze_conversation_for_experience(user_input, setsuna_response)
-            
-            # 協働記憶システムで会話を分析
-            if self.collaboration_memory:
-                # 応答品質評価（簡易版）
-                response_quality = self._assess_response_quality(setsuna_response)
-                understanding_level = self._assess_understanding_level(user_input, setsuna_response)
-                self.collaboration_memory.analyze_communication_style(
-                    user_input, response_quality, understanding_level
-                )
-            
-            # 記憶統合分析（新しい関係性発見）
-            if self.memory_integration:
-                # 定期的な記憶関係性分析（10回に1回）
-                if len(self.conversation_history) % 20 == 0:  # 10往復に1回
-                    print("[統合記憶] 🔍 記憶関係性分析実行中...")
-                    analysis_stats = self.memory_integration.analyze_memory_relationships()
-                    if analysis_stats.get("total_relationships", 0) > 0:
-                        print(f"[統合記憶] ✅ 新たな関係性を発見: {analysis_stats['total_relationships']}件")
-                        # 新発見の関係性を保存
-                        self.memory_integration.save_integration_data()
+            # === Stage 0〜2: コンテキスト収集・プロンプト構築（get_response と共通） ===
+            # タスクがキャンセルされてもワーカーは止まらないため、完了を finally で待てるよう保護する
+            prepare_future = loop.run_in_executor(
+                None, self._prepare_response_turn, user_input, mode, response_cache_context
+            )
+            turn = await asyncio.shield(prepare_future)
+            if self._streaming_cancelled.is_set():
+                return
             
-            # プロジェクト関連会話を分析
-            if self.project_system:
-                self.project_system.analyze_conversation_for_projects(user_input, setsuna_response)
+            start_time = datetime.now()
+            first_token_time = None
+            usage_chunk = None
+            stream = await self._get_async_client().chat.completions.create(
+                model=turn["model"],
+                messages=turn["messages"],
+                stream=True,
+                stream_options={"include_usage": True},
+                **self._completion_options(mode)
+            )
+            async for chunk in stream:
+                if self._streaming_cancelled.is_set():
+                    break
+                if chunk.usage:
+                    usage_chunk = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token_time is None:
+                        first_token_time = (datetime.now() - start_time).total_seconds()
+                        print(f"[チャット] 📡 最初のトークン受信: {first_token_time:.2f}s")
+                    received_parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+            else:
+                stream_finished = True
+            if not stream_finished:
+                return
+            
+            # コスト追跡（最後のチャンクに使用量が含まれる）
+            if usage_chunk:
+                self._track_api_usage(turn["model"], usage_chunk)
+            
+            # === Stage 2.5〜2.7: 一貫性チェック（修正なし）、プロアクティブ要素の追加 ===
+            streamed_response = "".join(received_parts).strip()
+            setsuna_response = await loop.run_in_executor(
+                None, self._review_response, user_input, streamed_response, turn, False
+            )
+            if setsuna_response != streamed_response and setsuna_response.startswith(streamed_response):
+                yield setsuna_response[len(streamed_response):]
+            else:
+                setsuna_response = streamed_response
             
-            # 会話プロジェクト文脈を更新
-            if self.conversation_project_context and not cached_response:
-                try:
-                    # プロジェクト分析結果を使って文脈更新
-                    update_success = self.conversation_project_context.update_conversation_context(
-                        user_input, setsuna_response, project_analysis
-                    )
-                    if update_success:
-                        print("[プロジェクト文脈] ✅ 会話文脈更新完了")
-                        # 文脈データを保存
-                        self.conversation_project_context.save_context_data()
-                    
-                    # 長期プロジェクト記憶への記録
-                    if self.long_term_memory and project_analysis and project_analysis.get("overall_relevance", 0) > 0.5:
-                        # プロジェクト関連の会話として記憶に記録
-                        active_matches = project_analysis.get("active_project_matches", [])
-                        for match in active_matches[:1]:  # 最も関連度の高いプロジェクトのみ
-                            project_id = match["project_id"]
-                            
-                            # 文脈スナップショット保存
-                            snapshot_success = self.long_term_memory.capture_context_snapshot(
-                                project_id, "conversation"
-                            )
-                            if snapshot_success:
-                                print(f"[長期記憶] ✅ プロジェクト文脈スナップショット保存: {project_id}")
-                
-                except Exception as e:
-                    print(f"[プロジェクト文脈] ⚠️ 文脈更新エラー: {e}")
+            response_time = (datetime.now() - start_time).total_seconds()
+            print(f"[チャット] ✅ ストリーミング応答生成完了: {response_time:.2f}s")
             
-            return setsuna_response
+            recorded = True
+            await loop.run_in_executor(None, self._record_response_turn, user_input, setsuna_response, turn)
             
         except Exception as e:
-            error_msg = f"[チャット] ❌ エラー: {e}"
-            print(error_msg)
+            print(f"[チャット] ❌ ストリーミングエラー: {e}")
             
-            # エラー時のフォールバック応答
-            fallback_responses = [
-                "すみません、ちょっと考えがまとまらなくて...",
-                "うーん、今うまく答えられないかも。",
-                "少し調子が悪いみたいです。もう一度聞いてもらえますか？"
-            ]
-            
-            import random
-            return random.choice(fallback_responses)
+            # 応答を返し始める前のエラーはフォールバック応答で置き換える
+            if not received_parts:
+                yield self._fallback_response()
+        
+        finally:
+            if stream is not None and not stream_finished:
+                await stream.close()
+            if turn is None and prepare_future is not None:
+                # プロンプト構築中の中断: 会話履歴へのユーザー入力の追加を待ってから取り消す
+                try:
+                    turn = await prepare_future
+                except Exception:
+                    pass
+            if turn is not None and not recorded:
+                if self._streaming_cancelled.is_set():
+                    print("[チャット] ✋ ストリーミング応答を中断")
+                self._record_interrupted_turn(user_input, "".join(received_parts))
+    
+    def get_streaming_response_internal(self, user_input, mode="full_search"):
+        """
+        StreamingResponseSystem 用のトークンストリーム
+        
+        Returns:
+            AsyncIterator[str]: stream_response の非同期ジェネレーター
+        """
+        return self.stream_response(user_input, mode)
+    
+    def cancel_streaming_response(self):
+        """
+        生成中のストリーミング応答を中断（GUIスレッドなど別スレッドからも呼び出し可能）
+        
+        次のチャンク受信時に生成を止め、APIとの接続を閉じる
+        """
+        self._streaming_cancelled.set()
     
     def _analyze_context(self, user_input):
         """ユーザー入力のコンテキストを分析"""
@@ -1172,6 +1544,9 @@ class SetsunaChat:
             print(f"[チャット] 💬 直接応答生成開始: {mode}")
             print(f"[チャット] 💬 ユーザー入力: {user_input[:300]}...")
             
+            # 応答キャッシュ用の文脈の指紋（動画検索を伴う通常応答とは区別する）
+            response_cache_context = f"{self._response_cache_context(mode)}|direct"
+            
             # 会話履歴に追加
             self.conversation_history.append({
                 "role": "user",
@@ -1247,7 +1622,9 @@ class SetsunaChat:
             
             # キャッシュに保存
             if self.response_cache:
-                self.response_cache.cache_response(user_input, setsuna_response)
+                self.response_cache.cache_response(
+                    user_input, setsuna_response, context_key=response_cache_context
+                )
             
             # 記憶システムに会話を記録
             if self.memory_system:
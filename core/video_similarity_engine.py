@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VideoSimilarityEngine - 動画間類似度のブロック単位ベクトル計算
+ジャンル・テーマを疎な2値行列、アーティスト・ムードをポスティング（one-hot行列）にし、
+行列積で「何かを共有する」候補ペアだけを抽出してから、候補のJaccard係数・類似度を
+配列演算でまとめて計算する（KnowledgeGraphSystem._calculate_video_similarity と同じ値）
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+class VideoSimilarityEngine:
+    """動画間類似度のベクトル計算エンジン
+
+    類似度は KnowledgeGraphSystem._calculate_video_similarity と同じ式・同じ加算順で計算するため、
+    閾値判定・エッジ強度は従来のペアごとの計算と浮動小数点レベルで一致する。
+
+    アーティスト・ジャンル・テーマ・ムードのいずれも共有しないペアの類似度は
+    「ムード不一致」の DIFFERENT_MOOD_SIMILARITY 以下にしかならないため、閾値がそれ以上なら
+    共有のあるペアだけを候補にしても結果は変わらない（閾値が低い場合はムードを持つペアも候補にする）。
+    """
+
+    # _calculate_video_similarity のムード不一致時の類似度
+    DIFFERENT_MOOD_SIMILARITY = 0.3
+
+    def __init__(self, relationship_weights: Dict[str, float], threshold: float = 0.3, block_size: int = 256):
+        """
+        Args:
+            relationship_weights: KnowledgeGraphSystem.relationship_weights
+            threshold: エッジを張る類似度の閾値（この値より大きいペアを返す）
+            block_size: 1回の行列積で処理する動画数（メモリ使用量の上限を決める）
+        """
+        if not SCIPY_AVAILABLE:
+            raise ImportError("scipy が必要です: pip install scipy")
+
+        self.artist_weight = relationship_weights["same_artist"]
+        self.genre_weight = relationship_weights["same_genre"]
+        self.theme_weight = relationship_weights["same_theme"]
+        self.mood_weight = relationship_weights["similar_mood"]
+        self.threshold = threshold
+        self.block_size = max(1, block_size)
+
+        # 統計
+        self.candidate_pairs = 0
+        self.similar_pairs = 0
+
+    @staticmethod
+    def _encode_labels(values: Sequence[Any]) -> np.ndarray:
+        """単一ラベルを整数コード化（空の値は-1）"""
+        vocabulary: Dict[Hashable, int] = {}
+        codes = np.full(len(values), -1, dtype=np.int64)
+        for i, value in enumerate(values):
+            if value:
+                codes[i] = vocabulary.setdefault(value, len(vocabulary))
+        return codes
+
+    @staticmethod
+    def _binary_matrix(item_lists: Sequence[Sequence[Hashable]]) -> 'sparse.csr_matrix':
+        """集合の列を疎な2値行列（動画×語彙）に変換"""
+        vocabulary: Dict[Hashable, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        for items in item_lists:
+            columns = {vocabulary.setdefault(item, len(vocabulary)) for item in set(items)}
+            indices.extend(sorted(columns))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.int32)
+        return sparse.csr_matrix((data, np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+                                 shape=(len(item_lists), max(1, len(vocabulary))))
+
+    @staticmethod
+    def _postings_matrix(codes: np.ndarray) -> 'sparse.csr_matrix':
+        """ラベルコードをone-hot行列に変換（コード-1の動画は空行）"""
+        rows = np.flatnonzero(codes >= 0)
+        data = np.ones(len(rows), dtype=np.int32)
+        return sparse.csr_matrix((data, (rows, codes[rows])),
+                                 shape=(len(codes), max(1, int(codes.max(initial=-1)) + 1)))
+
+    def find_similar_pairs(self, attributes: Sequence[Dict[str, Any]],
+                           query_indices: Optional[Sequence[int]] = None) -> List[Tuple[int, int, float]]:
+        """
+        類似度が閾値を超える動画ペアを抽出
+
+        Args:
+            attributes: 動画ノードの attributes のリスト
+            query_indices: 指定した動画を含むペアだけを抽出（差分更新用、None=全ペア）
+
+        Returns:
+            List[Tuple[int, int, float]]: (i, j, 類似度) のリスト（i < j、(i, j) の昇順）
+        """
+        count = len(attributes)
+        self.candidate_pairs = 0
+        self.similar_pairs = 0
+        if count < 2:
+            return []
+
+        artists = self._encode_labels([attrs.get("artist") for attrs in attributes])
+        moods = self._encode_labels([attrs.get("mood", "") for attrs in attributes])
+        genres = self._binary_matrix([attrs.get("genres", []) for attrs in attributes])
+        themes = self._binary_matrix([attrs.get("themes", []) for attrs in attributes])
+        genre_counts = np.diff(genres.indptr)
+        theme_counts = np.diff(themes.indptr)
+
+        # 候補抽出用の共有行列（アーティスト・ジャンル・テーマ・ムードのいずれかを共有すれば非ゼロ）
+        postings = [genres, themes, self._postings_matrix(artists), self._postings_matrix(moods)]
+        if self.threshold < self.DIFFERENT_MOOD_SIMILARITY:
+            # ムード不一致だけで閾値を超えうるため、ムードを持つ動画同士もすべて候補にする
+            postings.append(self._postings_matrix(np.where(moods >= 0, 0, -1)))
+        shared = sparse.hstack(postings, format='csr')
+        shared_t = shared.T.tocsr()
+        genres_t = genres.T.tocsr()
+        themes_t = themes.T.tocsr()
+
+        if query_indices is None:
+            row_ids = np.arange(count)
+        else:
+            row_ids = np.unique(np.asarray(query_indices, dtype=np.int64))
+            is_query = np.zeros(count, dtype=bool)
+            is_query[row_ids] = True
+
+        pairs: List[Tuple[int, int, float]] = []
+        for start in range(0, len(row_ids), self.block_size):
+            block = row_ids[start:start + self.block_size]
+
+            candidates = (shared[block] @ shared_t).tocoo()
+            local_rows = candidates.row.astype(np.int64)
+            rows = block[local_rows]
+            cols = candidates.col.astype(np.int64)
+            if query_indices is None:
+                keep = cols > rows
+            else:
+                # 指定動画同士のペアは片方向だけ数える
+                keep = (cols != rows) & (~is_query[cols] | (cols > rows))
+            rows, cols, local_rows = rows[keep], cols[keep], local_rows[keep]
+            if len(rows) == 0:
+                continue
+            self.candidate_pairs += len(rows)
+
+            # 候補ペアの共通ジャンル・テーマ数（ブロック×全体の行列積から取り出す）
+            genre_common = np.asarray((genres[block] @ genres_t)[local_rows, cols]).ravel()
+            theme_common = np.asarray((themes[block] @ themes_t)[local_rows, cols]).ravel()
+
+            scores = self._similarity(rows, cols, artists, moods, genre_counts, theme_counts,
+                                      genre_common, theme_common)
+            similar = scores > self.threshold
+            first = np.minimum(rows[similar], cols[similar])
+            second = np.maximum(rows[similar], cols[similar])
+            pairs.extend(zip(first.tolist(), second.tolist(), scores[similar].tolist()))
+
+        # 類似度は対称（同じ演算順）なので i < j に並べ替えても値は変わらない（ペアは重複しないため (i, j) 順になる）
+        pairs.sort()
+        self.similar_pairs = len(pairs)
+        return pairs
+
+    def _similarity(self, rows: np.ndarray, cols: np.ndarray, artists: np.ndarray, moods: np.ndarray,
+                    genre_counts: np.ndarray, theme_counts: np.ndarray,
+                    genre_common: np.ndarray, theme_common: np.ndarray) -> np.ndarray:
+        """候補ペアの類似度（_calculate_video_similarity と同じ加算順。該当しない項は0.0を足すので値は変わらない）"""
+        total_score = np.zeros(len(rows))
+        weights_sum = np.zeros(len(rows))
+
+        # アーティスト一致
+        same_artist = (artists[rows] >= 0) & (artists[rows] == artists[cols])
+        total_score = total_score + np.where(same_artist, self.artist_weight, 0.0)
+        weights_sum = weights_sum + np.where(same_artist, self.artist_weight, 0.0)
+
+        # ジャンル・テーマ一致（Jaccard係数）
+        for counts, common, weight in ((genre_counts, genre_common, self.genre_weight),
+                                       (theme_counts, theme_common, self.theme_weight)):
+            both = (counts[rows] > 0) & (counts[cols] > 0)
+            union = np.maximum(counts[rows] + counts[cols] - common, 1)
+            overlap = common / union
+            total_score = total_score + np.where(both, overlap * weight, 0.0)
+            weights_sum = weights_sum + np.where(both, weight, 0.0)
+
+        # ムード類似性
+        both_moods = (moods[rows] >= 0) & (moods[cols] >= 0)
+        mood_similarity = np.where(moods[rows] == moods[cols], 1.0, self.DIFFERENT_MOOD_SIMILARITY)
+        total_score = total_score + np.where(both_moods, mood_similarity * self.mood_weight, 0.0)
+        weights_sum = weights_sum + np.where(both_moods, self.mood_weight, 0.0)
+
+        return np.divide(total_score, weights_sum, out=np.zeros(len(rows)), where=weights_sum > 0)
+
+    def get_stats(self) -> Dict[str, int]:
+        """直近の計算の統計情報を取得"""
+        return {
+            'candidate_pairs': self.candidate_pairs,
+            'similar_pairs': self.similar_pairs
+        }
@@ -13,6 +13,9 @@ import re
 from datetime import datetime
 import requests
 from core.image_analyzer import ImageAnalyzer
+from core.knowledge_db_snapshot import (
+    get_knowledge_db_provider, load_knowledge_db, record_fingerprints, save_knowledge_db
+)
 
 
 class YouTubeKnowledgeManager:
@@ -33,6 +36,16 @@ class YouTubeKnowledgeManager:
         self.knowledge_db = {}
         self.video_cache = {}  # 話題になった動画のキャッシュ
         
+        # 検索インデックス（_load_knowledge_dbで構築）
+        self._search_entries: Dict[str, Dict[str, Any]] = {}  # video_id -> 事前計算済み検索フィールド
+        self._ngram_postings: Dict[str, set] = {}  # 1-gram/2-gram -> video_id集合
+        self._term_postings: Dict[str, set] = {}  # 検索可能用語(小文字) -> video_id集合
+        self._term_length_counts: Dict[int, int] = {}  # 用語長 -> 用語数
+        self._search_order_counter = 0
+        self.db_version = 0  # 動画DB・インデックスが変わるたびに進む版番号
+        self._db_file_fingerprint = ""  # 最後に読み込み・保存したDBファイル（ジャーナル含む）内容のSHA1
+        self._db_file_version = 0  # その時点のdb_version（以降の版の差分 = 未保存の変更）
+        
         # Phase 2: YouTube API検索用の設定（OAuth2対応）
         self.youtube_api_key = os.getenv('YOUTUBE_API_KEY')  # 下位互換性のため保持
         self.youtube_service = None  # OAuth2サービスオブジェクト
@@ -88,10 +101,15 @@ class YouTubeKnowledgeManager:
             if not self.knowledge_db_path.exists():
                 print(f"[YouTube知識] ⚠️ データベースファイルが見つかりません: {self.knowledge_db_path}")
                 self.knowledge_db = {"videos": {}, "playlists": {}}
+                self._db_file_fingerprint = ""
+                self._db_records = {}
+                self._build_search_index()
+                self._db_file_version = self.db_version
                 return
             
-            with open(self.knowledge_db_path, 'r', encoding='utf-8') as f:
-                self.knowledge_db = json.load(f)
+            # UnifiedStorageのジャーナル（GUIでの分析結果・削除など）も適用済みの複製
+            self.knowledge_db, self._db_file_fingerprint = load_knowledge_db(self.knowledge_db_path)
+            self._db_records = record_fingerprints(self.knowledge_db)
             
             video_count = len(self.knowledge_db.get("videos", {}))
             playlist_count = len(self.knowledge_db.get("playlists", {}))
@@ -100,6 +118,180 @@ class YouTubeKnowledgeManager:
         except Exception as e:
             print(f"[YouTube知識] ❌ データベース読み込み失敗: {e}")
             self.knowledge_db = {"videos": {}, "playlists": {}}
+            self._db_file_fingerprint = ""
+            self._db_records = {}
+        
+        self._build_search_index()
+        self._db_file_version = self.db_version
+    
+    def get_content_fingerprint(self) -> str:
+        """
+        動画DBの内容指紋を取得（応答キャッシュの指紋に使用）
+        
+        DBファイル・ジャーナルのSHA1と、読み込み・保存以降の未保存の変更数を組み合わせる。
+        プロセス再起動後も同じファイル内容なら同じ値になる
+        """
+        return f"{self._db_file_fingerprint[:16]}+{self.db_version - self._db_file_version}"
+    
+    def _build_search_index(self):
+        """検索インデックスを全動画から構築"""
+        self._search_entries = {}
+        self._ngram_postings = {}
+        self._term_postings = {}
+        self._term_length_counts = {}
+        self._search_order_counter = 0
+        self.db_version += 1
+        
+        for video_id, video_data in self.knowledge_db.get("videos", {}).items():
+            self._index_video(video_id, video_data)
+    
+    def update_search_index(self, video_id: str):
+        """
+        動画1件分の検索インデックスを更新（カスタム情報編集後などに呼び出す）
+        
+        Args:
+            video_id: YouTube動画ID
+        """
+        video_data = self.knowledge_db.get("videos", {}).get(video_id)
+        if video_data is None:
+            self._unindex_video(video_id)
+        else:
+            self._index_video(video_id, video_data)
+    
+    def _index_video(self, video_id: str, video_data: Dict[str, Any]):
+        """動画の検索フィールドを事前計算してインデックスに登録"""
+        # 既存エントリは辞書上の位置（同点時の順序）を維持したまま置き換える
+        self.db_version += 1
+        previous = self._search_entries.get(video_id)
+        if previous is not None:
+            order = previous["order"]
+            self._unindex_video(video_id)
+        else:
+            order = self._search_order_counter
+            self._search_order_counter += 1
+        
+        metadata = video_data.get("metadata", {})
+        title = metadata.get("title", "")
+        searchable_terms = self._extract_searchable_terms(title)
+        
+        creators = []
+        if "creative_insight" in video_data:
+            insight = video_data["creative_insight"]
+            if "creators" in insight:
+                creators = [c.get("name", "").lower() for c in insight["creators"]]
+        
+        custom_info = video_data.get("custom_info", {})
+        
+        entry = {
+            "order": order,
+            "title_lower": title.lower(),
+            "channel": metadata.get("channel_title", "").lower(),
+            "description": metadata.get("description", "").lower(),
+            "searchable_terms": searchable_terms,
+            "searchable_terms_lower": [term.lower() for term in searchable_terms],
+            "creators": creators,
+            "manual_title": custom_info.get("manual_title", "").lower(),
+            "manual_artist": custom_info.get("manual_artist", "").lower(),
+            "japanese_pronunciations": [r.lower() for r in custom_info.get("japanese_pronunciations", [])],
+            "artist_pronunciations": [r.lower() for r in custom_info.get("artist_pronunciations", [])],
+            "search_keywords": [k.lower() for k in custom_info.get("search_keywords", [])],
+        }
+        
+        # 部分一致判定の対象となる全フィールドのn-gram
+        texts = [
+            entry["title_lower"], entry["channel"], entry["description"],
+            entry["manual_title"], entry["manual_artist"]
+        ]
+        texts.extend(entry["searchable_terms_lower"])
+        texts.extend(entry["creators"])
+        texts.extend(entry["japanese_pronunciations"])
+        texts.extend(entry["artist_pronunciations"])
+        texts.extend(entry["search_keywords"])
+        
+        ngrams = set()
+        for text in texts:
+            ngrams.update(self._text_ngrams(text))
+        entry["ngrams"] = ngrams
+        entry["terms"] = set(entry["searchable_terms_lower"])
+        
+        for ngram in ngrams:
+            self._ngram_postings.setdefault(ngram, set()).add(video_id)
+        for term in entry["terms"]:
+            postings = self._term_postings.setdefault(term, set())
+            if not postings:
+                self._term_length_counts[len(term)] = self._term_length_counts.get(len(term), 0) + 1
+            postings.add(video_id)
+        
+        self._search_entries[video_id] = entry
+    
+    def _unindex_video(self, video_id: str):
+        """動画を検索インデックスから除去"""
+        entry = self._search_entries.pop(video_id, None)
+        if entry is None:
+            return
+        self.db_version += 1
+        
+        for ngram in entry["ngrams"]:
+            postings = self._ngram_postings.get(ngram)
+            if postings is not None:
+                postings.discard(video_id)
+                if not postings:
+                    del self._ngram_postings[ngram]
+        for term in entry["terms"]:
+            postings = self._term_postings.get(term)
+            if postings is not None:
+                postings.discard(video_id)
+                if not postings:
+                    del self._term_postings[term]
+                    self._term_length_counts[len(term)] -= 1
+                    if not self._term_length_counts[len(term)]:
+                        del self._term_length_counts[len(term)]
+    
+    @staticmethod
+    def _text_ngrams(text: str) -> set:
+        """部分一致候補抽出用の1-gram・2-gram集合"""
+        ngrams = set(text)
+        ngrams.update(text[i:i + 2] for i in range(len(text) - 1))
+        return ngrams
+    
+    def _substring_candidates(self, text: str) -> set:
+        """textを部分文字列として含み得る動画IDの集合"""
+        if len(text) == 1:
+            return set(self._ngram_postings.get(text, ()))
+        
+        postings_list = []
+        for i in range(len(text) - 1):
+            postings = self._ngram_postings.get(text[i:i + 2])
+            if not postings:
+                return set()
+            postings_list.append(postings)
+        
+        postings_list.sort(key=len)
+        candidates = set(postings_list[0])
+        for postings in postings_list[1:]:
+            candidates &= postings
+            if not candidates:
+                break
+        return candidates
+    
+    def _search_candidates(self, query_lower: str) -> set:
+        """スコアが0より大きくなり得る動画IDの集合"""
+        # クエリ全体が各フィールドに含まれる場合
+        candidates = self._substring_candidates(query_lower)
+        
+        # クエリ内の単語が各フィールドに含まれる場合
+        for word in query_lower.split():
+            if len(word) > 1:
+                candidates |= self._substring_candidates(word)
+        
+        # 検索可能用語がクエリに含まれる場合
+        for length in self._term_length_counts:
+            for i in range(len(query_lower) - length + 1):
+                postings = self._term_postings.get(query_lower[i:i + length])
+                if postings:
+                    candidates |= postings
+        
+        return candidates
     
     def _normalize_title(self, title: str) -> str:
         """
@@ -277,34 +469,34 @@ class YouTubeKnowledgeManager:
         
         query_lower = query.lower()
         videos = self.knowledge_db.get("videos", {})
-        results = []
         
-        for video_id, video_data in videos.items():
-            metadata = video_data.get("metadata", {})
-            
-            # 基本情報
-            title = metadata.get("title", "")
-            channel = metadata.get("channel_title", "").lower()
-            description = metadata.get("description", "").lower()
-            
-            # タイトルの検索可能用語を取得
-            searchable_terms = self._extract_searchable_terms(title)
-            searchable_terms_lower = [term.lower() for term in searchable_terms]
-            
-            # クリエイター情報での検索（分析結果から）
-            creators = []
-            if "creative_insight" in video_data:
-                insight = video_data["creative_insight"]
-                if "creators" in insight:
-                    creators = [c.get("name", "").lower() for c in insight["creators"]]
-            
-            # カスタム情報での検索（手動編集データ）
-            custom_info = video_data.get("custom_info", {})
-            manual_title = custom_info.get("manual_title", "").lower()
-            manual_artist = custom_info.get("manual_artist", "").lower()
-            japanese_pronunciations = [r.lower() for r in custom_info.get("japanese_pronunciations", [])]
-            artist_pronunciations = [r.lower() for r in custom_info.get("artist_pronunciations", [])]
-            search_keywords = [k.lower() for k in custom_info.get("search_keywords", [])]
+        # 動画が外部で追加・削除された場合はインデックスを再構築
+        if len(self._search_entries) != len(videos):
+            self._build_search_index()
+        
+        # 候補動画のみを元の辞書順でスコアリング（同点時の順序を維持）
+        candidate_ids = sorted(
+            (video_id for video_id in self._search_candidates(query_lower) if video_id in videos),
+            key=lambda video_id: self._search_entries[video_id]["order"]
+        )
+        
+        results = []
+        for video_id in candidate_ids:
+            video_data = videos[video_id]
+            entry = self._search_entries[video_id]
+            
+            # 事前計算済みの検索フィールド
+            title_lower = entry["title_lower"]
+            channel = entry["channel"]
+            description = entry["description"]
+            searchable_terms = entry["searchable_terms"]
+            searchable_terms_lower = entry["searchable_terms_lower"]
+            creators = entry["creators"]
+            manual_title = entry["manual_title"]
+            manual_artist = entry["manual_artist"]
+            japanese_pronunciations = entry["japanese_pronunciations"]
+            artist_pronunciations = entry["artist_pronunciations"]
+            search_keywords = entry["search_keywords"]
             
             # マッチング判定
             score = 0
@@ -351,7 +543,7 @@ class YouTubeKnowledgeManager:
                     score += 12
             
             # 元タイトルでの部分一致
-            if query_lower in title.lower():
+            if query_lower in title_lower:
                 score += 10
             
             # チャンネル名での一致
@@ -375,7 +567,7 @@ class YouTubeKnowledgeManager:
                             score += 6
                     
                     # その他の部分マッチ
-                    if word in title.lower():
+                    if word in title_lower:
                         score += 5
                     if word in channel:
                         score += 4
@@ -387,7 +579,7 @@ class YouTubeKnowledgeManager:
                     "video_id": video_id,
                     "data": video_data,
                     "score": score,
-                    "matched_terms": searchable_terms  # デバッグ用
+                    "matched_terms": list(searchable_terms)  # デバッグ用
                 })
         
         # スコア順でソート
@@ -881,6 +1073,7 @@ class YouTubeKnowledgeManager:
         }
         
         self.knowledge_db["videos"][video_id] = video_data
+        self._index_video(video_id, video_data)
     
     def add_video_image(self, video_id: str, image_metadata: Dict[str, Any]) -> bool:
         """
@@ -1183,17 +1376,15 @@ class YouTubeKnowledgeManager:
     def _save_knowledge_db(self):
         """知識データベースを保存"""
         try:
-            # バックアップを作成
-            if self.knowledge_db_path.exists():
-                backup_path = self.knowledge_db_path.with_suffix('.bak')
-                # 既存のバックアップファイルを削除（Windows対応）
-                if backup_path.exists():
-                    backup_path.unlink()
-                self.knowledge_db_path.rename(backup_path)
-            
-            # 新しいデータを保存
-            with open(self.knowledge_db_path, 'w', encoding='utf-8') as f:
-                json.dump(self.knowledge_db, f, ensure_ascii=False, indent=2)
+            # 変更した動画・プレイリストのみUnifiedStorageのジャーナルへ追記
+            # （スナップショットの書き直し・圧縮はUnifiedStorageが行う）
+            self._db_records = save_knowledge_db(self.knowledge_db_path, self.knowledge_db, self._db_records)
+            
+            # 共有スナップショットを更新し、読み取り側へ再ロードを通知
+            snapshot = get_knowledge_db_provider().refresh(self.knowledge_db_path)
+            if snapshot is not None:
+                self._db_file_fingerprint = snapshot.fingerprint
+                self._db_file_version = self.db_version
             
             print("[YouTube知識] ✅ データベース保存完了")
             
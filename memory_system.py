@@ -5,6 +5,7 @@
 セッション内記憶とユーザープロファイル学習
 """
 
+import hashlib
 import json
 import os
 from datetime import datetime
@@ -32,6 +33,10 @@ class SimpleMemorySystem:
             "relationship_level": 1
         }
         
+        # 永続記憶（学習事実・関係性）が変わるたびに進む世代番号（内容指紋の再計算判定に使用）
+        self.generation = 0
+        self._content_fingerprint = None  # (世代番号, 指紋)
+        
         self._load_persistent_memory()
         print("🧠 シンプル記憶システム初期化完了")
     
@@ -90,6 +95,7 @@ class SimpleMemorySystem:
                     # 重複チェック
                     if not self._is_duplicate_fact(fact):
                         self.persistent_memory["learned_facts"].append(fact)
+                        self.generation += 1
                         print(f"💡 新しい事実を学習: {category} - {user_input[:30]}...")
                     break
     
@@ -125,6 +131,22 @@ class SimpleMemorySystem:
         
         return "\n".join(context_parts)
     
+    def get_content_fingerprint(self) -> str:
+        """
+        応答に影響する永続記憶（学習事実・関係性）の内容指紋を取得
+        
+        世代番号と違いプロセス再起動後も同じ内容なら同じ値になるため、
+        ディスクに保存される応答キャッシュの指紋に使用できる
+        """
+        if self._content_fingerprint is None or self._content_fingerprint[0] != self.generation:
+            facts = [(fact.get("category"), fact.get("content"))
+                     for fact in self.persistent_memory.get("learned_facts", [])]
+            digest = hashlib.sha1(json.dumps(facts, ensure_ascii=False).encode("utf-8")).hexdigest()
+            self._content_fingerprint = (self.generation, digest)
+        
+        rel_level = self.persistent_memory.get("relationship_level", 1)
+        return f"{self._content_fingerprint[1][:16]}:{rel_level}"
+    
     def save_memory(self):
         """記憶をファイルに保存"""
         try:
@@ -182,6 +204,7 @@ class SimpleMemorySystem:
         try:
             if 0 <= fact_index < len(self.persistent_memory["learned_facts"]):
                 deleted_fact = self.persistent_memory["learned_facts"].pop(fact_index)
+                self.generation += 1
                 print(f"🗑️ 事実を削除: {deleted_fact['category']} - {deleted_fact['content'][:30]}...")
                 return True
             return False
@@ -196,6 +219,7 @@ class SimpleMemorySystem:
                 old_fact = self.persistent_memory["learned_facts"][fact_index]
                 old_fact["content"] = new_content
                 old_fact["timestamp"] = datetime.now().isoformat()
+                self.generation += 1
                 print(f"✏️ 事実を編集: {old_fact['category']} - {new_content[:30]}...")
                 return True
             return False
@@ -207,6 +231,7 @@ class SimpleMemorySystem:
         """全ての学習事実をクリア"""
         count = len(self.persistent_memory["learned_facts"])
         self.persistent_memory["learned_facts"] = []
+        self.generation += 1
         print(f"🗑️ 全ての学習事実をクリア: {count}件削除")
     
     def add_manual_fact(self, category: str, content: str) -> bool:
@@ -222,6 +247,7 @@ class SimpleMemorySystem:
             
             if not self._is_duplicate_fact(fact):
                 self.persistent_memory["learned_facts"].append(fact)
+                self.generation += 1
                 print(f"➕ 手動で事実を追加: {category} - {content[:30]}...")
                 return True
             else:
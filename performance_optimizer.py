@@ -14,6 +14,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from logging_system import get_logger
+from voice_cache import VoiceCache
 
 @dataclass
 class OptimizationResult:
@@ -62,6 +63,18 @@ class PerformanceOptimizer:
         self.optimization_thread = None
         self.stop_optimization = False
         
+        # 音声合成システムが使用中の音声キャッシュ（attach_voice_cacheで登録）
+        self.voice_cache: Optional[VoiceCache] = None
+        self.voice_cache_dir = Path("/mnt/d/setsuna_bot/voice_cache")
+    
+    def attach_voice_cache(self, voice_cache: VoiceCache):
+        """
+        同一プロセスの音声合成システムの音声キャッシュを登録
+        
+        登録後の統計取得・最適化はこのインスタンス（容量上限・展開済みWAVの管理を含む）を通して行う
+        """
+        self.voice_cache = voice_cache
+        
     def load_config(self):
         """設定を読み込み"""
         try:
@@ -154,12 +167,14 @@ class PerformanceOptimizer:
                     cache_stats["total_entries"] = len(cache_data)
                     cache_stats["total_size"] = response_cache_file.stat().st_size
             
-            # 音声キャッシュ
-            voice_cache_dir = Path("/mnt/d/setsuna_bot/voice_cache")
-            if voice_cache_dir.exists():
-                voice_files = list(voice_cache_dir.glob("*.wav"))
-                cache_stats["voice_cache_count"] = len(voice_files)
-                cache_stats["voice_cache_size"] = sum(f.stat().st_size for f in voice_files)
+            # 音声キャッシュ（インデックスから取得、ディレクトリ走査なし・副作用なし）
+            if self.voice_cache is not None:
+                voice_stats = self.voice_cache.stats()
+            else:
+                voice_stats = VoiceCache.read_stats(str(self.voice_cache_dir))
+            if voice_stats is not None:
+                cache_stats["voice_cache_count"] = voice_stats["entry_count"]
+                cache_stats["voice_cache_size"] = voice_stats["stored_bytes"]
             
             return cache_stats
             
@@ -387,8 +402,7 @@ class PerformanceOptimizer:
         try:
             before_metrics = self.get_current_performance_metrics()
             
-            voice_cache_dir = Path("/mnt/d/setsuna_bot/voice_cache")
-            if not voice_cache_dir.exists():
+            if self.voice_cache is None and not self.voice_cache_dir.exists():
                 return OptimizationResult(
                     timestamp=datetime.now().isoformat(),
                     operation="voice_cache_optimization",
@@ -399,22 +413,14 @@ class PerformanceOptimizer:
                     message="音声キャッシュディレクトリが存在しません"
                 )
             
-            # 古い音声キャッシュファイルを削除
-            cutoff_date = datetime.now() - timedelta(days=3)  # 3日以上古いファイル
-            
-            cleaned_files = 0
-            total_size_freed = 0
-            
-            for voice_file in voice_cache_dir.glob("*.wav"):
-                try:
-                    file_mtime = datetime.fromtimestamp(voice_file.stat().st_mtime)
-                    if file_mtime < cutoff_date:
-                        file_size = voice_file.stat().st_size
-                        voice_file.unlink()
-                        cleaned_files += 1
-                        total_size_freed += file_size
-                except Exception as e:
-                    self.logger.warning(f"音声キャッシュファイル削除エラー ({voice_file}): {e}")
+            # 3日以上アクセスの無い音声と容量上限超過分をインデックスに基づき削除
+            if self.voice_cache is not None:
+                cleaned_files, total_size_freed = self.voice_cache.cleanup(max_age_days=3)
+            else:
+                # 合成システム外からは期限切れのみ削除（展開済みWAV・容量上限は合成システム側が管理）
+                voice_cache = VoiceCache(str(self.voice_cache_dir), primary=False)
+                cleaned_files, total_size_freed = voice_cache.cleanup(max_age_days=3)
+                voice_cache.close()
             
             after_metrics = self.get_current_performance_metrics()
             
@@ -18,6 +18,7 @@ class SpeechTextConverter:
         self.knowledge_manager = None
         self._pronunciation_cache = {}
         self._cache_updated = False
+        self._pronunciation_pattern = None  # 発音辞書の全キーを1つにまとめた照合パターン
         
         # 基本的な読み辞書（フォールバック用）
         self.basic_pronunciations = {
@@ -95,12 +96,50 @@ class SpeechTextConverter:
             except Exception as e:
                 print(f"[音声変換] ⚠️ 動的辞書構築エラー: {e}")
         
-        # キャッシュを更新
+        # キャッシュを更新（照合パターンも辞書を作り直したときだけ再構築）
         self._pronunciation_cache = pronunciations
+        self._pronunciation_pattern = self._compile_pronunciation_pattern(pronunciations)
         self._cache_updated = True
         
         return pronunciations
     
+    @staticmethod
+    def _compile_pronunciation_pattern(pronunciations: Dict[str, str]) -> Optional[re.Pattern]:
+        """
+        発音辞書の全キーを1つの正規表現にまとめる
+        
+        キーを文字単位のトライにしてから正規表現に変換する（例: feat, feat. → feat(?:\.)?）。
+        各位置で候補のキーを1文字ずつ絞り込むため、照合コストは辞書の件数にほぼ依存せず、
+        終端の省略可能グループは貪欲に試されるので、検索は左端優先・最長一致になる
+        
+        Args:
+            pronunciations: 表記 → 読み の辞書
+            
+        Returns:
+            照合パターン（キーがない場合は None）
+        """
+        trie = {}
+        for original in pronunciations:
+            if not original:
+                continue
+            node = trie
+            for char in original:
+                node = node.setdefault(char, {})
+            node[""] = {}  # キーの終端
+        
+        if not trie:
+            return None
+        
+        def to_pattern(node: Dict[str, dict]) -> str:
+            branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # ここで終わるキーがあれば、より長いキーの続きは省略可能
+            return "(?:" + body + ")?" if "" in node else body
+        
+        return re.compile(to_pattern(trie))
+    
     def convert_for_speech(self, text: str) -> str:
         """
         音声合成用にテキストを変換
@@ -115,36 +154,30 @@ class SpeechTextConverter:
             return text
         
         original_text = text
-        converted_text = text
         
-        # 発音辞書を取得
+        # 発音辞書と照合パターンを取得
         pronunciations = self._build_pronunciation_dict()
+        if self._pronunciation_pattern is None:
+            return text
         
-        # 変換実行（長い単語から優先して置換）
-        sorted_keys = sorted(pronunciations.keys(), key=len, reverse=True)
-        replacements_made = []
+        # 変換実行（1回の走査で、左から順に最も長く一致する表記を置換）
+        # 置換後の読みが再び照合されることはない
+        replacements_made = {}
         
-        for original in sorted_keys:
+        def replace(match: re.Match) -> str:
+            original = match.group(0)
             pronunciation = pronunciations[original]
-            
-            if original in converted_text:
-                # 単語境界を考慮した置換
-                # 完全一致する場合のみ置換（部分一致を避ける）
-                pattern = r'\b' + re.escape(original) + r'\b'
-                if re.search(pattern, converted_text):
-                    converted_text = re.sub(pattern, pronunciation, converted_text)
-                    replacements_made.append((original, pronunciation))
-                elif original in converted_text:
-                    # 単語境界が適用できない場合（日本語混じりなど）
-                    converted_text = converted_text.replace(original, pronunciation)
-                    replacements_made.append((original, pronunciation))
+            replacements_made[original] = pronunciation
+            return pronunciation
+        
+        converted_text = self._pronunciation_pattern.sub(replace, text)
         
         # デバッグ出力
         if replacements_made:
             print(f"[音声変換] 🔄 テキスト変換実行:")
             print(f"  元テキスト: {original_text}")
             print(f"  変換後: {converted_text}")
-            for original, pronunciation in replacements_made:
+            for original, pronunciation in replacements_made.items():
                 print(f"  '{original}' → '{pronunciation}'")
         
         return converted_text
@@ -164,6 +197,7 @@ class SpeechTextConverter:
     def clear_cache(self):
         """キャッシュをクリア（データベース更新時に呼び出し）"""
         self._pronunciation_cache.clear()
+        self._pronunciation_pattern = None
         self._cache_updated = False
         print("[音声変換] 🗑️ 読み辞書キャッシュクリア")
     
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストリーミング応答パイプラインのベンチマーク
+台本どおりにトークンを流す擬似LLM・遅延分布を指定できる擬似音声合成・無音プレーヤーで
+StreamingResponseSystem を駆動し、最初の文・最初の音声までの時間、音声セグメント間の途切れ、
+キューの深さの推移をオフラインで計測する（音声経路の性能劣化の検出用）
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import redirect_stdout
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from streaming_system import StreamingResponseSystem
+
+
+DEFAULT_SCRIPT = (
+    "こんにちは、せつなです。今日はどんな曲を聴きたい気分かな？"
+    "最近のおすすめはTRiNITYの新曲で、明るいテンポが印象的なんだ。"
+    "歌詞も前向きで、聴いていると自然と元気が出てくるよ。"
+    "もし落ち着いた曲がよければ、夜に合うバラードも探してみるね。"
+    "気になったら一緒に聴いてみよう！"
+)
+
+# 集計する遅延指標（秒）
+LATENCY_METRICS = [
+    "time_to_first_token",     # 応答開始 → 最初のトークン
+    "time_to_first_sentence",  # 応答開始 → 最初の文の音声合成キュー投入
+    "time_to_first_audio",     # 応答開始 → 最初の音声の再生開始
+    "audio_gap",               # 音声セグメント間の途切れ（前の再生終了 → 次の再生開始）
+    "sentence_to_audio",       # 文のキュー投入 → その文の再生開始
+    "synthesis_latency",       # 1文の音声合成時間
+    "drain_time",              # 最後のトークン → 応答完了
+    "total_time",              # 応答開始 → 応答完了
+]
+
+# キューの深さのサンプル列（経過秒, 合成待ち, 合成中, 再生待ち）
+QUEUE_COLUMNS = ["synthesis_queue", "in_synthesis", "playback_queue"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """線形補間によるパーセンタイル（q: 0〜100）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class ScriptedTokenStream:
+    """台本テキストを一定レート（＋揺らぎ）でトークンとして流す擬似LLMストリーム"""
+
+    def __init__(self, script: str = DEFAULT_SCRIPT, tokens_per_second: float = 30.0, jitter: float = 0.0,
+                 first_token_delay: float = 0.0, max_chars_per_token: int = 3, seed: int = 0):
+        """
+        Args:
+            script: 流すテキスト
+            tokens_per_second: 平均トークンレート
+            jitter: トークン間隔の揺らぎ（0.5なら平均間隔の±50%）
+            first_token_delay: 最初のトークンまでの遅延（秒）
+            max_chars_per_token: 1トークンの最大文字数（1〜この値でランダムに分割）
+            seed: 乱数シード
+        """
+        if tokens_per_second <= 0:
+            raise ValueError("tokens_per_second は正の値を指定してください")
+        self.script = script
+        self.tokens_per_second = tokens_per_second
+        self.jitter = max(0.0, jitter)
+        self.first_token_delay = max(0.0, first_token_delay)
+        self.max_chars_per_token = max(1, max_chars_per_token)
+        self.seed = seed
+
+    def tokens(self, seed: Optional[int] = None) -> List[str]:
+        """台本をトークンに分割（同じシードなら同じ分割）"""
+        rng = random.Random(self.seed if seed is None else seed)
+        tokens = []
+        position = 0
+        while position < len(self.script):
+            size = rng.randint(1, self.max_chars_per_token)
+            tokens.append(self.script[position:position + size])
+            position += size
+        return tokens
+
+    def _interval(self, rng: random.Random) -> float:
+        interval = 1.0 / self.tokens_per_second
+        if self.jitter:
+            interval *= rng.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        return max(0.0, interval)
+
+    async def stream(self, seed: Optional[int] = None, on_token: Optional[Callable[[str], None]] = None):
+        """トークンを非同期に流す（on_token はトークンを渡す直前に呼ばれる）"""
+        seed = self.seed if seed is None else seed
+        rng = random.Random(seed + 1)
+        if self.first_token_delay:
+            await asyncio.sleep(self.first_token_delay)
+        for index, token in enumerate(self.tokens(seed)):
+            if index:
+                await asyncio.sleep(self._interval(rng))
+            if on_token:
+                on_token(token)
+            yield token
+
+    def describe(self) -> Dict[str, Any]:
+        """設定内容"""
+        return {
+            'script_length': len(self.script),
+            'tokens_per_second': self.tokens_per_second,
+            'jitter': self.jitter,
+            'first_token_delay': self.first_token_delay,
+            'max_chars_per_token': self.max_chars_per_token
+        }
+
+
+class FakeSetsunaChat:
+    """get_streaming_response_internal だけを持つ擬似SetsunaChat（トークン到着時刻を記録）"""
+
+    def __init__(self, token_stream: ScriptedTokenStream, seed: Optional[int] = None):
+        self.token_stream = token_stream
+        self.seed = seed
+        self.token_times: List[float] = []
+
+    def get_streaming_response_internal(self, user_input: str):
+        return self.token_stream.stream(self.seed, on_token=lambda token: self.token_times.append(time.perf_counter()))
+
+
+class FakeVoiceSynthesizer:
+    """遅延分布を指定できる擬似音声合成＋無音プレーヤー
+
+    synthesize_voice / play_voice は VoiceVoxSynthesizer と同じシグネチャで、
+    ワーカースレッドから呼ばれても安全。再生は音を出さず、文字数に比例した再生時間だけ待つ
+    （stop_voice で途中終了）。
+    """
+
+    DISTRIBUTIONS = ("constant", "uniform", "lognormal")
+
+    def __init__(self, base_latency: float = 0.05, latency_per_char: float = 0.0, distribution: str = "constant",
+                 spread: float = 0.0, playback_per_char: float = 0.0, seed: int = 0):
+        """
+        Args:
+            base_latency: 1文あたりの合成遅延（秒）
+            latency_per_char: 1文字あたりの追加合成遅延（秒）
+            distribution: 遅延の分布（constant / uniform / lognormal）
+            spread: 分布の広がり（uniform は±割合、lognormal は対数標準偏差）
+            playback_per_char: 1文字あたりの再生時間（秒、0なら即時に再生完了）
+            seed: 乱数シード
+        """
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"未対応の遅延分布: {distribution}（{', '.join(self.DISTRIBUTIONS)}）")
+        self.base_latency = base_latency
+        self.latency_per_char = latency_per_char
+        self.distribution = distribution
+        self.spread = max(0.0, spread)
+        self.playback_per_char = playback_per_char
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.reset()
+
+    def reset(self, seed: Optional[int] = None):
+        """記録をクリアして乱数を再初期化"""
+        with self._lock:
+            self._rng = random.Random(self.seed if seed is None else seed)
+            self._texts: Dict[str, str] = {}
+            self.synthesis_records: List[Dict[str, Any]] = []
+            self.playback_records: List[Dict[str, Any]] = []
+            self.active_syntheses = 0
+            self.max_active_syntheses = 0
+
+    def sample_latency(self, text: str) -> float:
+        """合成遅延をサンプリング"""
+        latency = self.base_latency + self.latency_per_char * len(text)
+        with self._lock:
+            if self.distribution == "uniform":
+                latency *= self._rng.uniform(1.0 - self.spread, 1.0 + self.spread)
+            elif self.distribution == "lognormal":
+                latency *= self._rng.lognormvariate(0.0, self.spread)
+        return max(0.0, latency)
+
+    def synthesize_voice(self, text: str) -> Optional[str]:
+        """擬似音声合成（遅延だけ待って擬似パスを返す）"""
+        latency = self.sample_latency(text)
+        with self._lock:
+            self.active_syntheses += 1
+            self.max_active_syntheses = max(self.max_active_syntheses, self.active_syntheses)
+        start_time = time.perf_counter()
+        time.sleep(latency)
+        end_time = time.perf_counter()
+        with self._lock:
+            self.active_syntheses -= 1
+            wav_path = f"fake://voice/{len(self.synthesis_records)}.wav"
+            self._texts[wav_path] = text
+            self.synthesis_records.append({'text': text, 'start': start_time, 'end': end_time})
+        return wav_path
+
+    def play_voice(self, wav_path: str) -> bool:
+        """無音再生（文字数に比例した再生時間だけ待つ）"""
+        with self._lock:
+            text = self._texts.get(wav_path)
+        if text is None:
+            return False
+        self._stop_event.clear()
+        start_time = time.perf_counter()
+        stopped = self._stop_event.wait(len(text) * self.playback_per_char) if self.playback_per_char else False
+        end_time = time.perf_counter()
+        with self._lock:
+            self.playback_records.append({'text': text, 'start': start_time, 'end': end_time, 'stopped': stopped})
+        return True
+
+    def stop_voice(self):
+        """再生中の音声を停止"""
+        self._stop_event.set()
+
+    def describe(self) -> Dict[str, Any]:
+        """設定内容"""
+        return {
+            'base_latency': self.base_latency,
+            'latency_per_char': self.latency_per_char,
+            'distribution': self.distribution,
+            'spread': self.spread,
+            'playback_per_char': self.playback_per_char
+        }
+
+
+@dataclass
+class PipelineRunMetrics:
+    """1回の応答の計測結果（時間はすべて応答開始からの秒）"""
+    sentence_count: int
+    response_length: int
+    time_to_first_token: Optional[float]
+    time_to_first_sentence: Optional[float]
+    time_to_first_audio: Optional[float]
+    drain_time: Optional[float]
+    total_time: float
+    audio_gaps: List[float]
+    sentence_to_audio: List[float]
+    synthesis_latencies: List[float]
+    queue_samples: List[Tuple[float, int, int, int]]  # (経過秒, 合成待ち, 合成中, 再生待ち)
+    max_active_syntheses: int
+
+
+class StreamingBenchmarkReport:
+    """複数回の計測結果の集計"""
+
+    # 1回の応答につき1値の指標 / 文・セグメントごとに複数値の指標
+    SCALAR_METRICS = {"time_to_first_token", "time_to_first_sentence", "time_to_first_audio", "drain_time", "total_time"}
+    LIST_METRICS = {"audio_gap": "audio_gaps", "sentence_to_audio": "sentence_to_audio",
+                    "synthesis_latency": "synthesis_latencies"}
+
+    def __init__(self, runs: List[PipelineRunMetrics], config: Optional[Dict[str, Any]] = None):
+        self.runs = runs
+        self.config = config or {}
+
+    def metric_values(self, name: str) -> List[float]:
+        """全実行分の指標値（未計測の値は除く）"""
+        if name in self.SCALAR_METRICS:
+            return [getattr(run, name) for run in self.runs if getattr(run, name) is not None]
+        if name in self.LIST_METRICS:
+            return [value for run in self.runs for value in getattr(run, self.LIST_METRICS[name])]
+        raise KeyError(f"未知の指標: {name}")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """指標ごとのパーセンタイル集計とキューの深さ"""
+        summary = {}
+        for name in LATENCY_METRICS:
+            values = self.metric_values(name)
+            summary[name] = {
+                'count': len(values),
+                'mean': sum(values) / len(values) if values else 0.0,
+                'p50': percentile(values, 50),
+                'p90': percentile(values, 90),
+                'p99': percentile(values, 99),
+                'max': max(values) if values else 0.0
+            }
+
+        samples = [sample for run in self.runs for sample in run.queue_samples]
+        for column, name in enumerate(QUEUE_COLUMNS, start=1):
+            depths = [sample[column] for sample in samples]
+            summary[f"queue.{name}"] = {
+                'count': len(depths),
+                'mean': sum(depths) / len(depths) if depths else 0.0,
+                'p90': percentile(depths, 90),
+                'max': max(depths) if depths else 0
+            }
+        return summary
+
+    def queue_timeline(self, run_index: int = 0, buckets: int = 10) -> List[Tuple[float, int, int, int]]:
+        """キューの深さの推移（時間を等分した区間ごとの最大値）"""
+        samples = self.runs[run_index].queue_samples if self.runs else []
+        if not samples:
+            return []
+        duration = max(samples[-1][0], 1e-9)
+        timeline = [[duration * (i + 1) / buckets, 0, 0, 0] for i in range(buckets)]
+        for elapsed, *depths in samples:
+            bucket = timeline[min(int(elapsed / duration * buckets), buckets - 1)]
+            for column, depth in enumerate(depths, start=1):
+                bucket[column] = max(bucket[column], depth)
+        return [tuple(bucket) for bucket in timeline]
+
+    def find_regressions(self, baseline_summary: Dict[str, Dict[str, float]], tolerance: float = 0.25,
+                         min_delta: float = 0.005, stats: Tuple[str, ...] = ("p50", "p90")) -> List[Dict[str, Any]]:
+        """
+        ベースラインと比べて悪化した指標を検出
+
+        Args:
+            baseline_summary: 以前の summary()（JSONから読み込んだものでも可）
+            tolerance: 許容する悪化率（0.25なら25%増まで許容）
+            min_delta: 許容する絶対差（秒・件数。タイマー精度以下の揺れを無視する）
+            stats: 比較する統計量
+
+        Returns:
+            List[Dict]: 悪化した指標（metric, stat, baseline, current）
+        """
+        regressions = []
+        current_summary = self.summary()
+        for metric, baseline_stats in baseline_summary.items():
+            current_stats = current_summary.get(metric)
+            if not current_stats:
+                continue
+            for stat in stats:
+                if stat not in baseline_stats or stat not in current_stats:
+                    continue
+                baseline, current = baseline_stats[stat], current_stats[stat]
+                if current - baseline > max(baseline * tolerance, min_delta):
+                    regressions.append({'metric': metric, 'stat': stat, 'baseline': baseline, 'current': current})
+        return regressions
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON保存用の辞書"""
+        return {'config': self.config, 'summary': self.summary(), 'runs': [asdict(run) for run in self.runs]}
+
+    def format_report(self) -> str:
+        """表示用の集計表"""
+        summary = self.summary()
+        sentences = sum(run.sentence_count for run in self.runs)
+        lines = [f"📊 {len(self.runs)}回, {sentences}文",
+                 f"{'指標':<24}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for name in LATENCY_METRICS:
+            stats = summary[name]
+            lines.append(f"{name:<24}" + "".join(f"{stats[key] * 1000:9.1f}" for key in ("p50", "p90", "p99", "max")))
+        lines.append(f"{'キュー':<24}{'平均':>9}{'p90':>9}{'max':>9}")
+        for name in QUEUE_COLUMNS:
+            stats = summary[f"queue.{name}"]
+            lines.append(f"{name:<24}{stats['mean']:9.2f}{stats['p90']:9.1f}{stats['max']:9d}")
+        timeline = self.queue_timeline()
+        if timeline:
+            lines.append("キューの深さの推移（1回目, 合成待ち/合成中/再生待ち）:")
+            lines.append("  " + " ".join(f"{elapsed * 1000:.0f}ms:{a}/{b}/{c}" for elapsed, a, b, c in timeline))
+        return "\n".join(lines)
+
+
+class StreamingPipelineBenchmark:
+    """StreamingResponseSystem のエンドツーエンド・ベンチマーク"""
+
+    def __init__(self, token_stream: Optional[ScriptedTokenStream] = None,
+                 synthesizer: Optional[FakeVoiceSynthesizer] = None,
+                 system_factory: Optional[Callable[[Any, Any], StreamingResponseSystem]] = None,
+                 sample_interval: float = 0.005, user_input: str = "おすすめの曲を教えて", quiet: bool = True):
+        """
+        Args:
+            token_stream: 擬似トークンストリーム（None=既定の台本・30トークン/秒）
+            synthesizer: 擬似音声合成（None=50ms固定遅延）
+            system_factory: (setsuna_chat, voice_synthesizer) からシステムを作成する関数
+            sample_interval: キューの深さのサンプリング間隔（秒）
+            user_input: 応答させる入力文
+            quiet: パイプラインのログ出力を抑制
+        """
+        self.token_stream = token_stream or ScriptedTokenStream()
+        self.synthesizer = synthesizer or FakeVoiceSynthesizer()
+        self.system_factory = system_factory or StreamingResponseSystem
+        self.sample_interval = sample_interval
+        self.user_input = user_input
+        self.quiet = quiet
+
+    def run(self, runs: int = 5) -> StreamingBenchmarkReport:
+        """ベンチマーク実行（runs回の応答を順に計測）"""
+        return asyncio.run(self.run_async(runs))
+
+    async def run_async(self, runs: int = 5) -> StreamingBenchmarkReport:
+        """ベンチマーク実行（実行中のイベントループから呼ぶ場合）"""
+        results = []
+        for run_index in range(runs):
+            if self.quiet:
+                with redirect_stdout(io.StringIO()):
+                    results.append(await self._run_once(run_index))
+            else:
+                results.append(await self._run_once(run_index))
+        config = {'runs': runs, 'token_stream': self.token_stream.describe(),
+                  'synthesizer': self.synthesizer.describe(), 'sample_interval': self.sample_interval}
+        return StreamingBenchmarkReport(results, config)
+
+    def _queue_depths(self, system) -> Tuple[int, int, int]:
+        """(合成待ち, 合成中, 再生待ち)"""
+        depths = system.parallel_synthesis.get_queue_depths()
+        return depths['pending'], self.synthesizer.active_syntheses, depths['ready']
+
+    async def _run_once(self, run_index: int) -> PipelineRunMetrics:
+        """1回の応答を計測"""
+        seed = self.token_stream.seed + run_index
+        self.synthesizer.reset(self.synthesizer.seed + run_index)
+        chat = FakeSetsunaChat(self.token_stream, seed)
+        system = self.system_factory(chat, self.synthesizer)
+
+        # 文のキュー投入時刻を記録
+        queued_sentences: List[Tuple[float, str]] = []
+        add_sentence = system.parallel_synthesis.add_sentence_for_synthesis
+
+        async def record_sentence(sentence: str):
+            queued_sentences.append((time.perf_counter(), sentence))
+            await add_sentence(sentence)
+
+        system.parallel_synthesis.add_sentence_for_synthesis = record_sentence
+
+        queue_samples = []
+        finished = asyncio.Event()
+        start_time = time.perf_counter()
+
+        async def sample_queues():
+            while not finished.is_set():
+                queue_samples.append((time.perf_counter() - start_time, *self._queue_depths(system)))
+                try:
+                    await asyncio.wait_for(finished.wait(), timeout=self.sample_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        sampler = asyncio.create_task(sample_queues())
+        try:
+            response = await system.get_streaming_response(self.user_input)
+        finally:
+            end_time = time.perf_counter()
+            finished.set()
+            await sampler
+            await system.parallel_synthesis.stop_workers()
+            system.parallel_synthesis.shutdown()
+
+        return self._collect(start_time, end_time, response, chat.token_times, queued_sentences, queue_samples)
+
+    def _collect(self, start_time: float, end_time: float, response: str, token_times: List[float],
+                 queued_sentences: List[Tuple[float, str]], queue_samples: List[Tuple[float, int, int, int]]) -> PipelineRunMetrics:
+        """記録した時刻から指標を計算"""
+        playback = sorted(self.synthesizer.playback_records, key=lambda record: record['start'])
+
+        # 再生された文をキュー投入時刻と対応付け（同じ文は投入順）
+        queued_by_text = defaultdict(deque)
+        for queued_at, sentence in queued_sentences:
+            queued_by_text[sentence].append(queued_at)
+        sentence_to_audio = []
+        for record in playback:
+            if queued_by_text[record['text']]:
+                sentence_to_audio.append(record['start'] - queued_by_text[record['text']].popleft())
+
+        return PipelineRunMetrics(
+            sentence_count=len(queued_sentences),
+            response_length=len(response),
+            time_to_first_token=token_times[0] - start_time if token_times else None,
+            time_to_first_sentence=queued_sentences[0][0] - start_time if queued_sentences else None,
+            time_to_first_audio=playback[0]['start'] - start_time if playback else None,
+            drain_time=end_time - token_times[-1] if token_times else None,
+            total_time=end_time - start_time,
+            audio_gaps=[max(0.0, current['start'] - previous['end']) for previous, current in zip(playback, playback[1:])],
+            sentence_to_audio=sentence_to_audio,
+            synthesis_latencies=[record['end'] - record['start'] for record in self.synthesizer.synthesis_records],
+            queue_samples=queue_samples,
+            max_active_syntheses=self.synthesizer.max_active_syntheses
+        )
+
+
+def main():
+    """コマンドライン実行"""
+    parser = argparse.ArgumentParser(description="ストリーミング応答パイプラインのベンチマーク")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    parser.add_argument("--tokens-per-second", type=float, default=30.0, help="トークンレート")
+    parser.add_argument("--token-jitter", type=float, default=0.3, help="トークン間隔の揺らぎ（割合）")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="最初のトークンまでの遅延（秒）")
+    parser.add_argument("--synthesis-latency", type=float, default=0.15, help="1文の合成遅延（秒）")
+    parser.add_argument("--latency-per-char", type=float, default=0.002, help="1文字あたりの追加合成遅延（秒）")
+    parser.add_argument("--distribution", choices=FakeVoiceSynthesizer.DISTRIBUTIONS, default="lognormal",
+                        help="合成遅延の分布")
+    parser.add_argument("--spread", type=float, default=0.3, help="合成遅延の分布の広がり")
+    parser.add_argument("--playback-per-char", type=float, default=0.01, help="1文字あたりの再生時間（秒）")
+    parser.add_argument("--save", help="計測結果を保存するJSONファイル")
+    parser.add_argument("--baseline", help="比較するベースラインJSONファイル（悪化があれば終了コード1）")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="許容する悪化率")
+    args = parser.parse_args()
+
+    benchmark = StreamingPipelineBenchmark(
+        ScriptedTokenStream(tokens_per_second=args.tokens_per_second, jitter=args.token_jitter,
+                            first_token_delay=args.first_token_delay),
+        FakeVoiceSynthesizer(base_latency=args.synthesis_latency, latency_per_char=args.latency_per_char,
+                             distribution=args.distribution, spread=args.spread,
+                             playback_per_char=args.playback_per_char)
+    )
+    print("🌊 ストリーミング応答パイプライン ベンチマーク")
+    report = benchmark.run(args.runs)
+    print(report.format_report())
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(report.to_dict(), ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 保存: {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = report.find_regressions(baseline['summary'], tolerance=args.tolerance)
+        for regression in regressions:
+            if regression['metric'].startswith("queue."):
+                change = f"{regression['baseline']:.1f} → {regression['current']:.1f}"
+            else:
+                change = f"{regression['baseline'] * 1000:.1f}ms → {regression['current'] * 1000:.1f}ms"
+            print(f"❌ 悪化: {regression['metric']} {regression['stat']} {change}")
+        if regressions:
+            sys.exit(1)
+        print("✅ ベースラインからの悪化なし")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,207 +8,355 @@ GPT-4ストリーミング応答システム
 import asyncio
 import threading
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, List, Callable
+from typing import Optional, List, Callable, Dict
 import re
 
 class StreamTextProcessor:
-    """ストリーミングテキストの分割処理"""
+    """ストリーミングテキストの分割処理
+
+    前回の走査位置を保持し、新しく届いた部分だけを走査して確定した文をすべて返す
+    （1チャンクあたり償却 O(チャンク長)）。
+    - 最小文字数に満たない文は次の文と結合する
+    - 目標文字数を超えたら読点（、,…〜）で分割する（最初の文は音声を早く出すため短めの目標）
+    - 区切りがないまま最大文字数を超えたら、直前の区切り候補（なければ最大文字数）で強制分割する
+    区切り文字の直後に続く閉じ括弧・連続した句読点（「。」」「！？」「...」）は同じ文に含める。
+    そのため区切り文字がバッファ末尾にあるときは次の文字が届くまで確定しない。
+    """
     
-    def __init__(self):
+    def __init__(self, min_sentence_length: int = 8, max_sentence_length: int = 80,
+                 target_length: int = 40, first_target_length: int = 20):
+        """
+        Args:
+            min_sentence_length: 最小文字数（これ未満の文は次の文と結合）
+            max_sentence_length: 最大文字数（これを超える文は強制分割）
+            target_length: 読点で分割する目標文字数
+            first_target_length: 最初の文の目標文字数
+        """
         self.buffer = ""
         self.sentence_delimiters = ["。", "！", "？", ".", "!", "?"]
-        self.pause_markers = ["、", ",", "...", "〜"]
-        self.min_sentence_length = 8  # 最小文字数
-        self.max_sentence_length = 80  # 最大文字数
+        self.pause_markers = ["、", ",", "，", "…", "〜", "～"]
+        self.closing_brackets = ["」", "』", "）", ")", "】", "〕", "\"", "'"]
+        self.min_sentence_length = min_sentence_length  # 最小文字数
+        self.max_sentence_length = max(max_sentence_length, 1)  # 最大文字数
+        self.target_length = target_length
+        self.first_target_length = first_target_length
+        
+        # 区切り文字で始まり、句読点・閉じ括弧が続く並び
+        boundary_chars = "".join(re.escape(char) for char in self.sentence_delimiters + self.pause_markers)
+        trailing_chars = boundary_chars + "".join(re.escape(char) for char in self.closing_brackets)
+        self._boundary_pattern = re.compile(f"[{boundary_chars}][{trailing_chars}]*")
+        self._sentence_delimiter_set = set(self.sentence_delimiters)
+        self._reset_scan_state()
+    
+    def _reset_scan_state(self):
+        """走査状態をリセット"""
+        self._scan_pos = 0  # 次に走査するバッファ位置
+        self._last_boundary = 0  # 分割しなかった区切り候補の直後の位置（強制分割用）
+        self._emitted_count = 0  # 出力した文の数
         
     def process_chunk(self, chunk_text: str) -> List[str]:
         """チャンクテキストを処理して完成した文章を返す"""
+        if not self.buffer:
+            chunk_text = chunk_text.lstrip()
         self.buffer += chunk_text
         sentences = self._extract_complete_sentences()
         return sentences
     
     def _extract_complete_sentences(self) -> List[str]:
-        """完成した文章を抽出"""
+        """完成した文章を抽出（前回の走査位置から再開）"""
         sentences = []
+        buffer, position = self.buffer, self._scan_pos
         
-        # 文章区切りで分割
-        for delimiter in self.sentence_delimiters:
-            if delimiter in self.buffer:
-                parts = self.buffer.split(delimiter, 1)  # 最初の区切りのみ
-                sentence = parts[0] + delimiter
-                
-                # 文字数チェック
-                if len(sentence.strip()) >= self.min_sentence_length:
-                    sentences.append(sentence.strip())
-                    self.buffer = parts[1] if len(parts) > 1 else ""
+        while True:
+            match = self._boundary_pattern.search(buffer, position)
+            if match is None or match.end() > self.max_sentence_length:
+                if len(buffer) <= self.max_sentence_length:
+                    position = len(buffer)
                     break
+                # 区切りがないまま最大文字数を超えた → 強制分割
+                if self._last_boundary >= self.min_sentence_length:
+                    cut = self._last_boundary
+                else:
+                    cut = self.max_sentence_length
+                buffer = self._emit_sentence(buffer, cut, sentences)
+                position = 0
+                continue
+            
+            start, end = match.span()
+            if end == len(buffer):
+                # 閉じ括弧・句読点が続く可能性があるため次の文字を待つ
+                position = start
+                break
+            position = end
+            if self._is_inline_punctuation(buffer, start, end):
+                continue
+            
+            is_sentence_end = any(char in self._sentence_delimiter_set for char in match.group())
+            target = self.first_target_length if self._emitted_count == 0 else self.target_length
+            if end >= self.min_sentence_length and (is_sentence_end or end >= target):
+                buffer = self._emit_sentence(buffer, end, sentences)
+                position = 0
+            else:
+                self._last_boundary = end
         
-        # 長すぎる場合は強制分割
-        if len(self.buffer) > self.max_sentence_length:
-            # 句読点で分割を試行
-            for marker in self.pause_markers:
-                if marker in self.buffer:
-                    parts = self.buffer.split(marker, 1)
-                    sentence = parts[0] + marker
-                    if len(sentence.strip()) >= self.min_sentence_length:
-                        sentences.append(sentence.strip())
-                        self.buffer = parts[1] if len(parts) > 1 else ""
-                        break
-        
+        self.buffer, self._scan_pos = buffer, position
         return sentences
     
+    @staticmethod
+    def _is_inline_punctuation(buffer: str, start: int, end: int) -> bool:
+        """文中の記号か（"3.5"・"1,000" の数字区切り、"ver.2"・"node.js" のドット）"""
+        if end - start != 1 or buffer[start] not in ".,":
+            return False
+        following = buffer[end]
+        if buffer[start] == "." and following.isascii() and following.isalnum():
+            return True
+        return start > 0 and buffer[start - 1].isdigit() and following.isdigit()
+    
+    def _emit_sentence(self, buffer: str, cut: int, sentences: List[str]) -> str:
+        """バッファ先頭から cut 文字を文として出力し、残りのバッファを返す"""
+        sentence = buffer[:cut].strip()
+        if sentence:
+            sentences.append(sentence)
+            self._emitted_count += 1
+        self._last_boundary = 0
+        return buffer[cut:].lstrip()
+    
     def get_remaining_buffer(self) -> str:
         """残りのバッファを取得してクリア"""
         remaining = self.buffer.strip()
-        self.buffer = ""
+        self.clear_buffer()
         return remaining
     
     def clear_buffer(self):
         """バッファをクリア"""
         self.buffer = ""
+        self._reset_scan_state()
 
 class ParallelVoiceSynthesis:
-    """並列音声合成システム"""
+    """並列音声合成システム（順序保証付きの合成→再生スケジューラー）
+
+    文に登録順のシーケンス番号を付け、再生位置から prefetch 文先までを並列に合成する。
+    合成結果は番号ごとの並べ替えバッファ（Future）に入り、完了順ではなく番号順に再生するため、
+    短い文が先に合成されても前の長い文を追い越さない。
+    再生ワーカーとスレッドプールは応答をまたいで維持し（応答ごとの起動コストなし）、
+    割り込み（interrupt）では合成待ち・合成中・再生待ちの文をすべて破棄する。
+    """
     
-    def __init__(self, voice_synthesizer, max_workers: int = 3):
+    def __init__(self, voice_synthesizer, max_workers: int = 3, prefetch: Optional[int] = None):
+        """
+        Args:
+            voice_synthesizer: synthesize_voice / play_voice を持つ音声合成器（stop_voice があれば割り込み時に呼ぶ）
+            max_workers: 音声合成スレッド数
+            prefetch: 再生位置から何文先まで合成しておくか（None=max_workers）
+        """
         self.voice_synthesizer = voice_synthesizer
-        self.synthesis_queue = asyncio.Queue()
-        self.playback_queue = asyncio.Queue()
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_workers = max_workers
+        self.prefetch = max(1, prefetch if prefetch is not None else max_workers)
+        self.synthesis_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voice_synthesis")
+        self.playback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice_playback")
         self.is_running = False
-        self.synthesis_task = None
         self.playback_task = None
+        self._loop = None
+        self._work_added = None
+        self._idle = None
+        self._reset_schedule()
         
-        print(f"🎵 並列音声合成システム初期化（ワーカー数: {max_workers}）")
+        print(f"🎵 並列音声合成システム初期化（ワーカー数: {max_workers}, 先読み: {self.prefetch}文）")
+    
+    def _reset_schedule(self):
+        """スケジュール状態をリセット"""
+        self._next_seq = 0  # 次に割り当てるシーケンス番号
+        self._play_seq = 0  # 次に再生するシーケンス番号
+        self._pending = deque()  # 合成開始待ちの番号
+        self._in_flight: Dict[int, asyncio.Task] = {}  # 合成中の番号 → タスク
+        self._slots: Dict[int, asyncio.Future] = {}  # 並べ替えバッファ: 番号 → 音声パス（合成失敗・破棄はNone）
+        self._sentences: Dict[int, str] = {}
+        self._playing = False
     
     async def start_workers(self):
-        """ワーカータスクを開始"""
-        if self.is_running:
+        """ワーカーを開始（起動済みなら何もしない）"""
+        loop = asyncio.get_running_loop()
+        if self.is_running and self._loop is loop and not self.playback_task.done():
             return
         
+        # 初回、または以前のイベントループが終了している場合は現在のループで作り直す
+        self._reset_schedule()
+        self._loop = loop
+        self._work_added = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
         self.is_running = True
-        self.synthesis_task = asyncio.create_task(self._synthesis_worker())
         self.playback_task = asyncio.create_task(self._playback_worker())
         print("🚀 音声合成ワーカー開始")
     
     async def stop_workers(self):
-        """ワーカータスクを停止"""
-        self.is_running = False
+        """ワーカーを停止（未再生の文は破棄。システム終了時に呼ぶ）"""
+        if not self.is_running:
+            return
         
-        if self.synthesis_task:
-            self.synthesis_task.cancel()
+        await self.interrupt()
+        self.is_running = False
         if self.playback_task:
             self.playback_task.cancel()
-        
-        # キューをクリア
-        while not self.synthesis_queue.empty():
             try:
-                self.synthesis_queue.get_nowait()
-                self.synthesis_queue.task_done()
-            except asyncio.QueueEmpty:
-                break
-        
-        while not self.playback_queue.empty():
-            try:
-                self.playback_queue.get_nowait()
-                self.playback_queue.task_done()
-            except asyncio.QueueEmpty:
-                break
+                await self.playback_task
+            except asyncio.CancelledError:
+                pass
+            self.playback_task = None
         
         print("⏹️ 音声合成ワーカー停止")
     
-    async def add_sentence_for_synthesis(self, sentence: str):
-        """音声合成キューに文章追加"""
-        if self.is_running:
-            await self.synthesis_queue.put(sentence)
-            print(f"📝 音声合成キューイング: {sentence[:30]}...")
+    def shutdown(self, wait: bool = True):
+        """スレッドプールを終了（stop_workers の後に呼ぶ）"""
+        self.synthesis_executor.shutdown(wait=wait)
+        self.playback_executor.shutdown(wait=wait)
     
-    async def _synthesis_worker(self):
-        """音声合成ワーカー"""
-        while self.is_running:
-            try:
-                sentence = await asyncio.wait_for(
-                    self.synthesis_queue.get(), 
-                    timeout=1.0
-                )
-                
-                # 別スレッドで音声合成実行
-                loop = asyncio.get_event_loop()
-                start_time = time.time()
-                
-                wav_path = await loop.run_in_executor(
-                    self.executor,
-                    self.voice_synthesizer.synthesize_voice,
-                    sentence
-                )
-                
-                synthesis_time = time.time() - start_time
-                
-                if wav_path:
-                    await self.playback_queue.put((wav_path, sentence))
-                    print(f"✅ 音声合成完了: {synthesis_time:.2f}s")
-                else:
-                    print(f"❌ 音声合成失敗: {sentence[:30]}...")
-                
-                self.synthesis_queue.task_done()
-                
-            except asyncio.TimeoutError:
-                continue
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                print(f"❌ 音声合成ワーカーエラー: {e}")
+    async def add_sentence_for_synthesis(self, sentence: str) -> Optional[int]:
+        """音声合成キューに文章追加（再生は追加順）。割り当てた番号を返す"""
+        if not self.is_running:
+            return None
+        
+        seq = self._next_seq
+        self._next_seq += 1
+        self._slots[seq] = self._loop.create_future()
+        self._sentences[seq] = sentence
+        self._pending.append(seq)
+        self._idle.clear()
+        self._work_added.set()
+        self._fill_prefetch()
+        print(f"📝 音声合成キューイング #{seq}: {sentence[:30]}...")
+        return seq
+    
+    def _fill_prefetch(self):
+        """再生位置から prefetch 文先までの合成を開始"""
+        while self._pending and self._pending[0] <= self._play_seq + self.prefetch:
+            seq = self._pending.popleft()
+            self._in_flight[seq] = asyncio.create_task(self._synthesize(seq, self._sentences[seq]))
+    
+    async def _synthesize(self, seq: int, sentence: str):
+        """1文を合成して並べ替えバッファに入れる"""
+        start_time = time.time()
+        try:
+            wav_path = await self._loop.run_in_executor(
+                self.synthesis_executor,
+                self.voice_synthesizer.synthesize_voice,
+                sentence
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ 音声合成ワーカーエラー: {e}")
+            wav_path = None
+        
+        if wav_path:
+            print(f"✅ 音声合成完了 #{seq}: {time.time() - start_time:.2f}s")
+        else:
+            print(f"❌ 音声合成失敗: {sentence[:30]}...")
+        
+        self._in_flight.pop(seq, None)
+        slot = self._slots.get(seq)
+        if slot is not None and not slot.done():
+            slot.set_result(wav_path)
     
     async def _playback_worker(self):
-        """音声再生ワーカー"""
+        """音声再生ワーカー（並べ替えバッファから番号順に再生）"""
         while self.is_running:
             try:
-                wav_path, sentence = await asyncio.wait_for(
-                    self.playback_queue.get(),
-                    timeout=1.0
-                )
+                while self._play_seq == self._next_seq:
+                    self._idle.set()
+                    self._work_added.clear()
+                    await self._work_added.wait()
                 
-                # 音声再生
-                loop = asyncio.get_event_loop()
-                start_time = time.time()
-                
-                success = await loop.run_in_executor(
-                    self.executor,
-                    self.voice_synthesizer.play_voice,
-                    wav_path
-                )
-                
-                playback_time = time.time() - start_time
-                
-                if success:
-                    print(f"🔊 音声再生完了: {playback_time:.2f}s")
-                else:
-                    print(f"❌ 音声再生失敗: {sentence[:30]}...")
-                
-                self.playback_queue.task_done()
-                
-            except asyncio.TimeoutError:
-                continue
+                seq = self._play_seq
+                try:
+                    wav_path = await self._slots[seq]
+                    # 合成待ちの間に割り込まれていたら再生しない
+                    if wav_path and seq == self._play_seq:
+                        await self._play(seq, wav_path)
+                finally:
+                    self._finish_sentence(seq)
+            
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 print(f"❌ 音声再生ワーカーエラー: {e}")
     
+    async def _play(self, seq: int, wav_path: str):
+        """1文を再生"""
+        sentence = self._sentences.get(seq, "")
+        self._playing = True
+        try:
+            start_time = time.time()
+            success = await self._loop.run_in_executor(
+                self.playback_executor,
+                self.voice_synthesizer.play_voice,
+                wav_path
+            )
+            
+            playback_time = time.time() - start_time
+            
+            if success:
+                print(f"🔊 音声再生完了 #{seq}: {playback_time:.2f}s")
+            else:
+                print(f"❌ 音声再生失敗: {sentence[:30]}...")
+        finally:
+            self._playing = False
+    
+    def _finish_sentence(self, seq: int):
+        """再生（またはスキップ）した文を並べ替えバッファから外して先読みを進める"""
+        self._slots.pop(seq, None)
+        self._sentences.pop(seq, None)
+        self._play_seq = max(self._play_seq, seq + 1)
+        self._fill_prefetch()
+    
+    async def interrupt(self):
+        """割り込み（バージイン）: 合成待ち・合成中・再生待ちの文を破棄し、再生中の音声を止める"""
+        if not self.is_running:
+            return
+        
+        discarded = self._next_seq - self._play_seq
+        for task in self._in_flight.values():
+            task.cancel()
+        for slot in self._slots.values():
+            if not slot.done():
+                slot.set_result(None)
+        self._in_flight.clear()
+        self._pending.clear()
+        self._slots.clear()
+        self._sentences.clear()
+        self._play_seq = self._next_seq
+        
+        stop_voice = getattr(self.voice_synthesizer, "stop_voice", None)
+        if self._playing and stop_voice:
+            stop_voice()
+        
+        print(f"✋ 音声割り込み: {discarded}文を破棄")
+    
+    def get_queue_depths(self) -> Dict[str, int]:
+        """キューの深さ（合成待ち・合成中・再生待ち）"""
+        ready = sum(1 for slot in self._slots.values() if slot.done())
+        return {
+            'pending': len(self._pending),
+            'synthesizing': len(self._in_flight),
+            'ready': ready - (1 if self._playing else 0)
+        }
+    
     async def wait_completion(self):
-        """全ての処理完了を待機"""
-        await self.synthesis_queue.join()
-        await self.playback_queue.join()
+        """登録済みの文をすべて再生し終えるまで待機"""
+        if self.is_running:
+            await self._idle.wait()
         print("✅ 全音声処理完了")
 
 class StreamingResponseSystem:
     """ストリーミング応答統合システム"""
     
-    def __init__(self, setsuna_chat, voice_synthesizer):
+    def __init__(self, setsuna_chat, voice_synthesizer, max_workers: int = 3, prefetch: Optional[int] = None):
         self.setsuna_chat = setsuna_chat
         self.voice_synthesizer = voice_synthesizer
         self.text_processor = StreamTextProcessor()
-        self.parallel_synthesis = ParallelVoiceSynthesis(voice_synthesizer)
+        self.parallel_synthesis = ParallelVoiceSynthesis(voice_synthesizer, max_workers, prefetch)
         self.gui_callback = None
         
         print("🌊 ストリーミング応答システム初期化完了")
@@ -224,7 +372,7 @@ class StreamingResponseSystem:
         # テキスト処理器リセット
         self.text_processor.clear_buffer()
         
-        # 並列音声合成開始
+        # 並列音声合成開始（起動済みのワーカーは応答をまたいで再利用）
         await self.parallel_synthesis.start_workers()
         
         full_response = ""
@@ -268,11 +416,13 @@ class StreamingResponseSystem:
             # 全音声処理完了を待機
             await self.parallel_synthesis.wait_completion()
             
+        except asyncio.CancelledError:
+            # 割り込み: 未再生の音声を破棄
+            await self.parallel_synthesis.interrupt()
+            raise
         except Exception as e:
             print(f"❌ ストリーミング処理エラー: {e}")
-        finally:
-            # ワーカー停止
-            await self.parallel_synthesis.stop_workers()
+            await self.parallel_synthesis.interrupt()
         
         print(f"🌊 ストリーミング応答完了: {len(full_response)}文字")
         return full_response
@@ -283,6 +433,8 @@ class AsyncGUIIntegration:
     def __init__(self, gui):
         self.gui = gui
         self.streaming_system = None
+        self.loop = None  # 応答をまたいで音声ワーカーを維持するための常駐イベントループ
+        self.current_response = None
         
     def initialize_streaming(self):
         """ストリーミングシステム初期化"""
@@ -309,21 +461,26 @@ class AsyncGUIIntegration:
             print("❌ ストリーミングシステムが初期化されていません")
             return
         
-        # 別スレッドで非同期処理実行
-        threading.Thread(
-            target=self._run_async_response,
-            args=(user_input,),
-            daemon=True
-        ).start()
-    
-    def _run_async_response(self, user_input: str):
-        """別スレッドで非同期処理実行"""
-        try:
-            asyncio.run(self._async_response_handler(user_input))
-        except Exception as e:
-            print(f"❌ 非同期応答エラー: {e}")
-            # エラー時のGUI更新
-            self.gui.root.after(0, lambda: self.gui.update_voice_status("エラー"))
+        # 前の応答が続いていれば割り込んでから開始
+        self.interrupt_response()
+        
+        # 常駐イベントループのスレッドで非同期処理実行
+        self.current_response = asyncio.run_coroutine_threadsafe(
+            self._async_response_handler(user_input),
+            self._ensure_event_loop()
+        )
+    
+    def interrupt_response(self):
+        """実行中の応答を中断（バージイン）。未再生の音声は破棄される"""
+        if self.current_response and not self.current_response.done():
+            self.current_response.cancel()
+    
+    def _ensure_event_loop(self) -> asyncio.AbstractEventLoop:
+        """常駐イベントループを取得（初回のみ別スレッドで起動）"""
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        return self.loop
     
     async def _async_response_handler(self, user_input: str):
         """非同期応答処理"""
@@ -336,6 +493,9 @@ class AsyncGUIIntegration:
             ))
             self.gui.root.after(0, lambda: self.gui.update_voice_status("完了"))
             
+        except asyncio.CancelledError:
+            self.gui.root.after(0, lambda: self.gui.update_voice_status("中断"))
+            raise
         except Exception as e:
             print(f"❌ 非同期応答処理エラー: {e}")
             self.gui.root.after(0, lambda: self.gui.update_voice_status("エラー"))
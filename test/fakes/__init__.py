@@ -0,0 +1,3 @@
+"""
+テスト用の擬似サービス（YouTube Data API など外部APIのオフライン代替）
+"""
@@ -0,0 +1,254 @@
+"""
+オフライン用Chat Completionsサーバー
+
+OpenAI互換の POST /v1/chat/completions をローカルで応答する擬似サーバー。
+OpenAI(base_url=server.base_url) / AsyncOpenAI の実クライアントからそのまま呼び出せ、応答遅延と
+同時実行数の上限を超えたときのレート制限（429 + Retry-After）を再現できる。
+stream=True のリクエストには chat.completion.chunk を Server-Sent Events で少しずつ送るため、
+DescriptionAnalyzer の並列分析・バックオフ・キャッシュや SetsunaChat の get_response と
+stream_response をオフラインで確認・計測できる
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, List, Callable, Union
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """リクエストハンドラー"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {'error': {'message': f"Unknown path: {self.path}"}}, {})
+            return
+
+        owner = self.server.owner
+        status, payload, headers = owner._handle(body)
+        if status == 200 and body.get('stream'):
+            self._send_stream(owner, body, payload)
+        else:
+            self._send_json(status, payload, headers)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str]):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, owner: 'FakeCompletionServer', body: Dict[str, Any], completion: Dict[str, Any]):
+        """SSE（chunked転送）で応答を少しずつ送信。クライアントが切断したら中断を記録"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        sent = 0
+        try:
+            if owner.first_chunk_delay:
+                time.sleep(owner.first_chunk_delay)
+            for index, event in enumerate(owner._stream_events(body, completion)):
+                if index and owner.chunk_interval and event.get('choices'):
+                    time.sleep(owner.chunk_interval)
+                self._write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode('utf-8'))
+                sent += 1
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            owner._record_stream(sent, completed=False)
+            return
+        owner._record_stream(sent, completed=True)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeCompletionServer:
+    """オフライン用Chat Completionsサーバー"""
+
+    def __init__(self, reply: Union[str, Callable[[List[Dict[str, str]]], str], None] = None,
+                 latency: float = 0.0, max_concurrent: Optional[int] = None, retry_after: float = 0.05,
+                 chars_per_chunk: int = 2, chunk_interval: float = 0.0, first_chunk_delay: float = 0.0):
+        """
+        Args:
+            reply: 応答文、またはリクエストの messages から応答文を返す関数
+                   （None=最後のメッセージの概要欄を分析したJSONを返す）
+            latency: 1リクエストあたりの応答遅延（秒）
+            max_concurrent: 同時に処理できるリクエスト数（超えた分は429、None=無制限）
+            retry_after: 429応答で指定する再試行までの秒数
+            chars_per_chunk: ストリーミング時の1チャンクあたりの文字数
+            chunk_interval: ストリーミング時のチャンク間の送信間隔（秒）
+            first_chunk_delay: ストリーミング時に最初のチャンクを送るまでの遅延（秒）
+        """
+        self.reply = reply
+        self.latency = latency
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.chars_per_chunk = max(1, chars_per_chunk)
+        self.chunk_interval = chunk_interval
+        self.first_chunk_delay = first_chunk_delay
+
+        self._lock = threading.Lock()
+        self.requests: List[Dict[str, Any]] = []
+        self.calls = 0
+        self.completed_calls = 0
+        self.rate_limited_calls = 0
+        self.active_requests = 0
+        self.max_active_requests = 0
+        self.completed_streams = 0
+        self.disconnected_streams = 0
+        self.sent_chunks = 0
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI クライアントの base_url に渡すURL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'FakeCompletionServer':
+        """サーバーを起動（空いているポートを使用）"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'FakeCompletionServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handle(self, body: Dict[str, Any]):
+        """Chat Completions リクエストを処理（同時実行数を超えたら429）"""
+        with self._lock:
+            self.calls += 1
+            self.requests.append(body)
+            if self.max_concurrent is not None and self.active_requests >= self.max_concurrent:
+                self.rate_limited_calls += 1
+                return 429, {'error': {'message': "Rate limit reached for requests", 'type': "requests",
+                                       'code': "rate_limit_exceeded"}}, {'Retry-After': str(self.retry_after)}
+            self.active_requests += 1
+            self.max_active_requests = max(self.max_active_requests, self.active_requests)
+
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            content = self._reply_content(body.get('messages', []))
+        finally:
+            with self._lock:
+                self.active_requests -= 1
+
+        with self._lock:
+            self.completed_calls += 1
+            completion_id = f"chatcmpl-fake-{self.completed_calls}"
+        return 200, {
+            'id': completion_id,
+            'object': "chat.completion",
+            'created': int(time.time()),
+            'model': body.get('model', "fake"),
+            'choices': [{'index': 0, 'message': {'role': "assistant", 'content': content},
+                         'finish_reason': "stop"}],
+            'usage': self._usage(body, content)
+        }, {}
+
+    def _reply_content(self, messages: List[Dict[str, str]]) -> str:
+        """応答文を決定"""
+        if self.reply is None:
+            prompt = messages[-1]['content']
+            return "```json\n" + json.dumps(self._analyze(prompt), ensure_ascii=False, indent=2) + "\n```"
+        return self.reply(messages) if callable(self.reply) else self.reply
+
+    @staticmethod
+    def _usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+        prompt_tokens = sum(len(message.get('content') or "") for message in body.get('messages', []))
+        return {'prompt_tokens': prompt_tokens, 'completion_tokens': len(content),
+                'total_tokens': prompt_tokens + len(content)}
+
+    def _stream_events(self, body: Dict[str, Any], completion: Dict[str, Any]):
+        """ストリーミング応答（chat.completion.chunk の列）"""
+        content = completion['choices'][0]['message']['content']
+        base = {'id': completion['id'], 'object': "chat.completion.chunk",
+                'created': completion['created'], 'model': completion['model']}
+
+        def chunk(delta: Dict[str, str], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return dict(base, choices=[{'index': 0, 'delta': delta, 'finish_reason': finish_reason}])
+
+        yield chunk({'role': "assistant", 'content': ""})
+        for start in range(0, len(content), self.chars_per_chunk):
+            yield chunk({'content': content[start:start + self.chars_per_chunk]})
+        yield chunk({}, "stop")
+        if (body.get('stream_options') or {}).get('include_usage'):
+            yield dict(base, choices=[], usage=completion['usage'])
+
+    def _record_stream(self, sent: int, completed: bool) -> None:
+        with self._lock:
+            if completed:
+                self.completed_streams += 1
+            else:
+                self.disconnected_streams += 1
+            self.sent_chunks += sent
+
+    @staticmethod
+    def _analyze(prompt: str) -> Dict[str, Any]:
+        """概要欄の定型表記から分析結果を組み立て"""
+        description = prompt.rsplit("概要欄:\n", 1)[-1]
+        creators = {}
+        for role, pattern in (("vocal", r"(?:Vocal|歌)[:：]\s*(\S+)"),
+                              ("composer", r"(?:作曲|作詞・作曲|Music)[:：]\s*(\S+)"),
+                              ("illustration", r"(?:イラスト|Illust)[:：]\s*(\S+)"),
+                              ("movie", r"(?:動画|Movie)[:：]\s*(\S+)")):
+            match = re.search(pattern, description)
+            if match:
+                creators[role] = match.group(1)
+
+        genre = re.search(r"#(\S+)", description)
+        return {
+            'creators': creators,
+            'lyrics': None,
+            'tools': {'software': re.findall(r"(?:使用ソフト|Software)[:：]\s*(\S+)", description)},
+            'music_info': {'genre': genre.group(1) if genre else None, 'mood': None},
+            'confidence_score': 0.9 if creators else 0.4
+        }
+
+    def get_stats(self) -> Dict[str, int]:
+        """統計情報を取得"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'completed_calls': self.completed_calls,
+                'rate_limited_calls': self.rate_limited_calls,
+                'max_active_requests': self.max_active_requests,
+                'stream_requests': sum(1 for body in self.requests if body.get('stream')),
+                'completed_streams': self.completed_streams,
+                'disconnected_streams': self.disconnected_streams,
+                'sent_chunks': self.sent_chunks
+            }
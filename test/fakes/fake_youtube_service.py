@@ -0,0 +1,218 @@
+"""
+オフライン用YouTubeサービス
+
+googleapiclient の service.playlists() / playlistItems() / videos() と同じ呼び出し形式・
+レスポンス構造を返す擬似サービス。ネットワーク遅延・取得できない動画・通信障害・
+ETagによる条件付きリクエスト（If-None-Match → 304）を再現でき、
+MultiPlaylistCollector のスループット計測や再開処理・差分同期の確認をオフラインで行える
+"""
+
+import json
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional, Iterable
+
+
+class FakeYouTubeServiceError(ConnectionError):
+    """擬似的な通信障害"""
+
+
+class FakeHttpError(Exception):
+    """googleapiclient の HttpError 相当（resp.status でステータスを参照）"""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"<HttpError {status}: {reason}>")
+        self.resp = SimpleNamespace(status=status, reason=reason)
+
+
+class _FakeRequest:
+    """list() が返すリクエスト（execute() で応答）"""
+
+    def __init__(self, service: 'FakeYouTubeService', method: str, params: Dict[str, Any]):
+        self._service = service
+        self._method = method
+        self._params = params
+        self.headers: Dict[str, str] = {}
+
+    def execute(self) -> Dict[str, Any]:
+        return self._service._call(self._method, self._params, self.headers)
+
+
+class _FakeResource:
+    """service.videos() などが返すリソース"""
+
+    def __init__(self, service: 'FakeYouTubeService', name: str):
+        self._service = service
+        self._name = name
+
+    def list(self, **params) -> _FakeRequest:
+        return _FakeRequest(self._service, f"{self._name}.list", params)
+
+
+class FakeYouTubeService:
+    """オフライン用YouTube Data APIサービス"""
+
+    def __init__(self, playlists: Dict[str, List[str]], latency: float = 0.0,
+                 missing_video_ids: Iterable[str] = (), fail_after: Optional[int] = None):
+        """
+        Args:
+            playlists: プレイリストID -> 動画IDリスト
+            latency: 1リクエストあたりの応答遅延（秒）
+            missing_video_ids: videos.list で返さない動画ID（削除・非公開動画）
+            fail_after: この回数のリクエストに成功した後は通信障害を発生させる
+        """
+        self.playlist_items = playlists
+        self.latency = latency
+        self.missing_video_ids = set(missing_video_ids)
+        self.fail_after = fail_after
+        self.revisions: Dict[str, int] = {}  # 動画ID -> 編集回数（タイトル・概要欄に反映）
+
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.successful_calls = 0
+        self.not_modified_calls = 0
+        self.active_requests = 0
+        self.max_active_requests = 0
+
+    @classmethod
+    def generate(cls, playlist_count: int, videos_per_playlist: int, shared_videos: int = 0,
+                 **options) -> 'FakeYouTubeService':
+        """
+        合成プレイリストを持つサービスを生成
+
+        Args:
+            playlist_count: プレイリスト数
+            videos_per_playlist: 1プレイリストあたりの動画数
+            shared_videos: 全プレイリストに共通して含まれる動画数
+        """
+        shared = [f"shared{i:07d}" for i in range(shared_videos)]
+        playlists = {}
+        for p in range(playlist_count):
+            own = [f"PL{p:03d}_{i:07d}" for i in range(videos_per_playlist - shared_videos)]
+            playlists[f"PLFAKE{p:028d}"] = shared + own  # 実際のIDと同じ34文字
+        return cls(playlists, **options)
+
+    def edit_video(self, video_id: str) -> None:
+        """動画のタイトル・概要欄を編集（内容ハッシュ・ページのETagが変わる）"""
+        with self._lock:
+            self.revisions[video_id] = self.revisions.get(video_id, 0) + 1
+
+    def playlists(self) -> _FakeResource:
+        return _FakeResource(self, "playlists")
+
+    def playlistItems(self) -> _FakeResource:
+        return _FakeResource(self, "playlistItems")
+
+    def videos(self) -> _FakeResource:
+        return _FakeResource(self, "videos")
+
+    def _call(self, method: str, params: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        """リクエストを処理（呼び出し回数・同時実行数を記録、ETagが一致すれば304）"""
+        with self._lock:
+            if self.fail_after is not None and self.successful_calls >= self.fail_after:
+                raise FakeYouTubeServiceError(f"擬似通信障害: {method}")
+            self.active_requests += 1
+            self.max_active_requests = max(self.max_active_requests, self.active_requests)
+
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            response = getattr(self, "_" + method.replace(".", "_"))(params)
+            response['etag'] = self._etag(response)
+        finally:
+            with self._lock:
+                self.active_requests -= 1
+
+        not_modified = headers.get('If-None-Match') == response['etag']
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self.successful_calls += 1
+            if not_modified:
+                self.not_modified_calls += 1
+        if not_modified:
+            raise FakeHttpError(304, "Not Modified")
+        return response
+
+    @staticmethod
+    def _etag(response: Dict[str, Any]) -> str:
+        """レスポンス内容から決まるETag"""
+        body = json.dumps(response, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        return f'"{zlib.crc32(body):08x}"'
+
+    def _video_snippet(self, video_id: str) -> Dict[str, str]:
+        """動画のタイトル・概要欄（playlistItems / videos で共通）"""
+        if video_id in self.missing_video_ids:
+            return {'title': "Deleted video", 'description': "This video is unavailable."}
+        seed = zlib.crc32(video_id.encode('utf-8'))
+        revision = self.revisions.get(video_id, 0)
+        return {
+            'title': f"テスト楽曲 {video_id}" + (f" (改訂{revision})" if revision else ""),
+            'description': f"{video_id} の概要欄\n作詞・作曲: Composer{seed % 50}"
+                           + (f"\n更新 {revision}" if revision else "")
+        }
+
+    def _playlists_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        playlist_id = params['id']
+        video_ids = self.playlist_items.get(playlist_id)
+        if video_ids is None:
+            return {'items': []}
+        return {'items': [{
+            'id': playlist_id,
+            'snippet': {
+                'title': f"テストプレイリスト {playlist_id}",
+                'description': "オフライン用の擬似プレイリスト",
+                'channelTitle': "Fake Channel",
+                'channelId': "UCFAKE",
+                'publishedAt': "2024-01-01T00:00:00Z"
+            },
+            'contentDetails': {'itemCount': len(video_ids)}
+        }]}
+
+    def _playlistItems_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        video_ids = self.playlist_items.get(params['playlistId'], [])
+        page_size = params.get('maxResults', 5)
+        page_token = params.get('pageToken')
+        offset = int(page_token.split("_")[1]) if page_token else 0
+
+        response = {'items': [
+            {'snippet': {**self._video_snippet(video_id),
+                         'resourceId': {'kind': 'youtube#video', 'videoId': video_id}, 'position': offset + i}}
+            for i, video_id in enumerate(video_ids[offset:offset + page_size])
+        ]}
+        if offset + page_size < len(video_ids):
+            response['nextPageToken'] = f"PAGE_{offset + page_size}"
+        return response
+
+    def _videos_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        items = []
+        for video_id in params['id'].split(","):
+            if video_id in self.missing_video_ids:
+                continue
+            seed = zlib.crc32(video_id.encode('utf-8'))
+            items.append({
+                'id': video_id,
+                'snippet': {
+                    **self._video_snippet(video_id),
+                    'publishedAt': f"2023-{seed % 12 + 1:02d}-{seed % 28 + 1:02d}T12:00:00Z",
+                    'channelTitle': f"Channel{seed % 20}",
+                    'channelId': f"UC{seed % 20:04d}",
+                    'tags': ["ボカロ", f"tag{seed % 30}"],
+                    'categoryId': "10"
+                },
+                'contentDetails': {'duration': f"PT{seed % 5 + 2}M{seed % 60}S"},
+                'statistics': {'viewCount': str(seed % 100000), 'likeCount': str(seed % 5000),
+                               'commentCount': str(seed % 300)}
+            })
+        return {'items': items}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'successful_calls': self.successful_calls,
+                'not_modified_calls': self.not_modified_calls,
+                'max_active_requests': self.max_active_requests
+            }
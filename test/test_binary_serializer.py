@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知識DBバイナリ直列化テスト - JSONとの可逆変換・形式バージョン・バイナリスナップショット・読み書き時間/ピークメモリ比較
+"""
+
+import sys
+import io
+import importlib.util
+import json
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+YOUTUBE_SYSTEM_ROOT = Path(__file__).parent.parent / "youtube_knowledge_system"
+
+
+def load_serializer_modules():
+    """YouTube知識システム側のモジュールを読み込み（独自のcore/configパッケージを持つため実行時に追加）"""
+    if str(YOUTUBE_SYSTEM_ROOT) not in sys.path:
+        sys.path.insert(0, str(YOUTUBE_SYSTEM_ROOT))
+    from core import data_models, binary_serializer
+    from storage import unified_storage
+    return data_models, binary_serializer, unified_storage
+
+
+def load_snapshot_module():
+    """せつなBot側の知識DBローダー（パッケージ名coreが衝突するためファイルから直接読み込み）"""
+    path = Path(__file__).parent.parent / "core" / "knowledge_db_snapshot.py"
+    spec = importlib.util.spec_from_file_location("knowledge_db_snapshot", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_database(dm, count: int):
+    """合成DBを生成（タイムゾーン付き日時・未分析・型の揺れた値を含む）"""
+    now = datetime(2024, 1, 1, 12, 30, 15, 123456)
+    jst = timezone(timedelta(hours=9))
+    videos = []
+    for i in range(count):
+        metadata = dm.VideoMetadata(
+            id=f"vid{i:07d}", title=f"テスト楽曲 {i} 🎵", description="歌ってみた・ボカロ・作業用BGM " * 8,
+            published_at=datetime(2023, 5, 1, tzinfo=timezone.utc) + timedelta(minutes=i),
+            channel_title=f"Channel{i % 30}", channel_id=f"UC{i % 30:04d}", duration="PT3M45S",
+            view_count=i * 37 if i % 1000 else str(i), like_count=i % 500, comment_count=i % 20,
+            tags=["ボカロ", f"tag{i % 40}", "ロック"], category_id="10", collected_at=now
+        )
+        insight = None
+        if i % 4:
+            music_info = dm.MusicInfo(lyrics="歌詞\n" * 3, genre="J-POP", bpm=120 if i % 3 else None,
+                                      mood="明るい" if i % 5 else None) if i % 2 else None
+            insight = dm.CreativeInsight(
+                creators=[dm.CreatorInfo(f"Artist{i % 50}", "vocal", 0.9),
+                          dm.CreatorInfo(f"Composer{i % 70}", "composer", 1)],
+                music_info=music_info, tools_used=["DAW"] if i % 3 else [], themes=["青春", "夏"],
+                visual_elements=[], analysis_confidence=0.8, analysis_timestamp=datetime(2024, 2, 1, tzinfo=jst),
+                analysis_model="gpt-4", insights="分析メモ" if i % 2 else ""
+            )
+        videos.append(dm.Video(
+            source=dm.ContentSource.YOUTUBE, metadata=metadata, playlists=["PL_A", "PL_B"] if i % 7 == 0 else ["PL_A"],
+            playlist_positions={"PL_A": i}, analysis_status=dm.AnalysisStatus.COMPLETED if insight else dm.AnalysisStatus.PENDING,
+            creative_insight=insight, analysis_error=None if i % 9 else "タイムアウト", created_at=now,
+            updated_at=now + timedelta(seconds=i), retry_count=i % 3, last_analysis_error=None if i % 9 else "タイムアウト"
+        ))
+
+    db = dm.create_empty_database()
+    db.add_videos(videos)
+    for playlist_id, video_ids in (("PL_A", list(db.videos)), ("PL_B", list(db.videos)[::7])):
+        db.add_playlist(dm.Playlist(
+            source=dm.ContentSource.YOUTUBE,
+            metadata=dm.PlaylistMetadata(playlist_id, f"プレイリスト{playlist_id}", "", "Channel", "UC0000",
+                                         now, len(video_ids), now),
+            video_ids=video_ids, last_full_sync=now, last_incremental_sync=None if playlist_id == "PL_A" else now,
+            sync_settings={"frequency": "daily", "filters": {"min_views": 0}}, total_videos=len(video_ids),
+            analyzed_videos=len(video_ids) // 2, analysis_success_rate=0.5, created_at=now, updated_at=now
+        ))
+    return db
+
+
+def database_state(db):
+    """ストレージ比較用の内容（読み込み時に更新される時刻を除く）"""
+    data = db.to_dict()
+    data.pop("last_updated")
+    return json.dumps(data, ensure_ascii=False)
+
+
+def measure(fmt: str, path: str):
+    """子プロセスで読み込み・保存の時間とピークメモリ増加量（LinuxではRSS、それ以外はPythonヒープ）を計測して出力"""
+    _, binary_serializer, _ = load_serializer_modules()
+    from core.data_models import KnowledgeDatabase
+
+    def load():
+        if fmt == "binary":
+            with open(path, 'rb') as f:
+                return binary_serializer.loads_database(f.read())
+        with open(path, 'r', encoding='utf-8') as f:
+            return KnowledgeDatabase.from_dict(json.load(f))
+
+    def save(db):
+        output = path + ".out"
+        if fmt == "binary":
+            with open(output, 'wb') as f:
+                f.write(binary_serializer.dumps_database(db))
+        else:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(db.to_dict(), f, ensure_ascii=False, indent=2)
+
+    # Linuxではピーク値（VmHWM）をリセットして区間ごとにRSSを計測、それ以外はPythonヒープのピークで代用
+    proc_status = Path("/proc/self/status")
+    memory_metric = "ピークRSS" if proc_status.exists() else "Pythonヒープピーク"
+
+    def run(action, *args):
+        if proc_status.exists():
+            with open("/proc/self/clear_refs", 'w') as f:
+                f.write("5")
+            status = lambda key: next(int(line.split()[1]) for line in proc_status.read_text().splitlines()
+                                      if line.startswith(key))
+            baseline = status("VmRSS:")
+            start_time = time.perf_counter()
+            value = action(*args)
+            elapsed = time.perf_counter() - start_time
+            return value, elapsed, (status("VmHWM:") - baseline) / 1024
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        value = action(*args)
+        elapsed = time.perf_counter() - start_time
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return value, elapsed, peak / 1024 / 1024
+
+    db, load_time, load_memory = run(load)
+    _, save_time, save_memory = run(save, db)
+    print(json.dumps({"load_time": load_time, "load_memory_mb": load_memory,
+                      "save_time": save_time, "save_memory_mb": save_memory,
+                      "memory_metric": memory_metric}, ensure_ascii=False))
+
+
+class BinarySerializerTester:
+    """知識DBバイナリ直列化テスター"""
+
+    def __init__(self, benchmark_count: int = 10000):
+        """初期化"""
+        self.benchmark_count = benchmark_count
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("📦 知識DBバイナリ直列化テスト")
+        print("=" * 60)
+
+        self.dm, self.serializer, self.unified_storage = load_serializer_modules()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        test_results = {}
+        try:
+            # テスト1: オブジェクト単位の可逆変換
+            test_results["lossless_round_trip"] = self.test_lossless_round_trip()
+
+            # テスト2: JSONファイルとの相互変換
+            test_results["json_conversion"] = self.test_json_conversion()
+
+            # テスト3: 形式バージョン・旧形式の読み込み
+            test_results["format_versioning"] = self.test_format_versioning()
+
+            # テスト4: バイナリスナップショットでのUnifiedStorage
+            test_results["binary_snapshot_storage"] = self.test_binary_snapshot_storage()
+
+            # テスト5: バイナリスナップショットでもせつなBot側の読み取りが最新になること
+            test_results["binary_bot_readers"] = self.test_binary_bot_readers()
+
+            # テスト6: 読み書き時間・ピークメモリ比較
+            test_results["benchmark"] = self.test_benchmark()
+        finally:
+            self.temp_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_lossless_round_trip(self):
+        """可逆変換テスト"""
+        print("\n🔁 可逆変換テスト")
+        print("-" * 40)
+
+        db = build_database(self.dm, 1200)
+        video = db.videos["vid0000003"]
+        video.metadata.like_count = 2 ** 70  # int64に収まらない値
+        video.metadata.tags = ["ボカロ", 3]  # 文字列以外を含むタグ
+        video.playlist_positions = {"PL_A": "3"}
+        db.update_video(video.metadata.id)
+        blob = self.serializer.dumps_database(db, {"journal_generation": 7})
+        restored, extra = self.serializer.loads_snapshot(blob)
+
+        # 索引は復元時に再構築されるため、キーの並びではなく内容で比較
+        same = (restored.to_dict() == db.to_dict() and list(restored.videos) == list(db.videos) and
+                restored.last_updated == db.last_updated)
+        types_kept = (type(restored.videos["vid0000000"].metadata.view_count) is str and
+                      restored.videos["vid0000001"].creative_insight.creators[1].confidence == 1 and
+                      type(restored.videos["vid0000001"].creative_insight.creators[1].confidence) is int and
+                      restored.videos["vid0000001"].metadata.published_at.tzinfo is not None)
+        indexed = len(restored.get_videos_by_tag("tag3")) == len(db.get_videos_by_tag("tag3"))
+        success = same and types_kept and indexed and extra == {"journal_generation": 7}
+        print(f"{'✅' if same else '❌'} to_dict() 完全一致 ({len(db.videos)}動画, {len(blob) / 1024:.0f}KB)")
+        print(f"{'✅' if types_kept else '❌'} 型の揺れ・タイムゾーンの保持")
+        print(f"{'✅' if indexed else '❌'} 復元後の索引")
+        return {"success": success}
+
+    def test_json_conversion(self):
+        """JSONファイルとの相互変換テスト"""
+        print("\n🔄 JSON相互変換テスト")
+        print("-" * 40)
+
+        json_file = Path(self.temp_dir.name) / "source.json"
+        data = build_database(self.dm, 300).to_dict()
+        data["journal_generation"] = 4
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+        binary_file = Path(self.temp_dir.name) / "converted.ykdb"
+        restored_file = Path(self.temp_dir.name) / "restored.json"
+        self.serializer.json_to_binary(json_file, binary_file)
+        self.serializer.binary_to_json(binary_file, restored_file)
+        with open(restored_file, 'r', encoding='utf-8') as f:
+            restored = json.load(f)
+
+        success = restored == data
+        ratio = binary_file.stat().st_size / json_file.stat().st_size
+        print(f"{'✅' if success else '❌'} JSON → バイナリ → JSON の内容一致 (サイズ比 {ratio:.2f})")
+        return {"success": success}
+
+    def test_format_versioning(self):
+        """形式バージョン・旧形式の読み込みテスト"""
+        print("\n🏷️ 形式バージョンテスト")
+        print("-" * 40)
+
+        db = build_database(self.dm, 20)
+        blob = self.serializer.dumps_database(db)
+
+        # 未来のバージョン・別形式は明示的に拒否
+        rejected = 0
+        future = blob[:4] + (self.serializer.FORMAT_VERSION + 1).to_bytes(2, "little") + blob[6:]
+        for invalid in (future, b"{}" + blob, blob[:-1]):
+            try:
+                self.serializer.loads_database(invalid)
+            except ValueError:
+                rejected += 1
+
+        # 後から追加されたフィールド（再試行情報）の列が無い旧形式は既定値で読む
+        video_schema = self.serializer.SCHEMA[self.dm.Video]
+        legacy_schema = {k: v for k, v in video_schema.items() if k not in ("retry_count", "last_analysis_error")}
+        self.serializer.SCHEMA[self.dm.Video] = legacy_schema
+        try:
+            legacy_blob = self.serializer.dumps_database(db)
+        finally:
+            self.serializer.SCHEMA[self.dm.Video] = video_schema
+        legacy = self.serializer.loads_database(legacy_blob)
+        defaults_ok = all(video.retry_count == 0 and video.last_analysis_error is None
+                          for video in legacy.videos.values())
+
+        success = rejected == 3 and defaults_ok
+        print(f"{'✅' if rejected == 3 else '❌'} 未対応バージョン・不正データの拒否 ({rejected}/3)")
+        print(f"{'✅' if defaults_ok else '❌'} 旧形式（列の欠落）を既定値で読み込み")
+        return {"success": success}
+
+    def test_binary_snapshot_storage(self):
+        """バイナリスナップショットでのUnifiedStorageテスト"""
+        print("\n💾 バイナリスナップショットテスト")
+        print("-" * 40)
+
+        data_dir = Path(self.temp_dir.name) / "storage"
+        with redirect_stdout(io.StringIO()):
+            json_storage = self.unified_storage.create_storage(data_dir, backend="json")
+            db = json_storage.load_database()
+            source = build_database(self.dm, 200)
+            json_storage.add_videos(list(source.videos.values()))
+            for playlist in source.playlists.values():
+                json_storage.add_playlist(playlist)
+            json_storage.save_database()
+            json_storage.update_video_analysis("vid0000004", "failed", analysis_error="ジャーナル上の変更")
+            expected = database_state(db)
+
+            # JSONスナップショット＋ジャーナルから移行
+            storage = self.unified_storage.create_storage(data_dir, backend="binary")
+            migrated = database_state(storage.load_database()) == expected
+            storage.save_database()
+            storage.update_video_analysis("vid0000005", "failed", analysis_error="移行後の変更")
+            expected = database_state(storage.load_database())
+
+            reopened = self.unified_storage.create_storage(data_dir, backend="binary")
+            restored = database_state(reopened.load_database()) == expected
+
+        success = migrated and restored and storage.db_file.suffix == ".ykdb" and storage.db_file.exists()
+        print(f"{'✅' if migrated else '❌'} JSONスナップショット＋ジャーナルからの移行")
+        print(f"{'✅' if restored else '❌'} バイナリスナップショット＋ジャーナルの再起動後復元")
+        return {"success": success}
+
+    def test_binary_bot_readers(self):
+        """バイナリ形式で圧縮した後の変更をせつなBot側の読み取りが反映するテスト"""
+        print("\n🤖 バイナリスナップショットのBot側読み取りテスト")
+        print("-" * 40)
+
+        snapshot_module = load_snapshot_module()
+        provider = snapshot_module.KnowledgeDBSnapshotProvider()
+        data_dir = Path(self.temp_dir.name) / "binary_readers"
+        with redirect_stdout(io.StringIO()):
+            storage = self.unified_storage.create_storage(data_dir, backend="binary")
+            storage.load_database()
+            source = build_database(self.dm, 50)
+            storage.add_videos(list(source.videos.values()))
+            storage.save_database(compact=True)
+            first = provider.get(storage.json_file)
+
+            # 圧縮後の変更はジャーナルにのみ書かれる
+            storage.update_video_analysis("vid0000004", "failed", analysis_error="圧縮後の変更")
+            storage.remove_video_completely("vid0000005")
+            storage.save_database()
+
+        def reader_state():
+            shared = provider.get(storage.json_file)
+            loaded, _ = snapshot_module.load_knowledge_db(storage.json_file)
+            expected = storage.load_database().to_dict()["videos"]
+            return shared.version > first.version and dict(shared.data["videos"]) == expected == loaded["videos"]
+
+        after_journal = reader_state()
+
+        # 2回目の圧縮でジャーナルが空になっても、JSON形式のスナップショットに反映されている
+        with redirect_stdout(io.StringIO()):
+            storage.save_database(compact=True)
+            storage.update_video_analysis("vid0000006", "failed", analysis_error="2回目の圧縮後の変更")
+        after_compact = reader_state()
+
+        with open(storage.json_file, 'r', encoding='utf-8') as f:
+            json_generation = json.load(f)["journal_generation"]
+        with open(storage.db_file, 'rb') as f:
+            binary_generation = self.serializer.loads_snapshot(f.read())[1]["journal_generation"]
+
+        success = after_journal and after_compact and json_generation == binary_generation == 2
+        print(f"{'✅' if after_journal else '❌'} 圧縮後のジャーナルが共有スナップショット・ローダーに反映")
+        print(f"{'✅' if after_compact else '❌'} 再圧縮後の変更も反映（JSON世代{json_generation}, "
+              f"バイナリ世代{binary_generation}）")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """JSON vs バイナリの読み込み・保存時間とピークメモリ"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        db = build_database(self.dm, self.benchmark_count)
+        paths = {"json": Path(self.temp_dir.name) / "bench.json", "binary": Path(self.temp_dir.name) / "bench.ykdb"}
+        with open(paths["json"], 'w', encoding='utf-8') as f:
+            json.dump(db.to_dict(), f, ensure_ascii=False, indent=2)
+        with open(paths["binary"], 'wb') as f:
+            f.write(self.serializer.dumps_database(db))
+        del db
+
+        results = {}
+        for fmt, path in paths.items():
+            output = subprocess.run([sys.executable, __file__, "--measure", fmt, str(path)],
+                                    capture_output=True, text=True, check=True).stdout
+            results[fmt] = json.loads(output.strip().splitlines()[-1])
+            results[fmt]["size_mb"] = path.stat().st_size / 1024 / 1024
+
+        print(f"✅ {self.benchmark_count}動画の合成DB（括弧内は{results['json']['memory_metric']}の増加量）")
+        for fmt, result in results.items():
+            print(f"✅ {fmt:<7}: {result['size_mb']:5.1f}MB | 読み込み {result['load_time'] * 1000:7.1f}ms "
+                  f"(+{result['load_memory_mb']:5.1f}MB) | 保存 {result['save_time'] * 1000:7.1f}ms "
+                  f"(+{result['save_memory_mb']:5.1f}MB)")
+
+        success = (results["binary"]["load_time"] < results["json"]["load_time"] and
+                   results["binary"]["save_time"] < results["json"]["save_time"])
+        return {"success": success, "results": results}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = BinarySerializerTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 知識DBバイナリ直列化テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知識グラフ探索テスト - 名前・別名索引／隣接リストによる多段探索の確認・ベンチマーク
+"""
+
+import sys
+import io
+import random
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.knowledge_database import KnowledgeDatabase, KnowledgeEntity
+
+
+def linear_one_hop(db: KnowledgeDatabase, entity_name: str):
+    """従来の全件走査による1ホップ抽出（比較基準）"""
+    target = None
+    for entity in db.entities.values():
+        if (entity.name.lower() == entity_name.lower() or
+                entity_name.lower() in [alias.lower() for alias in entity.aliases]):
+            target = entity
+            break
+    if target is None:
+        return None
+    relationships = [rel for rel in db.relationships
+                     if rel["source_entity"] == target.entity_id or rel["target_entity"] == target.entity_id]
+    return target.entity_id, [rel["relationship_id"] for rel in relationships]
+
+
+class KnowledgeGraphTraversalTester:
+    """知識グラフ探索テスター"""
+
+    def __init__(self, entity_count: int = 10000, relationship_count: int = 50000):
+        """初期化"""
+        self.entity_count = entity_count
+        self.relationship_count = relationship_count
+        self.rng = random.Random(11)
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🕸️ 知識グラフ探索テスト")
+        print("=" * 60)
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        test_results = {}
+        try:
+            # テスト1: 1ホップ結果の従来実装との一致
+            test_results["one_hop_parity"] = self.test_one_hop_parity()
+
+            # テスト2: 多段探索・ノード上限・登録時の索引更新
+            test_results["multi_hop"] = self.test_multi_hop()
+
+            # テスト3: 規模別ベンチマーク
+            test_results["benchmark"] = self.test_benchmark()
+        finally:
+            self.temp_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _create_db(self, name: str) -> KnowledgeDatabase:
+        with redirect_stdout(io.StringIO()):
+            return KnowledgeDatabase(data_dir=Path(self.temp_dir.name) / name)
+
+    def _populate_in_memory(self, db: KnowledgeDatabase, entity_count: int, relationship_count: int):
+        """読み込み済みデータと同じ状態を直接構築（索引は読み込み時と同じ経路で構築）"""
+        for i in range(entity_count):
+            entity = KnowledgeEntity(entity_id=f"ent_{i:06d}", name=f"Entity{i}", type="概念",
+                                     description="", aliases=[f"別名{i}"])
+            db.entities[entity.entity_id] = entity
+        for i in range(relationship_count):
+            source = f"ent_{self.rng.randrange(entity_count):06d}"
+            target = f"ent_{self.rng.randrange(entity_count):06d}"
+            db.relationships.append({
+                "relationship_id": f"rel_{i}", "source_entity": source, "target_entity": target,
+                "relationship_type": "related_to", "strength": 0.5, "discovered_in": "bench",
+                "reinforced_in": ["bench"], "confidence": 0.8
+            })
+        db._build_graph_indexes()
+
+    def test_one_hop_parity(self):
+        """1ホップ結果の従来実装との一致テスト"""
+        print("\n🔍 1ホップ一致テスト")
+        print("-" * 40)
+
+        db = self._create_db("parity")
+        self._populate_in_memory(db, 300, 1200)
+
+        mismatches = 0
+        names = [f"Entity{i}" for i in range(0, 300, 7)] + [f"別名{i}" for i in range(3, 300, 11)] + ["unknown"]
+        with redirect_stdout(io.StringIO()):
+            for name in names:
+                expected = linear_one_hop(db, name)
+                graph = db.get_entity_knowledge_graph(name, depth=1)
+                if expected is None:
+                    actual = None if "error" in graph else graph
+                else:
+                    actual = (graph["center_entity"]["entity_id"],
+                              [rel["relationship_id"] for rel in graph["relationships"]])
+                if expected != actual:
+                    mismatches += 1
+
+        success = mismatches == 0
+        print(f"{'✅' if success else '❌'} {len(names)}件中 不一致 {mismatches}件")
+        return {"success": success, "mismatches": mismatches}
+
+    def test_multi_hop(self):
+        """多段探索・ノード上限・登録時の索引更新テスト"""
+        print("\n🔗 多段探索テスト")
+        print("-" * 40)
+
+        db = self._create_db("chain")
+        with redirect_stdout(io.StringIO()):
+            ids = [db.store_entity(f"Node{i}", "概念", "", "s1", aliases=[f"ノード{i}"]) for i in range(6)]
+            for source, target in zip(ids, ids[1:]):
+                db.store_relationship(source, target, "next", 0.5, "s1")
+            # 既存関係性の強化は新規追加にならないこと
+            db.store_relationship(ids[0], ids[1], "next", 0.5, "s2")
+            # 別名でも既存エンティティとして更新されること
+            same_id = db.store_entity("ノード2", "概念", "更新", "s2")
+
+            hop_counts = [db.get_entity_knowledge_graph("node0", depth=d)["total_connections"] for d in range(4)]
+            via_alias = db.get_entity_knowledge_graph("ノード3", depth=1)
+            limited = db.get_entity_knowledge_graph("Node0", depth=5, max_nodes=3)
+
+        chain_ok = hop_counts == [0, 1, 2, 3] and len(db.relationships) == 5 and same_id == ids[2]
+        alias_ok = via_alias["entity_count"] == 3 and via_alias["entity_hops"][ids[2]] == 1
+        budget_ok = limited["truncated"] and limited["entity_count"] == 3
+        print(f"{'✅' if chain_ok else '❌'} 深度ごとの関係数: {hop_counts}")
+        print(f"{'✅' if alias_ok else '❌'} 別名からの探索")
+        print(f"{'✅' if budget_ok else '❌'} ノード上限での打ち切り")
+        return {"success": chain_ok and alias_ok and budget_ok}
+
+    def test_benchmark(self):
+        """従来の全件走査 vs 隣接リスト探索のベンチマーク"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        db = self._create_db("bench")
+        start_time = time.perf_counter()
+        self._populate_in_memory(db, self.entity_count, self.relationship_count)
+        build_time = time.perf_counter() - start_time
+
+        names = [f"Entity{self.rng.randrange(self.entity_count)}" for _ in range(50)]
+
+        start_time = time.perf_counter()
+        for name in names:
+            linear_one_hop(db, name)
+        linear_time = (time.perf_counter() - start_time) / len(names)
+
+        timings = {}
+        with redirect_stdout(io.StringIO()):
+            for depth in (1, 2):
+                start_time = time.perf_counter()
+                for name in names:
+                    db.get_entity_knowledge_graph(name, depth=depth)
+                timings[depth] = (time.perf_counter() - start_time) / len(names)
+
+        print(f"✅ {self.entity_count}エンティティ / {self.relationship_count}関係 索引構築: {build_time * 1000:.0f}ms")
+        print(f"✅ 全件走査(1ホップ): {linear_time * 1000:8.3f}ms")
+        for depth, elapsed in timings.items():
+            print(f"✅ 隣接リスト(深度{depth}): {elapsed * 1000:8.3f}ms")
+        return {"success": timings[1] < linear_time, "timings": timings, "linear": linear_time}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = KnowledgeGraphTraversalTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 知識グラフ探索テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
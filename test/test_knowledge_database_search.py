@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知識DB全文検索テスト - FTS5検索とメモリ内走査の一致確認・永続化後の検索・ベンチマーク
+"""
+
+import sys
+import io
+import random
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.knowledge_database import KnowledgeDatabase
+
+
+TOPICS = ["AI技術", "音楽", "映像制作", "VOICEVOX", "ボカロ", "Transformer", "配信", "作曲"]
+WORDS = ["音楽生成", "深層学習", "MV", "ミックス", "歌声合成", "ライブ配信", "Attention",
+         "コード進行", "サビ", "イラスト", "アニメーション", "ギター"]
+LAYERS = ["raw", "structured", "integrated"]
+
+
+class KnowledgeDatabaseSearchTester:
+    """知識DB全文検索テスター"""
+
+    def __init__(self, item_count: int = 2000, benchmark_count: int = 10000):
+        """初期化"""
+        self.item_count = item_count
+        self.benchmark_count = benchmark_count
+        self.rng = random.Random(7)
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🔎 知識DB全文検索テスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: メモリ内走査との結果一致
+        test_results["parity"] = self.test_parity_with_memory_scan()
+
+        # テスト2: 再起動後（メモリ外）のアイテム検索
+        test_results["persistence"] = self.test_search_after_reload()
+
+        # テスト3: 規模別ベンチマーク
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _populate(self, db: KnowledgeDatabase, count: int):
+        with redirect_stdout(io.StringIO()):
+            for i in range(count):
+                words = self.rng.sample(WORDS, 3)
+                db.store_knowledge_item(
+                    session_id=f"session_{i % 20:03d}",
+                    layer=self.rng.choice(LAYERS),
+                    content=f"{words[0]}と{words[1]}に関する知識 No.{i} ({self.rng.choice(TOPICS)})",
+                    importance_score=round(self.rng.random(), 2),
+                    categories=self.rng.sample(TOPICS, 2),
+                    keywords=[words[2], self.rng.choice(TOPICS)],
+                    entities=[self.rng.choice(TOPICS)]
+                )
+
+    def _queries(self):
+        queries = []
+        for word in WORDS + TOPICS:
+            queries.append((word.lower(), {}))
+            queries.append((word, {"layer": "structured"}))
+            queries.append((word, {"categories": ["音楽", "配信"], "min_importance": 0.4}))
+        queries += [("ai", {}), ("音", {}), ("No.1", {"limit": 50}), ("", {"layer": "raw"}),
+                    ('"', {}), ("存在しない語句", {})]
+        return queries
+
+    def _search(self, db: KnowledgeDatabase, query: str, options: dict):
+        with redirect_stdout(io.StringIO()):
+            results = db.search_knowledge(query, **options)
+        return [(r["item"]["item_id"], r["relevance_score"], r["combined_score"]) for r in results]
+
+    def test_parity_with_memory_scan(self):
+        """メモリ内走査との結果一致テスト"""
+        print("\n🔍 メモリ内走査との結果一致テスト")
+        print("-" * 40)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with redirect_stdout(io.StringIO()):
+                db = KnowledgeDatabase(data_dir=temp_dir)
+            self._populate(db, self.item_count)
+
+            mismatches = 0
+            queries = self._queries()
+            for query, options in queries:
+                db.fts_enabled = False
+                expected = self._search(db, query, options)
+                db.fts_enabled = True
+                actual = self._search(db, query, options)
+                if expected != actual:
+                    mismatches += 1
+                    print(f"❌ 不一致: '{query}' {options}: {len(actual)}件 (期待: {len(expected)}件)")
+
+        success = db.fts_enabled and mismatches == 0
+        print(f"{'✅' if success else '❌'} {len(queries)}クエリ中 不一致 {mismatches}件")
+        return {"success": success, "mismatches": mismatches}
+
+    def test_search_after_reload(self):
+        """再起動後の検索テスト（メモリに読み込まれていないアイテム）"""
+        print("\n💾 再起動後の検索テスト")
+        print("-" * 40)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with redirect_stdout(io.StringIO()):
+                db = KnowledgeDatabase(data_dir=temp_dir)
+                db.store_knowledge_item("s1", "structured", "AIによる音楽生成技術は2024年に大きく進歩している",
+                                        importance_score=0.8, categories=["AI技術", "音楽"],
+                                        keywords=["AI", "音楽生成"], entities=["AI技術"])
+                db.store_knowledge_item("s1", "raw", "古いメモ", importance_score=0.1)
+
+                reloaded = KnowledgeDatabase(data_dir=temp_dir)
+                found = reloaded.search_knowledge("音楽生成", categories=["音楽"])
+                filtered = reloaded.search_knowledge("音楽生成", layer="raw")
+
+        success = (len(reloaded.knowledge_items) == 0 and len(found) == 1 and not filtered and
+                   found[0]["item"]["keywords"] == ["AI", "音楽生成"] and
+                   abs(found[0]["relevance_score"] - 1.4) < 1e-9)
+        print(f"{'✅' if success else '❌'} メモリ外アイテムの検索: {len(found)}件")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """メモリ内走査 vs FTS5 ベンチマーク"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with redirect_stdout(io.StringIO()):
+                db = KnowledgeDatabase(data_dir=temp_dir)
+            start_time = time.perf_counter()
+            self._populate(db, self.benchmark_count)
+            store_time = time.perf_counter() - start_time
+
+            queries = [("コード進行", {"layer": "integrated", "min_importance": 0.9}),
+                       ("transformer", {"categories": ["作曲"]}),
+                       ("no.99", {}),
+                       ("ギター", {"limit": 5})]
+
+            timings = {}
+            for label, fts_enabled in (("memory_scan", False), ("fts5", True)):
+                db.fts_enabled = fts_enabled
+                start_time = time.perf_counter()
+                for _ in range(5):
+                    for query, options in queries:
+                        self._search(db, query, options)
+                timings[label] = (time.perf_counter() - start_time) / (5 * len(queries))
+
+        print(f"✅ {self.benchmark_count}件 保存: {store_time:.1f}s")
+        for label, elapsed in timings.items():
+            print(f"✅ {label:<12}: {elapsed * 1000:8.2f}ms/クエリ")
+        return {"success": True, "timings": timings}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = KnowledgeDatabaseSearchTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 知識DB全文検索テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
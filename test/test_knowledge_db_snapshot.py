@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知識DBスナップショット共有テスト - 1回解析・共有参照・再ロード通知・起動時間/メモリ比較
+"""
+
+import sys
+import io
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.knowledge_db_snapshot import get_knowledge_db_provider
+from core.semantic_search_engine import SemanticSearchEngine
+from core.preference_analyzer import PreferenceAnalyzer
+
+
+def build_knowledge_db(video_count: int):
+    """unified_knowledge_db.json と同じ構造のデータを生成"""
+    videos = {}
+    for i in range(video_count):
+        video_id = f"vid{i:07d}"
+        videos[video_id] = {
+            "metadata": {
+                "title": f"テスト楽曲 {i} / Artist{i % 50}",
+                "channel_title": f"Channel{i % 30}",
+                "description": "歌ってみた・ボカロ・作業用BGM " * 8,
+                "published_at": "2024-01-01T00:00:00Z",
+                "tags": ["ボカロ", "ロック", f"tag{i % 40}"]
+            },
+            "creative_insight": {
+                "themes": ["青春", "夏"],
+                "creators": [{"name": f"Artist{i % 50}", "role": "vocal"}],
+                "music_analysis": {"genre": "J-POP", "mood": "明るい"}
+            }
+        }
+    return {"videos": videos, "playlists": {}}
+
+
+class ReloadRecorder:
+    """再ロード通知の記録用購読者"""
+
+    def __init__(self):
+        self.versions = []
+
+    def on_reload(self, snapshot):
+        self.versions.append(snapshot.version)
+
+
+class KnowledgeDBSnapshotTester:
+    """知識DBスナップショット共有テスター"""
+
+    def __init__(self, video_count: int = 3000, reader_count: int = 7):
+        """初期化"""
+        self.video_count = video_count
+        self.reader_count = reader_count
+        self.provider = get_knowledge_db_provider()
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🗂️ 知識DBスナップショット共有テスト")
+        print("=" * 60)
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        test_results = {}
+        try:
+            # テスト1: 複数モジュールで1回だけ解析・同一データを共有
+            test_results["shared_parse"] = self.test_shared_parse()
+
+            # テスト2: 変更検出・再ロード通知
+            test_results["reload_notification"] = self.test_reload_notification()
+
+            # テスト3: 共有データの読み取り専用
+            test_results["read_only"] = self.test_read_only()
+
+            # テスト4: 起動時間・メモリ比較
+            test_results["benchmark"] = self.test_benchmark()
+        finally:
+            self.temp_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _write_db(self, name: str, data) -> Path:
+        path = Path(self.temp_dir.name) / name
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+    def test_shared_parse(self):
+        """複数モジュールでの共有解析テスト"""
+        print("\n🔗 共有解析テスト")
+        print("-" * 40)
+
+        path = self._write_db("shared.json", build_knowledge_db(50))
+        parse_count = self.provider.parse_count
+
+        with redirect_stdout(io.StringIO()):
+            engine = SemanticSearchEngine()
+            engine.knowledge_db_path = path
+            engine._load_knowledge_db()
+            analyzer = PreferenceAnalyzer()
+            analyzer.youtube_db_path = path
+            preferences = analyzer.analyze_music_preferences()
+
+        parses = self.provider.parse_count - parse_count
+        shared = engine.knowledge_db is self.provider.get_data(path)
+        success = parses == 1 and shared and preferences.get("total_videos_analyzed") == 50
+        print(f"{'✅' if success else '❌'} 2モジュール読み込みで解析{parses}回・共有参照: {shared}")
+        return {"success": success, "parses": parses}
+
+    def test_reload_notification(self):
+        """変更検出・再ロード通知テスト"""
+        print("\n🔔 再ロード通知テスト")
+        print("-" * 40)
+
+        data = build_knowledge_db(20)
+        path = self._write_db("reload.json", data)
+        first = self.provider.get(path)
+        recorder = ReloadRecorder()
+        self.provider.subscribe(path, recorder.on_reload)
+
+        # 同一内容での更新時刻変更は再解析・通知しない
+        parse_count = self.provider.parse_count
+        os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+        touched = self.provider.get(path)
+        touch_ok = (self.provider.parse_count == parse_count and touched.data is first.data and
+                    touched.version == first.version and not recorder.versions)
+
+        # 内容変更は次回取得時に再解析し、購読者へ通知
+        data["videos"]["vid_new"] = {"metadata": {"title": "新着"}}
+        self._write_db("reload.json", data)
+        refreshed = self.provider.refresh(path)
+        reload_ok = (refreshed.version == first.version + 1 and "vid_new" in refreshed.data["videos"] and
+                     recorder.versions == [refreshed.version])
+
+        # 解放された購読者は通知対象から外れる
+        del recorder
+        gc.collect()
+        data["videos"].pop("vid_new")
+        self._write_db("reload.json", data)
+        self.provider.refresh(path)
+        released = self.provider.get_stats()["subscribers"].get(refreshed.path) == 0
+
+        print(f"{'✅' if touch_ok else '❌'} 同一内容のtouchで再解析なし")
+        print(f"{'✅' if reload_ok else '❌'} 内容変更でバージョン更新・通知")
+        print(f"{'✅' if released else '❌'} 解放済み購読者の除去")
+        return {"success": touch_ok and reload_ok and released}
+
+    def test_read_only(self):
+        """共有データの書き込み拒否・読み取り側が内容を変えないことのテスト"""
+        print("\n🔒 読み取り専用テスト")
+        print("-" * 40)
+
+        path = self._write_db("read_only.json", build_knowledge_db(30))
+        data = self.provider.get_data(path)
+        before = json.dumps(dict(data), ensure_ascii=False, sort_keys=True)
+
+        try:
+            data["videos"] = {}
+            rejected = False
+        except TypeError:
+            rejected = True
+
+        with redirect_stdout(io.StringIO()):
+            engine = SemanticSearchEngine()
+            engine.knowledge_db_path = path
+            engine._load_knowledge_db()
+            engine.search("ボカロ ロック", max_results=5, use_cache=False)
+            analyzer = PreferenceAnalyzer()
+            analyzer.youtube_db_path = path
+            analyzer.analyze_music_preferences()
+
+        unchanged = (json.dumps(dict(self.provider.get_data(path)), ensure_ascii=False, sort_keys=True) == before)
+        print(f"{'✅' if rejected else '❌'} 最上位への書き込みを拒否")
+        print(f"{'✅' if unchanged else '❌'} 読み取り側の利用後も内容不変")
+        return {"success": rejected and unchanged}
+
+    def test_benchmark(self):
+        """各モジュール個別読み込み vs 共有スナップショットの比較"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        path = self._write_db("bench.json", build_knowledge_db(self.video_count))
+        size_mb = path.stat().st_size / 1024 / 1024
+
+        gc.collect()
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        copies = []
+        for _ in range(self.reader_count):
+            with open(path, 'r', encoding='utf-8') as f:
+                copies.append(json.load(f))
+        independent_time = time.perf_counter() - start_time
+        independent_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del copies
+        gc.collect()
+
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        shared = [self.provider.get_data(path) for _ in range(self.reader_count)]
+        shared_time = time.perf_counter() - start_time
+        shared_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print(f"✅ {self.video_count}動画 ({size_mb:.1f}MB) × {self.reader_count}モジュール")
+        print(f"✅ 個別読み込み: {independent_time * 1000:7.1f}ms / {independent_memory / 1024 / 1024:6.1f}MB")
+        print(f"✅ 共有スナップショット: {shared_time * 1000:7.1f}ms / {shared_memory / 1024 / 1024:6.1f}MB")
+        success = shared_time < independent_time and shared_memory < independent_memory and len(shared) == self.reader_count
+        return {"success": success,
+                "timings": {"independent": independent_time, "shared": shared_time},
+                "memory": {"independent": independent_memory, "shared": shared_memory}}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = KnowledgeDBSnapshotTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 知識DBスナップショット共有テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+知識グラフ差分更新テスト - 全体再構築とのノード/エッジ一致・差分ジャーナルの保存/復元・処理時間比較
+"""
+
+import sys
+import io
+import random
+import tempfile
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import networkx as nx
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+import core.knowledge_graph_system as knowledge_graph_module
+from core.knowledge_graph_system import KnowledgeGraphSystem
+
+
+def make_video(rng, index: int, artists, genres, themes, moods):
+    """合成動画データ"""
+    return {
+        "metadata": {"title": f"動画{index}", "channel_title": rng.choice(artists),
+                     "view_count": rng.randint(0, 200000), "like_count": rng.randint(0, 2000)},
+        "custom_info": {"manual_genre": ",".join(rng.sample(genres, rng.randint(0, 2))),
+                        "manual_mood": rng.choice(moods)},
+        "creative_insight": {"themes": rng.sample(themes, rng.randint(0, 3))}
+    }
+
+
+class SyntheticSource:
+    """合成の知識DB・会話履歴"""
+
+    def __init__(self, video_count: int, seed: int = 5):
+        self.rng = random.Random(seed)
+        self.artists = [f"アーティスト{i}" for i in range(max(10, video_count // 8))] + [""]
+        self.genres = [f"ジャンル{i}" for i in range(max(20, video_count // 20))]
+        self.themes = [f"テーマ{i}" for i in range(max(30, video_count // 10))]
+        self.moods = [""] * 8 + ["明るい", "切ない", "激しい"]
+        self.next_index = 0
+        self.videos = {}
+        for _ in range(video_count):
+            self.add_video()
+        video_ids = list(self.videos)
+        self.conversations = {f"c{i:03d}": {"video_ids": self.rng.sample(video_ids, 3), "context": f"会話{i}"}
+                              for i in range(10)}
+
+    def add_video(self) -> str:
+        video_id = f"v{self.next_index:05d}"
+        self.videos[video_id] = make_video(self.rng, self.next_index, self.artists, self.genres, self.themes, self.moods)
+        self.next_index += 1
+        return video_id
+
+    def edit_video(self, video_id: str):
+        video = self.videos[video_id]
+        video["custom_info"] = {"manual_genre": ",".join(self.rng.sample(self.genres, 2)),
+                                "manual_mood": self.rng.choice(self.moods[-3:])}
+        video["metadata"] = dict(video["metadata"], channel_title=self.rng.choice(self.artists[:-1]))
+
+    def knowledge_db(self):
+        return {"videos": self.videos}
+
+    def conversation_history(self):
+        return {"conversations": self.conversations}
+
+
+def normalize_evidence(evidence):
+    """根拠の列挙順（集合の走査順）に依存しない形"""
+    normalized = []
+    for text in evidence:
+        prefix, separator, items = text.partition(": ")
+        normalized.append(prefix + separator + ", ".join(sorted(items.split(", "))) if separator else text)
+    return sorted(normalized)
+
+
+def graph_signature(system):
+    """比較用のノード・エッジ内容（作成時刻・所属動画の並び順・エッジの向きを除く）"""
+    nodes = {}
+    for node_id, node in system.knowledge_nodes.items():
+        attributes = dict(node.attributes)
+        if "associated_videos" in attributes:
+            attributes["associated_videos"] = Counter(attributes["associated_videos"])
+        nodes[node_id] = (node.node_type, node.title, attributes, node.relevance_score)
+    edges = {frozenset((edge.source_id, edge.target_id)): (edge.relationship_type, edge.strength,
+                                                            normalize_evidence(edge.evidence))
+             for edge in system.knowledge_edges.values()}
+    return nodes, edges
+
+
+def partition_modularity(system):
+    """クラスター分割のモジュラリティ（クラスター外のノードは単独として数える）"""
+    communities = [set(cluster.node_ids) for cluster in system.clusters.values()]
+    clustered = set().union(*communities)
+    communities += [{node_id} for node_id in system.graph.nodes if node_id not in clustered]
+    return nx.algorithms.community.modularity(system.graph, communities)
+
+
+def stored_signature(system):
+    """保存内容の比較用（ノード・エッジ・クラスター）"""
+    return ({nid: (n.node_type, n.attributes, n.relevance_score) for nid, n in system.knowledge_nodes.items()},
+            {eid: (e.source_id, e.target_id, e.strength) for eid, e in system.knowledge_edges.items()},
+            {cid: sorted(c.node_ids) for cid, c in system.clusters.items()})
+
+
+class KnowledgeGraphIncrementalTester:
+    """知識グラフ差分更新テスター"""
+
+    def __init__(self, benchmark_count: int = 1500):
+        """初期化"""
+        self.benchmark_count = benchmark_count
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("⚡ 知識グラフ差分更新テスト")
+        print("=" * 60)
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        original_dirs = (knowledge_graph_module.GRAPH_DIR, knowledge_graph_module.CONVERSATION_DIR)
+        test_results = {}
+        try:
+            # テスト1: 全体再構築とのノード/エッジ一致
+            test_results["rebuild_parity"] = self.test_rebuild_parity()
+
+            # テスト2: 差分ジャーナルの保存と復元
+            test_results["delta_persistence"] = self.test_delta_persistence()
+
+            # テスト3: 処理時間比較
+            test_results["benchmark"] = self.test_benchmark()
+        finally:
+            knowledge_graph_module.GRAPH_DIR, knowledge_graph_module.CONVERSATION_DIR = original_dirs
+            self.temp_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _system(self, name: str, source: SyntheticSource = None, build: bool = True):
+        """一時ディレクトリを保存先にした知識グラフ（合成データで全体構築）"""
+        graph_dir = Path(self.temp_dir.name) / name
+        graph_dir.mkdir(exist_ok=True)
+        knowledge_graph_module.GRAPH_DIR = graph_dir
+        knowledge_graph_module.CONVERSATION_DIR = graph_dir
+        with redirect_stdout(io.StringIO()):
+            system = KnowledgeGraphSystem()
+            if source is not None:
+                system.knowledge_db = source.knowledge_db()
+                system.conversation_history = source.conversation_history()
+            if build:
+                system.build_knowledge_graph(force_rebuild=True)
+        return system
+
+    def _update(self, system, **options):
+        with redirect_stdout(io.StringIO()):
+            return system.update_knowledge_graph(**options)
+
+    def _apply_changes(self, source: SyntheticSource):
+        """追加・変更・削除の混在した変更"""
+        video_ids = list(source.videos)
+        for _ in range(6):
+            source.add_video()
+        for video_id in video_ids[10:16]:
+            source.edit_video(video_id)
+        for video_id in video_ids[40:43]:
+            del source.videos[video_id]
+        source.conversations["c100"] = {"video_ids": [video_ids[0], video_ids[50], "v99999"], "context": "新しい会話"}
+        source.conversations["c001"]["video_ids"] = [video_ids[1], video_ids[2]]
+        source.conversations["c002"]["video_ids"] = []
+        del source.conversations["c003"]
+
+    def test_rebuild_parity(self):
+        """全体再構築とのノード/エッジ一致テスト"""
+        print("\n🔁 全体再構築との一致テスト")
+        print("-" * 40)
+
+        source = SyntheticSource(400)
+        system = self._system("parity", source)
+        self._apply_changes(source)
+        summary = self._update(system)
+
+        rebuilt = self._system("parity_rebuilt", source)
+        incremental_nodes, incremental_edges = graph_signature(system)
+        rebuilt_nodes, rebuilt_edges = graph_signature(rebuilt)
+        same_nodes = incremental_nodes == rebuilt_nodes
+        same_edges = incremental_edges == rebuilt_edges
+        same_graph = (system.graph.number_of_nodes() == rebuilt.graph.number_of_nodes() and
+                      system.graph.number_of_edges() == rebuilt.graph.number_of_edges())
+
+        # クラスターの整合性（3ノード以上・存在するノードのみ・重複所属なし）
+        assigned = [node_id for cluster in system.clusters.values() for node_id in cluster.node_ids]
+        clusters_valid = (all(len(cluster.node_ids) >= 3 for cluster in system.clusters.values()) and
+                          all(node_id in system.knowledge_nodes for node_id in assigned) and
+                          len(assigned) == len(set(assigned)) and
+                          all(abs(cluster.cohesion_score - system._calculate_cluster_cohesion(set(cluster.node_ids))) < 1e-9
+                              for cluster in system.clusters.values()))
+
+        incremental_modularity = partition_modularity(system)
+        rebuilt_modularity = partition_modularity(rebuilt)
+        quality = incremental_modularity >= rebuilt_modularity * 0.9
+
+        success = (same_nodes and same_edges and same_graph and clusters_valid and quality and
+                   summary["videos"] == 15)
+        print(f"✅ 検出した変更: 動画{summary['videos']}件, 会話{summary['conversations']}件 → {summary['changes']}件")
+        print(f"{'✅' if same_nodes else '❌'} ノード一致: {len(incremental_nodes)}/{len(rebuilt_nodes)}")
+        print(f"{'✅' if same_edges else '❌'} エッジ一致: {len(incremental_edges)}/{len(rebuilt_edges)}")
+        print(f"{'✅' if clusters_valid else '❌'} クラスター整合性: {len(system.clusters)}クラスター, {len(assigned)}ノード所属")
+        print(f"{'✅' if quality else '❌'} モジュラリティ: 差分更新 {incremental_modularity:.3f} / "
+              f"全体再構築 {rebuilt_modularity:.3f}")
+        return {"success": success}
+
+    def test_delta_persistence(self):
+        """差分ジャーナルの保存と復元テスト"""
+        print("\n💾 差分保存テスト")
+        print("-" * 40)
+
+        source = SyntheticSource(300, seed=8)
+        system = self._system("persist", source)
+        snapshot_before = system.graph_data_path.read_bytes()
+
+        for _ in range(3):
+            video_id = source.add_video()
+            self._update(system, video_ids=[video_id], conversation_ids=[])
+        source.edit_video("v00005")
+        del source.videos["v00006"]
+        self._update(system, video_ids=["v00005", "v00006"], conversation_ids=[])
+
+        snapshot_untouched = system.graph_data_path.read_bytes() == snapshot_before
+        journal_size = system.graph_journal_path.stat().st_size
+
+        restored = self._system("persist", build=False)
+        restored_same = stored_signature(restored) == stored_signature(system)
+        restored_graph = restored.graph.number_of_edges() == system.graph.number_of_edges()
+
+        # 圧縮後も同じ内容を読み込める
+        with redirect_stdout(io.StringIO()):
+            system._save_graph_data()
+        compacted_journal = system.graph_journal_path.stat().st_size
+        compacted = self._system("persist", build=False)
+        compacted_same = stored_signature(compacted) == stored_signature(system)
+
+        success = (snapshot_untouched and journal_size > 0 and restored_same and restored_graph and
+                   compacted_journal == 0 and compacted_same)
+        print(f"{'✅' if snapshot_untouched else '❌'} 差分更新でスナップショットは書き換えない "
+              f"(ジャーナル {journal_size:,}バイト / スナップショット {len(snapshot_before):,}バイト)")
+        print(f"{'✅' if restored_same and restored_graph else '❌'} スナップショット＋ジャーナルから復元")
+        print(f"{'✅' if compacted_same and compacted_journal == 0 else '❌'} 圧縮後の再読み込み")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """全体再構築 vs 差分更新の処理時間比較"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        source = SyntheticSource(self.benchmark_count, seed=13)
+        start_time = time.perf_counter()
+        system = self._system("bench", source)
+        rebuild_time = time.perf_counter() - start_time
+
+        # 初回は索引を構築するため、2回目以降の1件追加を計測
+        self._update(system, video_ids=[source.add_video()], conversation_ids=[])
+        single_times = []
+        for _ in range(5):
+            video_id = source.add_video()
+            start_time = time.perf_counter()
+            self._update(system, video_ids=[video_id], conversation_ids=[])
+            single_times.append(time.perf_counter() - start_time)
+        single_time = sorted(single_times)[len(single_times) // 2]
+
+        video_id = source.add_video()
+        start_time = time.perf_counter()
+        detected = self._update(system)
+        detect_time = time.perf_counter() - start_time
+
+        print(f"✅ {self.benchmark_count}動画: {len(system.knowledge_nodes):,}ノード, {len(system.knowledge_edges):,}エッジ, "
+              f"{len(system.clusters)}クラスター")
+        print(f"✅ 全体再構築           : {rebuild_time * 1000:9.1f}ms")
+        print(f"✅ 1件追加（ID指定）    : {single_time * 1000:9.1f}ms ({rebuild_time / single_time:.0f}倍)")
+        print(f"✅ 1件追加（変更検出）  : {detect_time * 1000:9.1f}ms")
+
+        success = detected["videos"] == 1 and single_time * 10 < rebuild_time
+        return {"success": success, "rebuild": rebuild_time, "single": single_time}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = KnowledgeGraphIncrementalTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 知識グラフ差分更新テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+マルチプレイリスト並列収集テスト - クォータ連動レート制限・中断からの再開・並列/順次の結果一致・スループット比較・差分同期
+"""
+
+import sys
+import io
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+YOUTUBE_SYSTEM_ROOT = Path(__file__).parent.parent / "youtube_knowledge_system"
+
+
+def load_collector_modules():
+    """YouTube知識システム側のモジュールを読み込み（独自のcore/configパッケージを持つため実行時に追加）"""
+    if str(YOUTUBE_SYSTEM_ROOT) not in sys.path:
+        sys.path.insert(0, str(YOUTUBE_SYSTEM_ROOT))
+    from core import data_models
+    from collectors import multi_playlist_collector, quota_rate_limiter
+    from fakes import fake_youtube_service
+    return data_models, multi_playlist_collector, quota_rate_limiter, fake_youtube_service
+
+
+def collection_state(storage):
+    """比較用の収集結果（取得時刻・プレイリストへの追加順を除く）"""
+    db = storage.load_database()
+    videos = {vid: (video.metadata.title, video.metadata.view_count, video.metadata.published_at,
+                    sorted(video.playlists))
+              for vid, video in db.videos.items()}
+    playlists = {pid: playlist.video_ids for pid, playlist in db.playlists.items()}
+    return videos, playlists
+
+
+class FakeClock:
+    """レートリミッター用の擬似時計（sleep で時刻を進める）"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class MultiPlaylistCollectorTester:
+    """マルチプレイリスト並列収集テスター"""
+
+    def __init__(self, playlist_count: int = 8, videos_per_playlist: int = 300, latency: float = 0.02):
+        """初期化"""
+        self.playlist_count = playlist_count
+        self.videos_per_playlist = videos_per_playlist
+        self.latency = latency
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("📡 マルチプレイリスト並列収集テスト")
+        print("=" * 60)
+
+        (self.data_models, self.collector_module,
+         self.rate_limiter_module, self.fake_module) = load_collector_modules()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        test_results = {}
+        try:
+            # テスト1: クォータ連動トークンバケット
+            test_results["quota_rate_limiter"] = self.test_quota_rate_limiter()
+
+            # テスト2: 中断からの再開
+            test_results["checkpoint_resume"] = self.test_checkpoint_resume()
+
+            # テスト3: 並列収集と順次収集の結果一致
+            test_results["concurrent_parity"] = self.test_concurrent_parity()
+
+            # テスト4: スループット比較
+            test_results["benchmark"] = self.test_benchmark()
+
+            # テスト5: ETag・内容ハッシュによる差分同期
+            test_results["delta_sync"] = self.test_delta_sync()
+
+            # テスト6: 夜間再同期のコスト比較
+            test_results["delta_sync_benchmark"] = self.test_delta_sync_benchmark()
+        finally:
+            self.temp_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _service(self, **options):
+        return self.fake_module.FakeYouTubeService.generate(
+            self.playlist_count, self.videos_per_playlist, shared_videos=20,
+            missing_video_ids={"PL001_0000007", "PL003_0000100"}, **options
+        )
+
+    def _collector(self, name: str, service, units_per_second: float = 10000.0):
+        """プレイリスト設定を登録済みのコレクターを作成"""
+        data_dir = Path(self.temp_dir.name) / name
+        limiter = self.rate_limiter_module.QuotaRateLimiter(units_per_second=units_per_second,
+                                                             burst=units_per_second)
+        with redirect_stdout(io.StringIO()):
+            collector = self.collector_module.MultiPlaylistCollector(data_dir=data_dir, service=service,
+                                                                     rate_limiter=limiter)
+            for i, playlist_id in enumerate(service.playlist_items):
+                collector.config_manager.add_playlist(
+                    playlist_id, f"テストプレイリスト{i}", category=self.data_models.PlaylistCategory.MUSIC,
+                    priority=i % 5 + 1
+                )
+        return collector
+
+    def _reopen(self, collector, service):
+        """同じデータディレクトリで新しいコレクターを作成（次回の実行に相当）"""
+        with redirect_stdout(io.StringIO()):
+            return self.collector_module.MultiPlaylistCollector(data_dir=collector.data_dir, service=service,
+                                                                rate_limiter=collector.rate_limiter)
+
+    def _collect(self, collector, **options):
+        with redirect_stdout(io.StringIO()):
+            return collector.collect_multiple_playlists(**options)
+
+    def test_quota_rate_limiter(self):
+        """クォータ連動トークンバケットテスト"""
+        print("\n🪣 レートリミッターテスト")
+        print("-" * 40)
+
+        # 10 units/秒・容量10: 30 units 消費すると (30-10)/10 = 2秒待つ
+        clock = FakeClock()
+        limiter = self.rate_limiter_module.QuotaRateLimiter(units_per_second=10, burst=10,
+                                                             clock=clock.time, sleep=clock.sleep)
+        for _ in range(30):
+            limiter.acquire('videos.list')
+        paced_wait = clock.now
+        paced = abs(paced_wait - 2.0) < 1e-6 and limiter.units_used == 30
+
+        # 容量を超えるコスト（search.list=100）は満杯時に前借りし、次の呼び出しで返済分を待つ
+        clock = FakeClock()
+        limiter = self.rate_limiter_module.QuotaRateLimiter(units_per_second=10, burst=10,
+                                                             clock=clock.time, sleep=clock.sleep)
+        limiter.acquire('search.list')
+        limiter.acquire('videos.list')
+        borrowed = abs(clock.now - 9.1) < 1e-6
+
+        # 日次クォータ超過・並行呼び出し時の消費量
+        limiter = self.rate_limiter_module.QuotaRateLimiter(units_per_second=1e6, burst=1e6, daily_quota=5)
+        exceeded = False
+        try:
+            for _ in range(6):
+                limiter.acquire('playlistItems.list')
+        except self.rate_limiter_module.QuotaExceededError:
+            exceeded = limiter.units_used == 5
+        limiter = self.rate_limiter_module.QuotaRateLimiter(units_per_second=1e6, burst=1e6)
+        threads = [threading.Thread(target=lambda: [limiter.acquire('videos.list') for _ in range(250)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        thread_safe = limiter.units_used == 2000
+
+        success = paced and borrowed and exceeded and thread_safe
+        print(f"{'✅' if paced else '❌'} 30 units を10 units/秒で消費: 待機 {paced_wait:.1f}秒")
+        print(f"{'✅' if borrowed else '❌'} 容量超過コストの前借り")
+        print(f"{'✅' if exceeded else '❌'} 日次クォータ超過で停止")
+        print(f"{'✅' if thread_safe else '❌'} 8スレッド並行消費: {limiter.units_used} units")
+        return {"success": success}
+
+    def test_checkpoint_resume(self):
+        """中断からの再開テスト"""
+        print("\n♻️ 中断再開テスト")
+        print("-" * 40)
+
+        reference_service = self._service()
+        reference = self._collector("resume_reference", reference_service)
+        self._collect(reference)
+        expected = collection_state(reference.storage)
+        total_calls = reference_service.successful_calls
+
+        # 途中で通信障害 → 新しいプロセス（コレクター）で再実行
+        interrupted_service = self._service(fail_after=total_calls // 2)
+        interrupted = self._collector("resume", interrupted_service)
+        first = self._collect(interrupted)
+        checkpoint_file = interrupted.data_dir / "collection_checkpoint.jsonl"
+        kept = first['stats']['failed_playlists'] > 0 and checkpoint_file.exists()
+
+        resumed_service = self._service()
+        with redirect_stdout(io.StringIO()):
+            resumed = self.collector_module.MultiPlaylistCollector(data_dir=interrupted.data_dir,
+                                                                   service=resumed_service)
+        second = self._collect(resumed)
+
+        no_repeat = interrupted_service.successful_calls + resumed_service.successful_calls == total_calls
+        same = collection_state(resumed.storage) == expected
+        cleared = second['stats']['failed_playlists'] == 0 and not checkpoint_file.exists()
+
+        success = kept and no_repeat and same and cleared
+        print(f"{'✅' if kept else '❌'} 中断時: 失敗 {first['stats']['failed_playlists']}プレイリスト, チェックポイント保持")
+        print(f"{'✅' if no_repeat else '❌'} API呼び出し: 中断前 {interrupted_service.successful_calls} + "
+              f"再開後 {resumed_service.successful_calls} = 通常 {total_calls}")
+        print(f"{'✅' if same else '❌'} 再開後の収集結果が中断なしと一致 "
+              f"(再開時スキップ {second['stats']['resumed_playlists']}プレイリスト)")
+        print(f"{'✅' if cleared else '❌'} 完了後のチェックポイント削除")
+        return {"success": success}
+
+    def test_concurrent_parity(self):
+        """並列収集と順次収集の結果一致テスト"""
+        print("\n🔀 並列/順次 結果一致テスト")
+        print("-" * 40)
+
+        sequential = self._collector("parity_sequential", self._service())
+        self._collect(sequential)
+        concurrent_service = self._service(latency=0.005)
+        concurrent = self._collector("parity_concurrent", concurrent_service)
+        result = self._collect(concurrent, max_workers=4)
+
+        same = collection_state(concurrent.storage) == collection_state(sequential.storage)
+        ordered = [item['config'].playlist_id for item in result['results']] == \
+                  [config.playlist_id for config in concurrent.config_manager.get_configs_by_priority()]
+        parallel = concurrent_service.max_active_requests > 1
+
+        success = same and ordered and parallel
+        print(f"{'✅' if same else '❌'} 動画・プレイリスト内容の一致 ({len(collection_state(sequential.storage)[0])}動画)")
+        print(f"{'✅' if ordered else '❌'} 結果リストは優先度順")
+        print(f"{'✅' if parallel else '❌'} 最大同時リクエスト数: {concurrent_service.max_active_requests}")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """順次 vs 並列のスループット比較"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        timings = {}
+        calls = {}
+        videos = 0
+        for label, workers in (("sequential", 1), ("workers=4", 4), ("workers=8", 8)):
+            service = self._service(latency=self.latency)
+            collector = self._collector(f"bench_{workers}", service)
+            start_time = time.perf_counter()
+            self._collect(collector, max_workers=workers)
+            timings[label] = time.perf_counter() - start_time
+            calls[label] = service.successful_calls
+            videos = len(collector.storage.load_database().videos)
+
+        print(f"✅ {self.playlist_count}プレイリスト × {self.videos_per_playlist}動画, "
+              f"応答遅延 {self.latency * 1000:.0f}ms/リクエスト")
+        for label, elapsed in timings.items():
+            print(f"✅ {label:<11}: {elapsed * 1000:8.1f}ms | {videos / elapsed:7.0f}動画/秒 | API {calls[label]}回")
+
+        success = timings["workers=4"] < timings["sequential"] and len(set(calls.values())) == 1
+        return {"success": success, "timings": timings}
+
+    def test_delta_sync(self):
+        """ETag・内容ハッシュによる差分同期テスト"""
+        print("\n🔍 差分同期テスト")
+        print("-" * 40)
+
+        service = self._service()
+        collector = self._collector("delta", service)
+        self._collect(collector, incremental=True)
+        written_files = list((collector.data_dir / "playlists").glob("*.json")) + [collector.storage.db_file]
+        modified_times = {path: path.stat().st_mtime_ns for path in written_files}
+
+        # 変更なし: 全リクエストが304、動画詳細は取得せず、ファイルも書き換えない
+        calls_before = dict(service.calls)
+        not_modified_before = service.not_modified_calls
+        collector = self._reopen(collector, service)
+        unchanged = self._collect(collector, incremental=True)
+        requests = sum(service.calls.values()) - sum(calls_before.values())
+        all_not_modified = (service.not_modified_calls - not_modified_before == requests and
+                            service.calls.get('videos.list') == calls_before.get('videos.list'))
+        untouched = (unchanged['stats']['unchanged_playlists'] == self.playlist_count and
+                     all(path.stat().st_mtime_ns == modified_times[path] for path in written_files))
+
+        # 変更あり: 分析済み動画の編集・新規動画の追加・登録済み動画の別プレイリストへの追加
+        playlist_ids = list(service.playlist_items)
+        edited_ids = [service.playlist_items[playlist_ids[i]][30 + i] for i in range(3)]
+        new_ids = [f"NEW_{i:07d}" for i in range(5)]
+        service.playlist_items[playlist_ids[0]].extend(new_ids)
+        service.playlist_items[playlist_ids[2]].append(service.playlist_items[playlist_ids[1]][40])
+        for video_id in edited_ids:
+            service.edit_video(video_id)
+        with redirect_stdout(io.StringIO()):
+            collector.storage.update_video_analysis(edited_ids[0], "completed", creative_insight="分析済み")
+
+        calls_before = dict(service.calls)
+        collector = self._reopen(collector, service)
+        changed = self._collect(collector, incremental=True)
+        videos_calls = service.calls['videos.list'] - calls_before['videos.list']
+        stats = changed['stats']
+        delta_counts = (stats['modified_videos'] == 3 and stats['new_videos_added'] == 6 and
+                        stats['unchanged_playlists'] == self.playlist_count - 3 and videos_calls == 3)
+        db = collector.storage.load_database()
+        reanalyze = all(db.videos[video_id].analysis_status.value == "pending" and
+                        "改訂1" in db.videos[video_id].metadata.title for video_id in edited_ids)
+
+        # 全件収集し直した結果と一致
+        reference = self._collector("delta_reference", service)
+        self._collect(reference)
+        same = collection_state(collector.storage) == collection_state(reference.storage)
+
+        success = all_not_modified and untouched and delta_counts and reanalyze and same
+        print(f"{'✅' if all_not_modified else '❌'} 変更なし: {requests}リクエストすべて304, 動画詳細の取得なし")
+        print(f"{'✅' if untouched else '❌'} 変更なし: プレイリストJSON・スナップショットを書き換えない")
+        print(f"{'✅' if delta_counts else '❌'} 変更あり: 内容変更 {stats['modified_videos']}件, "
+              f"追加 {stats['new_videos_added']}件, videos.list {videos_calls}回")
+        print(f"{'✅' if reanalyze else '❌'} 内容が変わった動画を再分析待ちに戻す")
+        print(f"{'✅' if same else '❌'} 全件収集し直した結果と一致")
+        return {"success": success}
+
+    def test_delta_sync_benchmark(self):
+        """夜間再同期（変更なし・少量の変更）の全件同期 vs 差分同期"""
+        print("\n⏱️ 差分同期ベンチマーク")
+        print("-" * 40)
+
+        results = {}
+        for label, incremental in (("full", False), ("incremental", True)):
+            service = self._service()
+            collector = self._collector(f"delta_bench_{label}", service)
+            self._collect(collector, incremental=incremental)
+
+            for scenario in ("unchanged", "changed"):
+                if scenario == "changed":
+                    for playlist_id in list(service.playlist_items)[:2]:
+                        service.edit_video(service.playlist_items[playlist_id][50])
+                        service.playlist_items[playlist_id].append(f"NEW_{playlist_id[-3:]}")
+                calls_before = service.successful_calls
+                not_modified_before = service.not_modified_calls
+                collector = self._reopen(collector, service)
+                units_before = collector.rate_limiter.units_used
+                start_time = time.perf_counter()
+                result = self._collect(collector, incremental=incremental)
+                results[(label, scenario)] = {
+                    "time": time.perf_counter() - start_time,
+                    "calls": service.successful_calls - calls_before,
+                    "not_modified": service.not_modified_calls - not_modified_before,
+                    "units": collector.rate_limiter.units_used - units_before,
+                    "modified": result['stats']['modified_videos']
+                }
+
+        print(f"✅ {self.playlist_count}プレイリスト × {self.videos_per_playlist}動画の再同期（応答遅延なし）")
+        for (label, scenario), result in results.items():
+            print(f"✅ {label:<11} {scenario:<9}: {result['time'] * 1000:7.1f}ms | API {result['calls']:3d}回 "
+                  f"(304: {result['not_modified']:3d}) | {result['units']:3d} units | 内容変更 {result['modified']}件")
+
+        success = (results[("incremental", "unchanged")]["time"] < results[("full", "unchanged")]["time"] and
+                   results[("incremental", "changed")]["modified"] == 2 and
+                   results[("full", "changed")]["modified"] == 0)
+        return {"success": success, "results": results}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = MultiPlaylistCollectorTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ マルチプレイリスト並列収集テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
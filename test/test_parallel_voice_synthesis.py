@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+順序保証付き音声合成スケジューラーテスト - 番号順再生・先読み上限・割り込み・応答をまたぐワーカー維持・処理時間比較
+"""
+
+import sys
+import io
+import asyncio
+import time
+from contextlib import redirect_stdout
+from functools import partial
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from streaming_system import ParallelVoiceSynthesis, StreamingResponseSystem
+from streaming_benchmark import (
+    StreamingPipelineBenchmark, ScriptedTokenStream, FakeVoiceSynthesizer, FakeSetsunaChat
+)
+
+
+def run_quietly(coroutine):
+    """パイプラインのログを抑制して実行"""
+    with redirect_stdout(io.StringIO()):
+        return asyncio.run(coroutine)
+
+
+class ParallelVoiceSynthesisTester:
+    """順序保証付き音声合成スケジューラーのテスター"""
+
+    def __init__(self, benchmark_runs: int = 3):
+        """初期化"""
+        self.benchmark_runs = benchmark_runs
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🎼 順序保証付き音声合成スケジューラーテスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 合成完了順ではなく登録順に再生
+        test_results["ordered_playback"] = self.test_ordered_playback()
+
+        # テスト2: 先読み上限
+        test_results["prefetch_limit"] = self.test_prefetch_limit()
+
+        # テスト3: 割り込み（バージイン）
+        test_results["barge_in"] = self.test_barge_in()
+
+        # テスト4: 応答をまたいだワーカー維持
+        test_results["persistent_workers"] = self.test_persistent_workers()
+
+        # テスト5: 処理時間比較
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_ordered_playback(self):
+        """番号順再生テスト"""
+        print("\n🔢 番号順再生テスト")
+        print("-" * 40)
+
+        # 合成時間は文字数に比例するため、短い文ほど先に合成が終わる
+        synthesizer = FakeVoiceSynthesizer(base_latency=0.01, latency_per_char=0.004)
+        sentences = ["とても長い文章で、合成にはかなりの時間がかかってしまうことが予想されるような内容です。",
+                     "短い文。", "中くらいの長さの文章です。", "はい。"]
+
+        async def scenario():
+            scheduler = ParallelVoiceSynthesis(synthesizer, max_workers=4)
+            await scheduler.start_workers()
+            numbers = [await scheduler.add_sentence_for_synthesis(sentence) for sentence in sentences]
+            await scheduler.wait_completion()
+            await scheduler.stop_workers()
+            scheduler.shutdown()
+            return numbers
+
+        numbers = run_quietly(scenario())
+        synthesized = [record["text"] for record in synthesizer.synthesis_records]
+        played = [record["text"] for record in synthesizer.playback_records]
+
+        in_order = played == sentences and numbers == [0, 1, 2, 3]
+        overtaken = synthesized != sentences
+        success = in_order and overtaken and synthesizer.max_active_syntheses >= 2
+        print(f"✅ 合成完了順: {[sentences.index(text) for text in synthesized]}（最大同時合成 "
+              f"{synthesizer.max_active_syntheses}件）")
+        print(f"{'✅' if in_order else '❌'} 再生順: {[sentences.index(text) for text in played]}")
+        return {"success": success}
+
+    def test_prefetch_limit(self):
+        """先読み上限テスト"""
+        print("\n📏 先読み上限テスト")
+        print("-" * 40)
+
+        prefetch = 2
+        synthesizer = FakeVoiceSynthesizer(base_latency=0.01, playback_per_char=0.004)
+        sentences = [f"{i}番目の文章を読み上げます。" for i in range(10)]
+
+        async def scenario():
+            scheduler = ParallelVoiceSynthesis(synthesizer, max_workers=6, prefetch=prefetch)
+            await scheduler.start_workers()
+            for sentence in sentences:
+                await scheduler.add_sentence_for_synthesis(sentence)
+
+            # 合成中＋再生待ち（先読み済み）の件数を記録
+            ahead = []
+            while len(synthesizer.playback_records) < len(sentences):
+                depths = scheduler.get_queue_depths()
+                ahead.append(depths["synthesizing"] + depths["ready"])
+                await asyncio.sleep(0.002)
+            await scheduler.wait_completion()
+            await scheduler.stop_workers()
+            scheduler.shutdown()
+            return ahead
+
+        ahead = run_quietly(scenario())
+        played = [record["text"] for record in synthesizer.playback_records]
+
+        # 再生中の文の次から prefetch 文先まで（再生待ちの文自体がまだ合成中なら +1）
+        bounded = max(ahead) <= prefetch + 1 and synthesizer.max_active_syntheses <= prefetch + 1
+        success = bounded and max(ahead) >= prefetch and played == sentences
+        print(f"{'✅' if bounded else '❌'} 先読み {prefetch}文: 合成中＋再生待ちの最大 {max(ahead)}件, "
+              f"最大同時合成 {synthesizer.max_active_syntheses}件（ワーカー6）")
+        print(f"{'✅' if played == sentences else '❌'} {len(played)}文を順に再生")
+        return {"success": success}
+
+    def test_barge_in(self):
+        """割り込みテスト"""
+        print("\n✋ 割り込みテスト")
+        print("-" * 40)
+
+        synthesizer = FakeVoiceSynthesizer(base_latency=0.02, playback_per_char=0.02)
+        sentences = [f"{i}番目の長めの文章です。" for i in range(6)]
+
+        async def scenario():
+            scheduler = ParallelVoiceSynthesis(synthesizer)
+            await scheduler.start_workers()
+            for sentence in sentences:
+                await scheduler.add_sentence_for_synthesis(sentence)
+            await asyncio.sleep(0.1)  # 1文目の再生中
+
+            start_time = time.perf_counter()
+            await scheduler.interrupt()
+            await scheduler.wait_completion()
+            interrupt_time = time.perf_counter() - start_time
+            depths = scheduler.get_queue_depths()
+
+            # 割り込み後の新しい応答は通常どおり再生される
+            for sentence in ("割り込み後の応答です。", "続きの文章です。"):
+                await scheduler.add_sentence_for_synthesis(sentence)
+            await scheduler.wait_completion()
+            await scheduler.stop_workers()
+            scheduler.shutdown()
+            return interrupt_time, depths
+
+        interrupt_time, depths = run_quietly(scenario())
+        played = [record["text"] for record in synthesizer.playback_records]
+        stopped = [record["stopped"] for record in synthesizer.playback_records]
+
+        discarded = played == [sentences[0], "割り込み後の応答です。", "続きの文章です。"]
+        prompt = interrupt_time < 0.1 and stopped[0] and depths == {"pending": 0, "synthesizing": 0, "ready": 0}
+        success = discarded and prompt
+        print(f"{'✅' if prompt else '❌'} 割り込みから停止まで {interrupt_time * 1000:.1f}ms（再生中の音声を停止）")
+        print(f"{'✅' if discarded else '❌'} 未再生の{len(sentences) - 1}文を破棄し、新しい応答を再生: {len(played)}文")
+        return {"success": success}
+
+    def test_persistent_workers(self):
+        """応答をまたいだワーカー維持テスト"""
+        print("\n♻️ ワーカー維持テスト")
+        print("-" * 40)
+
+        synthesizer = FakeVoiceSynthesizer(base_latency=0.005)
+        token_stream = ScriptedTokenStream(tokens_per_second=500)
+        chat = FakeSetsunaChat(token_stream)
+
+        async def responses(system, count):
+            tasks, start_times = [], []
+            for _ in range(count):
+                start_time = time.perf_counter()
+                await system.parallel_synthesis.start_workers()
+                start_times.append(time.perf_counter() - start_time)
+                await system.get_streaming_response("テスト")
+                tasks.append(system.parallel_synthesis.playback_task)
+            alive = not system.parallel_synthesis.playback_task.done()
+            return tasks, start_times, alive
+
+        with redirect_stdout(io.StringIO()):
+            system = StreamingResponseSystem(chat, synthesizer)
+        tasks, start_times, alive = run_quietly(responses(system, 3))
+        same_workers = all(task is tasks[0] for task in tasks) and alive
+        threads = len(system.parallel_synthesis.synthesis_executor._threads)
+        played_first = len(synthesizer.playback_records)
+
+        # イベントループが変わった場合（asyncio.run を再度呼ぶ）は作り直して動作を継続
+        tasks_next_loop, _, _ = run_quietly(responses(system, 1))
+        restarted = tasks_next_loop[0] is not tasks[0] and len(synthesizer.playback_records) == played_first * 4 // 3
+        run_quietly(system.parallel_synthesis.stop_workers())
+        system.parallel_synthesis.shutdown()
+
+        success = same_workers and threads <= system.parallel_synthesis.max_workers and restarted
+        print(f"{'✅' if same_workers else '❌'} 3回の応答で同じ再生ワーカーを使用（2回目以降の起動 "
+              f"{max(start_times[1:]) * 1e6:.0f}µs）")
+        print(f"{'✅' if threads <= system.parallel_synthesis.max_workers else '❌'} 合成スレッド数: {threads}")
+        print(f"{'✅' if restarted else '❌'} 別のイベントループでは作り直して再生: {len(synthesizer.playback_records)}文")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """逐次合成 vs 先読み並列合成のパイプライン比較（合成が律速になる条件）"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        configurations = {
+            "逐次（1ワーカー）": {"max_workers": 1, "prefetch": 1},
+            "先読み1文": {"max_workers": 3, "prefetch": 1},
+            "先読み3文": {"max_workers": 3, "prefetch": 3},
+        }
+        summaries = {}
+        for label, options in configurations.items():
+            benchmark = StreamingPipelineBenchmark(
+                ScriptedTokenStream(tokens_per_second=150, jitter=0.3),
+                FakeVoiceSynthesizer(base_latency=0.12, latency_per_char=0.003, distribution="lognormal",
+                                     spread=0.3, playback_per_char=0.004),
+                system_factory=partial(StreamingResponseSystem, **options)
+            )
+            summaries[label] = benchmark.run(self.benchmark_runs).summary()
+
+        print(f"{'構成':<14}{'最初の音声':>10}{'途切れp50':>10}{'途切れp90':>10}{'応答完了':>10}  (ms)")
+        for label, summary in summaries.items():
+            print(f"{label:<14}{summary['time_to_first_audio']['p50'] * 1000:10.1f}"
+                  f"{summary['audio_gap']['p50'] * 1000:10.1f}{summary['audio_gap']['p90'] * 1000:10.1f}"
+                  f"{summary['total_time']['p50'] * 1000:10.1f}")
+
+        sequential, pipelined = summaries["逐次（1ワーカー）"], summaries["先読み3文"]
+        success = (pipelined["total_time"]["p50"] < sequential["total_time"]["p50"] and
+                   pipelined["audio_gap"]["p90"] < sequential["audio_gap"]["p90"])
+        return {"success": success, "summaries": summaries}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = ParallelVoiceSynthesisTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 順序保証付き音声合成スケジューラーテスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
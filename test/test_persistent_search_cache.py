@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+永続検索キャッシュテスト - LRU上限・TTL失効・知識DB変更時の破棄・圧縮後の再ロード
+"""
+
+import sys
+import io
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.semantic_search_engine import PersistentSearchCache
+
+
+def make_results(index: int):
+    """キャッシュに載せる検索結果（辞書化済みSearchResult相当）"""
+    return [{"video_id": f"vid{index:05d}", "title": f"テスト楽曲 {index}", "relevance_score": 0.5}]
+
+
+class PersistentSearchCacheTester:
+    """永続検索キャッシュテスター"""
+
+    def __init__(self):
+        """初期化"""
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="semantic_search_cache_test_"))
+
+    def new_cache(self, name: str, **kwargs) -> PersistentSearchCache:
+        cache = PersistentSearchCache(self.temp_dir / f"{name}.jsonl", **kwargs)
+        cache.load("fingerprint-1")
+        return cache
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("💾 永続検索キャッシュテスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: LRU上限による追い出し
+        test_results["lru_eviction"] = self.test_lru_eviction()
+
+        # テスト2: TTL失効
+        test_results["ttl_expiry"] = self.test_ttl_expiry()
+
+        # テスト3: 知識DBフィンガープリント変更時の破棄
+        test_results["fingerprint_invalidation"] = self.test_fingerprint_invalidation()
+
+        # テスト4: 圧縮後の再ロード
+        test_results["reload_after_compaction"] = self.test_reload_after_compaction()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_lru_eviction(self):
+        """LRU上限テスト"""
+        print("\n📦 LRU追い出しテスト")
+        print("-" * 40)
+
+        cache = self.new_cache("lru", max_entries=3)
+        for index in range(3):
+            cache.put(f"q{index}", make_results(index))
+        cache.get("q0")  # q0を最近使用に
+        cache.put("q3", make_results(3))
+
+        kept = list(cache.entries)
+        reloaded = PersistentSearchCache(cache.log_path, max_entries=3)
+        reloaded.load("fingerprint-1")
+
+        success = kept == ["q2", "q0", "q3"] and set(reloaded.entries) == set(kept)
+        print(f"{'✅' if success else '❌'} 最も古いq1のみ追い出し: {kept} / 再ロード {list(reloaded.entries)}")
+        return {"success": success}
+
+    def test_ttl_expiry(self):
+        """TTL失効テスト"""
+        print("\n⏳ TTL失効テスト")
+        print("-" * 40)
+
+        cache = self.new_cache("ttl", ttl_seconds=0.05)
+        cache.put("q0", make_results(0))
+        fresh = cache.get("q0") is not None
+        time.sleep(0.1)
+        expired = cache.get("q0") is None and "q0" not in cache.entries
+
+        cache.put("q1", make_results(1))
+        time.sleep(0.1)
+        reloaded = PersistentSearchCache(cache.log_path, ttl_seconds=0.05)
+        reloaded.load("fingerprint-1")
+
+        success = fresh and expired and len(reloaded) == 0
+        print(f"{'✅' if success else '❌'} 期限内ヒット・期限切れミス・再ロード時に破棄")
+        return {"success": success}
+
+    def test_fingerprint_invalidation(self):
+        """知識DB変更時の破棄テスト"""
+        print("\n🔑 フィンガープリント破棄テスト")
+        print("-" * 40)
+
+        cache = self.new_cache("fingerprint")
+        cache.put("q0", make_results(0))
+
+        same = PersistentSearchCache(cache.log_path)
+        same.load("fingerprint-1")
+        changed = PersistentSearchCache(cache.log_path)
+        changed.load("fingerprint-2")
+
+        cache = self.new_cache("invalidate")
+        cache.put("q0", make_results(0))
+        cache.invalidate("fingerprint-2")
+        after_invalidate = PersistentSearchCache(cache.log_path)
+        after_invalidate.load("fingerprint-2")
+
+        success = (same.get("q0") == make_results(0) and len(changed) == 0 and
+                   len(cache) == 0 and len(after_invalidate) == 0)
+        print(f"{'✅' if success else '❌'} 同一DBでは保持・変更時は破棄・invalidate後も空")
+        return {"success": success}
+
+    def test_reload_after_compaction(self):
+        """圧縮後の再ロードテスト（圧縮中の追記も失わない）"""
+        print("\n🗜️ 圧縮後再ロードテスト")
+        print("-" * 40)
+
+        with redirect_stdout(io.StringIO()):
+            cache = self.new_cache("compaction", max_entries=20, compaction_ratio=2.0)
+            for round_index in range(5):
+                for index in range(20):
+                    cache.put(f"q{index}", make_results(index * 10 + round_index))
+                cache.delete("q0")
+            cache.wait_for_compaction()
+
+            # 圧縮ファイルの書き込み中もput/getがロックで待たされず、追記分も置換後に残ること
+            writing, release = threading.Event(), threading.Event()
+            write_records = cache._write_records
+
+            def slow_write_records(path, records):
+                writing.set()
+                release.wait(5)
+                write_records(path, records)
+
+            cache._write_records = slow_write_records
+            cache._log_records = cache.max_entries * cache.compaction_ratio + 1
+            cache.put("trigger", make_results(98))
+            writing.wait(5)
+            start_time = time.perf_counter()
+            cache.put("during", make_results(99))
+            hit_during = cache.get("q10") is not None
+            put_elapsed = time.perf_counter() - start_time
+            release.set()
+            cache.wait_for_compaction()
+            cache._write_records = write_records
+
+            expected = {key: entry["results"] for key, entry in cache.entries.items()}
+            reloaded = PersistentSearchCache(cache.log_path, max_entries=20)
+            reloaded.load("fingerprint-1")
+            actual = {key: entry["results"] for key, entry in reloaded.entries.items()}
+
+        log_lines = len(cache.log_path.read_text(encoding="utf-8").splitlines())
+        success = (actual == expected and "during" in actual and "q0" not in actual and
+                   hit_during and put_elapsed < 1.0 and log_lines <= 1 + 20 + 2)
+        print(f"{'✅' if success else '❌'} 圧縮後ログ{log_lines}行・再ロード{len(actual)}件が一致")
+        return {"success": success}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = PersistentSearchCacheTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 永続検索キャッシュテスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
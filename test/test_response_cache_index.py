@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+応答キャッシュ類似検索インデックステスト - 線形スキャンとの一致確認・ベンチマーク
+"""
+
+import sys
+import io
+import random
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cache_system import ResponseCache
+from core.setsuna_chat import SetsunaChat
+from logging_system import get_logger
+from memory_system import SimpleMemorySystem
+
+
+# 会話入力に近い文字分布を作るための文字プール
+HIRAGANA = [chr(c) for c in range(ord("ぁ"), ord("ん") + 1)]
+KANJI = list("今日明天気曲歌好音楽動画最近話題人気新作配信作品聞見")
+ASCII = list("abcdefghijklmnopqrstuvwxyz")
+
+
+def make_text(rng: random.Random) -> str:
+    """合成ユーザー入力を生成"""
+    length = rng.randint(6, 30)
+    pool = HIRAGANA * 3 + KANJI + ASCII
+    return "".join(rng.choice(pool) for _ in range(length))
+
+
+def mutate_text(rng: random.Random, text: str) -> str:
+    """1文字だけ置き換えた近似入力を生成"""
+    position = rng.randrange(len(text))
+    return text[:position] + rng.choice(HIRAGANA) + text[position + 1:]
+
+
+def linear_lookup(cache: ResponseCache, user_input: str):
+    """従来の線形スキャンによる類似検索（比較基準）"""
+    for key, cache_entry in cache.memory_cache.items():
+        if not cache._is_cache_valid(cache_entry):
+            continue
+        similarity = cache._calculate_similarity(user_input, cache_entry["original_input"])
+        if similarity >= cache.similarity_threshold:
+            return cache_entry["response"]
+    return None
+
+
+class FailingStageExecutor:
+    """キャッシュヒット時に呼ばれてはいけないコンテキスト収集実行器"""
+
+    def __init__(self):
+        self.run_count = 0
+
+    def run(self, stages):
+        self.run_count += 1
+        raise RuntimeError("context stages should not run on cache hit")
+
+
+def make_memory_system(learned_facts):
+    """ファイルを読まない記憶システム（プロセス起動直後と同じく世代番号0）"""
+    memory_system = SimpleMemorySystem.__new__(SimpleMemorySystem)
+    memory_system.persistent_memory = {"learned_facts": list(learned_facts), "relationship_level": 1}
+    memory_system.generation = 0
+    memory_system._content_fingerprint = None
+    return memory_system
+
+
+def make_chat(cache: ResponseCache, memory_system) -> SetsunaChat:
+    """キャッシュ確認用の最小構成SetsunaChat"""
+    chat = SetsunaChat.__new__(SetsunaChat)
+    chat.logger = get_logger()
+    chat.conversation_history = []
+    chat.response_cache = cache
+    chat.memory_system = memory_system
+    chat.context_builder = None
+    chat.context_stage_executor = FailingStageExecutor()
+    return chat
+
+
+class ResponseCacheIndexTester:
+    """応答キャッシュ類似検索インデックステスター"""
+
+    def __init__(self, sizes=(1000, 10000, 100000), query_count: int = 50):
+        """初期化"""
+        self.sizes = sizes
+        self.query_count = query_count
+        self.rng = random.Random(42)
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🗄️ 応答キャッシュ類似検索インデックステスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 線形スキャンとの結果一致
+        test_results["parity"] = self.test_parity_with_linear_scan()
+
+        # テスト2: 削除・更新時のインデックス追従
+        test_results["maintenance"] = self.test_incremental_maintenance()
+
+        # テスト3: 文脈の指紋付きキー・早期キャッシュ確認
+        test_results["context_key"] = self.test_context_key_probe()
+
+        # テスト4: 規模別ベンチマーク
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _build_cache(self, temp_dir: str, size: int) -> ResponseCache:
+        with redirect_stdout(io.StringIO()):
+            cache = ResponseCache(cache_dir=temp_dir)
+            cache.max_cache_size = size + 1
+            for i in range(size):
+                cache.cache_response(make_text(self.rng), f"response_{i}")
+        return cache
+
+    def _make_queries(self, cache: ResponseCache):
+        inputs = [entry["original_input"] for entry in cache.memory_cache.values()]
+        queries = []
+        for _ in range(self.query_count):
+            if self.rng.random() < 0.5:
+                queries.append(mutate_text(self.rng, self.rng.choice(inputs)))
+            else:
+                queries.append(make_text(self.rng))
+        return queries
+
+    def test_parity_with_linear_scan(self):
+        """線形スキャンとの結果一致テスト"""
+        print("\n🔍 線形スキャンとの結果一致テスト")
+        print("-" * 40)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = self._build_cache(temp_dir, 2000)
+            queries = self._make_queries(cache) + ["", "a", "こんにちは"]
+
+            mismatches = 0
+            for query in queries:
+                expected = linear_lookup(cache, query)
+                with redirect_stdout(io.StringIO()):
+                    actual = cache.get_cached_response(query)
+                if expected != actual:
+                    mismatches += 1
+                    print(f"❌ 不一致: '{query}' → {actual} (期待: {expected})")
+
+        success = mismatches == 0
+        print(f"{'✅' if success else '❌'} {len(queries)}クエリ中 不一致 {mismatches}件")
+        return {"success": success, "mismatches": mismatches}
+
+    def test_incremental_maintenance(self):
+        """削除・更新時のインデックス追従テスト"""
+        print("\n🔧 インデックス追従テスト")
+        print("-" * 40)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with redirect_stdout(io.StringIO()):
+                cache = ResponseCache(cache_dir=temp_dir)
+                cache.max_cache_size = 150
+                for i in range(300):
+                    cache.cache_response(f"テスト入力{i:04d}です", f"response_{i}")
+
+                # LRU削除後もインデックスとキャッシュが一致すること
+                size_match = len(cache.similarity_index) == len(cache.memory_cache)
+
+                # 閾値変更時は再構築されること
+                cache.similarity_threshold = 0.5
+                query = "テスト入力9999です"
+                threshold_match = cache.get_cached_response(query) == linear_lookup(cache, query)
+
+                cache.clear_cache()
+                cleared = len(cache.similarity_index) == 0
+
+        success = size_match and threshold_match and cleared
+        print(f"{'✅' if size_match else '❌'} LRU削除後のサイズ一致")
+        print(f"{'✅' if threshold_match else '❌'} 閾値変更後の結果一致")
+        print(f"{'✅' if cleared else '❌'} クリア後の空インデックス")
+        return {"success": success}
+
+    def test_context_key_probe(self):
+        """文脈の指紋付きキーと get_response の早期キャッシュ確認テスト"""
+        print("\n🔑 文脈の指紋付きキャッシュテスト")
+        print("-" * 40)
+
+        fact = {"category": "趣味", "content": "ボカロが好き", "timestamp": "2025-01-01T00:00:00"}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with redirect_stdout(io.StringIO()):
+                cache = ResponseCache(cache_dir=temp_dir)
+                chat = make_chat(cache, make_memory_system([]))
+
+                context_key = chat._response_cache_context("full_search")
+                cache.cache_response("おすすめの曲ある？", "TRiNITYの新曲がいいと思うんだ", context_key=context_key)
+
+                # 同じ文脈ならコンテキスト収集前にヒットすること
+                hit = chat.get_response("おすすめの曲ある？")
+                skipped_stages = chat.context_stage_executor.run_count == 0
+
+                # モードや記憶の内容が違えば、完全一致・類似どちらでもヒットしないこと
+                other_mode = cache.get_cached_response(
+                    "おすすめの曲ある？", context_key=chat._response_cache_context("fast_response"))
+                chat.memory_system.add_manual_fact(fact["category"], fact["content"])
+                new_fact = cache.get_cached_response(
+                    "おすすめの曲ある?", context_key=chat._response_cache_context("full_search"))
+                no_context = cache.get_cached_response("おすすめの曲ある？")
+                cache.save_cache()
+
+                # 再起動後（世代番号は0から）もディスクのキャッシュは記憶の内容で判定されること
+                restarted_cache = ResponseCache(cache_dir=temp_dir)
+                learned = make_chat(restarted_cache, make_memory_system([fact]))
+                unchanged = make_chat(restarted_cache, make_memory_system([]))
+                stale_after_restart = restarted_cache.get_cached_response(
+                    "おすすめの曲ある？", context_key=learned._response_cache_context("full_search"))
+                hit_after_restart = restarted_cache.get_cached_response(
+                    "おすすめの曲ある？", context_key=unchanged._response_cache_context("full_search"))
+
+        hit_ok = hit == "TRiNITYの新曲がいいと思うんだ" and skipped_stages
+        isolated = other_mode is None and new_fact is None and no_context is None
+        restart_ok = stale_after_restart is None and hit_after_restart == "TRiNITYの新曲がいいと思うんだ"
+        print(f"{'✅' if hit_ok else '❌'} 早期ヒット（コンテキスト収集なし）")
+        print(f"{'✅' if isolated else '❌'} 指紋が異なるエントリは不一致")
+        print(f"{'✅' if restart_ok else '❌'} 再起動後も記憶の内容で判定")
+        return {"success": hit_ok and isolated and restart_ok}
+
+    def test_benchmark(self):
+        """規模別ベンチマーク（線形スキャン vs インデックス）"""
+        print("\n⏱️ 規模別ベンチマーク")
+        print("-" * 40)
+
+        results = {}
+        for size in self.sizes:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                cache = self._build_cache(temp_dir, size)
+                queries = self._make_queries(cache)
+
+                start_time = time.perf_counter()
+                for query in queries:
+                    linear_lookup(cache, query)
+                linear_time = (time.perf_counter() - start_time) / len(queries)
+
+                start_time = time.perf_counter()
+                with redirect_stdout(io.StringIO()):
+                    for query in queries:
+                        cache.get_cached_response(query)
+                indexed_time = (time.perf_counter() - start_time) / len(queries)
+
+            speedup = linear_time / indexed_time if indexed_time > 0 else 0
+            results[size] = {
+                "linear_ms": linear_time * 1000,
+                "indexed_ms": indexed_time * 1000,
+                "speedup": speedup
+            }
+            print(f"✅ {size:>6}件: 線形 {linear_time * 1000:8.3f}ms / "
+                  f"インデックス {indexed_time * 1000:8.3f}ms ({speedup:.1f}倍)")
+
+        return {"success": True, "details": results}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = ResponseCacheIndexTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 応答キャッシュ類似検索インデックステスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
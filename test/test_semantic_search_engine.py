@@ -46,6 +46,9 @@ class SemanticSearchTester:
         # テスト6: キャッシュ機能
         test_results["caching"] = self.test_caching()
         
+        # テスト7: ベクトル化スコアリングの一致
+        test_results["vectorized_scoring"] = self.test_vectorized_scoring()
+        
         # 総合結果
         self.display_comprehensive_results(test_results)
         
@@ -351,6 +354,45 @@ class SemanticSearchTester:
             print(f"❌ エラー: {e}")
             return {"success": False, "error": str(e)}
     
+    def test_vectorized_scoring(self):
+        """ベクトル化スコアリングと逐次スコア計算の一致テスト"""
+        print("\n🧮 ベクトル化スコアリング一致テスト")
+        print("-" * 40)
+        
+        test_queries = ["TRiNITY", "ボカロ", "最近の人気曲", "昔の懐かしいロック", "何かいいアニソンない？"]
+        videos = self.engine.knowledge_db.get("videos", {})
+        video_ids = list(videos.keys())
+        
+        try:
+            mismatches = 0
+            for query in test_queries:
+                semantic_query = self.engine.parse_semantic_query(query)
+                batch_scores = self.engine._calculate_relevance_scores(semantic_query)
+                
+                for index, video_id in enumerate(video_ids):
+                    expected = self.engine._calculate_relevance_score(videos[video_id], semantic_query)
+                    if abs(expected - float(batch_scores[index])) > 1e-12:
+                        mismatches += 1
+                
+                # 従来の全件ソートと上位順位が一致すること
+                expected_ranking = sorted(
+                    (video_id for index, video_id in enumerate(video_ids) if batch_scores[index] > 0.1),
+                    key=lambda video_id: self.engine._calculate_relevance_score(videos[video_id], semantic_query),
+                    reverse=True
+                )[:10]
+                actual_ranking = [r.video_id for r in self.engine.search(query, max_results=10, use_cache=False)]
+                if expected_ranking != actual_ranking:
+                    mismatches += 1
+                    print(f"❌ '{query}': 順位不一致")
+            
+            success = mismatches == 0
+            print(f"{'✅' if success else '❌'} {len(test_queries)}クエリ × {len(video_ids)}件: 不一致 {mismatches}件")
+            return {"success": success, "mismatches": mismatches}
+            
+        except Exception as e:
+            print(f"❌ エラー: {e}")
+            return {"success": False, "error": str(e)}
+    
     def display_comprehensive_results(self, test_results):
         """総合結果表示"""
         print("\n" + "=" * 60)
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SetsunaChat ストリーミング応答テスト - トークン逐次受信・get_response とのプロンプト共通化・
+コンテキスト収集の非同期化・中断・音声パイプライン統合
+"""
+
+import sys
+import io
+import asyncio
+import threading
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from openai import OpenAI
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.setsuna_chat import SetsunaChat
+from core.context_stage_executor import ContextStageExecutor
+from fakes.fake_completion_server import FakeCompletionServer
+from logging_system import get_logger
+from streaming_system import StreamingResponseSystem
+from streaming_benchmark import FakeVoiceSynthesizer
+
+REPLY = "うん、その曲いいよね。サビの転調がすごく好きなんだ。今度一緒に聴こうよ。"
+
+
+class FakeMemorySystem:
+    """記憶コンテキストを返し、記録された会話を保持する模擬記憶システム"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.conversations = []
+
+    def get_memory_context(self):
+        time.sleep(self.delay)
+        return "ユーザーはボカロ曲が好き"
+
+    def process_conversation(self, user_input, response):
+        self.conversations.append((user_input, response))
+
+
+class FakeResponseCache:
+    """文脈キー付きの模擬応答キャッシュ"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get_cached_response(self, user_input, context_key=None):
+        return self.entries.get((user_input, context_key))
+
+    def cache_response(self, user_input, response, context_key=None):
+        self.entries[(user_input, context_key)] = response
+
+
+class FakeProactiveEngine:
+    """常に同じ提案を返す模擬プロアクティブエンジン"""
+
+    def should_suggest_proactive_response(self, conversation_context):
+        return {"should_suggest": True, "suggested_type": "creative_project_proposal"}
+
+    def generate_proactive_suggestion(self, conversation_context, suggested_type):
+        return {"type": suggested_type, "suggestion": "次の動画のアイデアも考えてみない？"}
+
+
+def make_chat(server: FakeCompletionServer, memory_delay: float = 0.0, proactive: bool = False):
+    """擬似サーバーに接続した最小構成の SetsunaChat"""
+    chat = SetsunaChat.__new__(SetsunaChat)
+    chat.logger = get_logger()
+    chat.is_test_mode = True
+    chat.conversation_history = []
+    chat.response_patterns = {}
+    chat.response_cache = FakeResponseCache()
+    chat.last_context_data = None
+    chat.proactive_engine = FakeProactiveEngine() if proactive else None
+    chat.knowledge_provider = None
+    chat.context_builder = None
+    chat.conversation_project_context = None
+    chat.long_term_memory = None
+    chat.memory_system = FakeMemorySystem(memory_delay)
+    chat.personality_memory = None
+    chat.collaboration_memory = None
+    chat.memory_integration = None
+    chat.project_system = None
+    chat.prompt_manager = None
+    chat.fallback_character_prompt = "あなたは「片無せつな」です。"
+    chat.consistency_checker = None
+    chat.new_consistency_checker = None
+    chat.model_selection_enabled = False
+    chat.default_model = "gpt-4-turbo"
+    chat.cost_tracker = {"gpt-4-turbo": {"requests": 0, "input_tokens": 0, "output_tokens": 0}}
+    chat.cost_rates = {"gpt-4-turbo": {"input": 0.01, "output": 0.03}}
+    chat.client = OpenAI(api_key="test-key", base_url=server.base_url)
+    chat.async_client = None
+    chat._async_client_loop = None
+    chat._streaming_cancelled = threading.Event()
+    chat.context_stage_executor = ContextStageExecutor(max_workers=4, default_deadline=1.0)
+    return chat
+
+
+async def collect(chat, user_input, mode="full_search"):
+    """トークンと受信時刻を収集"""
+    start_time = time.perf_counter()
+    tokens, times = [], []
+    async for token in chat.stream_response(user_input, mode):
+        tokens.append(token)
+        times.append(time.perf_counter() - start_time)
+    return tokens, times, time.perf_counter() - start_time
+
+
+def run_quietly(coroutine):
+    """ログを抑制して実行"""
+    with redirect_stdout(io.StringIO()):
+        return asyncio.run(coroutine)
+
+
+class SetsunaChatStreamingTester:
+    """SetsunaChat ストリーミング応答のテスター"""
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("📡 SetsunaChat ストリーミング応答テスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: トークンの逐次受信
+        test_results["token_streaming"] = self.test_token_streaming()
+
+        # テスト2: get_response とのプロンプト・応答の一致
+        test_results["prompt_parity"] = self.test_prompt_parity()
+
+        # テスト3: コンテキスト収集中もイベントループが止まらない
+        test_results["executor_stages"] = self.test_executor_stages()
+
+        # テスト4: 中断
+        test_results["cancellation"] = self.test_cancellation()
+
+        # テスト5: 音声パイプライン統合
+        test_results["pipeline"] = self.test_pipeline()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_token_streaming(self):
+        """トークン逐次受信テスト"""
+        print("\n🔤 トークン逐次受信テスト")
+        print("-" * 40)
+
+        chunk_interval = 0.02
+        with FakeCompletionServer(REPLY, chars_per_chunk=3, chunk_interval=chunk_interval) as server:
+            chat = make_chat(server)
+            tokens, times, total_time = run_quietly(collect(chat, "この曲どう思う？"))
+            request = server.requests[-1]
+
+        streamed = "".join(tokens) == REPLY and len(tokens) == len(range(0, len(REPLY), 3))
+        # 一括受信ではなく、サーバーの送信間隔どおりに届くこと
+        spread = times[-1] - times[0]
+        incremental = spread >= (len(tokens) - 1) * chunk_interval * 0.8
+        recorded = (chat.conversation_history == [{"role": "user", "content": "この曲どう思う？"},
+                                                  {"role": "assistant", "content": REPLY}] and
+                    chat.memory_system.conversations == [("この曲どう思う？", REPLY)] and
+                    len(chat.response_cache.entries) == 1)
+        usage_tracked = (request["stream"] and request["stream_options"] == {"include_usage": True} and
+                         chat.cost_tracker["gpt-4-turbo"]["output_tokens"] == len(REPLY))
+
+        success = streamed and incremental and recorded and usage_tracked
+        print(f"{'✅' if streamed else '❌'} {len(tokens)}チャンクを受信（結合で応答全文に一致）")
+        print(f"{'✅' if incremental else '❌'} 最初のトークン {times[0] * 1000:.1f}ms → 最後のトークン "
+              f"{times[-1] * 1000:.1f}ms（全体 {total_time * 1000:.1f}ms）")
+        print(f"{'✅' if recorded else '❌'} 会話履歴・記憶・キャッシュに記録")
+        print(f"{'✅' if usage_tracked else '❌'} 使用量チャンクからコスト追跡")
+        return {"success": success}
+
+    def test_prompt_parity(self):
+        """get_response とのプロンプト・応答一致テスト"""
+        print("\n🟰 プロンプト共通化テスト")
+        print("-" * 40)
+
+        parity = []
+        with FakeCompletionServer(REPLY) as server:
+            for mode in ("full_search", "fast_response", "ultra_fast"):
+                sync_chat, stream_chat = make_chat(server, proactive=True), make_chat(server, proactive=True)
+                for chat in (sync_chat, stream_chat):
+                    chat.conversation_history = [{"role": "user", "content": "こんにちは"},
+                                                 {"role": "assistant", "content": "こんにちは！"}]
+
+                with redirect_stdout(io.StringIO()):
+                    sync_response = sync_chat.get_response("新しい曲を作りたい", mode)
+                tokens, _, _ = run_quietly(collect(stream_chat, "新しい曲を作りたい", mode))
+                sync_request, stream_request = server.requests[-2], server.requests[-1]
+
+                same_request = all(sync_request.get(key) == stream_request.get(key)
+                                   for key in ("model", "messages", "max_tokens", "temperature"))
+                parity.append(same_request and "".join(tokens) == sync_response and
+                              sync_chat.conversation_history == stream_chat.conversation_history)
+
+        with_memory = "ユーザーはボカロ曲が好き" in server.requests[-1]["messages"][0]["content"]
+        proactive = sync_response.endswith("次の動画のアイデアも考えてみない？")
+        success = all(parity) and with_memory and proactive
+        print(f"{'✅' if all(parity) else '❌'} 3モードで送信内容（messages・生成パラメーター）と最終応答が一致")
+        print(f"{'✅' if with_memory and proactive else '❌'} 記憶コンテキストの注入・提案の追記も共通")
+        return {"success": success}
+
+    def test_executor_stages(self):
+        """コンテキスト収集中のイベントループ応答性テスト"""
+        print("\n🧵 コンテキスト収集の非同期化テスト")
+        print("-" * 40)
+
+        stage_delay = 0.2
+
+        async def scenario(chat):
+            ticks = []
+
+            async def heartbeat():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.01)
+
+            heartbeat_task = asyncio.create_task(heartbeat())
+            tokens, times, _ = await collect(chat, "最近どう？")
+            heartbeat_task.cancel()
+            gaps = [later - earlier for earlier, later in zip(ticks, ticks[1:])]
+            return tokens, times, max(gaps)
+
+        with FakeCompletionServer(REPLY) as server:
+            chat = make_chat(server, memory_delay=stage_delay)
+            tokens, times, max_gap = run_quietly(scenario(chat))
+
+        waited = times[0] >= stage_delay
+        responsive = max_gap < stage_delay / 2
+        success = waited and responsive and "".join(tokens) == REPLY
+        print(f"{'✅' if waited else '❌'} 記憶段階 {stage_delay * 1000:.0f}ms を待って最初のトークン: {times[0] * 1000:.1f}ms")
+        print(f"{'✅' if responsive else '❌'} その間のイベントループ停止 最大 {max_gap * 1000:.1f}ms")
+        return {"success": success}
+
+    def test_cancellation(self):
+        """中断テスト"""
+        print("\n✋ 中断テスト")
+        print("-" * 40)
+
+        long_reply = REPLY * 4
+
+        async def cancel_from_thread(chat):
+            tokens = []
+            async for token in chat.stream_response("長く話して"):
+                tokens.append(token)
+                if len(tokens) == 5:
+                    # GUIスレッドからの中断を想定
+                    threading.Thread(target=chat.cancel_streaming_response).start()
+            return tokens
+
+        async def cancel_task(chat):
+            tokens = []
+
+            async def consume():
+                async for token in chat.stream_response("長く話して"):
+                    tokens.append(token)
+
+            task = asyncio.create_task(consume())
+            while len(tokens) < 5:
+                await asyncio.sleep(0.005)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return tokens
+
+        results = {}
+        for label, scenario in (("cancel_streaming_response", cancel_from_thread), ("タスクのキャンセル", cancel_task)):
+            with FakeCompletionServer(long_reply, chars_per_chunk=2, chunk_interval=0.02) as server:
+                chat = make_chat(server)
+                start_time = time.perf_counter()
+                tokens = run_quietly(scenario(chat))
+                elapsed = time.perf_counter() - start_time
+                time.sleep(0.1)  # 切断をサーバー側で検知するまで待つ
+                stats = server.get_stats()
+
+            partial = "".join(tokens)
+            history_ok = chat.conversation_history == [{"role": "user", "content": "長く話して"},
+                                                       {"role": "assistant", "content": partial}]
+            stopped_early = len(partial) < len(long_reply) / 2 and elapsed < len(long_reply) / 2 * 0.02 / 2
+            not_cached = chat.response_cache.entries == {} and chat.memory_system.conversations == []
+            results[label] = (stopped_early and history_ok and not_cached and
+                              stats["disconnected_streams"] == 1 and stats["completed_streams"] == 0)
+            print(f"{'✅' if results[label] else '❌'} {label}: {len(partial)}/{len(long_reply)}文字で停止 "
+                  f"({elapsed * 1000:.0f}ms), 受信済みの部分のみ履歴に記録, 接続切断 {stats['disconnected_streams']}件")
+
+        # 応答受信前の中断はユーザー入力ごと取り消す
+        with FakeCompletionServer(REPLY) as server:
+            chat = make_chat(server, memory_delay=0.1)
+
+            async def cancel_before_tokens():
+                threading.Timer(0.02, chat.cancel_streaming_response).start()
+                return [token async for token in chat.stream_response("こんにちは")]
+
+            tokens = run_quietly(cancel_before_tokens())
+            before_tokens = tokens == [] and chat.conversation_history == [] and server.get_stats()["calls"] == 0
+        print(f"{'✅' if before_tokens else '❌'} コンテキスト収集中の中断: API呼び出しなし・履歴に残さない")
+
+        # プロンプト構築中のタスクのキャンセルも、ワーカーの完了後にユーザー入力を残さない
+        with FakeCompletionServer(REPLY) as server:
+            chat = make_chat(server, memory_delay=0.2)
+
+            async def cancel_during_prepare():
+                task = asyncio.create_task(collect(chat, "こんにちは"))
+                await asyncio.sleep(0.05)
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                return list(chat.conversation_history)
+
+            history_at_cancel = run_quietly(cancel_during_prepare())
+            time.sleep(0.3)  # 中断後にワーカーが会話履歴へ追記しないこと
+            during_prepare = (history_at_cancel == [] and chat.conversation_history == [] and
+                              server.get_stats()["calls"] == 0)
+        print(f"{'✅' if during_prepare else '❌'} プロンプト構築中のタスクのキャンセル: 履歴にユーザー入力を残さない")
+
+        return {"success": all(results.values()) and before_tokens and during_prepare}
+
+    def test_pipeline(self):
+        """音声パイプライン統合テスト"""
+        print("\n🔊 音声パイプライン統合テスト")
+        print("-" * 40)
+
+        async def scenario(system):
+            start_time = time.perf_counter()
+            response = await system.get_streaming_response("この曲どう思う？")
+            end_time = time.perf_counter()
+            await system.parallel_synthesis.stop_workers()
+            system.parallel_synthesis.shutdown()
+            return response, start_time, end_time
+
+        with FakeCompletionServer(REPLY, chars_per_chunk=2, chunk_interval=0.02) as server:
+            chat = make_chat(server)
+            synthesizer = FakeVoiceSynthesizer(base_latency=0.02)
+            with redirect_stdout(io.StringIO()):
+                system = StreamingResponseSystem(chat, synthesizer)
+            response, start_time, end_time = run_quietly(scenario(system))
+            stream_end = start_time + len(range(0, len(REPLY), 2)) * 0.02
+
+        played = "".join(record["text"] for record in synthesizer.playback_records)
+        first_audio = synthesizer.playback_records[0]["start"] - start_time
+        overlapped = synthesizer.playback_records[0]["start"] < stream_end
+        success = response == REPLY and played == REPLY and overlapped and len(synthesizer.playback_records) >= 2
+        print(f"{'✅' if overlapped else '❌'} 最初の音声 {first_audio * 1000:.1f}ms（応答受信完了 "
+              f"{(stream_end - start_time) * 1000:.0f}ms より前）")
+        print(f"{'✅' if played == REPLY else '❌'} {len(synthesizer.playback_records)}文を順に再生（全体 "
+              f"{(end_time - start_time) * 1000:.0f}ms）")
+        return {"success": success}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = SetsunaChatStreamingTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ SetsunaChat ストリーミング応答テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音声合成用テキスト変換テスト - 従来の置換との一致・左端最長一致・照合パターンの再構築条件・10,000件辞書での処理時間比較
+"""
+
+import sys
+import io
+import random
+import re
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from speech_text_converter import SpeechTextConverter
+
+
+class LegacySpeechTextConverter(SpeechTextConverter):
+    """比較用: 呼び出しごとに辞書をソートし、キーごとに正規表現で置換する従来の実装"""
+
+    def convert_for_speech(self, text: str) -> str:
+        if not text or not text.strip():
+            return text
+
+        converted_text = text
+        pronunciations = self._build_pronunciation_dict()
+        sorted_keys = sorted(pronunciations.keys(), key=len, reverse=True)
+
+        for original in sorted_keys:
+            pronunciation = pronunciations[original]
+            if original in converted_text:
+                pattern = r'\b' + re.escape(original) + r'\b'
+                if re.search(pattern, converted_text):
+                    converted_text = re.sub(pattern, pronunciation, converted_text)
+                elif original in converted_text:
+                    converted_text = converted_text.replace(original, pronunciation)
+        return converted_text
+
+
+class FakeKnowledgeManager:
+    """カスタム読みを持つ動画だけの模擬知識DB"""
+
+    def __init__(self, videos):
+        self.knowledge_db = {"videos": videos}
+
+
+def make_converter(converter_class=SpeechTextConverter, knowledge_manager=None):
+    """ログを抑制して変換器を生成"""
+    with redirect_stdout(io.StringIO()):
+        converter = converter_class()
+        if knowledge_manager:
+            converter.set_knowledge_manager(knowledge_manager)
+    return converter
+
+
+def convert(converter, text: str) -> str:
+    with redirect_stdout(io.StringIO()):
+        return converter.convert_for_speech(text)
+
+
+def synthetic_videos(count: int, seed: int = 0):
+    """英字の楽曲名・アーティスト名とその読みを持つ合成動画データ"""
+    rng = random.Random(seed)
+    syllables = ["ka", "ri", "no", "su", "te", "mi", "ra", "to", "ne", "yu", "ha", "ze"]
+    readings = dict(zip(syllables, ["カ", "リ", "ノ", "ス", "テ", "ミ", "ラ", "ト", "ネ", "ユ", "ハ", "ゼ"]))
+    videos = {}
+    for index in range(count):
+        parts = [rng.choice(syllables) for _ in range(rng.randint(2, 5))]
+        title = "".join(parts).capitalize() + str(index)
+        videos[f"v{index:05d}"] = {"custom_info": {
+            "manual_title": title,
+            "japanese_pronunciations": ["".join(readings[part] for part in parts) + str(index)]
+        }}
+    return videos
+
+
+class SpeechTextConverterTester:
+    """音声合成用テキスト変換のテスター"""
+
+    def __init__(self, dictionary_size: int = 10000, benchmark_sentences: int = 200):
+        """初期化"""
+        self.dictionary_size = dictionary_size
+        self.benchmark_sentences = benchmark_sentences
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🗣️ 音声合成用テキスト変換テスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 従来の置換結果との一致
+        test_results["legacy_parity"] = self.test_legacy_parity()
+
+        # テスト2: 左端最長一致・1回の走査
+        test_results["leftmost_longest"] = self.test_leftmost_longest()
+
+        # テスト3: 照合パターンの再構築条件
+        test_results["pattern_rebuild"] = self.test_pattern_rebuild()
+
+        # テスト4: 処理時間比較
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_legacy_parity(self):
+        """従来の置換結果との一致テスト"""
+        print("\n🟰 従来の置換との一致テスト")
+        print("-" * 40)
+
+        knowledge_manager = FakeKnowledgeManager({
+            "v1": {"custom_info": {"manual_title": "Adventure", "japanese_pronunciations": ["アドベンチャー"],
+                                   "manual_artist": "YOASOBI", "artist_pronunciations": ["ヨアソビ"]}},
+            "v2": {"custom_info": {"manual_title": "夜に駆ける", "japanese_pronunciations": []}}
+        })
+        converter = make_converter(knowledge_manager=knowledge_manager)
+        legacy = make_converter(LegacySpeechTextConverter, knowledge_manager)
+
+        texts = [
+            "XOXOは良い曲ですね",
+            "TRiNITYの新曲が出ました",
+            "MusicVideoを見ました",
+            "VTuberのカバー曲です♪",
+            "YOASOBIのAdventure、MVもよかった※個人の感想",
+            "feat. 初音ミクのOriginal曲",
+            "こんにちは、今日はいい天気ですね",
+            "",
+        ]
+        mismatches = [text for text in texts if convert(converter, text) != convert(legacy, text)]
+
+        success = not mismatches
+        print(f"{'✅' if success else '❌'} {len(texts) - len(mismatches)}/{len(texts)}件で従来と同じ変換結果")
+        for text in mismatches:
+            print(f"  ❌ {text!r}: {convert(converter, text)!r} / 従来 {convert(legacy, text)!r}")
+        return {"success": success}
+
+    def test_leftmost_longest(self):
+        """左端最長一致テスト"""
+        print("\n📐 左端最長一致テスト")
+        print("-" * 40)
+
+        converter = make_converter()
+        with redirect_stdout(io.StringIO()):
+            converter.add_custom_pronunciation("ABC", "エービーシー")
+            converter.add_custom_pronunciation("BCD", "ビーシーディー")
+            converter.add_custom_pronunciation("ABCDE", "エービーシーディーイー")
+            converter.add_custom_pronunciation("エム", "M")
+            converter.add_custom_pronunciation("a.b", "ドット")
+
+        cases = {
+            # 重なる候補は左から、同じ位置では最も長いものを優先
+            "ABCD": "エービーシーD",
+            "ABCDE!": "エービーシーディーイー!",
+            "XBCDE": "XビーシーディーE",
+            # より長いキーの途中で一致しなくなったら、短いキーで置換
+            "ABCDX": "エービーシーDX",
+            "feat.とfeat": "フィーチャリングとフィーチャリング",
+            # 置換後の読みは再照合しない（MV → エムブイ → Mブイ とはならない）
+            "MVとエム": "エムブイとM",
+            # 正規表現の特殊文字はそのまま照合
+            "a.bとaxb": "ドットとaxb",
+        }
+        failures = {text: convert(converter, text) for text, expected in cases.items()
+                    if convert(converter, text) != expected}
+
+        success = not failures
+        print(f"{'✅' if success else '❌'} {len(cases) - len(failures)}/{len(cases)}件が期待どおり")
+        for text, actual in failures.items():
+            print(f"  ❌ {text!r} → {actual!r}（期待 {cases[text]!r}）")
+        return {"success": success}
+
+    def test_pattern_rebuild(self):
+        """照合パターンの再構築条件テスト"""
+        print("\n♻️ 照合パターン再構築テスト")
+        print("-" * 40)
+
+        converter = make_converter()
+        compiled = []
+        compile_pattern = converter._compile_pronunciation_pattern
+
+        def counting_compile(pronunciations):
+            compiled.append(len(pronunciations))
+            return compile_pattern(pronunciations)
+
+        converter._compile_pronunciation_pattern = counting_compile
+
+        for text in ("TRiNITYの新曲", "XOXOは良い曲", "VTuberの新曲", ""):
+            convert(converter, text)
+        reused = len(compiled) == 1
+
+        # 辞書が変わる操作のあとは作り直して新しい読みを反映
+        with redirect_stdout(io.StringIO()):
+            converter.add_custom_pronunciation("Setsuna", "せつな")
+        added = convert(converter, "Setsunaです") == "せつなです" and len(compiled) == 2
+
+        with redirect_stdout(io.StringIO()):
+            converter.set_knowledge_manager(FakeKnowledgeManager({"v1": {"custom_info": {
+                "manual_title": "Yoru", "japanese_pronunciations": ["ヨル"]}}}))
+        linked = convert(converter, "Yoruを聴いた") == "ヨルを聴いた" and len(compiled) == 3
+
+        with redirect_stdout(io.StringIO()):
+            converter.clear_cache()
+        cleared = converter._pronunciation_pattern is None
+        rebuilt = (convert(converter, "Yoruを聴いた") == "ヨルを聴いた" and
+                   convert(converter, "Setsunaです") == "せつなです" and len(compiled) == 4)
+
+        success = reused and added and linked and cleared and rebuilt
+        print(f"{'✅' if reused else '❌'} 辞書が変わらない間は同じ照合パターンを再利用（4回の変換で構築1回）")
+        print(f"{'✅' if added and linked and cleared and rebuilt else '❌'} "
+              f"カスタム読み追加・知識DB連携・キャッシュクリア後に再構築")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """従来の置換 vs 一括照合の処理時間比較"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        knowledge_manager = FakeKnowledgeManager(synthetic_videos(self.dictionary_size))
+        converter = make_converter(knowledge_manager=knowledge_manager)
+        legacy = make_converter(LegacySpeechTextConverter, knowledge_manager)
+
+        start_time = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            dictionary_size = len(converter.get_pronunciation_dict())
+        build_time = time.perf_counter() - start_time
+        with redirect_stdout(io.StringIO()):
+            legacy.get_pronunciation_dict()
+
+        # 応答文と同程度の長さで、数件の楽曲名・アーティスト名を含む文
+        rng = random.Random(1)
+        titles = [video["custom_info"]["manual_title"]
+                  for video in knowledge_manager.knowledge_db["videos"].values()]
+        templates = ["{}のサビが好きなんだ。", "最近は{}をよく聴いてるよ、MVもいい感じ。",
+                     "{}と{}、どっちも名曲だよね♪", "今日はいい天気だね。"]
+        sentences = [template.format(*(rng.choice(titles) for _ in range(template.count("{}"))))
+                     for template in (rng.choice(templates) for _ in range(self.benchmark_sentences))]
+
+        timings = {}
+        outputs = {}
+        for label, target in (("従来（キーごとの置換）", legacy), ("一括照合", converter)):
+            with redirect_stdout(io.StringIO()):
+                start_time = time.perf_counter()
+                outputs[label] = [target.convert_for_speech(sentence) for sentence in sentences]
+                timings[label] = (time.perf_counter() - start_time) / len(sentences)
+
+        legacy_time, new_time = timings["従来（キーごとの置換）"], timings["一括照合"]
+        same_output = outputs["従来（キーごとの置換）"] == outputs["一括照合"]
+        success = same_output and new_time * 10 < legacy_time
+        print(f"✅ 辞書 {dictionary_size:,}件（照合パターン構築 {build_time * 1000:.0f}ms・辞書更新時のみ）")
+        for label, elapsed in timings.items():
+            print(f"✅ {label:<14}: 1文あたり {elapsed * 1000:8.3f}ms")
+        print(f"{'✅' if success else '❌'} {legacy_time / new_time:.0f}倍高速, 変換結果一致: {same_output}")
+        return {"success": success, "legacy": legacy_time, "new": new_time}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = SpeechTextConverterTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 音声合成用テキスト変換テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストレージバックエンド互換テスト - JSON/SQLiteで同じUnifiedStorage APIの結果一致・相互変換・Bot側読み取り・遅延復元
+"""
+
+import sys
+import io
+import importlib.util
+import json
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+YOUTUBE_SYSTEM_ROOT = Path(__file__).parent.parent / "youtube_knowledge_system"
+
+
+def load_storage_modules():
+    """YouTube知識システム側のモジュールを読み込み（独自のcore/configパッケージを持つため実行時に追加）"""
+    if str(YOUTUBE_SYSTEM_ROOT) not in sys.path:
+        sys.path.insert(0, str(YOUTUBE_SYSTEM_ROOT))
+    from core import data_models
+    from storage import unified_storage
+    return data_models, unified_storage
+
+
+def load_snapshot_module():
+    """せつなBot側の知識DBローダー（パッケージ名coreが衝突するためファイルから直接読み込み）"""
+    path = Path(__file__).parent.parent / "core" / "knowledge_db_snapshot.py"
+    spec = importlib.util.spec_from_file_location("knowledge_db_snapshot", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_video(data_models, index: int):
+    """テスト用の動画を生成"""
+    now = datetime(2024, 1, 1)
+    metadata = data_models.VideoMetadata(
+        id=f"vid{index:07d}", title=f"テスト楽曲 {index}", description="概要欄 " * 20, published_at=now,
+        channel_title="Channel", channel_id="channel", duration="PT3M", view_count=index,
+        like_count=0, comment_count=0, tags=["ボカロ", f"tag{index % 7}", "ロック" if index % 3 else "バラード"],
+        category_id="10", collected_at=now
+    )
+    return data_models.Video(
+        source=data_models.ContentSource.YOUTUBE, metadata=metadata, playlists=["PL"],
+        playlist_positions={"PL": index}, analysis_status=data_models.AnalysisStatus.PENDING,
+        creative_insight=None, analysis_error=None, created_at=now, updated_at=now
+    )
+
+
+def make_insight(data_models, creators, themes):
+    """テスト用の分析結果を生成"""
+    return data_models.CreativeInsight(
+        creators=[data_models.CreatorInfo(name, role, 0.9) for name, role in creators],
+        music_info=data_models.MusicInfo(lyrics="歌詞", genre="J-POP"), tools_used=["DAW"], themes=list(themes),
+        visual_elements=[], analysis_confidence=0.8, analysis_timestamp=datetime(2024, 2, 1),
+        analysis_model="test", insights="分析メモ"
+    )
+
+
+def make_playlist(data_models, video_ids):
+    """テスト用のプレイリストを生成"""
+    now = datetime(2024, 1, 1)
+    metadata = data_models.PlaylistMetadata(
+        id="PL", title="テストプレイリスト", description="", channel_title="Channel", channel_id="channel",
+        item_count=len(video_ids), published_at=now, collected_at=now
+    )
+    return data_models.Playlist(
+        source=data_models.ContentSource.YOUTUBE, metadata=metadata, video_ids=list(video_ids),
+        last_full_sync=now, last_incremental_sync=None, sync_settings={}, total_videos=len(video_ids),
+        analyzed_videos=0, analysis_success_rate=0.0, created_at=now, updated_at=now
+    )
+
+
+def observe(storage):
+    """UnifiedStorage APIの観測結果（時刻を除く）"""
+    ids = lambda videos: [video.metadata.id for video in videos]
+    statistics = storage.get_statistics()
+    statistics.pop("last_updated")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        export_path = storage.export_for_setsuna(Path(temp_dir) / "export.json")
+        with open(export_path, 'r', encoding='utf-8') as f:
+            export = json.load(f)
+    export.pop("export_timestamp")
+    for creator in export["creators"].values():
+        creator["roles"] = sorted(creator["roles"])
+
+    video = storage.get_video("vid0000005")
+    return {
+        "video": [video.metadata.title, video.analysis_status.value, video.analysis_error,
+                  video.creative_insight.insights, [c.name for c in video.creative_insight.creators]],
+        "missing": storage.get_video("vid0000007"),
+        "by_tag": ids(storage.search_videos_by_tag("tag3")),
+        "by_creator": ids(storage.search_videos_by_creator("歌い手A")),
+        "by_theme": ids(storage.search_videos_by_theme("青春")),
+        "creators": storage.get_all_creators(),
+        "tags": storage.get_all_tags(),
+        "themes": storage.get_all_themes(),
+        "playlist": ids(storage.get_videos_by_playlist("PL")),
+        "retry": ids(storage.get_failed_videos_for_retry()),
+        "all_videos": list(storage.get_all_videos()),
+        "statistics": statistics,
+        "export": export
+    }
+
+
+class StorageBackendTester:
+    """ストレージバックエンド互換テスター"""
+
+    def __init__(self, benchmark_count: int = 5000):
+        """初期化"""
+        self.benchmark_count = benchmark_count
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🗄️ ストレージバックエンド互換テスト")
+        print("=" * 60)
+
+        self.data_models, self.unified_storage = load_storage_modules()
+        from storage.sqlite_storage import SQLiteStorage
+        self.sqlite_storage_class = SQLiteStorage
+        self.temp_dir = tempfile.TemporaryDirectory()
+        test_results = {}
+        try:
+            # テスト1: 同じ操作列でのAPI結果一致（再起動後も含む）
+            test_results["api_parity"] = self.test_api_parity()
+
+            # テスト2: JSON形式との相互変換
+            test_results["json_round_trip"] = self.test_json_round_trip()
+
+            # テスト3: ジャーナルに残る変更を含めた移行
+            test_results["journal_migration"] = self.test_journal_migration()
+
+            # テスト4: SQLiteでの保存をせつなBot側の読み取りが反映すること
+            test_results["sqlite_bot_readers"] = self.test_sqlite_bot_readers()
+
+            # テスト5: 動画の遅延復元
+            test_results["lazy_hydration"] = self.test_lazy_hydration()
+
+            # テスト6: 起動＋単一参照のベンチマーク
+            test_results["benchmark"] = self.test_benchmark()
+        finally:
+            self.temp_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _storage(self, backend: str, name: str):
+        data_dir = Path(self.temp_dir.name) / name
+        return self.unified_storage.create_storage(data_dir, backend=backend)
+
+    def _populate(self, storage, count: int):
+        videos = [make_video(self.data_models, i) for i in range(count)]
+        storage.add_videos(videos)
+        storage.add_playlist(make_playlist(self.data_models, [v.metadata.id for v in videos]))
+        storage.save_database()
+
+    def _run_scenario(self, storage):
+        """両バックエンドで同じ操作列を実行"""
+        dm = self.data_models
+        videos = [make_video(dm, i) for i in range(40)]
+        storage.add_videos(videos[:30])
+        for video in videos[30:]:
+            storage.add_video(video)
+        storage.add_playlist(make_playlist(dm, [v.metadata.id for v in videos]))
+        storage.save_database()
+
+        # 分析結果の更新（API経由・その場での変更）
+        storage.update_video_analysis("vid0000003", "completed", creative_insight="分析結果")
+        for i, (creators, themes) in enumerate([([("歌い手A", "vocal"), ("作曲者B", "composer")], ["青春", "夏"]),
+                                                ([("歌い手A", "vocal")], ["青春"]),
+                                                ([("絵師C", "illustrator")], [])]):
+            video = storage.get_video(f"vid{5 + i * 4:07d}")
+            video.creative_insight = make_insight(dm, creators, themes)
+            video.analysis_status = dm.AnalysisStatus.COMPLETED
+            storage.mark_video_changed(video.metadata.id)
+        for i in range(20, 24):
+            storage.update_video_analysis(f"vid{i:07d}", "failed", analysis_error=f"エラー{i}")
+        storage.update_video_analysis("vid0000020", "pending")
+        storage.update_video_analysis("vid0000020", "failed", analysis_error="再失敗")
+
+        # タグ変更の再登録・削除・既存分析の強化
+        moved = storage.get_video("vid0000010")
+        moved.metadata.tags = ["tag3", "ボカロ"]
+        storage.add_video(moved)
+        storage.remove_video_completely("vid0000007")
+        storage.enhance_existing_analysis()
+        storage.save_database()
+
+    def test_api_parity(self):
+        """同じ操作列でのAPI結果一致テスト"""
+        print("\n🔁 API結果一致テスト")
+        print("-" * 40)
+
+        observations = {}
+        for backend in ("json", "sqlite"):
+            with redirect_stdout(io.StringIO()):
+                storage = self._storage(backend, f"parity_{backend}")
+                self._run_scenario(storage)
+                live = observe(storage)
+                reopened = self._storage(backend, f"parity_{backend}")
+                restored = observe(reopened)
+                if backend == "sqlite":
+                    storage.close()
+                    reopened.close()
+            observations[backend] = (live, restored)
+
+        json_live, json_restored = observations["json"]
+        sqlite_live, sqlite_restored = observations["sqlite"]
+        mismatched = sorted(key for key in json_live if json_live[key] != sqlite_live[key])
+        same_live = not mismatched
+        same_restored = json_restored == sqlite_restored == json_live
+        print(f"{'✅' if same_live else '❌'} 実行中の結果一致 ({len(json_live)}項目) {mismatched or ''}")
+        print(f"{'✅' if same_restored else '❌'} 再起動後の結果一致")
+        return {"success": same_live and same_restored}
+
+    def test_json_round_trip(self):
+        """JSON形式との相互変換テスト"""
+        print("\n🔄 JSON相互変換テスト")
+        print("-" * 40)
+
+        with redirect_stdout(io.StringIO()):
+            source = self._storage("json", "round_trip")
+            self._run_scenario(source)
+            source.save_database(compact=True)
+            with open(source.db_file, 'r', encoding='utf-8') as f:
+                original = json.load(f)
+
+            # 既存JSONのあるディレクトリで初めて開くと自動移行される
+            migrated = self._storage("sqlite", "round_trip")
+            migrated_count = migrated.load_database().total_videos
+            exported_path = migrated.export_json(Path(self.temp_dir.name) / "exported.json")
+            migrated.close()
+            with open(exported_path, 'r', encoding='utf-8') as f:
+                exported = json.load(f)
+
+        success = exported == original and migrated_count == len(original["videos"])
+        print(f"{'✅' if success else '❌'} JSON → SQLite → JSON の内容一致 ({migrated_count}動画)")
+        return {"success": success}
+
+    def test_journal_migration(self):
+        """圧縮前のジャーナルを含めたJSON → SQLite移行テスト"""
+        print("\n📒 ジャーナル込み移行テスト")
+        print("-" * 40)
+
+        with redirect_stdout(io.StringIO()):
+            source = self._storage("json", "journal_migration")
+            self._populate(source, 20)
+            source.add_video(make_video(self.data_models, 20))
+            source.update_video_analysis("vid0000003", "failed", analysis_error="ジャーナルのみ")
+            source.save_database()
+            journaled = source.journal_file.stat().st_size > 0
+            with open(source.db_file, 'r', encoding='utf-8') as f:
+                snapshot_count = len(json.load(f)["videos"])
+
+            migrated = self._storage("sqlite", "journal_migration")
+            db = migrated.load_database()
+            migrated_count = db.total_videos
+            added = migrated.get_video("vid0000020") is not None
+            updated = migrated.get_video("vid0000003").analysis_error == "ジャーナルのみ"
+            migrated.close()
+
+        success = journaled and snapshot_count == 20 and migrated_count == 21 and added and updated
+        print(f"{'✅' if success else '❌'} スナップショット{snapshot_count}動画 + ジャーナル → SQLite {migrated_count}動画")
+        return {"success": success}
+
+    def test_sqlite_bot_readers(self):
+        """SQLiteでの保存・JSON書き出し・せつなBot側の保存を共有ローダーが反映するテスト"""
+        print("\n🤖 SQLite保存のBot側読み取りテスト")
+        print("-" * 40)
+
+        snapshot_module = load_snapshot_module()
+        provider = snapshot_module.KnowledgeDBSnapshotProvider()
+
+        def readers_match(storage):
+            shared = provider.get(storage.json_file)
+            loaded, _ = snapshot_module.load_knowledge_db(storage.json_file)
+            expected = storage.load_database().to_dict()
+            return (dict(shared.data["videos"]) == expected["videos"] == loaded["videos"] and
+                    loaded["playlists"] == expected["playlists"])
+
+        with redirect_stdout(io.StringIO()):
+            storage = self._storage("sqlite", "sqlite_bot_readers")
+            storage.load_database()
+            self._populate(storage, 20)
+
+            # SQLiteへの保存は変更分がジャーナルにも書かれる
+            storage.update_video_analysis("vid0000003", "failed", analysis_error="GUIでの分析エラー")
+            storage.remove_video_completely("vid0000010")
+            storage.save_database()
+            saved = readers_match(storage)
+
+            # 同じスナップショットへの書き出しは世代を進めてジャーナルを空にし、以降の保存も反映される
+            storage.export_json()
+            with open(storage.json_file, 'r', encoding='utf-8') as f:
+                exported_generation = json.load(f)["journal_generation"]
+            emptied = storage.journal_file.stat().st_size == 0
+            storage.update_video_analysis("vid0000004", "failed", analysis_error="書き出し後の変更")
+            exported = readers_match(storage) and emptied and exported_generation == 2
+
+            # せつなBot側の保存（ジャーナル追記）は再起動時にSQLiteへ取り込まれる
+            loaded, _ = snapshot_module.load_knowledge_db(storage.json_file)
+            base = snapshot_module.record_fingerprints(loaded)
+            loaded["videos"]["vid0000005"]["analysis_error"] = "Bot側で編集"
+            snapshot_module.save_knowledge_db(storage.json_file, loaded, base)
+            storage.close()
+            reopened = self._storage("sqlite", "sqlite_bot_readers")
+            bot_saved = (reopened.get_video("vid0000005").analysis_error == "Bot側で編集" and
+                         reopened.get_video("vid0000004").analysis_error == "書き出し後の変更")
+            reopened.save_database(compact=True)
+            bot_saved = bot_saved and readers_match(reopened) and reopened.journal_file.stat().st_size == 0
+            reopened.close()
+
+        print(f"{'✅' if saved else '❌'} SQLiteへの保存が共有スナップショット・ローダーに反映")
+        print(f"{'✅' if exported else '❌'} JSON書き出し（世代{exported_generation}）後の保存も反映")
+        print(f"{'✅' if bot_saved else '❌'} Bot側の保存を再起動時に取り込み、圧縮後も反映")
+        return {"success": saved and exported and bot_saved}
+
+    def test_lazy_hydration(self):
+        """動画の遅延復元テスト"""
+        print("\n💤 遅延復元テスト")
+        print("-" * 40)
+
+        with redirect_stdout(io.StringIO()):
+            storage = self._storage("sqlite", "lazy")
+            self._populate(storage, 500)
+            storage.close()
+
+            reopened = self._storage("sqlite", "lazy")
+            db = reopened.load_database()
+            opened = db.videos.hydrated_count
+            tag_count = len(db.tag_index)
+            reopened.get_video("vid0000042")
+            single = db.videos.hydrated_count
+            by_tag = reopened.search_videos_by_tag("tag3")
+            after_search = db.videos.hydrated_count
+            reopened.close()
+
+        success = (opened == 0 and tag_count == 10 and single == 1 and
+                   after_search == len(by_tag) + (0 if 42 % 7 == 3 else 1))
+        print(f"{'✅' if success else '❌'} 起動時 {opened}件 / 1件参照後 {single}件 / "
+              f"タグ検索({len(by_tag)}件)後 {after_search}件 を復元")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """JSON vs SQLite の起動＋単一参照時間"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        timings = {}
+        for backend in ("json", "sqlite"):
+            with redirect_stdout(io.StringIO()):
+                storage = self._storage(backend, f"bench_{backend}")
+                self._populate(storage, self.benchmark_count)
+                if backend == "sqlite":
+                    storage.close()
+
+                start_time = time.perf_counter()
+                reopened = self._storage(backend, f"bench_{backend}")
+                reopened.get_video(f"vid{self.benchmark_count // 2:07d}")
+                reopened.search_videos_by_tag("バラード")
+                timings[backend] = time.perf_counter() - start_time
+                if backend == "sqlite":
+                    reopened.close()
+
+        print(f"✅ {self.benchmark_count}動画: 起動＋動画1件参照＋タグ検索")
+        for backend, elapsed in timings.items():
+            print(f"✅ {backend:<8}: {elapsed * 1000:9.1f}ms")
+        return {"success": timings["sqlite"] < timings["json"], "timings": timings}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = StorageBackendTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ ストレージバックエンド互換テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストリーミング文分割テスト - 1チャンク複数文・短文結合・目標文字数での分割・性質テスト・スループット比較
+"""
+
+import sys
+import random
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from streaming_system import StreamTextProcessor
+
+
+class LegacyStreamTextProcessor:
+    """比較用: 従来の分割処理（チャンクごとにバッファ全体を区切り文字ごとに再走査し、1文ずつ出力）"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.sentence_delimiters = ["。", "！", "？", ".", "!", "?"]
+        self.pause_markers = ["、", ",", "...", "〜"]
+        self.min_sentence_length = 8
+        self.max_sentence_length = 80
+
+    def process_chunk(self, chunk_text):
+        self.buffer += chunk_text
+        sentences = []
+        for delimiter in self.sentence_delimiters:
+            if delimiter in self.buffer:
+                parts = self.buffer.split(delimiter, 1)
+                sentence = parts[0] + delimiter
+                if len(sentence.strip()) >= self.min_sentence_length:
+                    sentences.append(sentence.strip())
+                    self.buffer = parts[1] if len(parts) > 1 else ""
+                    break
+        if len(self.buffer) > self.max_sentence_length:
+            for marker in self.pause_markers:
+                if marker in self.buffer:
+                    parts = self.buffer.split(marker, 1)
+                    sentence = parts[0] + marker
+                    if len(sentence.strip()) >= self.min_sentence_length:
+                        sentences.append(sentence.strip())
+                        self.buffer = parts[1] if len(parts) > 1 else ""
+                        break
+        return sentences
+
+    def get_remaining_buffer(self):
+        remaining = self.buffer.strip()
+        self.buffer = ""
+        return remaining
+
+
+def random_text(rng: random.Random, sentence_count: int) -> str:
+    """句読点・閉じ括弧・数字・英単語・空白・区切りのない長文を含むランダムな応答テキスト"""
+    words = ["せつな", "音楽", "今日は", "とても", "楽しい", "曲", "ボカロ", "TRiNITY", "node.js", "ver.2",
+             "3.14", "1,000", "歌詞", "テンポ", "hello", "world"]
+    endings = ["。", "！", "？", "!", "?", ".", "。」", "！？", "...", "…", "」。", ""]
+    parts = []
+    for _ in range(sentence_count):
+        length = rng.choice([1, 2, 3, 5, 8, 20])
+        sentence = ""
+        for _ in range(length):
+            sentence += rng.choice(words)
+            if rng.random() < 0.2:
+                sentence += rng.choice(["、", ",", "〜", " "])
+        parts.append(sentence + rng.choice(endings) + (" " if rng.random() < 0.2 else ""))
+    return "".join(parts)
+
+
+def random_chunks(rng: random.Random, text: str, max_size: int):
+    """テキストをランダムな長さのチャンクに分割"""
+    chunks, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, max_size)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+def segment(chunks, processor=None):
+    """チャンク列を分割して (チャンク中に確定した文, 残りバッファ) を返す"""
+    processor = processor or StreamTextProcessor()
+    sentences = []
+    for chunk in chunks:
+        sentences.extend(processor.process_chunk(chunk))
+    return sentences, processor.get_remaining_buffer()
+
+
+def without_spaces(text: str) -> str:
+    return "".join(text.split())
+
+
+class StreamTextProcessorTester:
+    """ストリーミング文分割テスター"""
+
+    def __init__(self, property_cases: int = 300, benchmark_chars: int = 200000, backlog_chars: int = 40000):
+        """初期化"""
+        self.property_cases = property_cases
+        self.benchmark_chars = benchmark_chars
+        self.backlog_chars = backlog_chars
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("✂️ ストリーミング文分割テスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 1チャンクに含まれる文をすべて出力
+        test_results["multi_sentence_chunk"] = self.test_multi_sentence_chunk()
+
+        # テスト2: 短文結合・目標文字数での分割・強制分割
+        test_results["merge_and_split"] = self.test_merge_and_split()
+
+        # テスト3: 性質テスト（欠落なし・チャンク分割に依存しない・文字数の範囲）
+        test_results["properties"] = self.test_properties()
+
+        # テスト4: スループット比較
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_multi_sentence_chunk(self):
+        """1チャンク複数文テスト"""
+        print("\n📦 1チャンク複数文テスト")
+        print("-" * 40)
+
+        processor = StreamTextProcessor()
+        first = processor.process_chunk("今日はいい天気ですね。散歩に行きたくなります！一緒に行きませんか？")
+        second = processor.process_chunk("ぜひ")
+        remaining = processor.get_remaining_buffer()
+
+        # 区切り文字が末尾のときは次の文字が届いてから確定（閉じ括弧が続く場合に備える）
+        success = (first == ["今日はいい天気ですね。", "散歩に行きたくなります！"] and
+                   second == ["一緒に行きませんか？"] and remaining == "ぜひ")
+        print(f"{'✅' if len(first) == 2 else '❌'} 1チャンク目で2文を出力: {first}")
+        print(f"{'✅' if second == ['一緒に行きませんか？'] else '❌'} 末尾の文は次の文字で確定: {second}")
+        return {"success": success}
+
+    def test_merge_and_split(self):
+        """短文結合・分割テスト"""
+        print("\n🧩 短文結合・分割テスト")
+        print("-" * 40)
+
+        # 最小文字数未満の文は次の文と結合（従来は先頭に残り続けて後続の文も出力されなかった）
+        merged, _ = segment(list("はい。うん。そうだね、いい曲だと思うよ。次は"))
+        merge_ok = merged == ["はい。うん。そうだね、いい曲だと思うよ。"]
+
+        # 閉じ括弧・連続句読点・数字中の記号
+        quoted, quoted_remaining = segment(list("「すごい！」と彼女は言った。円周率は3.14で、1,000回聴いたよ！？ver.2もいいね。"))
+        quote_ok = (quoted == ["「すごい！」と彼女は言った。", "円周率は3.14で、1,000回聴いたよ！？"] and
+                    quoted_remaining == "ver.2もいいね。")
+
+        # 目標文字数を超えたら読点で分割（最初の文は短めの目標）
+        processor = StreamTextProcessor(target_length=30, first_target_length=12)
+        text = "最近よく聴いているのは、夜に合う落ち着いたバラードなんだけど、" \
+               "歌詞がとても丁寧に書かれていて、何度聴いても新しい発見があるんだ。"
+        split, split_remaining = segment(list(text), processor)
+        split_ok = (split == ["最近よく聴いているのは、", "夜に合う落ち着いたバラードなんだけど、歌詞がとても丁寧に書かれていて、"] and
+                    "".join(split) + split_remaining == text)
+
+        # 区切りのない長文は最大文字数で強制分割、読点があればそこで分割
+        long_sentences, remaining = segment(["あ" * 200])
+        hard_ok = [len(sentence) for sentence in long_sentences] == [80, 80] and remaining == "あ" * 40
+        paused, _ = segment(list("い" * 30 + "、" + "う" * 70 + "。次"))
+        pause_ok = paused == ["い" * 30 + "、", "う" * 70 + "。"]
+
+        success = merge_ok and quote_ok and split_ok and hard_ok and pause_ok
+        print(f"{'✅' if merge_ok else '❌'} 短文の結合: {merged}")
+        print(f"{'✅' if quote_ok else '❌'} 閉じ括弧・連続句読点・数字中の記号: {quoted}")
+        print(f"{'✅' if split_ok else '❌'} 目標文字数での分割: {[len(piece) for piece in split]}文字")
+        print(f"{'✅' if hard_ok and pause_ok else '❌'} 強制分割: {[len(piece) for piece in long_sentences]}文字, "
+              f"読点優先 {[len(piece) for piece in paused]}文字")
+        return {"success": success}
+
+    def test_properties(self):
+        """性質テスト"""
+        print("\n🎲 性質テスト")
+        print("-" * 40)
+
+        rng = random.Random(20240715)
+        lossless = chunk_independent = bounded = True
+        sentence_total = 0
+        for case in range(self.property_cases):
+            text = random_text(rng, rng.randint(1, 12))
+            reference, reference_remaining = segment([text])
+            sentence_total += len(reference)
+
+            # 欠落・重複なし（空白を除いて元のテキストに一致）
+            lossless = lossless and without_spaces("".join(reference) + reference_remaining) == without_spaces(text)
+
+            # チャンクの分け方に依存しない（1文字ずつ・ランダム長）
+            for chunks in (list(text), random_chunks(rng, text, 5), random_chunks(rng, text, 40)):
+                chunk_independent = chunk_independent and segment(chunks) == (reference, reference_remaining)
+
+            # 出力した文は最小〜最大文字数、残りバッファも最大文字数以下
+            bounded = bounded and all(8 <= len(sentence) <= 80 for sentence in reference) and \
+                len(reference_remaining) <= 80
+
+        success = lossless and chunk_independent and bounded
+        print(f"✅ {self.property_cases}テキスト, {sentence_total}文")
+        print(f"{'✅' if lossless else '❌'} 欠落・重複なし")
+        print(f"{'✅' if chunk_independent else '❌'} チャンク分割に依存しない（1文字ずつ・ランダム長）")
+        print(f"{'✅' if bounded else '❌'} 文字数が 8〜80 文字の範囲")
+        return {"success": success}
+
+    def _time_segment(self, chunks, processor_class):
+        """分割時間と (ストリーム中に出力した文数, 終了時の残りバッファ長)"""
+        start_time = time.perf_counter()
+        sentences, remaining = segment(chunks, processor_class())
+        return time.perf_counter() - start_time, len(sentences), len(remaining)
+
+    def test_benchmark(self):
+        """従来実装とのスループット比較（1〜3文字ずつのトークンで流す）"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        rng = random.Random(7)
+        text = ""
+        while len(text) < self.benchmark_chars:
+            text += random_text(rng, 50)
+        workloads = {
+            # 一般的な応答テキスト
+            "通常の応答": random_chunks(rng, text[:self.benchmark_chars], 3),
+            # 先頭の短い文が最小文字数未満で読点もない応答（従来はバッファが際限なく伸びる）
+            "短文で始まる応答": random_chunks(rng, "はい。" + "今日はとても良い天気ですね。" * (self.backlog_chars // 14), 3),
+        }
+
+        linear = True
+        backlog_faster = False
+        for name, chunks in workloads.items():
+            characters = sum(len(chunk) for chunk in chunks)
+            print(f"📝 {name}: {characters:,}文字, {len(chunks):,}チャンク")
+            for label, processor_class in (("従来", LegacyStreamTextProcessor), ("走査位置保持", StreamTextProcessor)):
+                elapsed, sentence_count, remaining_length = self._time_segment(chunks, processor_class)
+                quarter_elapsed = self._time_segment(chunks[:len(chunks) // 4], processor_class)[0]
+                scaling = elapsed / max(quarter_elapsed, 1e-9) / 4
+                print(f"  {label:<8}: {elapsed * 1000:8.1f}ms | {characters / elapsed / 1e6:6.2f}M文字/秒 | "
+                      f"ストリーム中に出力 {sentence_count:,}文 | 残りバッファ {remaining_length:,}文字 | "
+                      f"4倍の入力での1文字あたり時間比 {scaling:.2f}")
+                if processor_class is StreamTextProcessor:
+                    linear = linear and scaling < 2 and remaining_length <= 80
+                    if name == "短文で始まる応答":
+                        backlog_faster = elapsed < legacy_elapsed
+                else:
+                    legacy_elapsed = elapsed
+
+        success = linear and backlog_faster
+        print(f"{'✅' if linear else '❌'} 走査位置保持は入力長に線形・残りバッファは最大文字数以下")
+        return {"success": success}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = StreamTextProcessorTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ ストリーミング文分割テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
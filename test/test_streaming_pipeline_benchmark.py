@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ストリーミング応答パイプライン・ベンチマークのテスト - 擬似コンポーネント・遅延指標・キューの深さ・劣化検出
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from streaming_system import StreamTextProcessor
+from streaming_benchmark import (
+    StreamingPipelineBenchmark, ScriptedTokenStream, FakeVoiceSynthesizer, DEFAULT_SCRIPT, percentile
+)
+
+
+def expected_sentences(token_stream: ScriptedTokenStream, seed: int) -> int:
+    """同じトークン列を StreamTextProcessor に通したときの文数"""
+    processor = StreamTextProcessor()
+    count = sum(len(processor.process_chunk(token)) for token in token_stream.tokens(seed))
+    return count + (1 if processor.get_remaining_buffer() else 0)
+
+
+class StreamingPipelineBenchmarkTester:
+    """ストリーミング応答パイプライン・ベンチマークのテスター"""
+
+    def __init__(self, benchmark_runs: int = 3):
+        """初期化"""
+        self.benchmark_runs = benchmark_runs
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🌊 ストリーミング応答パイプライン・ベンチマークテスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 擬似トークンストリーム・擬似音声合成
+        test_results["fake_components"] = self.test_fake_components()
+
+        # テスト2: 遅延指標の整合性
+        test_results["latency_metrics"] = self.test_latency_metrics()
+
+        # テスト3: キューの深さの推移
+        test_results["queue_depth"] = self.test_queue_depth()
+
+        # テスト4: ベースラインからの劣化検出
+        test_results["regression_detection"] = self.test_regression_detection()
+
+        # テスト5: ベンチマーク
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_fake_components(self):
+        """擬似コンポーネントテスト"""
+        print("\n🧪 擬似コンポーネントテスト")
+        print("-" * 40)
+
+        stream = ScriptedTokenStream(max_chars_per_token=4)
+        tokens_ok = all("".join(stream.tokens(seed)) == DEFAULT_SCRIPT and
+                        all(1 <= len(token) <= 4 for token in stream.tokens(seed)) for seed in range(5))
+        reproducible = stream.tokens(3) == stream.tokens(3) and stream.tokens(3) != stream.tokens(4)
+
+        synthesizer = FakeVoiceSynthesizer(base_latency=0.01, distribution="lognormal", spread=0.5, seed=1)
+        first = [synthesizer.sample_latency("テスト") for _ in range(5)]
+        synthesizer.reset()
+        second = [synthesizer.sample_latency("テスト") for _ in range(5)]
+        latencies_ok = first == second and len(set(first)) > 1
+
+        wav_path = synthesizer.synthesize_voice("こんにちは")
+        played = synthesizer.play_voice(wav_path) and not synthesizer.play_voice("missing.wav")
+
+        try:
+            FakeVoiceSynthesizer(distribution="pareto")
+            rejected = False
+        except ValueError:
+            rejected = True
+
+        percentile_ok = (percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5 and percentile([5.0], 99) == 5.0 and
+                         percentile([], 90) == 0.0)
+
+        success = tokens_ok and reproducible and latencies_ok and played and rejected and percentile_ok
+        print(f"{'✅' if tokens_ok and reproducible else '❌'} トークン分割（結合で台本に一致・シードで再現）")
+        print(f"{'✅' if latencies_ok else '❌'} 合成遅延の分布（シードで再現）: {', '.join(f'{v * 1000:.1f}' for v in first)}ms")
+        print(f"{'✅' if played and rejected else '❌'} 無音再生・未対応分布の拒否")
+        print(f"{'✅' if percentile_ok else '❌'} パーセンタイル計算")
+        return {"success": success}
+
+    def test_latency_metrics(self):
+        """遅延指標の整合性テスト"""
+        print("\n⏱️ 遅延指標テスト")
+        print("-" * 40)
+
+        token_stream = ScriptedTokenStream(tokens_per_second=200, first_token_delay=0.05)
+        synthesis_latency = 0.03
+        benchmark = StreamingPipelineBenchmark(token_stream, FakeVoiceSynthesizer(base_latency=synthesis_latency))
+        report = benchmark.run(2)
+
+        checks = []
+        for run_index, run in enumerate(report.runs):
+            expected = expected_sentences(token_stream, token_stream.seed + run_index)
+            checks.append(
+                run.sentence_count == expected and
+                run.response_length == len(DEFAULT_SCRIPT) and
+                run.time_to_first_token >= 0.05 and
+                run.time_to_first_token <= run.time_to_first_sentence <= run.time_to_first_audio and
+                run.time_to_first_audio - run.time_to_first_sentence >= synthesis_latency and
+                len(run.audio_gaps) == run.sentence_count - 1 and
+                len(run.sentence_to_audio) == run.sentence_count and
+                all(latency >= synthesis_latency for latency in run.synthesis_latencies) and
+                run.total_time >= run.time_to_first_audio
+            )
+
+        summary = report.summary()
+        success = all(checks)
+        run = report.runs[0]
+        print(f"{'✅' if success else '❌'} 文数 {run.sentence_count}（StreamTextProcessor と一致）, "
+              f"セグメント間 {len(run.audio_gaps)}件")
+        print(f"✅ 最初のトークン {summary['time_to_first_token']['p50'] * 1000:.1f}ms → "
+              f"最初の文 {summary['time_to_first_sentence']['p50'] * 1000:.1f}ms → "
+              f"最初の音声 {summary['time_to_first_audio']['p50'] * 1000:.1f}ms")
+        return {"success": success}
+
+    def test_queue_depth(self):
+        """キューの深さの推移テスト"""
+        print("\n📈 キューの深さテスト")
+        print("-" * 40)
+
+        fast_tokens = ScriptedTokenStream(tokens_per_second=400)
+        slow = StreamingPipelineBenchmark(fast_tokens, FakeVoiceSynthesizer(base_latency=0.3)).run(1)
+        fast = StreamingPipelineBenchmark(fast_tokens, FakeVoiceSynthesizer(base_latency=0.001)).run(1)
+
+        slow_depth = slow.summary()["queue.synthesis_queue"]["max"]
+        fast_depth = fast.summary()["queue.synthesis_queue"]["max"]
+        timeline = slow.queue_timeline(buckets=8)
+        timeline_ok = len(timeline) == 8 and max(bucket[1] for bucket in timeline) == slow_depth
+
+        success = slow_depth >= 2 and fast_depth <= 1 and timeline_ok and slow.runs[0].max_active_syntheses >= 1
+        print(f"{'✅' if slow_depth >= 2 else '❌'} 合成が遅いと合成待ちが溜まる: 最大 {slow_depth}件")
+        print(f"{'✅' if fast_depth <= 1 else '❌'} 合成が速いと溜まらない: 最大 {fast_depth}件")
+        print(f"{'✅' if timeline_ok else '❌'} 推移: " +
+              " ".join(f"{elapsed * 1000:.0f}ms:{waiting}" for elapsed, waiting, _, _ in timeline))
+        return {"success": success}
+
+    def test_regression_detection(self):
+        """ベースラインからの劣化検出テスト"""
+        print("\n🚨 劣化検出テスト")
+        print("-" * 40)
+
+        token_stream = ScriptedTokenStream(tokens_per_second=200)
+        baseline = StreamingPipelineBenchmark(token_stream, FakeVoiceSynthesizer(base_latency=0.01)).run(2)
+        degraded = StreamingPipelineBenchmark(token_stream, FakeVoiceSynthesizer(base_latency=0.12)).run(2)
+
+        # JSON保存したベースラインとの比較
+        saved = json.loads(json.dumps(baseline.to_dict(), ensure_ascii=False))
+        regressions = degraded.find_regressions(saved["summary"])
+        flagged = {regression["metric"] for regression in regressions}
+        unchanged = baseline.find_regressions(baseline.summary())
+
+        success = ("time_to_first_audio" in flagged and "synthesis_latency" in flagged and
+                   "time_to_first_token" not in flagged and unchanged == [])
+        print(f"{'✅' if success else '❌'} 合成遅延10ms → 120ms で検出: {', '.join(sorted(flagged))}")
+        print(f"{'✅' if unchanged == [] else '❌'} 同じ結果では検出なし")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """既定に近い条件でのベンチマーク"""
+        print("\n📊 ベンチマーク")
+        print("-" * 40)
+
+        benchmark = StreamingPipelineBenchmark(
+            ScriptedTokenStream(tokens_per_second=60, jitter=0.3, first_token_delay=0.1),
+            FakeVoiceSynthesizer(base_latency=0.08, latency_per_char=0.001, distribution="lognormal",
+                                 spread=0.3, playback_per_char=0.004)
+        )
+        report = benchmark.run(self.benchmark_runs)
+        print(report.format_report())
+
+        summary = report.summary()
+        success = summary["time_to_first_audio"]["count"] == self.benchmark_runs
+        return {"success": success, "summary": summary}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = StreamingPipelineBenchmarkTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ ストリーミング応答パイプライン・ベンチマークテスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+統一ストレージジャーナルテスト - 変更分の追記保存・再起動時の再適用・クラッシュ復旧・圧縮
+"""
+
+import sys
+import io
+import importlib.util
+import json
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+YOUTUBE_SYSTEM_ROOT = Path(__file__).parent.parent / "youtube_knowledge_system"
+
+
+def load_storage_modules():
+    """YouTube知識システム側のモジュールを読み込み（独自のcore/configパッケージを持つため実行時に追加）"""
+    if str(YOUTUBE_SYSTEM_ROOT) not in sys.path:
+        sys.path.insert(0, str(YOUTUBE_SYSTEM_ROOT))
+    from core import data_models
+    from storage import unified_storage
+    return data_models, unified_storage
+
+
+def load_snapshot_module():
+    """せつなBot側の知識DBローダー（パッケージ名coreが衝突するためファイルから直接読み込み）"""
+    path = Path(__file__).parent.parent / "core" / "knowledge_db_snapshot.py"
+    spec = importlib.util.spec_from_file_location("knowledge_db_snapshot", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_video(data_models, index: int):
+    """テスト用の動画を生成"""
+    now = datetime(2024, 1, 1)
+    metadata = data_models.VideoMetadata(
+        id=f"vid{index:07d}", title=f"テスト楽曲 {index}", description="概要欄 " * 20, published_at=now,
+        channel_title="Channel", channel_id="channel", duration="PT3M", view_count=index,
+        like_count=0, comment_count=0, tags=["ボカロ", f"tag{index % 30}"], category_id="10", collected_at=now
+    )
+    return data_models.Video(
+        source=data_models.ContentSource.YOUTUBE, metadata=metadata, playlists=["PL"],
+        playlist_positions={"PL": index}, analysis_status=data_models.AnalysisStatus.PENDING,
+        creative_insight=None, analysis_error=None, created_at=now, updated_at=now
+    )
+
+
+def make_playlist(data_models, video_ids):
+    """テスト用のプレイリストを生成"""
+    now = datetime(2024, 1, 1)
+    metadata = data_models.PlaylistMetadata(
+        id="PL", title="テストプレイリスト", description="", channel_title="Channel", channel_id="channel",
+        item_count=len(video_ids), published_at=now, collected_at=now
+    )
+    return data_models.Playlist(
+        source=data_models.ContentSource.YOUTUBE, metadata=metadata, video_ids=list(video_ids),
+        last_full_sync=now, last_incremental_sync=None, sync_settings={}, total_videos=len(video_ids),
+        analyzed_videos=0, analysis_success_rate=0.0, created_at=now, updated_at=now
+    )
+
+
+def database_state(db):
+    """比較用の内容（更新時刻を除く）"""
+    data = db.to_dict()
+    data.pop("last_updated")
+    return json.dumps(data, ensure_ascii=False, sort_keys=True)
+
+
+class UnifiedStorageJournalTester:
+    """統一ストレージジャーナルテスター"""
+
+    def __init__(self, benchmark_count: int = 5000):
+        """初期化"""
+        self.benchmark_count = benchmark_count
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("📒 統一ストレージジャーナルテスト")
+        print("=" * 60)
+
+        self.data_models, self.unified_storage = load_storage_modules()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        test_results = {}
+        try:
+            # テスト1: 単一編集の追記保存と再起動後の復元
+            test_results["journal_replay"] = self.test_journal_replay()
+
+            # テスト2: 書き込み途中・圧縮途中のクラッシュからの復旧
+            test_results["crash_recovery"] = self.test_crash_recovery()
+
+            # テスト3: 閾値による自動圧縮
+            test_results["compaction"] = self.test_compaction()
+
+            # テスト4: せつなBot側の読み取りがジャーナルを反映すること
+            test_results["bot_readers"] = self.test_bot_readers()
+
+            # テスト5: せつなBot側の保存とUnifiedStorageの追記が交互に行われても失われないこと
+            test_results["bot_writer_interleave"] = self.test_bot_writer_interleave()
+
+            # テスト6: 単一編集の保存時間ベンチマーク
+            test_results["benchmark"] = self.test_benchmark()
+        finally:
+            self.temp_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _create_storage(self, name: str, count: int, **options):
+        data_dir = Path(self.temp_dir.name) / name
+        with redirect_stdout(io.StringIO()):
+            storage = self.unified_storage.UnifiedStorage(data_dir, **options)
+            storage.load_database()
+            if count:
+                videos = [make_video(self.data_models, i) for i in range(count)]
+                storage.add_videos(videos)
+                storage.add_playlist(make_playlist(self.data_models, [v.metadata.id for v in videos]))
+                storage.save_database()
+        return storage
+
+    def _reopen(self, storage):
+        with redirect_stdout(io.StringIO()):
+            reopened = self.unified_storage.UnifiedStorage(storage.data_dir)
+            reopened.load_database()
+        return reopened
+
+    def _journal_lines(self, storage):
+        if not storage.journal_file.exists():
+            return 0
+        with open(storage.journal_file, 'r', encoding='utf-8') as f:
+            return sum(1 for _ in f)
+
+    def test_journal_replay(self):
+        """単一編集の追記保存・再起動後の復元テスト"""
+        print("\n📝 ジャーナル追記・再適用テスト")
+        print("-" * 40)
+
+        storage = self._create_storage("replay", 200)
+        snapshot_stat = storage.db_file.stat()
+
+        with redirect_stdout(io.StringIO()):
+            storage.update_video_analysis("vid0000003", "completed", creative_insight="分析結果")
+            storage.remove_video_completely("vid0000010")
+            storage.add_video(make_video(self.data_models, 500))
+            storage.save_database()
+
+        untouched = storage.db_file.stat().st_mtime_ns == snapshot_stat.st_mtime_ns
+        lines = self._journal_lines(storage)
+        reopened = self._reopen(storage)
+        restored = database_state(reopened.load_database()) == database_state(storage.load_database())
+        indexed = len(reopened.load_database().get_videos_by_tag("ボカロ")) == 200
+
+        success = untouched and lines == 4 and restored and indexed
+        print(f"{'✅' if untouched else '❌'} スナップショット無変更・ジャーナル{lines}行")
+        print(f"{'✅' if restored and indexed else '❌'} 再起動後の内容・索引一致")
+        return {"success": success}
+
+    def test_crash_recovery(self):
+        """クラッシュ復旧テスト"""
+        print("\n💥 クラッシュ復旧テスト")
+        print("-" * 40)
+
+        # 追記途中で中断: 完全な行だけ適用し、途切れた末尾は破棄
+        storage = self._create_storage("torn", 20)
+        with redirect_stdout(io.StringIO()):
+            storage.update_video_analysis("vid0000001", "failed", analysis_error="エラー")
+        with open(storage.journal_file, 'a', encoding='utf-8') as f:
+            f.write('{"generation": 1, "op": "put_video", "id": "vid00')
+        reopened = self._reopen(storage)
+        video = reopened.get_video("vid0000001")
+        torn_ok = (video.analysis_error == "エラー" and self._journal_lines(reopened) == 1 and
+                   storage.journal_file.read_bytes().endswith(b"\n"))
+
+        # スナップショット置き換え直後（ジャーナル消去前）に中断: 旧世代の行は再適用しない
+        storage = self._create_storage("compaction", 20)
+        with redirect_stdout(io.StringIO()):
+            storage.update_video_analysis("vid0000002", "failed", analysis_error="古いエラー")
+            stale_journal = storage.journal_file.read_bytes()
+            storage.get_video("vid0000002").analysis_error = "新しいエラー"
+            storage.mark_video_changed("vid0000002")
+            storage.save_database(compact=True)
+        storage.journal_file.write_bytes(stale_journal)
+        reopened = self._reopen(storage)
+        stale_ok = reopened.get_video("vid0000002").analysis_error == "新しいエラー"
+
+        print(f"{'✅' if torn_ok else '❌'} 途切れた末尾の破棄")
+        print(f"{'✅' if stale_ok else '❌'} 圧縮済み世代の読み飛ばし")
+        return {"success": torn_ok and stale_ok}
+
+    def test_compaction(self):
+        """閾値による自動圧縮テスト"""
+        print("\n🗜️ 自動圧縮テスト")
+        print("-" * 40)
+
+        storage = self._create_storage("compact", 30, journal_compact_entries=25,
+                                      journal_compact_ratio=100.0)
+        backups_before = len(list(storage.backup_dir.glob("*.json")))
+        with redirect_stdout(io.StringIO()):
+            for i in range(30):
+                storage.update_video_analysis(f"vid{i:07d}", "failed", analysis_error=f"エラー{i}")
+        backups = len(list(storage.backup_dir.glob("*.json"))) - backups_before
+
+        with open(storage.db_file, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        reopened = self._reopen(storage)
+        success = (snapshot["journal_generation"] == 2 and self._journal_lines(storage) == 5 and
+                   backups == 1 and reopened.get_video("vid0000029").analysis_error == "エラー29")
+        print(f"{'✅' if success else '❌'} 30回保存で圧縮1回 (世代{snapshot['journal_generation']}, "
+              f"残りジャーナル{self._journal_lines(storage)}行, バックアップ{backups}件)")
+        return {"success": success}
+
+    def test_bot_readers(self):
+        """せつなBot側の共有ローダーによるジャーナル再適用テスト"""
+        print("\n🤖 Bot側読み取りテスト")
+        print("-" * 40)
+
+        snapshot_module = load_snapshot_module()
+        provider = snapshot_module.KnowledgeDBSnapshotProvider()
+        storage = self._create_storage("bot_readers", 20)
+        first = provider.get(storage.json_file)
+
+        # GUIでの分析結果・削除・追加はジャーナルにのみ書かれる
+        with redirect_stdout(io.StringIO()):
+            storage.update_video_analysis("vid0000003", "failed", analysis_error="GUIでの分析エラー")
+            storage.remove_video_completely("vid0000010")
+            storage.add_video(make_video(self.data_models, 500))
+            storage.save_database()
+
+        expected = storage.load_database().to_dict()
+        shared = provider.get(storage.json_file)
+        loaded, fingerprint = snapshot_module.load_knowledge_db(storage.json_file)
+        visible = (shared.version == first.version + 1 and fingerprint == shared.fingerprint and
+                   dict(shared.data["videos"]) == expected["videos"] == loaded["videos"] and
+                   loaded["playlists"] == expected["playlists"])
+
+        print(f"{'✅' if visible else '❌'} 圧縮前のジャーナルが共有スナップショット・ローダーに反映")
+        return {"success": visible}
+
+    def test_bot_writer_interleave(self):
+        """せつなBot側の保存後に、稼働中のUnifiedStorageが追記した変更も失われないテスト"""
+        print("\n🔀 Bot側保存・ストレージ追記の交互実行テスト")
+        print("-" * 40)
+
+        snapshot_module = load_snapshot_module()
+        provider = snapshot_module.KnowledgeDBSnapshotProvider()
+        storage = self._create_storage("bot_writer", 20)
+        with redirect_stdout(io.StringIO()):
+            storage.update_video_analysis("vid0000003", "failed", analysis_error="GUIでの分析エラー")
+
+        # Bot側: ジャーナル適用済みの複製を編集して保存（変更分だけがジャーナルへ追記される）
+        loaded, _ = snapshot_module.load_knowledge_db(storage.json_file)
+        base = snapshot_module.record_fingerprints(loaded)
+        loaded["videos"]["vid0000003"]["analysis_error"] = "Bot側で編集"
+        loaded["videos"]["vid0000004"]["analysis_error"] = "Bot側で編集"
+        snapshot_module.save_knowledge_db(storage.json_file, loaded, base)
+
+        # 稼働中のUnifiedStorage: Bot側の保存を知らないまま追記
+        with redirect_stdout(io.StringIO()):
+            storage.update_video_analysis("vid0000005", "failed", analysis_error="GUIでの分析エラー")
+            storage.add_video(make_video(self.data_models, 500))
+            storage.save_database()
+
+        def expected_state(videos):
+            return (videos["vid0000003"]["analysis_error"] == "Bot側で編集" and
+                    videos["vid0000004"]["analysis_error"] == "Bot側で編集" and
+                    videos["vid0000005"]["analysis_error"] == "GUIでの分析エラー" and
+                    "vid0000500" in videos)
+
+        with open(storage.json_file, 'r', encoding='utf-8') as f:
+            generation = json.load(f)["journal_generation"]
+        shared = provider.get(storage.json_file)
+        reloaded, _ = snapshot_module.load_knowledge_db(storage.json_file)
+        readers_ok = (expected_state(shared.data["videos"]) and
+                      expected_state(reloaded["videos"]) and shared.data["journal_generation"] == generation)
+
+        # 圧縮（Bot側の行を取り込んでから世代を進める）・再起動後も全ての変更が残る
+        with redirect_stdout(io.StringIO()):
+            storage.save_database(compact=True)
+        reopened = self._reopen(storage)
+        compacted = {video_id: video.to_dict() for video_id, video in reopened.get_all_videos().items()}
+        after_compact, _ = snapshot_module.load_knowledge_db(storage.json_file)
+        compact_ok = (expected_state(compacted) and expected_state(after_compact["videos"]) and
+                      self._journal_lines(storage) == 0)
+
+        print(f"{'✅' if readers_ok else '❌'} Bot側保存後の追記も読み取り側に反映（世代{generation}のまま）")
+        print(f"{'✅' if compact_ok else '❌'} 圧縮・再起動後もBot側・ストレージ双方の変更が残る")
+        return {"success": readers_ok and compact_ok}
+
+    def test_benchmark(self):
+        """全体書き直し（従来）vs ジャーナル追記の保存時間"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        storage = self._create_storage("bench", self.benchmark_count)
+        size_mb = storage.db_file.stat().st_size / 1024 / 1024
+        timings = {}
+        with redirect_stdout(io.StringIO()):
+            for label, compact in (("full_rewrite", True), ("journal", False)):
+                start_time = time.perf_counter()
+                for i in range(5):
+                    storage.update_video_analysis(f"vid{i:07d}", "failed", analysis_error=label)
+                    storage.save_database(compact=compact)
+                timings[label] = (time.perf_counter() - start_time) / 5
+        shutil.rmtree(storage.backup_dir, ignore_errors=True)
+
+        print(f"✅ {self.benchmark_count}動画 ({size_mb:.1f}MB) の単一編集保存")
+        for label, elapsed in timings.items():
+            print(f"✅ {label:<12}: {elapsed * 1000:9.1f}ms/回")
+        return {"success": timings["journal"] < timings["full_rewrite"], "timings": timings}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = UnifiedStorageJournalTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 統一ストレージジャーナルテスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+動画間類似度ベクトル計算テスト - 全ペア比較とのエッジ一致・閾値/ブロック境界・処理時間比較
+"""
+
+import sys
+import io
+import random
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+import core.knowledge_graph_system as knowledge_graph_module
+from core.knowledge_graph_system import KnowledgeGraphSystem
+from core.video_similarity_engine import VideoSimilarityEngine
+
+
+def build_knowledge_db(video_count: int, seed: int = 7):
+    """合成知識DB（空のアーティスト・重複ジャンル・空ジャンル項目などの境界ケースを含む）"""
+    rng = random.Random(seed)
+    artists = [f"アーティスト{i}" for i in range(max(5, video_count // 20))] + [""]
+    genres = [f"ジャンル{i}" for i in range(25)]
+    themes = [f"テーマ{i}" for i in range(40)]
+    moods = ["", "", "明るい", "切ない", "激しい", "穏やか", "幻想的"]
+
+    videos = {}
+    for i in range(video_count):
+        genre_list = rng.sample(genres, rng.randint(0, 3))
+        if genre_list and rng.random() < 0.1:
+            genre_list.append(genre_list[0] + ",")  # split後に空文字が混ざるケース
+        videos[f"v{i:05d}"] = {
+            "metadata": {"title": f"動画{i}", "channel_title": rng.choice(artists),
+                         "view_count": rng.randint(0, 200000), "like_count": rng.randint(0, 2000)},
+            "custom_info": {"manual_genre": ",".join(genre_list), "manual_mood": rng.choice(moods)},
+            "creative_insight": {"themes": rng.sample(themes, rng.randint(0, 4)) + ([themes[0]] if rng.random() < 0.05 else [])}
+        }
+    return {"videos": videos}
+
+
+def edge_signature(system):
+    """エッジ比較用の内容（作成時刻を除く、挿入順を保持）"""
+    return [(edge.edge_id, edge.source_id, edge.target_id, edge.relationship_type, edge.strength, edge.evidence)
+            for edge in system.knowledge_edges.values()]
+
+
+class VideoSimilarityEngineTester:
+    """動画間類似度ベクトル計算テスター"""
+
+    def __init__(self, benchmark_count: int = 1500):
+        """初期化"""
+        self.benchmark_count = benchmark_count
+        with redirect_stdout(io.StringIO()):
+            self.graph_system = KnowledgeGraphSystem()
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🧮 動画間類似度ベクトル計算テスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 全ペア比較とのエッジ一致
+        test_results["edge_parity"] = self.test_edge_parity()
+
+        # テスト2: 閾値・ブロック境界での一致
+        test_results["threshold_parity"] = self.test_threshold_parity()
+
+        # テスト3: 処理時間比較
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _load_videos(self, video_count: int, seed: int = 7):
+        """合成データで動画ノードを作成"""
+        system = self.graph_system
+        system.knowledge_db = build_knowledge_db(video_count, seed)
+        system.graph.clear()
+        system.knowledge_nodes.clear()
+        system.knowledge_edges.clear()
+        system._create_video_nodes()
+        return [n for n in system.knowledge_nodes.values() if n.node_type == "video"]
+
+    def _build_edges(self, use_engine: bool):
+        """動画間エッジを構築してエッジ内容を返す"""
+        system = self.graph_system
+        system.graph.remove_edges_from(list(system.graph.edges))
+        system.knowledge_edges.clear()
+        original = knowledge_graph_module.SCIPY_AVAILABLE
+        knowledge_graph_module.SCIPY_AVAILABLE = use_engine
+        try:
+            start_time = time.perf_counter()
+            system._build_video_relationships()
+            elapsed = time.perf_counter() - start_time
+        finally:
+            knowledge_graph_module.SCIPY_AVAILABLE = original
+        return edge_signature(system), system.graph.number_of_edges(), elapsed
+
+    def test_edge_parity(self):
+        """全ペア比較とのエッジ一致テスト"""
+        print("\n🔗 エッジ一致テスト")
+        print("-" * 40)
+
+        self._load_videos(600)
+        reference, reference_graph_edges, _ = self._build_edges(use_engine=False)
+        vectorized, vectorized_graph_edges, _ = self._build_edges(use_engine=True)
+
+        same = reference == vectorized and reference_graph_edges == vectorized_graph_edges
+        types = {edge[3] for edge in reference}
+        success = same and len(reference) > 0 and len(types) >= 3
+        print(f"{'✅' if same else '❌'} エッジ一致（ID・順序・種別・強度・根拠）: {len(vectorized)}/{len(reference)}件")
+        print(f"✅ 関係タイプ: {', '.join(sorted(types))}")
+        return {"success": success}
+
+    def test_threshold_parity(self):
+        """閾値・ブロック境界での一致テスト"""
+        print("\n🎚️ 閾値・ブロック境界テスト")
+        print("-" * 40)
+
+        video_nodes = self._load_videos(300, seed=11)
+        attributes = [video.attributes for video in video_nodes]
+        all_match = True
+        for threshold in (0.0, 0.1, 0.25, 0.3, 0.45, 0.8):
+            reference = self.graph_system._find_similar_video_pairs(video_nodes, threshold)
+            matches = []
+            for block_size in (1, 7, 256, 1000):
+                engine = VideoSimilarityEngine(self.graph_system.relationship_weights, threshold, block_size)
+                matches.append(engine.find_similar_pairs(attributes) == reference)
+            all_match = all_match and all(matches)
+            print(f"{'✅' if all(matches) else '❌'} 閾値 {threshold:.2f}: {len(reference)}ペア "
+                  f"(候補 {engine.candidate_pairs}ペア)")
+
+        empty = VideoSimilarityEngine(self.graph_system.relationship_weights).find_similar_pairs(attributes[:1])
+        success = all_match and empty == []
+        return {"success": success}
+
+    def test_benchmark(self):
+        """全ペア比較 vs ベクトル計算の処理時間比較"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        video_nodes = self._load_videos(self.benchmark_count, seed=3)
+
+        # 類似ペア抽出のみ
+        start_time = time.perf_counter()
+        self.graph_system._find_similar_video_pairs(video_nodes, 0.3)
+        pairwise_time = time.perf_counter() - start_time
+        engine = VideoSimilarityEngine(self.graph_system.relationship_weights)
+        start_time = time.perf_counter()
+        engine.find_similar_pairs([video.attributes for video in video_nodes])
+        vectorized_time = time.perf_counter() - start_time
+
+        # エッジ作成を含む _build_video_relationships 全体
+        reference, _, pairwise_build_time = self._build_edges(use_engine=False)
+        vectorized, _, vectorized_build_time = self._build_edges(use_engine=True)
+
+        pair_count = self.benchmark_count * (self.benchmark_count - 1) // 2
+        print(f"✅ {self.benchmark_count}動画 ({pair_count:,}ペア, 候補 {engine.candidate_pairs:,}ペア) "
+              f"→ {len(vectorized):,}エッジ")
+        print(f"✅ 類似ペア抽出: 全ペア比較 {pairwise_time * 1000:8.1f}ms | ベクトル計算 "
+              f"{vectorized_time * 1000:8.1f}ms ({pairwise_time / vectorized_time:.1f}倍)")
+        print(f"✅ エッジ構築全体: 全ペア比較 {pairwise_build_time * 1000:8.1f}ms | ベクトル計算 "
+              f"{vectorized_build_time * 1000:8.1f}ms ({pairwise_build_time / vectorized_build_time:.1f}倍)")
+
+        success = reference == vectorized and vectorized_time < pairwise_time
+        return {"success": success, "pairwise": pairwise_time, "vectorized": vectorized_time}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = VideoSimilarityEngineTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ 動画間類似度ベクトル計算テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
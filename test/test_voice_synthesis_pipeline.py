@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+VOICEVOXパイプライン合成テスト - ローカルスタブサーバーでの接続再利用・先行query確認
+"""
+
+import sys
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from voice_synthesizer import VoiceVoxSynthesizer
+from voice_cache import VoiceCache
+
+
+class StubVoiceVoxHandler(BaseHTTPRequestHandler):
+    """VOICEVOX APIスタブ（文字数に比例した処理時間を模擬）"""
+
+    protocol_version = "HTTP/1.1"  # Keep-Alive対応
+    disable_nagle_algorithm = True  # ヘッダーと本文の分割送信による遅延ACK待ちを防ぐ
+    query_latency_per_char = 0.002
+    synthesis_latency_per_char = 0.004
+    connections = set()
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _record_connection(self):
+        with self.lock:
+            StubVoiceVoxHandler.connections.add(self.client_address)
+
+    def do_GET(self):
+        self._record_connection()
+        self._send(json.dumps("0.0.0-stub").encode("utf-8"), "application/json")
+
+    def do_POST(self):
+        self._record_connection()
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        parsed = urlparse(self.path)
+
+        if parsed.path == "/audio_query":
+            text = parse_qs(parsed.query).get("text", [""])[0]
+            time.sleep(len(text) * self.query_latency_per_char)
+            self._send(json.dumps({"text": text}, ensure_ascii=False).encode("utf-8"), "application/json")
+        else:
+            text = json.loads(body.decode("utf-8")).get("text", "")
+            time.sleep(len(text) * self.synthesis_latency_per_char)
+            self._send(b"RIFF" + text.encode("utf-8"), "audio/wav")
+
+
+class VoiceSynthesisPipelineTester:
+    """VOICEVOXパイプライン合成テスター"""
+
+    def __init__(self):
+        """初期化"""
+        self.reply_sentences = [
+            "こんにちは、せつなです。",
+            "今日はどんな曲を聴きたい気分かな？",
+            "最近のおすすめはTRiNITYの新曲だよ。",
+            "明るいテンポで、聴いていると元気が出てくるんだ。",
+            "気になったら一緒に聴いてみようね。"
+        ]
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🎵 VOICEVOXパイプライン合成テスト")
+        print("=" * 60)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubVoiceVoxHandler)
+        self.server_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+
+        self.work_dir = tempfile.TemporaryDirectory()
+        original_dir = os.getcwd()
+        os.chdir(self.work_dir.name)
+
+        test_results = {}
+        try:
+            # テスト1: 接続プールによる接続再利用
+            test_results["connection_pooling"] = self.test_connection_pooling()
+
+            # テスト2: バッチ合成の結果・順序
+            test_results["batch_order"] = self.test_batch_order()
+
+            # テスト3: 最初の音声までの時間
+            test_results["time_to_first_audio"] = self.test_time_to_first_audio()
+
+            # テスト4: 圧縮保存・容量上限付きキャッシュ
+            test_results["voice_cache"] = self.test_voice_cache()
+
+            # テスト5: 保守処理からの統計取得・期限切れ削除が再生中のWAVを消さない
+            test_results["secondary_voice_cache"] = self.test_secondary_voice_cache()
+        finally:
+            os.chdir(original_dir)
+            self.server.shutdown()
+            self.work_dir.cleanup()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def _create_synthesizer(self, use_session: bool, cache_name: str) -> VoiceVoxSynthesizer:
+        with redirect_stdout(io.StringIO()):
+            synthesizer = VoiceVoxSynthesizer(
+                use_session=use_session,
+                cache_dir=os.path.join(self.work_dir.name, cache_name)
+            )
+        synthesizer.voicevox_url = self.server_url
+        return synthesizer
+
+    def test_connection_pooling(self):
+        """接続プールによる接続再利用テスト"""
+        print("\n🔌 接続再利用テスト")
+        print("-" * 40)
+
+        results = {}
+        for use_session in (False, True):
+            synthesizer = self._create_synthesizer(use_session, f"pool_{use_session}")
+            StubVoiceVoxHandler.connections.clear()
+            with redirect_stdout(io.StringIO()):
+                for sentence in self.reply_sentences:
+                    synthesizer.synthesize_voice(sentence)
+            results[use_session] = len(StubVoiceVoxHandler.connections)
+            synthesizer.close()
+            print(f"✅ Session{'有効' if use_session else '無効'}: "
+                  f"{len(self.reply_sentences) * 2}リクエストで{results[use_session]}接続")
+
+        success = results[True] < results[False]
+        return {"success": success, "connections": results}
+
+    def test_batch_order(self):
+        """バッチ合成の結果・順序テスト"""
+        print("\n📋 バッチ合成順序テスト")
+        print("-" * 40)
+
+        synthesizer = self._create_synthesizer(True, "batch")
+        ready_order = []
+        with redirect_stdout(io.StringIO()):
+            paths = synthesizer.synthesize_batch(
+                self.reply_sentences + [""],
+                on_ready=lambda index, path: ready_order.append(index)
+            )
+            expected = [synthesizer.synthesize_voice(s) for s in self.reply_sentences]
+
+        success = (paths[:-1] == expected and paths[-1] is None and
+                   ready_order == list(range(len(self.reply_sentences) + 1)))
+        print(f"{'✅' if success else '❌'} 文順に完成: {ready_order}")
+        synthesizer.close()
+        return {"success": success}
+
+    def test_time_to_first_audio(self):
+        """最初の音声までの時間テスト（一括合成 / 逐次 / パイプライン）"""
+        print("\n⏱️ 最初の音声までの時間")
+        print("-" * 40)
+
+        timings = {}
+
+        # 応答全体を1回で合成（従来のGUI経路）
+        synthesizer = self._create_synthesizer(False, "whole")
+        start_time = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            synthesizer.synthesize_voice("".join(self.reply_sentences))
+        elapsed = time.perf_counter() - start_time
+        timings["whole_reply"] = {"first_audio": elapsed, "total": elapsed}
+
+        # 文ごとに逐次合成（接続プールなし）
+        synthesizer = self._create_synthesizer(False, "sequential")
+        start_time = time.perf_counter()
+        first_audio = None
+        with redirect_stdout(io.StringIO()):
+            for sentence in self.reply_sentences:
+                synthesizer.synthesize_voice(sentence)
+                if first_audio is None:
+                    first_audio = time.perf_counter() - start_time
+        timings["sequential"] = {"first_audio": first_audio, "total": time.perf_counter() - start_time}
+
+        # パイプライン合成（接続プール＋先行audio_query）
+        synthesizer = self._create_synthesizer(True, "pipelined")
+        start_time = time.perf_counter()
+        first_audio = None
+        with redirect_stdout(io.StringIO()):
+            for _ in synthesizer.iter_synthesize(self.reply_sentences):
+                if first_audio is None:
+                    first_audio = time.perf_counter() - start_time
+        timings["pipelined"] = {"first_audio": first_audio, "total": time.perf_counter() - start_time}
+        metrics = synthesizer.get_metrics()
+        synthesizer.close()
+
+        for name, timing in timings.items():
+            print(f"✅ {name:<12}: 最初の音声 {timing['first_audio'] * 1000:7.1f}ms / "
+                  f"全体 {timing['total'] * 1000:7.1f}ms")
+        print(f"   段階別メトリクス: {sorted(metrics['stages'])}")
+
+        success = (timings["pipelined"]["first_audio"] < timings["whole_reply"]["first_audio"] and
+                   timings["pipelined"]["total"] < timings["sequential"]["total"] and
+                   "time_to_first_audio" in metrics["stages"])
+        return {"success": success, "timings": timings}
+
+    def test_voice_cache(self):
+        """圧縮保存・LRU容量上限テスト"""
+        print("\n📦 音声キャッシュテスト")
+        print("-" * 40)
+
+        with redirect_stdout(io.StringIO()):
+            synthesizer = VoiceVoxSynthesizer(
+                cache_dir=os.path.join(self.work_dir.name, "compressed"),
+                cache_max_bytes=150,
+                compress_cache=True
+            )
+        synthesizer.voicevox_url = self.server_url
+
+        with redirect_stdout(io.StringIO()):
+            first_path = synthesizer.synthesize_voice(self.reply_sentences[0])
+            with open(first_path, "rb") as f:
+                original = f.read()
+            for sentence in self.reply_sentences[1:]:
+                synthesizer.synthesize_voice(sentence)
+            # 容量上限を超えた分は最終アクセスの古い順に削除されること
+            synthesizer.synthesize_voice(self.reply_sentences[0])
+            for sentence in self.reply_sentences:
+                synthesizer.synthesize_voice(sentence)
+
+        stats = synthesizer.voice_cache.stats()
+        synthesizer.close()
+
+        # 再オープン後も展開結果が元のWAVと一致すること
+        cache = VoiceCache(os.path.join(self.work_dir.name, "compressed"), max_bytes=150, compress=True)
+        key = VoiceCache.make_key(self.reply_sentences[-1], synthesizer.speaker_id)
+        with open(f"{cache.get(key)}", "rb") as f:
+            decoded = f.read()
+        cache.close()
+
+        within_budget = stats["stored_bytes"] <= 150 and stats["entry_count"] < len(self.reply_sentences)
+        lossless = original.startswith(b"RIFF") and decoded == b"RIFF" + self.reply_sentences[-1].encode("utf-8")
+        print(f"{'✅' if within_budget else '❌'} 容量上限内: {stats['stored_bytes']} / 150 bytes "
+              f"({stats['entry_count']}件, ヒット{stats['total_hits']}回)")
+        print(f"{'✅' if lossless else '❌'} 可逆展開")
+        return {"success": within_budget and lossless, "stats": stats}
+
+    def test_secondary_voice_cache(self):
+        """副インスタンス（保守処理）の副作用なしテスト"""
+        print("\n🧹 副インスタンステスト")
+        print("-" * 40)
+
+        cache_dir = os.path.join(self.work_dir.name, "shared")
+        with redirect_stdout(io.StringIO()):
+            synthesizer = VoiceVoxSynthesizer(cache_dir=cache_dir, cache_max_bytes=10 ** 6, compress_cache=True)
+            synthesizer.voicevox_url = self.server_url
+            playing_paths = [synthesizer.synthesize_voice(sentence) for sentence in self.reply_sentences]
+
+        live_stats = synthesizer.voice_cache.stats()
+        read_only_stats = VoiceCache.read_stats(cache_dir)
+
+        secondary = VoiceCache(cache_dir, primary=False)
+        cleaned = secondary.cleanup(max_age_days=3)
+        secondary.close()
+
+        playing_kept = all(os.path.exists(path) for path in playing_paths)
+        after_stats = synthesizer.voice_cache.stats()
+        synthesizer.close()
+
+        stats_match = (read_only_stats["entry_count"] == live_stats["entry_count"] and
+                       read_only_stats["stored_bytes"] == live_stats["stored_bytes"])
+        untouched = cleaned == (0, 0) and after_stats["entry_count"] == live_stats["entry_count"]
+        print(f"{'✅' if stats_match else '❌'} 読み取り専用統計: {read_only_stats['entry_count']}件")
+        print(f"{'✅' if playing_kept and untouched else '❌'} 展開済みWAV・有効エントリを保持")
+        return {"success": stats_match and playing_kept and untouched}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = VoiceSynthesisPipelineTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ VOICEVOXパイプライン合成テスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
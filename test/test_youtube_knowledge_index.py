@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YouTube知識DB横断インデックステスト - 差分更新と全再構築の一致・重複排除・一括取り込みベンチマーク
+"""
+
+import sys
+import json
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from youtube_knowledge_system.core.data_models import (
+    AnalysisStatus, ContentSource, CreativeInsight, CreatorInfo, Video, VideoMetadata,
+    create_empty_database
+)
+
+
+CREATORS = [f"クリエイター{i}" for i in range(300)]
+TAGS = [f"タグ{i}" for i in range(500)] + ["ボカロ", "歌ってみた", "MV"]
+THEMES = ["青春", "夏", "恋愛", "別れ", "希望", "夜", "旅", "友情"]
+
+
+def make_video(index: int, rng: random.Random, analyzed: bool = True) -> Video:
+    """テスト用の動画を生成"""
+    now = datetime(2024, 1, 1)
+    metadata = VideoMetadata(
+        id=f"vid{index:07d}", title=f"テスト楽曲 {index}", description="", published_at=now,
+        channel_title="Channel", channel_id="channel", duration="PT3M", view_count=0,
+        like_count=0, comment_count=0, tags=rng.sample(TAGS, 5), category_id="10", collected_at=now
+    )
+    insight = None
+    if analyzed:
+        insight = CreativeInsight(
+            creators=[CreatorInfo(name, "vocal", 0.9) for name in rng.sample(CREATORS, 2)],
+            music_info=None, tools_used=[], themes=rng.sample(THEMES, 2), visual_elements=[],
+            analysis_confidence=0.8, analysis_timestamp=now, analysis_model="test"
+        )
+    return Video(
+        source=ContentSource.YOUTUBE, metadata=metadata, playlists=["PL"], playlist_positions={"PL": index},
+        analysis_status=AnalysisStatus.COMPLETED if analyzed else AnalysisStatus.PENDING,
+        creative_insight=insight, analysis_error=None, created_at=now, updated_at=now
+    )
+
+
+def index_snapshot(db):
+    """索引内容を比較用に正規化"""
+    return tuple({term: set(video_ids) for term, video_ids in index.items()}
+                 for index in (db.creator_index, db.tag_index, db.theme_index))
+
+
+class YouTubeKnowledgeIndexTester:
+    """YouTube知識DB横断インデックステスター"""
+
+    def __init__(self, benchmark_count: int = 10000, legacy_count: int = 500):
+        """初期化"""
+        self.benchmark_count = benchmark_count
+        self.legacy_count = legacy_count
+        self.rng = random.Random(12)
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🗃️ YouTube知識DB横断インデックステスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 追加・更新・削除後の索引が全再構築と一致
+        test_results["incremental_parity"] = self.test_incremental_parity()
+
+        # テスト2: 重複排除・保存形式
+        test_results["deduplicated_postings"] = self.test_deduplicated_postings()
+
+        # テスト3: 一括取り込みベンチマーク
+        test_results["benchmark"] = self.test_benchmark()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def test_incremental_parity(self):
+        """差分更新と全再構築の一致テスト"""
+        print("\n🔍 差分更新一致テスト")
+        print("-" * 40)
+
+        db = create_empty_database()
+        videos = [make_video(i, self.rng, analyzed=i % 3 != 0) for i in range(400)]
+        for video in videos[:200]:
+            db.add_video(video)
+        db.add_videos(videos[200:])
+
+        # その場での変更（分析完了・タグ変更）と再登録
+        for video in videos[::7]:
+            replacement = make_video(0, self.rng)
+            video.creative_insight = replacement.creative_insight
+            video.metadata.tags = replacement.metadata.tags
+            db.update_video(video.metadata.id)
+        for video in videos[1::11]:
+            video.metadata.tags = video.metadata.tags[:2]
+            db.add_video(video)
+        for video in videos[::13]:
+            db.remove_video(video.metadata.id)
+
+        incremental = index_snapshot(db)
+        db.rebuild_indexes()
+        rebuilt = index_snapshot(db)
+
+        success = incremental == rebuilt and db.total_videos == len(db.videos)
+        print(f"{'✅' if success else '❌'} {len(db.videos)}動画の索引一致 "
+              f"(クリエイター{len(db.creator_index)} / タグ{len(db.tag_index)} / テーマ{len(db.theme_index)})")
+        return {"success": success}
+
+    def test_deduplicated_postings(self):
+        """重複排除・保存形式テスト"""
+        print("\n🧹 重複排除テスト")
+        print("-" * 40)
+
+        db = create_empty_database()
+        video = make_video(1, self.rng)
+        video.metadata.tags = ["ボカロ", "ボカロ", "MV"]
+        db.add_video(video)
+        db.add_video(video)
+
+        by_tag = db.get_videos_by_tag("ボカロ")
+        exported = json.loads(json.dumps(db.to_dict(), ensure_ascii=False))
+        success = len(by_tag) == 1 and exported["tag_index"]["ボカロ"] == [video.metadata.id]
+        print(f"{'✅' if success else '❌'} 重複タグ・再登録でも1件: {len(by_tag)}件")
+        return {"success": success}
+
+    def test_benchmark(self):
+        """全再構築（従来）vs 差分更新 vs 一括追加のベンチマーク"""
+        print("\n⏱️ ベンチマーク")
+        print("-" * 40)
+
+        videos = [make_video(i, self.rng) for i in range(self.benchmark_count)]
+        timings = {}
+
+        # 従来: 追加のたびに全動画を走査して索引を再構築
+        db = create_empty_database()
+        start_time = time.perf_counter()
+        for video in videos[:self.legacy_count]:
+            db.videos[video.metadata.id] = video
+            db.rebuild_indexes()
+        timings[f"rebuild_per_add({self.legacy_count})"] = time.perf_counter() - start_time
+
+        db = create_empty_database()
+        start_time = time.perf_counter()
+        for video in videos:
+            db.add_video(video)
+        timings[f"add_video({self.benchmark_count})"] = time.perf_counter() - start_time
+        incremental = index_snapshot(db)
+
+        db = create_empty_database()
+        start_time = time.perf_counter()
+        db.add_videos(videos)
+        timings[f"add_videos({self.benchmark_count})"] = time.perf_counter() - start_time
+
+        for label, elapsed in timings.items():
+            print(f"✅ {label:<24}: {elapsed * 1000:9.1f}ms")
+
+        success = (incremental == index_snapshot(db) and
+                   timings[f"add_videos({self.benchmark_count})"] <
+                   timings[f"rebuild_per_add({self.legacy_count})"])
+        return {"success": success, "timings": timings}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = YouTubeKnowledgeIndexTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ YouTube知識DB横断インデックステスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+YouTube知識検索インデックステスト - 候補抽出（n-gram/用語索引）と従来の全件走査のスコア一致
+"""
+
+import sys
+import io
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.youtube_knowledge_manager import YouTubeKnowledgeManager
+
+
+def build_knowledge_db():
+    """検索パリティ確認用の小さな動画DB"""
+    videos = {
+        "vid_a": {
+            "metadata": {"title": "【MV】夜に駆ける / YOASOBI", "channel_title": "Ayase / YOASOBI",
+                         "description": "YOASOBI 1st Single"},
+            "creative_insight": {"creators": [{"name": "Ayase"}, {"name": "ikura"}]},
+        },
+        "vid_b": {
+            "metadata": {"title": "アイドル (Idol) - YOASOBI", "channel_title": "YOASOBI",
+                         "description": "TVアニメ主題歌"},
+            "custom_info": {"manual_title": "アイドル", "manual_artist": "YOASOBI",
+                            "japanese_pronunciations": ["あいどる"], "artist_pronunciations": ["よあそび"],
+                            "search_keywords": ["推しの子", "OP"]},
+        },
+        "vid_c": {
+            "metadata": {"title": "『ロキ』歌ってみた", "channel_title": "歌い手チャンネル",
+                         "description": "ボカロ曲を歌ってみました"},
+            "creative_insight": {"creators": [{"name": "みきとP"}]},
+        },
+        "vid_d": {
+            "metadata": {"title": "Tell Your World", "channel_title": "livetune",
+                         "description": "初音ミク"},
+            "custom_info": {"search_keywords": ["ミク"]},
+        },
+        "vid_e": {
+            "metadata": {"title": "", "channel_title": "", "description": ""},
+        },
+        "vid_f": {
+            "metadata": {"title": "夜 / 夜 / 夜", "channel_title": "a", "description": "a b c"},
+        },
+    }
+    return {"videos": videos, "playlists": {}}
+
+
+def make_manager(knowledge_db):
+    """ファイル・API初期化を伴わない検索用マネージャー"""
+    manager = YouTubeKnowledgeManager.__new__(YouTubeKnowledgeManager)
+    manager.knowledge_db = knowledge_db
+    manager.video_cache = {}
+    manager._search_entries = {}
+    manager._ngram_postings = {}
+    manager._term_postings = {}
+    manager._term_length_counts = {}
+    manager._search_order_counter = 0
+    manager.db_version = 0
+    manager._build_search_index()
+    return manager
+
+
+def legacy_search_videos(manager, query, limit=5):
+    """インデックス導入前の全件走査によるsearch_videos（比較用）"""
+    if not query.strip():
+        return []
+
+    query_lower = query.lower()
+    results = []
+
+    for video_id, video_data in manager.knowledge_db.get("videos", {}).items():
+        metadata = video_data.get("metadata", {})
+        title = metadata.get("title", "")
+        channel = metadata.get("channel_title", "").lower()
+        description = metadata.get("description", "").lower()
+
+        searchable_terms = manager._extract_searchable_terms(title)
+        searchable_terms_lower = [term.lower() for term in searchable_terms]
+
+        creators = []
+        if "creative_insight" in video_data:
+            insight = video_data["creative_insight"]
+            if "creators" in insight:
+                creators = [c.get("name", "").lower() for c in insight["creators"]]
+
+        custom_info = video_data.get("custom_info", {})
+        manual_title = custom_info.get("manual_title", "").lower()
+        manual_artist = custom_info.get("manual_artist", "").lower()
+        japanese_pronunciations = [r.lower() for r in custom_info.get("japanese_pronunciations", [])]
+        artist_pronunciations = [r.lower() for r in custom_info.get("artist_pronunciations", [])]
+        search_keywords = [k.lower() for k in custom_info.get("search_keywords", [])]
+
+        score = 0
+        if manual_title and query_lower == manual_title:
+            score += 50
+        elif manual_title and query_lower in manual_title:
+            score += 30
+        if manual_artist and query_lower == manual_artist:
+            score += 40
+        elif manual_artist and query_lower in manual_artist:
+            score += 25
+        for pronunciation in japanese_pronunciations:
+            if query_lower == pronunciation:
+                score += 50
+            elif query_lower in pronunciation:
+                score += 25
+        for pronunciation in artist_pronunciations:
+            if query_lower == pronunciation:
+                score += 45
+            elif query_lower in pronunciation:
+                score += 22
+        for keyword in search_keywords:
+            if query_lower == keyword:
+                score += 35
+            elif query_lower in keyword:
+                score += 15
+        for searchable_term in searchable_terms_lower:
+            if query_lower == searchable_term:
+                score += 20
+            elif query_lower in searchable_term:
+                score += 15
+            elif searchable_term in query_lower:
+                score += 12
+        if query_lower in title.lower():
+            score += 10
+        if query_lower in channel:
+            score += 8
+        if any(query_lower in creator for creator in creators):
+            score += 9
+        if query_lower in description:
+            score += 3
+        for word in query_lower.split():
+            if len(word) > 1:
+                for searchable_term in searchable_terms_lower:
+                    if word in searchable_term:
+                        score += 6
+                if word in title.lower():
+                    score += 5
+                if word in channel:
+                    score += 4
+                if any(word in creator for creator in creators):
+                    score += 4
+
+        if score > 0:
+            results.append({
+                "video_id": video_id,
+                "data": video_data,
+                "score": score,
+                "matched_terms": searchable_terms
+            })
+
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results[:limit]
+
+
+def ranked(results):
+    """比較用に順位・スコア・用語を正規化"""
+    return [(result["video_id"], result["score"], list(result["matched_terms"])) for result in results]
+
+
+QUERIES = [
+    "", "   ", "夜", "a", "y", "Y", "ミ",
+    "YOASOBI", "yoasobi", "夜に駆ける", "アイドル", "あいどる", "よあそび", "推しの子",
+    "ロキ 歌ってみた", "ayase ikura", "tell your world", "初音ミク", "みきとp",
+    "夜に駆けるをもう一度聴きたい", "アイドルとロキ", "存在しない曲", " a b ",
+]
+
+
+class YouTubeKnowledgeSearchTester:
+    """YouTube知識検索インデックステスター"""
+
+    def run_comprehensive_test(self):
+        """包括的テスト実行"""
+        print("🔎 YouTube知識検索インデックステスト")
+        print("=" * 60)
+
+        test_results = {}
+
+        # テスト1: 全件走査とのスコア一致
+        test_results["linear_scan_parity"] = self.test_linear_scan_parity()
+
+        # テスト2: 編集・削除後のスコア一致
+        test_results["updated_index_parity"] = self.test_updated_index_parity()
+
+        self.display_comprehensive_results(test_results)
+
+        return test_results
+
+    def compare_all(self, manager):
+        """全クエリで索引経由と全件走査の結果を比較"""
+        mismatches = []
+        for query in QUERIES:
+            for limit in (5, 100):
+                indexed = ranked(manager.search_videos(query, limit))
+                legacy = ranked(legacy_search_videos(manager, query, limit))
+                if indexed != legacy:
+                    mismatches.append((query, limit, indexed, legacy))
+        return mismatches
+
+    def test_linear_scan_parity(self):
+        """全件走査とのスコア一致テスト"""
+        print("\n🔍 全件走査一致テスト")
+        print("-" * 40)
+
+        with redirect_stdout(io.StringIO()):
+            manager = make_manager(build_knowledge_db())
+            mismatches = self.compare_all(manager)
+
+        success = not mismatches
+        print(f"{'✅' if success else '❌'} {len(QUERIES)}クエリの順位・スコア一致 (不一致{len(mismatches)}件)")
+        for query, limit, indexed, legacy in mismatches:
+            print(f"   {query!r} (limit={limit}): {indexed} != {legacy}")
+        return {"success": success}
+
+    def test_updated_index_parity(self):
+        """カスタム情報編集・動画削除後のスコア一致テスト"""
+        print("\n✏️ 差分更新一致テスト")
+        print("-" * 40)
+
+        with redirect_stdout(io.StringIO()):
+            manager = make_manager(build_knowledge_db())
+            videos = manager.knowledge_db["videos"]
+
+            videos["vid_c"]["custom_info"] = {"manual_title": "ロキ", "japanese_pronunciations": ["ろき"]}
+            manager.update_search_index("vid_c")
+            del videos["vid_d"]
+            manager.update_search_index("vid_d")
+
+            mismatches = self.compare_all(manager)
+
+        success = not mismatches
+        print(f"{'✅' if success else '❌'} 編集・削除後の順位・スコア一致 (不一致{len(mismatches)}件)")
+        return {"success": success}
+
+    def display_comprehensive_results(self, test_results):
+        """総合結果表示"""
+        print("\n" + "=" * 60)
+        print("📊 総合テスト結果")
+        print("=" * 60)
+
+        passed_tests = 0
+        for test_name, result in test_results.items():
+            if result.get("success", False):
+                passed_tests += 1
+                print(f"✅ 合格 {test_name}")
+            else:
+                print(f"❌ 不合格 {test_name}")
+
+        print(f"\n🎯 総合成功率: {passed_tests / len(test_results) * 100:.1f}% "
+              f"({passed_tests}/{len(test_results)})")
+
+
+def main():
+    """メイン実行"""
+    tester = YouTubeKnowledgeSearchTester()
+    results = tester.run_comprehensive_test()
+
+    print(f"\n✨ YouTube知識検索インデックステスト完了")
+
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音声キャッシュシステム
+合成音声をコンテンツアドレスで保存し、SQLiteインデックスで容量・アクセスを管理
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Any
+
+
+class VoiceCache:
+    """容量上限付きLRU音声キャッシュ
+
+    キーは合成条件（テキスト・話者ID）のハッシュ。ファイルサイズ・最終アクセス・
+    ヒット数をSQLiteインデックスに記録し、容量超過時は最終アクセスの古い順に削除する。
+    圧縮モードではWAVをzlibで可逆圧縮して保存し、再生時にWAVへ展開する。
+
+    同じディレクトリを合成システム以外（保守処理など）から開く場合は primary=False とする。
+    副インスタンスは再生中の展開済みWAVを削除せず、容量上限も合成システム側に任せる。
+    """
+
+    INDEX_FILE = "voice_cache_index.db"
+    DECODED_DIR = "decoded"
+    WAV_SUFFIX = ".wav"
+    COMPRESSED_SUFFIX = ".wav.z"
+
+    def __init__(self, cache_dir: str = "voice_cache", max_bytes: Optional[int] = 500 * 1024 * 1024,
+                 compress: bool = False, compression_level: int = 6, decoded_limit: int = 32,
+                 primary: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes if primary else None
+        self.primary = primary
+        self.compress = compress
+        self.compression_level = compression_level
+        self.decoded_limit = decoded_limit
+
+        self.decoded_dir = os.path.join(cache_dir, self.DECODED_DIR)
+        os.makedirs(self.decoded_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._decoded: "OrderedDict[str, str]" = OrderedDict()
+        self.total_bytes = 0
+
+        self.conn = sqlite3.connect(os.path.join(cache_dir, self.INDEX_FILE), check_same_thread=False)
+        self._initialize_index()
+
+    @staticmethod
+    def make_key(text: str, speaker_id: int) -> str:
+        """合成条件からキャッシュキーを生成"""
+        return hashlib.sha1(f"{text}_{speaker_id}".encode("utf-8")).hexdigest()
+
+    def _initialize_index(self):
+        """インデックス初期化（既存のWAVファイルは初回のみ取り込む）"""
+        with self._lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS voice_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    file_name TEXT NOT NULL,
+                    compression TEXT NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    original_size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_voice_cache_access ON voice_cache(last_access)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS voice_cache_meta (name TEXT PRIMARY KEY, value TEXT)")
+
+            adopted = self.conn.execute(
+                "SELECT value FROM voice_cache_meta WHERE name = 'legacy_adopted'"
+            ).fetchone()
+            if not adopted:
+                self._adopt_legacy_files()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO voice_cache_meta (name, value) VALUES ('legacy_adopted', '1')"
+                )
+            self.conn.commit()
+
+            # 展開済みWAVは一時ファイルなので起動時に破棄（再生中の可能性がある副インスタンスでは残す）
+            if self.primary:
+                for file_name in os.listdir(self.decoded_dir):
+                    try:
+                        os.remove(os.path.join(self.decoded_dir, file_name))
+                    except OSError:
+                        pass
+
+            row = self.conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM voice_cache").fetchone()
+            self.total_bytes = row[0]
+
+    def _adopt_legacy_files(self):
+        """インデックス導入前の <key>.wav ファイルを登録"""
+        adopted_count = 0
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(self.WAV_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, file_name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            cache_key = file_name[:-len(self.WAV_SUFFIX)]
+            self.conn.execute(
+                "INSERT OR IGNORE INTO voice_cache VALUES (?, ?, 'none', ?, ?, ?, ?, 0)",
+                (cache_key, file_name, stat.st_size, stat.st_size, stat.st_mtime, stat.st_mtime)
+            )
+            adopted_count += 1
+        if adopted_count:
+            print(f"📦 既存音声キャッシュをインデックスに登録: {adopted_count}件")
+
+    def contains(self, cache_key: str) -> bool:
+        """キャッシュ有無の確認（アクセス記録は更新しない）"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM voice_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone() is not None
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """
+        キャッシュされた音声の再生用WAVパスを取得
+
+        Args:
+            cache_key: キャッシュキー
+
+        Returns:
+            WAVファイルパス（未登録・ファイル消失時None）
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT file_name, compression FROM voice_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            file_name, compression = row
+            stored_path = os.path.join(self.cache_dir, file_name)
+            if not os.path.exists(stored_path):
+                self._remove_entry(cache_key)
+                self.conn.commit()
+                return None
+
+            self.conn.execute(
+                "UPDATE voice_cache SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (time.time(), cache_key)
+            )
+            self.conn.commit()
+
+            if compression == "none":
+                return stored_path
+            return self._decoded_path(cache_key, stored_path)
+
+    def put(self, cache_key: str, wav_bytes: bytes) -> str:
+        """
+        音声を保存して再生用WAVパスを返す
+
+        Args:
+            cache_key: キャッシュキー
+            wav_bytes: WAVデータ
+
+        Returns:
+            WAVファイルパス
+        """
+        with self._lock:
+            if self.compress:
+                stored_bytes = zlib.compress(wav_bytes, self.compression_level)
+                file_name = cache_key + self.COMPRESSED_SUFFIX
+                compression = "zlib"
+            else:
+                stored_bytes = wav_bytes
+                file_name = cache_key + self.WAV_SUFFIX
+                compression = "none"
+
+            self._remove_entry(cache_key)
+            self._write_atomic(os.path.join(self.cache_dir, file_name), stored_bytes)
+
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO voice_cache VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (cache_key, file_name, compression, len(stored_bytes), len(wav_bytes), now, now)
+            )
+            self.total_bytes += len(stored_bytes)
+
+            if compression == "none":
+                wav_path = os.path.join(self.cache_dir, file_name)
+            else:
+                # 合成直後は展開不要：元のWAVをそのまま再生用に書き出す
+                wav_path = os.path.join(self.decoded_dir, cache_key + self.WAV_SUFFIX)
+                self._write_atomic(wav_path, wav_bytes)
+                self._remember_decoded(cache_key, wav_path)
+
+            self._evict_to_budget(protected_key=cache_key)
+            self.conn.commit()
+            return wav_path
+
+    def cleanup(self, max_age_days: Optional[float] = None) -> Tuple[int, int]:
+        """
+        期限切れ・容量超過エントリの削除
+
+        Args:
+            max_age_days: 最終アクセスからの保持日数（None時は容量上限のみ適用）
+
+        Returns:
+            (削除件数, 解放バイト数)
+        """
+        with self._lock:
+            before_count, before_bytes = self._count_and_bytes()
+
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 24 * 60 * 60
+                expired_keys = [row[0] for row in self.conn.execute(
+                    "SELECT cache_key FROM voice_cache WHERE last_access < ?", (cutoff,)
+                )]
+                for cache_key in expired_keys:
+                    self._remove_entry(cache_key)
+
+            self._evict_to_budget()
+            self.conn.commit()
+
+            after_count, after_bytes = self._count_and_bytes()
+            return before_count - after_count, before_bytes - after_bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """キャッシュ統計取得"""
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(stored_size), 0), COALESCE(SUM(original_size), 0),
+                       COALESCE(SUM(hit_count), 0)
+                FROM voice_cache
+            """).fetchone()
+            entry_count, stored_bytes, original_bytes, total_hits = row
+            return {
+                "entry_count": entry_count,
+                "stored_bytes": stored_bytes,
+                "original_bytes": original_bytes,
+                "compression_ratio": stored_bytes / original_bytes if original_bytes else 1.0,
+                "total_hits": total_hits,
+                "max_bytes": self.max_bytes,
+                "usage_rate": stored_bytes / self.max_bytes if self.max_bytes else 0.0
+            }
+
+    @classmethod
+    def read_stats(cls, cache_dir: str) -> Optional[Dict[str, Any]]:
+        """
+        インデックスを読み取り専用で開いて統計取得（ファイル・インデックスを変更しない）
+
+        Args:
+            cache_dir: キャッシュディレクトリ
+
+        Returns:
+            stats()と同形式の統計（容量上限は不明のためNone、インデックス未作成時None）
+        """
+        index_path = os.path.join(cache_dir, cls.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+
+        conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(stored_size), 0), COALESCE(SUM(original_size), 0),
+                       COALESCE(SUM(hit_count), 0)
+                FROM voice_cache
+            """).fetchone()
+        finally:
+            conn.close()
+
+        entry_count, stored_bytes, original_bytes, total_hits = row
+        return {
+            "entry_count": entry_count,
+            "stored_bytes": stored_bytes,
+            "original_bytes": original_bytes,
+            "compression_ratio": stored_bytes / original_bytes if original_bytes else 1.0,
+            "total_hits": total_hits,
+            "max_bytes": None,
+            "usage_rate": None
+        }
+
+    def clear(self):
+        """全エントリ削除"""
+        with self._lock:
+            for (cache_key,) in self.conn.execute("SELECT cache_key FROM voice_cache").fetchall():
+                self._remove_entry(cache_key)
+            self.conn.commit()
+            self.total_bytes = 0
+
+    def close(self):
+        """インデックスを閉じる"""
+        with self._lock:
+            self.conn.close()
+
+    def _count_and_bytes(self) -> Tuple[int, int]:
+        return self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(stored_size), 0) FROM voice_cache"
+        ).fetchone()
+
+    def _evict_to_budget(self, protected_key: Optional[str] = None):
+        """最終アクセスの古い順に容量上限まで削除"""
+        if self.max_bytes is None or self.total_bytes <= self.max_bytes:
+            return
+
+        # 他のインスタンスが削除した分を反映してから判定
+        self.total_bytes = self._count_and_bytes()[1]
+        rows = self.conn.execute(
+            "SELECT cache_key FROM voice_cache ORDER BY last_access ASC"
+        ).fetchall()
+        for (cache_key,) in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            if cache_key == protected_key:
+                continue
+            self._remove_entry(cache_key)
+
+    def _remove_entry(self, cache_key: str):
+        """エントリとファイルの削除（コミットは呼び出し側）"""
+        row = self.conn.execute(
+            "SELECT file_name, stored_size FROM voice_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row is None:
+            return
+
+        file_name, stored_size = row
+        self.conn.execute("DELETE FROM voice_cache WHERE cache_key = ?", (cache_key,))
+        self.total_bytes -= stored_size
+
+        try:
+            os.remove(os.path.join(self.cache_dir, file_name))
+        except OSError:
+            pass
+
+        decoded_path = self._decoded.pop(cache_key, None)
+        if decoded_path:
+            try:
+                os.remove(decoded_path)
+            except OSError:
+                pass
+
+    def _decoded_path(self, cache_key: str, stored_path: str) -> str:
+        """圧縮音声を展開したWAVパス（展開済みなら再利用）"""
+        decoded_path = self._decoded.get(cache_key)
+        if decoded_path and os.path.exists(decoded_path):
+            self._decoded.move_to_end(cache_key)
+            return decoded_path
+
+        with open(stored_path, "rb") as f:
+            wav_bytes = zlib.decompress(f.read())
+        decoded_path = os.path.join(self.decoded_dir, cache_key + self.WAV_SUFFIX)
+        self._write_atomic(decoded_path, wav_bytes)
+        self._remember_decoded(cache_key, decoded_path)
+        return decoded_path
+
+    def _remember_decoded(self, cache_key: str, decoded_path: str):
+        """展開済みWAVを記録し、上限を超えた古いものを削除"""
+        self._decoded[cache_key] = decoded_path
+        self._decoded.move_to_end(cache_key)
+        while len(self._decoded) > self.decoded_limit:
+            _, old_path = self._decoded.popitem(last=False)
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        """一時ファイル経由で書き込み（書き込み途中のファイルを読ませない）"""
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+
+# テスト用
+if __name__ == "__main__":
+    import tempfile
+
+    print("=" * 50)
+    print("🧪 音声キャッシュシステムテスト")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = VoiceCache(temp_dir, max_bytes=3000, compress=True)
+
+        for i in range(5):
+            key = VoiceCache.make_key(f"テスト音声{i}", 20)
+            path = cache.put(key, b"RIFF" + bytes(1000))
+            print(f"💾 保存: {os.path.basename(path)}")
+
+        print(f"📦 取得: {cache.get(VoiceCache.make_key('テスト音声4', 20))}")
+        print(f"📊 統計: {cache.stats()}")
+        cache.close()
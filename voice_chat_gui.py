@@ -3360,6 +3360,7 @@ class SetsunaGUI:
                 
                 # データベースを更新
                 video_data["custom_info"] = new_custom_info
+                knowledge_manager.update_search_index(video_id)
                 
                 # ファイルに保存
                 self.save_video_database(knowledge_manager)
@@ -5,26 +5,84 @@ VOICEVOX音声合成システム
 過去の成功実績に基づく確実動作版
 """
 
-import hashlib
 import os
 import requests
+import threading
 import time
 import subprocess
 import platform
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable
+from voice_cache import VoiceCache
+
+
+class SynthesisMetrics:
+    """音声合成の段階別処理時間メトリクス"""
+    
+    STAGES = ("audio_query", "synthesis", "save", "total", "time_to_first_audio")
+    
+    def __init__(self, window_size: int = 200):
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """計測値をリセット"""
+        with self._lock:
+            self.samples: Dict[str, deque] = {stage: deque(maxlen=self.window_size) for stage in self.STAGES}
+            self.counters: Dict[str, int] = {"requests": 0, "cache_hits": 0, "failures": 0}
+    
+    def record(self, stage: str, seconds: float):
+        """段階の処理時間を記録"""
+        with self._lock:
+            self.samples.setdefault(stage, deque(maxlen=self.window_size)).append(seconds)
+    
+    def increment(self, counter: str):
+        """カウンタを加算"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + 1
+    
+    def summary(self) -> Dict[str, Any]:
+        """段階別の件数・平均・p50・p95・最大値"""
+        with self._lock:
+            stages = {}
+            for stage, values in self.samples.items():
+                if not values:
+                    continue
+                ordered = sorted(values)
+                stages[stage] = {
+                    "count": len(ordered),
+                    "avg": sum(ordered) / len(ordered),
+                    "p50": ordered[int(0.5 * (len(ordered) - 1))],
+                    "p95": ordered[int(0.95 * (len(ordered) - 1))],
+                    "max": ordered[-1]
+                }
+            return {"stages": stages, "counters": dict(self.counters)}
+
 
 class VoiceVoxSynthesizer:
     """VOICEVOX音声合成システム（Windows専用）"""
     
-    def __init__(self):
+    def __init__(self, use_session: bool = True, prefetch: int = 2, cache_dir: str = "voice_cache",
+                 cache_max_bytes: int = 500 * 1024 * 1024, compress_cache: bool = False):
         # VOICEVOX設定
         self.speaker_id = 20  # せつなの音声ID
         self.voicevox_url = None
         self.is_windows = self._detect_windows()
         
-        # キャッシュ設定
-        self.cache_dir = "voice_cache"
+        # HTTP接続設定（Session使用時はKeep-Aliveで接続を再利用）
+        self.use_session = use_session
+        self.prefetch = max(1, prefetch)  # バッチ合成で先行するaudio_query数
+        self.session = self._create_session() if use_session else None
+        
+        # 段階別処理時間メトリクス
+        self.metrics = SynthesisMetrics()
+        
+        # キャッシュ設定（インデックス付きLRU、容量上限あり）
+        self.cache_dir = cache_dir
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.voice_cache = VoiceCache(self.cache_dir, max_bytes=cache_max_bytes, compress=compress_cache)
         
         # VOICEVOX URL の自動検出
         self._auto_detect_voicevox_url()
@@ -33,7 +91,29 @@ class VoiceVoxSynthesizer:
         print(f"   - Windows環境: {self.is_windows}")
         print(f"   - VOICEVOX URL: {self.voicevox_url}")
         print(f"   - Speaker ID: {self.speaker_id} (せつな)")
-        print(f"   - キャッシュディレクトリ: {self.cache_dir}")
+        print(f"   - キャッシュディレクトリ: {self.cache_dir} (上限: {cache_max_bytes // (1024 * 1024)}MB, 圧縮: {compress_cache})")
+        print(f"   - 接続プール: {'有効' if use_session else '無効'} (先行query数: {self.prefetch})")
+    
+    def _create_session(self) -> requests.Session:
+        """接続プール付きHTTPセッション作成"""
+        session = requests.Session()
+        # audio_queryの先行実行とsynthesisが同時に走るため、その分の接続を確保
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.prefetch + 2
+        )
+        session.mount("http://", adapter)
+        return session
+    
+    def _http(self):
+        """HTTPクライアント（Sessionまたはrequestsモジュール）"""
+        return self.session if self.session is not None else requests
+    
+    def close(self):
+        """HTTPセッション・キャッシュインデックスを閉じる"""
+        if self.session is not None:
+            self.session.close()
+        self.voice_cache.close()
     
     def _detect_windows(self) -> bool:
         """Windows環境の検出"""
@@ -66,7 +146,7 @@ class VoiceVoxSynthesizer:
         for url in url_candidates:
             try:
                 print(f"   - {url} テスト中...")
-                response = requests.get(f"{url}/version", timeout=3)
+                response = self._http().get(f"{url}/version", timeout=3)
                 
                 if response.status_code == 200:
                     version_info = response.json()
@@ -84,96 +164,195 @@ class VoiceVoxSynthesizer:
         print("💡 解決方法:")
         print("   1. VOICEVOXをWindows上で起動してください")
         print("   2. デフォルトポート50021で起動していることを確認してください")
-        if self.is_wsl2:
+        if getattr(self, "is_wsl2", False):
             print("   3. WSL2環境からWindows上のVOICEVOXにアクセス中")
         
         # フォールバック: デフォルトURL
         self.voicevox_url = url_candidates[0]
     
-    def synthesize_voice(self, text: str) -> Optional[str]:
-        """音声合成実行（過去成功実績の実装）"""
-        if not self.voicevox_url:
-            print("❌ VOICEVOX URLが設定されていません")
+    def _cache_key(self, text: str) -> str:
+        """テキストに対応するキャッシュキー"""
+        return VoiceCache.make_key(text, self.speaker_id)
+    
+    def _request_audio_query(self, text: str) -> Optional[Dict[str, Any]]:
+        """audio_query API呼び出し（音声パラメータ調整済みのクエリを返す）"""
+        start_time = time.perf_counter()
+        query_response = self._http().post(
+            f"{self.voicevox_url}/audio_query",
+            params={"text": text, "speaker": self.speaker_id},
+            timeout=10
+        )
+        self.metrics.record("audio_query", time.perf_counter() - start_time)
+        
+        if query_response.status_code != 200:
+            print(f"❌ audio_query失敗: {query_response.status_code}")
             return None
         
-        if not text.strip():
-            print("⚠️ 合成するテキストが空です")
+        query = query_response.json()
+        
+        # 音声パラメータ調整（過去の成功設定）
+        query["speedScale"] = 1.3   # 話速
+        query["pitchScale"] = 0.0   # ピッチ
+        query["intonationScale"] = 1.0  # イントネーション
+        return query
+    
+    def _request_synthesis(self, query: Dict[str, Any], cache_key: str) -> Optional[str]:
+        """synthesis API呼び出しとキャッシュ保存"""
+        start_time = time.perf_counter()
+        synthesis_response = self._http().post(
+            f"{self.voicevox_url}/synthesis",
+            params={"speaker": self.speaker_id},
+            json=query,
+            timeout=15
+        )
+        synthesis_time = time.perf_counter()
+        self.metrics.record("synthesis", synthesis_time - start_time)
+        
+        if synthesis_response.status_code != 200:
+            print(f"❌ synthesis失敗: {synthesis_response.status_code}")
             return None
         
-        # キャッシュキー生成
-        cache_key = hashlib.sha1(f"{text}_{self.speaker_id}".encode("utf-8")).hexdigest()
-        cache_path = os.path.join(self.cache_dir, f"{cache_key}.wav")
+        wav_path = self.voice_cache.put(cache_key, synthesis_response.content)
+        self.metrics.record("save", time.perf_counter() - synthesis_time)
         
-        # キャッシュ確認
-        if os.path.exists(cache_path):
-            print(f"📦 キャッシュヒット: '{text[:20]}...'")
-            return cache_path
+        return wav_path
+    
+    def _check_synthesis_input(self, text: str) -> bool:
+        """合成可能な入力かどうか"""
+        if not self.voicevox_url:
+            print("❌ VOICEVOX URLが設定されていません")
+            return False
+        
+        if not text.strip():
+            print("⚠️ 合成するテキストが空です")
+            return False
         
+        return True
+    
+    def _run_stage(self, stage: Callable, *args):
+        """API呼び出し段階の実行（通信エラーはNoneとして扱う）"""
         try:
-            print(f"🎵 音声合成開始: '{text[:30]}...'")
-            start_time = time.time()
-            
-            # 1. audio_query API呼び出し
-            print("   - audio_query 生成中...")
-            query_response = requests.post(
-                f"{self.voicevox_url}/audio_query",
-                params={"text": text, "speaker": self.speaker_id},
-                timeout=10
-            )
-            
-            if query_response.status_code != 200:
-                print(f"❌ audio_query失敗: {query_response.status_code}")
-                return None
-            
-            query = query_response.json()
-            query_time = time.time()
-            
-            # 音声パラメータ調整（過去の成功設定）
-            query["speedScale"] = 1.3   # 話速
-            query["pitchScale"] = 0.0   # ピッチ
-            query["intonationScale"] = 1.0  # イントネーション
-            
-            # 2. synthesis API呼び出し
-            print("   - 音声synthesis実行中...")
-            synthesis_response = requests.post(
-                f"{self.voicevox_url}/synthesis",
-                params={"speaker": self.speaker_id},
-                json=query,
-                timeout=15
-            )
-            
-            if synthesis_response.status_code != 200:
-                print(f"❌ synthesis失敗: {synthesis_response.status_code}")
-                return None
-            
-            synthesis_time = time.time()
-            
-            # 3. WAVファイル保存
-            with open(cache_path, "wb") as f:
-                f.write(synthesis_response.content)
-            
-            save_time = time.time()
-            
-            # ファイルサイズ確認
-            file_size = os.path.getsize(cache_path)
-            print(f"✅ 音声合成完了: {cache_path}")
-            print(f"   - ファイルサイズ: {file_size} bytes")
-            print(f"   - Query時間: {query_time - start_time:.2f}s")
-            print(f"   - Synthesis時間: {synthesis_time - query_time:.2f}s")
-            print(f"   - 保存時間: {save_time - synthesis_time:.2f}s")
-            print(f"   - 総時間: {save_time - start_time:.2f}s")
-            
-            return cache_path
-            
+            return stage(*args)
         except requests.exceptions.Timeout:
             print("❌ VOICEVOX APIタイムアウト")
-            return None
         except requests.exceptions.RequestException as e:
             print(f"❌ VOICEVOX API呼び出しエラー: {e}")
-            return None
         except Exception as e:
             print(f"❌ 音声合成エラー: {e}")
+        return None
+    
+    def synthesize_voice(self, text: str) -> Optional[str]:
+        """音声合成実行（過去成功実績の実装）"""
+        if not self._check_synthesis_input(text):
+            return None
+        
+        self.metrics.increment("requests")
+        cache_key = self._cache_key(text)
+        
+        # キャッシュ確認
+        cached_path = self.voice_cache.get(cache_key)
+        if cached_path:
+            self.metrics.increment("cache_hits")
+            print(f"📦 キャッシュヒット: '{text[:20]}...'")
+            return cached_path
+        
+        print(f"🎵 音声合成開始: '{text[:30]}...'")
+        start_time = time.perf_counter()
+        
+        # 1. audio_query API呼び出し
+        query = self._run_stage(self._request_audio_query, text)
+        
+        # 2. synthesis API呼び出し・3. WAVファイル保存
+        wav_path = self._run_stage(self._request_synthesis, query, cache_key) if query else None
+        
+        if not wav_path:
+            self.metrics.increment("failures")
             return None
+        
+        self.metrics.record("total", time.perf_counter() - start_time)
+        print(f"✅ 音声合成完了: {wav_path} ({os.path.getsize(wav_path)} bytes)")
+        return wav_path
+    
+    def iter_synthesize(self, texts: List[str]) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """
+        複数文の音声を文順に合成し、完成した順に (index, text, wav_path) を返す
+        
+        後続文のaudio_queryを最大prefetch件まで先行実行し、
+        前の文のsynthesisと重ねることで最初の音声が出るまでの時間を短縮する。
+        """
+        start_time = time.perf_counter()
+        first_audio_recorded = False
+        
+        with ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix="voicevox_query") as executor:
+            pending: Dict[int, Any] = {}
+            next_to_submit = 0
+            
+            def submit_queries(current: int):
+                """current以降のprefetch件分のaudio_queryを投入"""
+                nonlocal next_to_submit
+                next_to_submit = max(next_to_submit, current)
+                while next_to_submit < len(texts) and next_to_submit < current + self.prefetch:
+                    text = texts[next_to_submit]
+                    if self._check_synthesis_input(text) and not self.voice_cache.contains(self._cache_key(text)):
+                        pending[next_to_submit] = executor.submit(self._run_stage, self._request_audio_query, text)
+                    next_to_submit += 1
+            
+            for index, text in enumerate(texts):
+                submit_queries(index)
+                sentence_start = time.perf_counter()
+                
+                if not self._check_synthesis_input(text):
+                    yield index, text, None
+                    continue
+                
+                self.metrics.increment("requests")
+                cache_key = self._cache_key(text)
+                future = pending.pop(index, None)
+                cached_path = self.voice_cache.get(cache_key) if future is None else None
+                
+                if cached_path:
+                    self.metrics.increment("cache_hits")
+                    wav_path = cached_path
+                else:
+                    query = future.result() if future is not None else self._run_stage(self._request_audio_query, text)
+                    # 次の文のaudio_queryを先行させてからsynthesis
+                    submit_queries(index + 1)
+                    wav_path = self._run_stage(self._request_synthesis, query, cache_key) if query else None
+                    if wav_path:
+                        self.metrics.record("total", time.perf_counter() - sentence_start)
+                    else:
+                        self.metrics.increment("failures")
+                
+                if wav_path and not first_audio_recorded:
+                    self.metrics.record("time_to_first_audio", time.perf_counter() - start_time)
+                    first_audio_recorded = True
+                
+                yield index, text, wav_path
+    
+    def synthesize_batch(self, texts: List[str],
+                         on_ready: Optional[Callable[[int, Optional[str]], None]] = None) -> List[Optional[str]]:
+        """
+        複数文をパイプライン合成
+        
+        Args:
+            texts: 合成する文のリスト（再生順）
+            on_ready: 1文完成するごとに (index, wav_path) で呼ばれるコールバック
+            
+        Returns:
+            文ごとのWAVファイルパス（失敗時None）
+        """
+        results: List[Optional[str]] = [None] * len(texts)
+        for index, _, wav_path in self.iter_synthesize(texts):
+            results[index] = wav_path
+            if on_ready:
+                on_ready(index, wav_path)
+        return results
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """段階別処理時間メトリクス取得"""
+        summary = self.metrics.summary()
+        summary["voice_cache"] = self.voice_cache.stats()
+        return summary
     
     def play_voice(self, wav_path: str) -> bool:
         """音声再生（Windows専用）"""
@@ -253,7 +432,7 @@ class VoiceVoxSynthesizer:
             return False
         
         try:
-            response = requests.get(f"{self.voicevox_url}/version", timeout=5)
+            response = self._http().get(f"{self.voicevox_url}/version", timeout=5)
             if response.status_code == 200:
                 version_info = response.json()
                 print(f"✅ VOICEVOX接続テスト成功")
@@ -0,0 +1,96 @@
+"""
+分析APIの適応的スロットル
+
+同時実行数の上限内でリクエストを流し、レート制限（429）を受けたら同時実行数を半分にして待機、
+成功が続けば少しずつ上限まで戻す（AIMD方式）
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+class AdaptiveThrottle:
+    """同時実行数・待機時間をレート制限に応じて調整するスロットル（スレッドセーフ）"""
+
+    def __init__(self, max_in_flight: int = 4, base_backoff: float = 1.0, max_backoff: float = 60.0,
+                 min_interval: float = 0.0, clock=time.monotonic):
+        """
+        Args:
+            max_in_flight: 同時実行数の上限
+            base_backoff: 初回レート制限時の待機秒数（以降は連続するたびに倍増）
+            max_backoff: 待機秒数の上限
+            min_interval: リクエスト開始の最小間隔（秒）
+            clock: 時刻取得関数（テスト用に差し替え可能）
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_interval = min_interval
+        self._clock = clock
+
+        self._condition = threading.Condition()
+        self._limit = float(self.max_in_flight)
+        self._in_flight = 0
+        self._backoff = 0.0
+        self._resume_at = 0.0
+        self._next_start = 0.0
+
+        # 統計
+        self.requests = 0
+        self.rate_limited = 0
+        self.max_observed_in_flight = 0
+        self.min_limit = self.max_in_flight
+
+    def acquire(self) -> None:
+        """リクエスト開始の許可を待つ"""
+        with self._condition:
+            while True:
+                now = self._clock()
+                wait = max(self._resume_at, self._next_start) - now
+                if self._in_flight < int(self._limit) and wait <= 0:
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+            self._in_flight += 1
+            self._next_start = now + self.min_interval
+            self.requests += 1
+            self.max_observed_in_flight = max(self.max_observed_in_flight, self._in_flight)
+
+    def release(self, rate_limited: bool = False, retry_after: Optional[float] = None) -> None:
+        """
+        リクエスト終了を通知
+
+        Args:
+            rate_limited: レート制限で失敗したか
+            retry_after: サーバーが指定した再試行までの秒数
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if rate_limited:
+                # 同時実行数を半減し、全リクエストの開始を待機させる（同時に受けた429で重ねて延ばさない）
+                # 待機はサーバー指定の Retry-After を優先し、指定がなければ指数バックオフ
+                self.rate_limited += 1
+                self._limit = max(1.0, self._limit / 2)
+                self.min_limit = min(self.min_limit, int(self._limit))
+                self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else self.base_backoff)
+                delay = retry_after if retry_after else self._backoff * random.uniform(0.5, 1.0)
+                self._resume_at = max(self._resume_at, self._clock() + delay)
+            else:
+                # 成功ごとに上限へ向けて少しずつ戻す
+                self._limit = min(float(self.max_in_flight), self._limit + 1 / self._limit)
+                self._backoff /= 2
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        with self._condition:
+            return {
+                'requests': self.requests,
+                'rate_limited': self.rate_limited,
+                'max_in_flight': self.max_in_flight,
+                'current_limit': int(self._limit),
+                'min_limit': self.min_limit,
+                'max_observed_in_flight': self.max_observed_in_flight
+            }
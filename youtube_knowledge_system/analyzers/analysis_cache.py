@@ -0,0 +1,94 @@
+"""
+概要欄分析結果キャッシュ
+
+動画タイトル・概要欄のハッシュとプロンプトバージョンをキーに分析結果をJSONLへ追記し、
+同じ内容の再分析ではAPIを呼ばずに結果を返す
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+class AnalysisCache:
+    """分析結果キャッシュ管理クラス
+
+    1件ごとに1行追記するため、一括分析の途中で中断しても分析済みの結果は失われない。
+    プロンプト（モデル）が変わった場合は別バージョンの結果を読み込まず、すべて再分析する。
+    """
+
+    def __init__(self, cache_file: Path, prompt_version: str):
+        self.cache_file = cache_file
+        self.prompt_version = prompt_version
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        """キャッシュを読み込み（現在のプロンプトバージョンのみ）"""
+        if not self.cache_file.exists():
+            return
+
+        with open(self.cache_file, 'rb') as f:
+            raw = f.read()
+
+        valid_length = 0
+        for line in raw.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line.decode('utf-8'))
+                if entry['prompt_version'] == self.prompt_version:
+                    self._entries[entry['key']] = entry['result']
+            except (ValueError, KeyError):
+                break
+            valid_length += len(line)
+
+        if valid_length < len(raw):
+            print(f"⚠️ 分析キャッシュの途切れた末尾を破棄しました: {len(raw) - valid_length}バイト")
+            with open(self.cache_file, 'r+b') as f:
+                f.truncate(valid_length)
+
+    @staticmethod
+    def make_key(description: str, video_title: str = "") -> str:
+        """キャッシュキー（プロンプトに含まれるタイトル・概要欄のハッシュ）"""
+        return hashlib.sha1(f"{video_title}\0{description}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """分析結果を取得（呼び出し側で変更しても影響しないよう複製を返す）"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """分析結果を記録"""
+        line = json.dumps({'key': key, 'prompt_version': self.prompt_version, 'result': result,
+                           'cached_at': datetime.now().isoformat()}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self._entries[key] = copy.deepcopy(result)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, int]:
+        """統計情報を取得"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
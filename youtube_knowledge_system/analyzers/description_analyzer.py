@@ -2,32 +2,64 @@
 YouTube動画概要欄の分析
 GPT APIを使用してクリエイター情報・歌詞・制作情報を抽出
 """
+import hashlib
 import json
 import os
-import time
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from openai import OpenAI
 from dotenv import load_dotenv
 
+# パス設定
+sys.path.append(str(Path(__file__).parent.parent))
+
+from analyzers.adaptive_throttle import AdaptiveThrottle
+from analyzers.analysis_cache import AnalysisCache
+from config.settings import DATA_DIR
+
 # 環境変数読み込み
 load_dotenv()
 
+SYSTEM_PROMPT = "あなたは音楽・映像制作の専門家です。正確なJSON形式で回答してください。"
+
 
 class DescriptionAnalyzer:
     """概要欄分析クラス"""
     
-    def __init__(self, model="gpt-4o-mini"):
+    def __init__(self, model="gpt-4o-mini", client: OpenAI = None, cache_file: Optional[Path] = None,
+                 use_cache: bool = True):
+        """
+        Args:
+            model: 使用するモデル
+            client: 使用するOpenAIクライアント（None=環境変数のAPIキーから生成、オフラインのテストでは
+                    test/fakes の FakeCompletionServer を base_url に指定したクライアント）
+            cache_file: 分析結果キャッシュ（None=DATA_DIR/description_analysis_cache.jsonl）
+            use_cache: 分析結果キャッシュを使用するか
+        """
         # OpenAI API設定
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY が設定されていません。.envファイルを確認してください。")
+        if client is None:
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY が設定されていません。.envファイルを確認してください。")
+            client = OpenAI(api_key=api_key)
         
-        self.client = OpenAI(api_key=api_key)
+        self.client = client
         self.model = model
         
         # 分析プロンプト
         self.analysis_prompt = self._create_analysis_prompt()
+        
+        # プロンプト・モデルが変わると結果も変わるため、キャッシュはプロンプトバージョンごとに分ける
+        self.prompt_version = hashlib.sha1(
+            f"{self.model}\n{SYSTEM_PROMPT}\n{self.analysis_prompt}".encode('utf-8')
+        ).hexdigest()[:12]
+        self.cache = AnalysisCache(
+            cache_file or DATA_DIR / "description_analysis_cache.jsonl", self.prompt_version
+        ) if use_cache else None
     
     def _create_analysis_prompt(self) -> str:
         """分析用プロンプトを作成（コスト削減版）"""
@@ -59,67 +91,84 @@ JSON形式（必ず```jsonと```で囲む）：
 """
     
     def analyze_description(self, description: str, video_title: str = "") -> Optional[Dict[str, Any]]:
-        """概要欄を分析してクリエイター情報等を抽出"""
+        """概要欄を分析してクリエイター情報等を抽出（分析済みの内容はキャッシュから返す）"""
         if not description or len(description.strip()) < 10:
             return None
         
+        cache_key = AnalysisCache.make_key(description, video_title)
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+        
         try:
-            # プロンプトに概要欄テキストを追加
-            full_prompt = self.analysis_prompt + f"\n\n動画タイトル: {video_title}\n\n概要欄:\n{description}"
-            
-            # OpenAI API呼び出し（トークン数を調整）
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "あなたは音楽・映像制作の専門家です。正確なJSON形式で回答してください。"},
-                    {"role": "user", "content": full_prompt}
-                ],
-                max_tokens=1200,  # トークン数を増加（JSON完了を確保）
-                temperature=0.1
-            )
-            
-            # レスポンスからJSONを抽出
-            response_text = response.choices[0].message.content.strip()
-            
-            # JSON部分を抽出（```json と ``` の間）
-            json_start = response_text.find('```json')
-            if json_start != -1:
-                json_start += 7  # '```json'の長さ
-                json_end = response_text.find('```', json_start)
-                if json_end != -1:
-                    json_text = response_text[json_start:json_end].strip()
-                else:
-                    json_text = response_text[json_start:].strip()
+            response_text = self._request_analysis(description, video_title)
+        except Exception as e:
+            print(f"概要欄分析エラー: {e}")
+            return None
+        
+        return self._store_result(cache_key, self._parse_analysis_response(response_text))
+    
+    def _request_analysis(self, description: str, video_title: str, client: OpenAI = None) -> str:
+        """分析APIを呼び出して応答テキストを取得（APIエラーは例外として送出）"""
+        # プロンプトに概要欄テキストを追加
+        full_prompt = self.analysis_prompt + f"\n\n動画タイトル: {video_title}\n\n概要欄:\n{description}"
+        
+        # OpenAI API呼び出し（トークン数を調整）
+        response = (client or self.client).chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": full_prompt}
+            ],
+            max_tokens=1200,  # トークン数を増加（JSON完了を確保）
+            temperature=0.1
+        )
+        
+        return response.choices[0].message.content.strip()
+    
+    def _store_result(self, cache_key: str, analysis_result: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """分析に成功した結果をキャッシュに記録"""
+        if analysis_result is not None and self.cache is not None:
+            self.cache.put(cache_key, analysis_result)
+        return analysis_result
+    
+    def _parse_analysis_response(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """応答テキストから分析結果のJSONを抽出"""
+        # JSON部分を抽出（```json と ``` の間）
+        json_start = response_text.find('```json')
+        if json_start != -1:
+            json_start += 7  # '```json'の長さ
+            json_end = response_text.find('```', json_start)
+            if json_end != -1:
+                json_text = response_text[json_start:json_end].strip()
             else:
-                # JSON形式のマーカーがない場合、全体をJSONとして試行
-                json_text = response_text
-            
-            # JSONパース（エラー処理強化）
+                json_text = response_text[json_start:].strip()
+        else:
+            # JSON形式のマーカーがない場合、全体をJSONとして試行
+            json_text = response_text
+        
+        # JSONパース（エラー処理強化）
+        try:
+            analysis_result = json.loads(json_text)
+            analysis_result['analyzed_at'] = datetime.now().isoformat()
+            analysis_result['analysis_model'] = "gpt-4-turbo"
+            return analysis_result
+        except json.JSONDecodeError as e:
+            print(f"JSON解析エラー: {e}")
+            print(f"レスポンステキスト: {response_text}")
+            
+            # JSON修復を試行
             try:
-                analysis_result = json.loads(json_text)
-                analysis_result['analyzed_at'] = datetime.now().isoformat()
-                analysis_result['analysis_model'] = "gpt-4-turbo"
-                return analysis_result
-            except json.JSONDecodeError as e:
-                print(f"JSON解析エラー: {e}")
-                print(f"レスポンステキスト: {response_text}")
-                
-                # JSON修復を試行
-                try:
-                    fixed_json = self._fix_json_response(json_text)
-                    if fixed_json:
-                        analysis_result = json.loads(fixed_json)
-                        analysis_result['analyzed_at'] = datetime.now().isoformat()
-                        analysis_result['analysis_model'] = "gpt-4-turbo"
-                        print("✅ JSON修復成功")
-                        return analysis_result
-                except Exception as fix_error:
-                    print(f"JSON修復失敗: {fix_error}")
-                
-                return None
+                fixed_json = self._fix_json_response(json_text)
+                if fixed_json:
+                    analysis_result = json.loads(fixed_json)
+                    analysis_result['analyzed_at'] = datetime.now().isoformat()
+                    analysis_result['analysis_model'] = "gpt-4-turbo"
+                    print("✅ JSON修復成功")
+                    return analysis_result
+            except Exception as fix_error:
+                print(f"JSON修復失敗: {fix_error}")
             
-        except Exception as e:
-            print(f"概要欄分析エラー: {e}")
             return None
     
     def _fix_json_response(self, json_text: str) -> Optional[str]:
@@ -211,36 +260,105 @@ JSON形式（必ず```jsonと```で囲む）：
             except:
                 return None
     
-    def batch_analyze_videos(self, videos: List[Dict[str, Any]], delay: float = 1.0) -> List[Dict[str, Any]]:
-        """複数動画の概要欄を一括分析"""
-        analyzed_videos = []
+    def batch_analyze_videos(self, videos: List[Dict[str, Any]], delay: float = 0.0, max_in_flight: int = 4,
+                             max_retries: int = 5) -> List[Dict[str, Any]]:
+        """複数動画の概要欄を一括分析
         
-        for i, video in enumerate(videos):
-            print(f"分析中: {i+1}/{len(videos)} - {video.get('title', 'Unknown')}")
-            
-            # 概要欄分析
+        分析済みの内容はキャッシュから返し、残りを同時実行数 max_in_flight までの並列リクエストで分析する。
+        レート制限（429）を受けたら同時実行数を半分にして待機し、成功が続けば上限まで戻す。
+        
+        Args:
+            videos: 動画データ（title・description を含む辞書）
+            delay: リクエスト開始の最小間隔（秒）
+            max_in_flight: 同時に分析するリクエスト数の上限
+            max_retries: 1動画あたりのレート制限時の再試行回数
+        
+        Returns:
+            description_analysis を追加した動画データ（入力と同じ順序）
+        """
+        throttle = AdaptiveThrottle(max_in_flight=max_in_flight, min_interval=delay)
+        # レート制限はスロットルで待機・再試行するため、クライアント側の自動再試行は無効にする
+        client = self.client.with_options(max_retries=0) if hasattr(self.client, 'with_options') else self.client
+        progress_lock = threading.Lock()
+        completed = [0]
+        cache_hits_before = self.cache.hits if self.cache is not None else 0
+        
+        def analyze(video):
             description = video.get('description', '')
             title = video.get('title', '')
             
-            analysis = self.analyze_description(description, title)
+            analysis = self._analyze_with_backoff(description, title, client, throttle, max_retries)
+            
+            with progress_lock:
+                completed[0] += 1
+                done = completed[0]
             
             # 元の動画データに分析結果を追加
             enhanced_video = video.copy()
             enhanced_video['description_analysis'] = analysis
             
-            analyzed_videos.append(enhanced_video)
-            
-            # API制限を考慮して待機
-            if delay > 0:
-                time.sleep(delay)
-            
             # 進捗表示
-            if (i + 1) % 5 == 0:
-                print(f"  {i + 1} 件の分析が完了しました")
+            print(f"分析完了: {done}/{len(videos)} - {title or 'Unknown'}")
+            if done % 5 == 0:
+                print(f"  {done} 件の分析が完了しました")
+            return enhanced_video
         
-        print(f"全 {len(analyzed_videos)} 件の分析が完了しました")
+        if max_in_flight > 1 and len(videos) > 1:
+            with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+                analyzed_videos = list(executor.map(analyze, videos))
+        else:
+            analyzed_videos = [analyze(video) for video in videos]
+        
+        throttle_stats = throttle.get_stats()
+        cache_hits = (self.cache.hits if self.cache is not None else 0) - cache_hits_before
+        print(f"全 {len(analyzed_videos)} 件の分析が完了しました "
+              f"(キャッシュ {cache_hits}件, API {throttle_stats['requests']}回, "
+              f"レート制限 {throttle_stats['rate_limited']}回)")
         return analyzed_videos
     
+    def _analyze_with_backoff(self, description: str, video_title: str, client: OpenAI,
+                              throttle: AdaptiveThrottle, max_retries: int) -> Optional[Dict[str, Any]]:
+        """スロットル経由で1件分析（レート制限時は待機して再試行）"""
+        if not description or len(description.strip()) < 10:
+            return None
+        
+        cache_key = AnalysisCache.make_key(description, video_title)
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+        if cached is not None:
+            return cached
+        
+        for attempt in range(max_retries + 1):
+            throttle.acquire()
+            try:
+                response_text = self._request_analysis(description, video_title, client)
+            except Exception as e:
+                retry_after = self._rate_limit_retry_after(e)
+                if retry_after is None:
+                    throttle.release()
+                    print(f"概要欄分析エラー: {e}")
+                    return None
+                throttle.release(rate_limited=True, retry_after=retry_after)
+                if attempt == max_retries:
+                    print(f"概要欄分析エラー（レート制限の再試行上限）: {e}")
+                    return None
+                continue
+            
+            throttle.release()
+            return self._store_result(cache_key, self._parse_analysis_response(response_text))
+        
+        return None
+    
+    @staticmethod
+    def _rate_limit_retry_after(error: Exception) -> Optional[float]:
+        """レート制限エラーなら再試行までの秒数（指定なしは0）、それ以外は None"""
+        response = getattr(error, 'response', None)
+        if getattr(error, 'status_code', None) != 429 and getattr(response, 'status_code', None) != 429:
+            return None
+        try:
+            return float(response.headers.get('retry-after', 0))
+        except (AttributeError, TypeError, ValueError):
+            return 0.0
+    
     def extract_creative_insights(self, videos: List[Dict[str, Any]]) -> Dict[str, Any]:
         """分析結果から創作に関する洞察を抽出"""
         insights = {
@@ -406,7 +524,7 @@ def analyze_playlist_from_file(playlist_file_path: str, max_videos: int = 3):
         print(f"分析対象: {len(test_videos)} 件の動画")
         
         # 分析実行
-        analyzed_videos = analyzer.batch_analyze_videos(test_videos, delay=2.0)
+        analyzed_videos = analyzer.batch_analyze_videos(test_videos)
         
         # 結果保存（プレイリストIDを含むファイル名）
         playlist_id = playlist_info.get('id', 'unknown')
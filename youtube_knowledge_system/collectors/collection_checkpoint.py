@@ -0,0 +1,163 @@
+"""
+収集チェックポイント
+
+プレイリスト一括収集の途中経過（検証済みプレイリスト情報・取得済みページ・動画詳細バッチ・
+処理済みプレイリスト）をJSONLに追記し、中断後の再実行で続きから再開できるようにする
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+class CollectionCheckpoint:
+    """収集チェックポイント管理クラス
+
+    1件ごとに1行追記するため、記録のコストは取得したページ・バッチの大きさにだけ比例する。
+    書き込み途中で中断した末尾の行は読み込み時に破棄する。
+    """
+
+    def __init__(self, checkpoint_file: Path):
+        self.checkpoint_file = checkpoint_file
+        self._lock = threading.RLock()
+        self._playlists: Dict[str, Dict[str, Any]] = {}
+        self._completed: Dict[str, None] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """チェックポイントを読み込み"""
+        if not self.checkpoint_file.exists():
+            return
+
+        with open(self.checkpoint_file, 'rb') as f:
+            raw = f.read()
+
+        valid_length = 0
+        for line in raw.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                self._apply(json.loads(line.decode('utf-8')))
+            except (ValueError, KeyError):
+                break
+            valid_length += len(line)
+
+        if valid_length < len(raw):
+            print(f"⚠️ チェックポイントの途切れた末尾を破棄しました: {len(raw) - valid_length}バイト")
+            with open(self.checkpoint_file, 'r+b') as f:
+                f.truncate(valid_length)
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        """記録1件を反映"""
+        playlist_id = entry['playlist_id']
+        op = entry['op']
+        if op == 'completed':
+            self._playlists.pop(playlist_id, None)
+            self._completed[playlist_id] = None
+            return
+
+        playlist = self._playlist(playlist_id)
+        if op == 'info':
+            playlist['info'] = entry['info']
+        elif op == 'page':
+            playlist['pages'][entry['page_token']] = {
+                'video_ids': entry['video_ids'],
+                'next_page_token': entry['next_page_token'],
+                'etag': entry.get('etag'),
+                'content_hashes': entry.get('content_hashes')
+            }
+        elif op == 'batch':
+            playlist['batches'][entry['batch_key']] = {
+                'details': entry['details'],
+                'missing_ids': entry['missing_ids']
+            }
+
+    def _playlist(self, playlist_id: str) -> Dict[str, Any]:
+        return self._playlists.setdefault(playlist_id, {'info': None, 'pages': {}, 'batches': {}})
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """記録を追記して反映"""
+        entry['recorded_at'] = datetime.now().isoformat()
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.checkpoint_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+            self._apply(entry)
+
+    @staticmethod
+    def batch_key(video_ids: List[str]) -> str:
+        """動画詳細バッチの識別子"""
+        return hashlib.sha1(",".join(video_ids).encode('utf-8')).hexdigest()
+
+    def has_progress(self) -> bool:
+        """再開できる途中経過があるか"""
+        with self._lock:
+            return bool(self._playlists or self._completed)
+
+    def is_completed(self, playlist_id: str) -> bool:
+        """処理済みのプレイリストか"""
+        with self._lock:
+            return playlist_id in self._completed
+
+    def get_playlist_info(self, playlist_id: str) -> Optional[Dict[str, Any]]:
+        """検証済みのプレイリスト情報を取得"""
+        with self._lock:
+            playlist = self._playlists.get(playlist_id)
+            return playlist['info'] if playlist else None
+
+    def save_playlist_info(self, playlist_id: str, info: Dict[str, Any]) -> None:
+        """検証済みのプレイリスト情報を記録"""
+        self._append({'op': 'info', 'playlist_id': playlist_id, 'info': info})
+
+    def get_page(self, playlist_id: str, page_token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """取得済みページ（動画ID・次ページトークン・ETag・内容ハッシュ）を取得"""
+        with self._lock:
+            playlist = self._playlists.get(playlist_id)
+            return playlist['pages'].get(page_token or "") if playlist else None
+
+    def save_page(self, playlist_id: str, page_token: Optional[str], video_ids: List[str],
+                  next_page_token: Optional[str], etag: Optional[str] = None,
+                  content_hashes: Optional[List[Optional[str]]] = None) -> None:
+        """取得したページを記録（差分同期用のETag・内容ハッシュも保持）"""
+        self._append({'op': 'page', 'playlist_id': playlist_id, 'page_token': page_token or "",
+                      'video_ids': video_ids, 'next_page_token': next_page_token,
+                      'etag': etag, 'content_hashes': content_hashes})
+
+    def get_batch(self, playlist_id: str, video_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """取得済みの動画詳細バッチを取得"""
+        with self._lock:
+            playlist = self._playlists.get(playlist_id)
+            return playlist['batches'].get(self.batch_key(video_ids)) if playlist else None
+
+    def save_batch(self, playlist_id: str, video_ids: List[str], details: List[Dict[str, Any]],
+                   missing_ids: List[str]) -> None:
+        """取得した動画詳細バッチを記録"""
+        self._append({'op': 'batch', 'playlist_id': playlist_id, 'batch_key': self.batch_key(video_ids),
+                      'details': details, 'missing_ids': missing_ids})
+
+    def mark_completed(self, playlist_id: str) -> None:
+        """プレイリストを処理済みにする（ページ・バッチの記録は不要になるため破棄）"""
+        self._append({'op': 'completed', 'playlist_id': playlist_id})
+
+    def clear(self) -> None:
+        """チェックポイントを削除（一括収集の完了時）"""
+        with self._lock:
+            self._playlists.clear()
+            self._completed.clear()
+            if self.checkpoint_file.exists():
+                self.checkpoint_file.unlink()
+
+    def get_stats(self) -> Dict[str, int]:
+        """統計情報を取得"""
+        with self._lock:
+            return {
+                'completed_playlists': len(self._completed),
+                'in_progress_playlists': len(self._playlists),
+                'pages': sum(len(p['pages']) for p in self._playlists.values()),
+                'batches': sum(len(p['batches']) for p in self._playlists.values())
+            }
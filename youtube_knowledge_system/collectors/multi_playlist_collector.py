@@ -7,20 +7,31 @@
 import sys
 import asyncio
 import pickle
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
-import googleapiclient.discovery
-from google.oauth2.credentials import Credentials
+# Google APIクライアント（オフライン用サービスを渡す場合は不要）
+try:
+    import googleapiclient.discovery
+    from google.oauth2.credentials import Credentials
+    GOOGLE_API_AVAILABLE = True
+except ImportError:
+    GOOGLE_API_AVAILABLE = False
+    print("Warning: google-api-python-client library not found")
+    print("Install: pip install google-api-python-client google-auth-oauthlib")
 
 # パス設定
 sys.path.append(str(Path(__file__).parent.parent))
 
 from managers.playlist_config_manager import PlaylistConfigManager
-from storage.unified_storage import UnifiedStorage
+from storage.unified_storage import create_storage
+from collectors.quota_rate_limiter import QuotaRateLimiter
+from collectors.collection_checkpoint import CollectionCheckpoint
+from collectors.playlist_sync_state import PlaylistSyncState
 from core.data_models import (
     Video, Playlist, VideoMetadata, PlaylistMetadata,
     ContentSource, AnalysisStatus, PlaylistConfig
@@ -31,19 +42,36 @@ from config.settings import DATA_DIR
 class MultiPlaylistCollector:
     """マルチプレイリストコレクター"""
     
-    def __init__(self, credentials_path: str = None, token_path: str = None):
+    def __init__(self, credentials_path: str = None, token_path: str = None, data_dir: Path = None,
+                 service=None, rate_limiter: QuotaRateLimiter = None):
+        """
+        Args:
+            credentials_path: OAuth認証情報ファイル
+            token_path: トークンファイル
+            data_dir: データディレクトリ（None=設定値 DATA_DIR）
+            service: 使用するYouTubeサービス（None=認証情報から生成、オフラインのテストでは test/fakes の FakeYouTubeService）
+            rate_limiter: APIクォータのレートリミッター（None=10 units/秒）
+        """
         # 認証設定（Windows パス）
         self.credentials_path = credentials_path or r"D:\setsuna_bot\config\youtube_credentials.json"
         self.token_path = token_path or r"D:\setsuna_bot\config\youtube_token.json"
         
         # 管理システム初期化
-        self.config_manager = PlaylistConfigManager()
-        self.storage = UnifiedStorage()
+        self.data_dir = data_dir or DATA_DIR
+        self.config_manager = PlaylistConfigManager(data_dir)
+        self.storage = create_storage(data_dir)
         
         # API設定
-        self.service = None
+        self.service = service
         self.api_service_name = 'youtube'
         self.api_version = 'v3'
+        self.rate_limiter = rate_limiter or QuotaRateLimiter()
+        
+        # 並列収集・再開・差分同期用（collect_multiple_playlists の実行中のみ設定）
+        self.checkpoint: Optional[CollectionCheckpoint] = None
+        self.sync_state: Optional[PlaylistSyncState] = None
+        self._batch_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()  # ストレージ・統計の更新を直列化
         
         # 処理統計
         self.stats = {
@@ -53,11 +81,16 @@ class MultiPlaylistCollector:
             'failed_playlists': 0,
             'total_videos_found': 0,
             'new_videos_added': 0,
+            'modified_videos': 0,
+            'unchanged_playlists': 0,
+            'unchanged_pages': 0,
+            'resumed_playlists': 0,
+            'quota_units_used': 0,
             'start_time': None,
             'errors': []
         }
     
-    def _load_credentials(self) -> Optional[Credentials]:
+    def _load_credentials(self) -> Optional['Credentials']:
         """認証情報を読み込み"""
         try:
             # まずJSONファイルとして読み込みを試行
@@ -79,7 +112,7 @@ class MultiPlaylistCollector:
             print("   新規認証を試行します...")
             return self._recreate_credentials()
     
-    def _recreate_credentials(self) -> Optional[Credentials]:
+    def _recreate_credentials(self) -> Optional['Credentials']:
         """認証情報を再生成"""
         try:
             from google_auth_oauthlib.flow import InstalledAppFlow
@@ -106,6 +139,13 @@ class MultiPlaylistCollector:
     
     def _initialize_service(self) -> bool:
         """YouTube APIサービスを初期化"""
+        if self.service is not None:
+            return True
+        
+        if not GOOGLE_API_AVAILABLE:
+            print("❌ API初期化エラー: google-api-python-client がインストールされていません")
+            return False
+        
         try:
             creds = self._load_credentials()
             if not creds:
@@ -122,9 +162,29 @@ class MultiPlaylistCollector:
             print(f"❌ API初期化エラー: {e}")
             return False
     
-    def verify_playlist_access(self, playlist_id: str) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    def _execute(self, request, method: str, etag: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """クォータ分のトークンを確保してからAPIリクエストを実行
+        
+        etag を指定すると If-None-Match 付きで送信し、前回から変更がなければ（304）None を返す
+        """
+        self.rate_limiter.acquire(method)
+        if etag:
+            request.headers['If-None-Match'] = etag
+        try:
+            return request.execute()
+        except Exception as e:
+            if etag and getattr(getattr(e, 'resp', None), 'status', None) == 304:
+                return None
+            raise
+    
+    def verify_playlist_access(self, playlist_id: str,
+                               etag: Optional[str] = None) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
         """プレイリストアクセス可能性を検証
         
+        Args:
+            playlist_id: プレイリストID
+            etag: 前回取得時のETag（変更がなければプレイリスト情報を None で返す）
+        
         Returns:
             (アクセス可能, メッセージ, プレイリスト情報)
         """
@@ -137,7 +197,10 @@ class MultiPlaylistCollector:
                 part='snippet,contentDetails',
                 id=playlist_id
             )
-            playlist_response = playlist_request.execute()
+            playlist_response = self._execute(playlist_request, 'playlists.list', etag)
+            
+            if playlist_response is None:
+                return True, "変更なし（ETag一致）", None
             
             if not playlist_response.get('items'):
                 return False, "プレイリストが見つかりません", None
@@ -150,7 +213,7 @@ class MultiPlaylistCollector:
                 playlistId=playlist_id,
                 maxResults=1
             )
-            items_response = items_request.execute()
+            items_response = self._execute(items_request, 'playlistItems.list')
             
             video_count = playlist_info['contentDetails']['itemCount']
             accessible_videos = len(items_response.get('items', []))
@@ -165,7 +228,8 @@ class MultiPlaylistCollector:
                 'channel_title': playlist_info['snippet']['channelTitle'],
                 'channel_id': playlist_info['snippet']['channelId'],
                 'published_at': playlist_info['snippet']['publishedAt'],
-                'item_count': video_count
+                'item_count': video_count,
+                'etag': playlist_response.get('etag')
             }
             
             return True, f"アクセス可能（動画数: {video_count}）", playlist_data
@@ -179,44 +243,95 @@ class MultiPlaylistCollector:
         Returns:
             (成功フラグ, 動画IDリスト, メッセージ)
         """
+        success, items, _, message = self.collect_playlist_items(playlist_id, max_videos)
+        return success, [video_id for video_id, _ in items], message
+    
+    def collect_playlist_items(
+        self, 
+        playlist_id: str, 
+        max_videos: Optional[int] = None
+    ) -> Tuple[bool, List[Tuple[str, Optional[str]]], Dict[str, Dict[str, Any]], str]:
+        """プレイリストから動画IDと内容ハッシュを収集
+        
+        チェックポイントが有効な場合、取得済みのページはAPIを呼ばずに記録から復元する。
+        差分同期中は前回のページETagを送り、変更のないページ（304）は前回の内容を使う。
+        
+        Returns:
+            (成功フラグ, (動画ID, 内容ハッシュ)のリスト, たどったページ（トークン -> ETag・動画ID）, メッセージ)
+        """
         try:
             print(f"  📥 動画ID収集開始: {playlist_id}")
             
-            all_video_ids = []
+            all_items = []
+            pages = {}
             next_page_token = None
             page = 1
-            collected_videos = 0
             
             while True:
                 print(f"    ページ {page} 処理中...")
                 
-                request = self.service.playlistItems().list(
-                    part='snippet',
-                    playlistId=playlist_id,
-                    maxResults=50,
-                    pageToken=next_page_token
-                )
+                page_token = next_page_token
+                cached_page = self.checkpoint.get_page(playlist_id, page_token) if self.checkpoint else None
+                if cached_page:
+                    page_video_ids = cached_page['video_ids']
+                    page_hashes = cached_page['content_hashes'] or [None] * len(page_video_ids)
+                    page_etag, next_page_token = cached_page['etag'], cached_page['next_page_token']
+                    print(f"    {len(page_video_ids)}件（チェックポイントから復元）")
+                else:
+                    synced_page = self.sync_state.get_page(playlist_id, page_token) if self.sync_state else None
+                    request = self.service.playlistItems().list(
+                        part='snippet',
+                        playlistId=playlist_id,
+                        maxResults=50,
+                        pageToken=page_token
+                    )
+                    
+                    response = self._execute(request, 'playlistItems.list',
+                                             synced_page['etag'] if synced_page else None)
+                    
+                    if response is None:
+                        # 前回から変更なし
+                        page_video_ids = synced_page['video_ids']
+                        page_hashes = [self.sync_state.get_video_hash(video_id) for video_id in page_video_ids]
+                        page_etag, next_page_token = synced_page['etag'], synced_page['next_page_token']
+                        with self._lock:
+                            self.stats['unchanged_pages'] += 1
+                        print(f"    {len(page_video_ids)}件（変更なし）")
+                    else:
+                        page_video_ids = []
+                        page_hashes = []
+                        
+                        for item in response.get('items', []):
+                            snippet = item.get('snippet', {})
+                            resource_id = snippet.get('resourceId', {})
+                            if resource_id.get('kind') == 'youtube#video':
+                                video_id = resource_id.get('videoId')
+                                if video_id:
+                                    page_video_ids.append(video_id)
+                                    page_hashes.append(PlaylistSyncState.content_hash(
+                                        snippet.get('title', ''), snippet.get('description', '')
+                                    ))
+                        
+                        page_etag, next_page_token = response.get('etag'), response.get('nextPageToken')
+                        print(f"    {len(page_video_ids)}件取得")
+                    
+                    if self.checkpoint:
+                        self.checkpoint.save_page(playlist_id, page_token, page_video_ids, next_page_token,
+                                                  page_etag, page_hashes)
                 
-                response = request.execute()
-                page_video_ids = []
+                pages[page_token or ""] = {
+                    'etag': page_etag,
+                    'video_ids': page_video_ids,
+                    'next_page_token': next_page_token
+                }
                 
-                for item in response.get('items', []):
-                    resource_id = item.get('snippet', {}).get('resourceId', {})
-                    if resource_id.get('kind') == 'youtube#video':
-                        video_id = resource_id.get('videoId')
-                        if video_id:
-                            all_video_ids.append(video_id)
-                            page_video_ids.append(video_id)
-                            collected_videos += 1
-                            
-                            # 最大数制限チェック
-                            if max_videos and collected_videos >= max_videos:
-                                print(f"    最大数到達: {max_videos}")
-                                return True, all_video_ids[:max_videos], f"収集完了（制限: {max_videos}）"
+                all_items.extend(zip(page_video_ids, page_hashes))
                 
-                print(f"    {len(page_video_ids)}件取得")
+                # 最大数制限チェック
+                if max_videos and len(all_items) >= max_videos:
+                    print(f"    最大数到達: {max_videos}")
+                    return True, all_items[:max_videos], pages, f"収集完了（制限: {max_videos}）"
                 
-                next_page_token = response.get('nextPageToken')
                 if not next_page_token:
                     break
                 
@@ -227,17 +342,26 @@ class MultiPlaylistCollector:
                     print(f"    ページ制限到達")
                     break
             
-            print(f"  ✅ 収集完了: {len(all_video_ids)}件")
-            return True, all_video_ids, f"収集完了: {len(all_video_ids)}件"
+            print(f"  ✅ 収集完了: {len(all_items)}件")
+            return True, all_items, pages, f"収集完了: {len(all_items)}件"
             
         except Exception as e:
             error_msg = f"動画収集エラー: {e}"
             print(f"  ❌ {error_msg}")
-            return False, [], error_msg
+            return False, [], {}, error_msg
     
-    def collect_video_details(self, video_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    def collect_video_details(self, video_ids: List[str], playlist_id: Optional[str] = None,
+                              raise_errors: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
         """動画詳細情報を一括取得
         
+        50件ずつのバッチを、並列収集中はワーカープールで同時に取得する。
+        playlist_id を指定しチェックポイントが有効な場合、取得済みのバッチは記録から復元する。
+        
+        Args:
+            video_ids: 動画IDリスト
+            playlist_id: チェックポイントの記録先プレイリストID
+            raise_errors: バッチのAPIエラーを失敗IDとして扱わず例外として送出するか
+        
         Returns:
             (動画詳細リスト, 失敗したIDリスト)
         """
@@ -246,60 +370,85 @@ class MultiPlaylistCollector:
         
         # 50件ずつバッチ処理
         batch_size = 50
+        batches = [video_ids[i:i + batch_size] for i in range(0, len(video_ids), batch_size)]
         
         print(f"  📋 動画詳細取得: {len(video_ids)}件")
         
-        for i in range(0, len(video_ids), batch_size):
-            batch_ids = video_ids[i:i + batch_size]
-            print(f"    バッチ {i//batch_size + 1}: {len(batch_ids)}件")
-            
+        def fetch(numbered_batch: Tuple[int, List[str]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+            batch_number, batch_ids = numbered_batch
             try:
-                request = self.service.videos().list(
-                    part='snippet,statistics,contentDetails',
-                    id=','.join(batch_ids)
-                )
-                response = request.execute()
-                
-                batch_details = []
-                found_ids = set()
-                
-                for item in response.get('items', []):
-                    video_data = {
-                        'id': item['id'],
-                        'title': item['snippet']['title'],
-                        'description': item['snippet']['description'],
-                        'published_at': item['snippet']['publishedAt'],
-                        'channel_title': item['snippet']['channelTitle'],
-                        'channel_id': item['snippet']['channelId'],
-                        'duration': item['contentDetails']['duration'],
-                        'view_count': int(item['statistics'].get('viewCount', 0)),
-                        'like_count': int(item['statistics'].get('likeCount', 0)),
-                        'comment_count': int(item['statistics'].get('commentCount', 0)),
-                        'tags': item['snippet'].get('tags', []),
-                        'category_id': item['snippet'].get('categoryId', ''),
-                        'collected_at': datetime.now().isoformat()
-                    }
-                    
-                    video_details.append(video_data)
-                    batch_details.append(video_data)
-                    found_ids.add(item['id'])
-                
-                # 見つからなかった動画
-                missing_ids = set(batch_ids) - found_ids
-                failed_ids.extend(missing_ids)
-                
-                print(f"      成功: {len(batch_details)}件, 失敗: {len(missing_ids)}件")
-                
-                # API制限を考慮した待機
-                time.sleep(0.1)
-                
+                return self._fetch_video_batch(batch_number, batch_ids, playlist_id)
             except Exception as e:
+                if raise_errors:
+                    raise
                 print(f"      ❌ バッチエラー: {e}")
-                failed_ids.extend(batch_ids)
+                return [], list(batch_ids)
+        
+        if self._batch_executor and len(batches) > 1:
+            results = list(self._batch_executor.map(fetch, enumerate(batches, 1)))
+        else:
+            results = [fetch(numbered_batch) for numbered_batch in enumerate(batches, 1)]
+        
+        for batch_details, batch_failed_ids in results:
+            video_details.extend(batch_details)
+            failed_ids.extend(batch_failed_ids)
         
         print(f"  ✅ 詳細取得完了: 成功 {len(video_details)}件, 失敗 {len(failed_ids)}件")
         return video_details, failed_ids
     
+    def _fetch_video_batch(self, batch_number: int, batch_ids: List[str],
+                           playlist_id: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """動画詳細を1バッチ（最大50件）取得（APIエラーは例外として送出）
+        
+        Returns:
+            (動画詳細リスト, 失敗したIDリスト)
+        """
+        checkpoint = self.checkpoint if playlist_id else None
+        cached_batch = checkpoint.get_batch(playlist_id, batch_ids) if checkpoint else None
+        if cached_batch:
+            print(f"    バッチ {batch_number}: {len(batch_ids)}件（チェックポイントから復元）")
+            return cached_batch['details'], cached_batch['missing_ids']
+        
+        print(f"    バッチ {batch_number}: {len(batch_ids)}件")
+        
+        request = self.service.videos().list(
+            part='snippet,statistics,contentDetails',
+            id=','.join(batch_ids)
+        )
+        response = self._execute(request, 'videos.list')
+        
+        batch_details = []
+        found_ids = set()
+        
+        for item in response.get('items', []):
+            video_data = {
+                'id': item['id'],
+                'title': item['snippet']['title'],
+                'description': item['snippet']['description'],
+                'published_at': item['snippet']['publishedAt'],
+                'channel_title': item['snippet']['channelTitle'],
+                'channel_id': item['snippet']['channelId'],
+                'duration': item['contentDetails']['duration'],
+                'view_count': int(item['statistics'].get('viewCount', 0)),
+                'like_count': int(item['statistics'].get('likeCount', 0)),
+                'comment_count': int(item['statistics'].get('commentCount', 0)),
+                'tags': item['snippet'].get('tags', []),
+                'category_id': item['snippet'].get('categoryId', ''),
+                'collected_at': datetime.now().isoformat()
+            }
+            
+            batch_details.append(video_data)
+            found_ids.add(item['id'])
+        
+        # 見つからなかった動画
+        missing_ids = [vid for vid in batch_ids if vid not in found_ids]
+        
+        print(f"      成功: {len(batch_details)}件, 失敗: {len(missing_ids)}件")
+        
+        if checkpoint:
+            checkpoint.save_batch(playlist_id, batch_ids, batch_details, missing_ids)
+        return batch_details, missing_ids
+    
     def process_playlist_by_id(self, playlist_id: str, display_name: str = "") -> Tuple[bool, str, Dict[str, Any]]:
         """プレイリストIDを直接指定して処理（設定管理なし）
         
@@ -343,7 +492,8 @@ class MultiPlaylistCollector:
                 return False, collect_msg, result
             
             result['videos_found'] = len(video_ids)
-            self.stats['total_videos_found'] += len(video_ids)
+            with self._lock:
+                self.stats['total_videos_found'] += len(video_ids)
             
             # 新規動画の特定
             db = self.storage.load_database()
@@ -520,6 +670,7 @@ class MultiPlaylistCollector:
                     existing_playlist.video_ids.append(video_id)
                     existing_playlist.total_videos = len(existing_playlist.video_ids)
                     existing_playlist.updated_at = datetime.now()
+                playlist = existing_playlist
             else:
                 # 手動追加プレイリストを新規作成
                 metadata = PlaylistMetadata(
@@ -570,6 +721,8 @@ class MultiPlaylistCollector:
             'videos_found': 0,
             'new_videos': 0,
             'updated_videos': 0,
+            'modified_videos': 0,
+            'unchanged': False,
             'errors': []
         }
         
@@ -578,17 +731,30 @@ class MultiPlaylistCollector:
             print(f"   ID: {playlist_id}")
             print(f"   カテゴリ: {config.category.value}")
             
-            # プレイリストアクセス検証
-            accessible, verify_msg, playlist_info = self.verify_playlist_access(playlist_id)
-            if not accessible:
-                error_msg = f"アクセス検証失敗: {verify_msg}"
-                result['errors'].append(error_msg)
-                return False, error_msg, result
+            # プレイリストアクセス検証（再開時は検証済みの情報、差分同期で変更がなければ前回の情報を使用）
+            playlist_modified = True
+            playlist_info = self.checkpoint.get_playlist_info(playlist_id) if self.checkpoint else None
+            if playlist_info:
+                verify_msg = "検証済み（チェックポイントから再開）"
+            else:
+                synced_info = self.sync_state.get_playlist_info(playlist_id) if self.sync_state else None
+                accessible, verify_msg, playlist_info = self.verify_playlist_access(
+                    playlist_id, synced_info.get('etag') if synced_info else None
+                )
+                if not accessible:
+                    error_msg = f"アクセス検証失敗: {verify_msg}"
+                    result['errors'].append(error_msg)
+                    return False, error_msg, result
+                if playlist_info is None:
+                    playlist_info = synced_info
+                    playlist_modified = False
+                if self.checkpoint:
+                    self.checkpoint.save_playlist_info(playlist_id, playlist_info)
             
             print(f"   ✅ {verify_msg}")
             
             # 動画ID収集
-            success, video_ids, collect_msg = self.collect_playlist_videos(
+            success, items, pages, collect_msg = self.collect_playlist_items(
                 playlist_id, 
                 config.max_videos
             )
@@ -597,48 +763,89 @@ class MultiPlaylistCollector:
                 result['errors'].append(collect_msg)
                 return False, collect_msg, result
             
+            video_ids = [video_id for video_id, _ in items]
+            content_hashes = dict(items)
             result['videos_found'] = len(video_ids)
-            self.stats['total_videos_found'] += len(video_ids)
+            with self._lock:
+                self.stats['total_videos_found'] += len(video_ids)
             
-            # 新規動画の特定
-            db = self.storage.load_database()
-            existing_playlist = db.playlists.get(playlist_id)
-            
-            if existing_playlist:
-                existing_video_ids = set(existing_playlist.video_ids)
+            # 新規動画の特定（差分同期では内容が変わった登録済み動画も対象）
+            with self._lock:
+                db = self.storage.load_database()
+                existing_playlist = db.playlists.get(playlist_id)
+                existing_video_ids = set(existing_playlist.video_ids) if existing_playlist else set()
                 new_video_ids = [vid for vid in video_ids if vid not in existing_video_ids]
-            else:
-                new_video_ids = video_ids
-                existing_video_ids = set()
+                
+                if self.sync_state:
+                    fetch_ids, modified_ids, link_ids = self._plan_delta_sync(
+                        db, video_ids, content_hashes, existing_video_ids
+                    )
+                else:
+                    fetch_ids, modified_ids, link_ids = new_video_ids, [], []
             
             result['new_videos'] = len(new_video_ids)
             
             print(f"   📊 既存: {len(existing_video_ids)}件, 新規: {len(new_video_ids)}件")
+            if self.sync_state:
+                print(f"   🔍 差分同期: 詳細取得 {len(fetch_ids)}件（内容変更 {len(modified_ids)}件）, "
+                      f"登録済み動画の追加 {len(link_ids)}件")
             
-            if new_video_ids:
-                # 新規動画の詳細取得
-                video_details, failed_ids = self.collect_video_details(new_video_ids)
+            video_details = []
+            if fetch_ids:
+                # 動画の詳細取得（途中のAPIエラーはプレイリストごと失敗とし、再実行時に続きから取得）
+                video_details, failed_ids = self.collect_video_details(
+                    fetch_ids, playlist_id, raise_errors=self.checkpoint is not None
+                )
                 
                 if failed_ids:
                     result['errors'].append(f"動画詳細取得失敗: {len(failed_ids)}件")
+            
+            # 差分同期で何も変わっていなければ、プレイリスト情報・JSONファイルの書き直しを省略
+            unchanged = (self.sync_state is not None and not playlist_modified and existing_playlist is not None
+                         and existing_playlist.video_ids == video_ids and not fetch_ids and not link_ids)
+            
+            with self._lock:
+                if modified_ids:
+                    # 内容が変わった動画を更新し、再分析待ちに戻す
+                    modified_count = self._update_modified_videos(video_details, modified_ids)
+                    result['modified_videos'] = modified_count
+                    self.stats['modified_videos'] += modified_count
+                    
+                    print(f"   ✏️ 内容変更: {modified_count}件（再分析待ち）")
                 
-                # データベースに追加
-                added_count = self._add_videos_to_database(
-                    video_details, 
-                    playlist_id, 
-                    config
-                )
+                if video_details or link_ids:
+                    # データベースに追加
+                    added_count = self._add_videos_to_database(
+                        video_details, 
+                        playlist_id, 
+                        config
+                    )
+                    added_count += self._link_videos_to_playlist(link_ids, playlist_id)
+                    
+                    result['updated_videos'] = added_count
+                    self.stats['new_videos_added'] += added_count
+                    
+                    print(f"   ✅ 新規動画追加: {added_count}件")
                 
-                result['updated_videos'] = added_count
-                self.stats['new_videos_added'] += added_count
+                if unchanged:
+                    result['unchanged'] = True
+                    self.stats['unchanged_playlists'] += 1
+                    print(f"   ⏭️ 変更なし（プレイリスト情報・JSONファイルの更新を省略）")
+                else:
+                    # プレイリスト情報更新
+                    self._update_playlist_metadata(playlist_id, playlist_info, video_ids, config)
+                    
+                    # プレイリスト専用JSONファイルを生成
+                    self._generate_playlist_json(playlist_id, playlist_info, video_ids, config)
                 
-                print(f"   ✅ 新規動画追加: {added_count}件")
-            
-            # プレイリスト情報更新
-            self._update_playlist_metadata(playlist_id, playlist_info, video_ids, config)
-            
-            # プレイリスト専用JSONファイルを生成
-            self._generate_playlist_json(playlist_id, playlist_info, video_ids, config)
+                # 次回の差分同期の比較元を更新
+                if self.sync_state:
+                    self.sync_state.commit_playlist(playlist_id, playlist_info, pages, content_hashes)
+                
+                # 再開時に取り込み済みとして読み飛ばせるよう、保存してから処理済みにする
+                if self.checkpoint:
+                    self.storage.save_database()
+                    self.checkpoint.mark_completed(playlist_id)
             
             return True, f"処理完了: 新規 {result['new_videos']}件", result
             
@@ -648,6 +855,99 @@ class MultiPlaylistCollector:
             print(f"   ❌ {error_msg}")
             return False, error_msg, result
     
+    def _plan_delta_sync(
+        self, 
+        db, 
+        video_ids: List[str], 
+        content_hashes: Dict[str, Optional[str]], 
+        existing_video_ids: set
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """差分同期で処理する動画を分類
+        
+        前回の内容ハッシュと一致する動画は詳細を取得しない（登録済みで未所属ならプレイリストへの追加のみ）。
+        
+        Returns:
+            (詳細を取得する動画ID, うち内容が変わった登録済み動画ID, 詳細を取得せずに追加する登録済み動画ID)
+        """
+        fetch_ids = []
+        modified_ids = []
+        link_ids = []
+        
+        for video_id in dict.fromkeys(video_ids):
+            registered = video_id in db.videos
+            previous_hash = self.sync_state.get_video_hash(video_id)
+            if previous_hash is None and registered:
+                # 差分同期を始める前に登録された動画は、登録内容を比較元にする
+                metadata = db.videos[video_id].metadata
+                previous_hash = PlaylistSyncState.content_hash(metadata.title, metadata.description)
+            
+            if previous_hash != content_hashes[video_id] or not (registered or video_id in existing_video_ids):
+                fetch_ids.append(video_id)
+                if registered:
+                    modified_ids.append(video_id)
+            elif registered and video_id not in existing_video_ids:
+                link_ids.append(video_id)
+        
+        return fetch_ids, modified_ids, link_ids
+    
+    def _update_modified_videos(self, video_details: List[Dict[str, Any]], video_ids: List[str]) -> int:
+        """内容が変わった登録済み動画のメタデータを更新し、再分析待ちに戻す"""
+        targets = set(video_ids)
+        db = self.storage.load_database()
+        updated_count = 0
+        
+        for video_data in video_details:
+            if video_data['id'] not in targets or video_data['id'] not in db.videos:
+                continue
+            try:
+                video = db.videos[video_data['id']]
+                video.metadata = VideoMetadata(
+                    id=video_data['id'],
+                    title=video_data['title'],
+                    description=video_data['description'],
+                    published_at=datetime.fromisoformat(video_data['published_at'].replace('Z', '+00:00')),
+                    channel_title=video_data['channel_title'],
+                    channel_id=video_data['channel_id'],
+                    duration=video_data['duration'],
+                    view_count=video_data['view_count'],
+                    like_count=video_data['like_count'],
+                    comment_count=video_data['comment_count'],
+                    tags=video_data['tags'],
+                    category_id=video_data['category_id'],
+                    collected_at=datetime.fromisoformat(video_data['collected_at'])
+                )
+                
+                # 分析対象の内容が変わったため、以前の失敗履歴は持ち越さない
+                if video.analysis_status != AnalysisStatus.SKIPPED:
+                    video.analysis_status = AnalysisStatus.PENDING
+                    video.analysis_error = None
+                    video.retry_count = 0
+                    video.last_analysis_error = None
+                video.updated_at = datetime.now()
+                self.storage.add_video(video)
+                updated_count += 1
+                
+            except Exception as e:
+                print(f"      ❌ 動画更新エラー ({video_data['id']}): {e}")
+        
+        return updated_count
+    
+    def _link_videos_to_playlist(self, video_ids: List[str], playlist_id: str) -> int:
+        """登録済み動画をプレイリストに追加（詳細は再取得しない）"""
+        db = self.storage.load_database()
+        linked_count = 0
+        
+        for video_id in video_ids:
+            video = db.videos.get(video_id)
+            if video and playlist_id not in video.playlists:
+                video.playlists.append(playlist_id)
+                video.playlist_positions[playlist_id] = len(video.playlists) - 1
+                video.updated_at = datetime.now()
+                self.storage.add_video(video)
+                linked_count += 1
+        
+        return linked_count
+    
     def _add_videos_to_database(
         self, 
         video_details: List[Dict[str, Any]], 
@@ -895,7 +1195,7 @@ class MultiPlaylistCollector:
             import json
             
             # プレイリストディレクトリ
-            playlist_dir = Path("D:/setsuna_bot/youtube_knowledge_system/data/playlists")
+            playlist_dir = self.data_dir / "playlists"
             playlist_dir.mkdir(parents=True, exist_ok=True)
             
             # プレイリスト専用ファイル
@@ -996,14 +1296,26 @@ class MultiPlaylistCollector:
         self, 
         playlist_ids: Optional[List[str]] = None,
         enabled_only: bool = True,
-        priority_order: bool = True
+        priority_order: bool = True,
+        max_workers: int = 1,
+        resume: bool = True,
+        incremental: bool = False
     ) -> Dict[str, Any]:
         """複数プレイリストの一括収集
         
+        途中経過はチェックポイント（collection_checkpoint.jsonl）に記録し、
+        中断された場合は次回の実行で取得済みのページ・バッチ・プレイリストを読み飛ばして再開する。
+        
+        差分同期（incremental=True）では前回のETag・内容ハッシュ（playlist_sync_state.json）と比較し、
+        変更のないページ・動画は読み飛ばして、新規・内容が変わった動画だけ詳細を取得・再分析待ちにする。
+        
         Args:
             playlist_ids: 処理対象のプレイリストID（None=設定から取得）
             enabled_only: 有効なプレイリストのみ処理
             priority_order: 優先度順で処理
+            max_workers: 同時に処理するプレイリスト数・動画詳細バッチ数（1=順次処理）
+            resume: 前回中断時のチェックポイントから再開するか（False=最初からやり直す）
+            incremental: 差分同期を行うか（False=全ページを取得し直す）
         """
         print("🚀 マルチプレイリスト収集開始")
         print("=" * 60)
@@ -1042,34 +1354,68 @@ class MultiPlaylistCollector:
         for i, config in enumerate(configs, 1):
             print(f"  {i}. {config.display_name} (優先度: {config.priority})")
         
-        # 順次処理
-        results = []
-        for config in configs:
-            success, message, result = self.process_single_playlist(config)
-            
-            self.stats['processed_playlists'] += 1
-            
-            if success:
-                self.stats['successful_playlists'] += 1
-            else:
-                self.stats['failed_playlists'] += 1
-                self.stats['errors'].append(f"{config.display_name}: {message}")
-            
-            results.append({
-                'config': config,
-                'success': success,
-                'message': message,
-                'result': result
-            })
-            
-            # 進捗表示
-            progress = (self.stats['processed_playlists'] / self.stats['total_playlists']) * 100
-            print(f"\n📊 進捗: {progress:.1f}% ({self.stats['processed_playlists']}/{self.stats['total_playlists']})")
+        # チェックポイント
+        self.checkpoint = CollectionCheckpoint(self.data_dir / "collection_checkpoint.jsonl")
+        if not resume:
+            self.checkpoint.clear()
+        elif self.checkpoint.has_progress():
+            checkpoint_stats = self.checkpoint.get_stats()
+            print(f"♻️ 前回の中断地点から再開: 処理済み {checkpoint_stats['completed_playlists']}プレイリスト, "
+                  f"取得済み {checkpoint_stats['pages']}ページ / {checkpoint_stats['batches']}バッチ")
+        
+        # 差分同期
+        if incremental:
+            self.sync_state = PlaylistSyncState(self.data_dir / "playlist_sync_state.json")
+            sync_stats = self.sync_state.get_stats()
+            print(f"🔍 差分同期: 前回の同期状態 {sync_stats['playlists']}プレイリスト, {sync_stats['videos']}動画")
+        
+        def process(config: PlaylistConfig) -> Tuple[bool, str, Dict[str, Any]]:
+            if self.checkpoint.is_completed(config.playlist_id):
+                with self._lock:
+                    self.stats['resumed_playlists'] += 1
+                print(f"\n⏭️ 処理済み（チェックポイント）: {config.display_name}")
+                return True, "処理済み（チェックポイントから再開）", {'playlist_id': config.playlist_id,
+                                                                  'display_name': config.display_name,
+                                                                  'errors': []}
+            return self.process_single_playlist(config)
+        
+        if max_workers > 1:
+            # 並列処理（プレイリスト単位・動画詳細バッチ単位で別々のプールを使用）
+            print(f"並列処理: {max_workers}ワーカー")
+            with ThreadPoolExecutor(max_workers=max_workers) as playlist_pool, \
+                    ThreadPoolExecutor(max_workers=max_workers) as batch_pool:
+                self._batch_executor = batch_pool
+                futures = {playlist_pool.submit(process, config): config for config in configs}
+                outcomes = ((futures[future], *future.result()) for future in as_completed(futures))
+                results = self._record_playlist_results(outcomes)
+            self._batch_executor = None
+            order = {config.playlist_id: i for i, config in enumerate(configs)}
+            results.sort(key=lambda item: order[item['config'].playlist_id])
+        else:
+            # 順次処理
+            results = self._record_playlist_results(
+                (config, *process(config)) for config in configs
+            )
+        
+        # 最終保存（一括取り込み後はスナップショットへ圧縮し、他モジュールからも最新内容を読めるようにする）
+        if incremental and self.stats['unchanged_playlists'] == len(configs):
+            print(f"\n💾 変更なし（データベースの保存を省略）")
+        else:
+            print(f"\n💾 データベース保存中...")
+            self.storage.save_database(compact=True)
+            print(f"   ✅ 保存完了")
+        
+        if self.sync_state:
+            self.sync_state.save()
+            self.sync_state = None
         
-        # 最終保存
-        print(f"\n💾 データベース保存中...")
-        self.storage.save_database()
-        print(f"   ✅ 保存完了")
+        # すべて成功した場合のみチェックポイントを削除（失敗分は再実行で続きから）
+        if self.stats['failed_playlists'] == 0:
+            self.checkpoint.clear()
+        else:
+            print(f"♻️ チェックポイントを保持しました（再実行で失敗したプレイリストの続きから再開）")
+        self.checkpoint = None
+        self.stats['quota_units_used'] = self.rate_limiter.units_used
         
         # 結果サマリー
         duration = (datetime.now() - self.stats['start_time']).total_seconds()
@@ -1082,6 +1428,10 @@ class MultiPlaylistCollector:
         print(f"失敗: {self.stats['failed_playlists']}")
         print(f"発見動画: {self.stats['total_videos_found']}")
         print(f"新規追加: {self.stats['new_videos_added']}")
+        if incremental:
+            print(f"内容変更: {self.stats['modified_videos']}")
+            print(f"変更なし: {self.stats['unchanged_playlists']}プレイリスト, {self.stats['unchanged_pages']}ページ")
+        print(f"クォータ消費: {self.stats['quota_units_used']} units")
         
         if self.stats['errors']:
             print(f"\nエラー:")
@@ -1093,6 +1443,31 @@ class MultiPlaylistCollector:
             'results': results,
             'stats': self.stats
         }
+    
+    def _record_playlist_results(self, outcomes) -> List[Dict[str, Any]]:
+        """プレイリストごとの処理結果を集計（完了順）"""
+        results = []
+        for config, success, message, result in outcomes:
+            self.stats['processed_playlists'] += 1
+            
+            if success:
+                self.stats['successful_playlists'] += 1
+            else:
+                self.stats['failed_playlists'] += 1
+                self.stats['errors'].append(f"{config.display_name}: {message}")
+            
+            results.append({
+                'config': config,
+                'success': success,
+                'message': message,
+                'result': result
+            })
+            
+            # 進捗表示
+            progress = (self.stats['processed_playlists'] / self.stats['total_playlists']) * 100
+            print(f"\n📊 進捗: {progress:.1f}% ({self.stats['processed_playlists']}/{self.stats['total_playlists']})")
+        
+        return results
 
 
 # テスト用関数
@@ -1135,14 +1510,17 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         if sys.argv[1] == "test":
             test_multi_playlist_collector()
-        elif sys.argv[1] == "collect":
+        elif sys.argv[1] in ("collect", "sync"):
+            max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
             collector = MultiPlaylistCollector()
-            result = collector.collect_multiple_playlists()
+            result = collector.collect_multiple_playlists(max_workers=max_workers,
+                                                          incremental=sys.argv[1] == "sync")
             if not result['success']:
                 print(f"❌ 収集失敗: {result.get('error')}")
         else:
             print("使用方法:")
-            print("  python multi_playlist_collector.py test     # テスト実行")
-            print("  python multi_playlist_collector.py collect  # 一括収集")
+            print("  python multi_playlist_collector.py test         # テスト実行")
+            print("  python multi_playlist_collector.py collect [N]  # 一括収集（N=並列ワーカー数）")
+            print("  python multi_playlist_collector.py sync [N]     # 差分同期（変更分のみ取得）")
     else:
         test_multi_playlist_collector()
\ No newline at end of file
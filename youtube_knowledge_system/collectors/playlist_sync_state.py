@@ -0,0 +1,119 @@
+"""
+プレイリスト差分同期状態
+
+前回の同期で受け取ったプレイリスト・ページのETagと、動画ごとの内容ハッシュ（タイトル・概要欄）を保持し、
+次回の同期で変更のないページ・動画を読み飛ばせるようにする
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+
+class PlaylistSyncState:
+    """差分同期状態管理クラス
+
+    状態はプレイリストの処理が成功したときだけ commit_playlist() で反映するため、
+    途中で失敗したプレイリストのETagが残って変更を見落とすことはない。
+    """
+
+    def __init__(self, state_file: Path):
+        self.state_file = state_file
+        self._lock = threading.RLock()
+        self._playlists: Dict[str, Dict[str, Any]] = {}
+        self._video_hashes: Dict[str, str] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        """同期状態を読み込み"""
+        if not self.state_file.exists():
+            return
+
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._playlists = data.get('playlists', {})
+            self._video_hashes = data.get('video_hashes', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 差分同期状態を読み込めません（全件を再同期します）: {e}")
+
+    @staticmethod
+    def content_hash(title: str, description: str) -> str:
+        """動画の内容ハッシュ（分析対象のタイトル・概要欄から算出）"""
+        return hashlib.sha1(f"{title}\n{description}".encode('utf-8')).hexdigest()
+
+    def get_playlist_info(self, playlist_id: str) -> Optional[Dict[str, Any]]:
+        """前回同期時のプレイリスト情報（ETagを含む）を取得"""
+        with self._lock:
+            playlist = self._playlists.get(playlist_id)
+            return playlist['info'] if playlist else None
+
+    def get_page(self, playlist_id: str, page_token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """前回同期時のページ（ETag・動画ID・次ページトークン）を取得"""
+        with self._lock:
+            playlist = self._playlists.get(playlist_id)
+            return playlist['pages'].get(page_token or "") if playlist else None
+
+    def get_video_hash(self, video_id: str) -> Optional[str]:
+        """前回同期時の動画の内容ハッシュを取得"""
+        with self._lock:
+            return self._video_hashes.get(video_id)
+
+    def commit_playlist(self, playlist_id: str, info: Dict[str, Any], pages: Dict[str, Dict[str, Any]],
+                        content_hashes: Dict[str, Optional[str]]) -> None:
+        """
+        同期に成功したプレイリストの状態を反映
+
+        Args:
+            playlist_id: プレイリストID
+            info: プレイリスト情報（ETagを含む）
+            pages: 今回たどったページ（ページトークン -> ETag・動画ID・次ページトークン）
+            content_hashes: 動画ID -> 内容ハッシュ
+        """
+        with self._lock:
+            self._playlists[playlist_id] = {
+                'info': info,
+                'pages': pages,
+                'synced_at': datetime.now().isoformat()
+            }
+            self._video_hashes.update(
+                (video_id, content_hash) for video_id, content_hash in content_hashes.items() if content_hash
+            )
+            self._dirty = True
+
+    def save(self) -> None:
+        """変更があれば同期状態を保存（一時ファイルから置き換え）"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'playlists': self._playlists, 'video_hashes': self._video_hashes},
+                          f, ensure_ascii=False)
+            os.replace(temp_file, self.state_file)
+            self._dirty = False
+
+    def clear(self) -> None:
+        """同期状態を削除（次回は全件同期）"""
+        with self._lock:
+            self._playlists.clear()
+            self._video_hashes.clear()
+            self._dirty = False
+            if self.state_file.exists():
+                self.state_file.unlink()
+
+    def get_stats(self) -> Dict[str, int]:
+        """統計情報を取得"""
+        with self._lock:
+            return {
+                'playlists': len(self._playlists),
+                'pages': sum(len(p['pages']) for p in self._playlists.values()),
+                'videos': len(self._video_hashes)
+            }
@@ -0,0 +1,102 @@
+"""
+YouTube APIクォータ連動レートリミッター
+
+API呼び出しごとのクォータ消費量（units）をトークンバケットから差し引き、
+複数スレッドからの呼び出しを一定のペースに平準化する
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+# YouTube Data API v3 のクォータ消費量（units/リクエスト）
+API_QUOTA_COSTS: Dict[str, int] = {
+    'playlists.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+    'channels.list': 1,
+    'search.list': 100
+}
+
+
+class QuotaExceededError(Exception):
+    """設定した日次クォータを使い切った"""
+
+
+class QuotaRateLimiter:
+    """クォータ消費量で補充・消費するトークンバケット（スレッドセーフ）"""
+
+    def __init__(self, units_per_second: float = 10.0, burst: float = 10.0,
+                 daily_quota: Optional[int] = None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            units_per_second: 1秒あたりに補充するunits
+            burst: バケット容量（連続して消費できるunits）
+            daily_quota: 消費できるunitsの上限（None=無制限）
+            clock: 時刻取得関数（テスト用に差し替え可能）
+            sleep: 待機関数（テスト用に差し替え可能）
+        """
+        self.units_per_second = units_per_second
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self._clock = clock
+        self._sleep = sleep
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated_at = clock()
+
+        # 統計
+        self.units_used = 0
+        self.requests = 0
+        self.total_wait = 0.0
+
+    def acquire(self, method: str) -> float:
+        """
+        API呼び出し前にクォータ分のトークンを確保（不足時は補充されるまで待機）
+
+        Args:
+            method: APIメソッド名（'videos.list' など）
+
+        Returns:
+            float: 待機した秒数
+        """
+        cost = API_QUOTA_COSTS.get(method, 1)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                if self.daily_quota is not None and self.units_used + cost > self.daily_quota:
+                    raise QuotaExceededError(
+                        f"クォータ上限に達しました: {self.units_used}/{self.daily_quota} units ({method})"
+                    )
+
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.units_per_second)
+                self._updated_at = now
+
+                # バケット容量を超えるコストは満杯時に前借り（残高がマイナスになる）
+                # 補充計算の丸め誤差で待機が終わらなくならないよう、わずかな不足は許容
+                needed = min(cost, self.burst)
+                if self._tokens >= needed - 1e-9:
+                    self._tokens -= cost
+                    self.units_used += cost
+                    self.requests += 1
+                    self.total_wait += waited
+                    return waited
+
+                delay = (needed - self._tokens) / self.units_per_second
+
+            self._sleep(delay)
+            waited += delay
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報を取得"""
+        with self._lock:
+            return {
+                'units_used': self.units_used,
+                'requests': self.requests,
+                'total_wait': self.total_wait,
+                'daily_quota': self.daily_quota
+            }
@@ -78,6 +78,9 @@ DATA_DIR = get_data_dir()
 HISTORY_DATA_FILE = DATA_DIR / "watch_history.json"
 PLAYLIST_DATA_FILE = DATA_DIR / "playlists.json"
 
+# ストレージバックエンド（"json": JSONスナップショット＋ジャーナル / "binary": バイナリスナップショット＋ジャーナル / "sqlite": SQLite）
+STORAGE_BACKEND = "json"
+
 # 取得制限設定
 MAX_RESULTS_PER_REQUEST = 50  # YouTube API の制限
 MAX_TOTAL_VIDEOS = 1000  # 一度に取得する最大動画数
@@ -0,0 +1,494 @@
+"""
+知識データベースのバイナリ直列化
+
+JSON（to_dict/from_dict）と同じ内容を、列ごとの固定長配列（array）と
+重複を除いた1つのUTF-8文字列表に詰めて保存する。
+数値・日時・列挙値は列単位でまとめて変換するため、動画ごとの辞書構築や
+ISO文字列の解析が不要になる。
+"""
+
+import json
+import struct
+import sys
+from array import array
+from dataclasses import fields, MISSING
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from core.data_models import (
+    ContentSource, AnalysisStatus, VideoMetadata, CreatorInfo, MusicInfo, CreativeInsight,
+    Video, PlaylistMetadata, Playlist, KnowledgeDatabase
+)
+
+
+MAGIC = b"YKDB"
+FORMAT_VERSION = 1  # 列の追加は後方互換（既定値のあるフィールドは欠けていても読める）
+
+_HEADER = struct.Struct("<4sHHI")  # マジック, 形式バージョン, フラグ, セクション数
+_SECTION = struct.Struct("<H1sQ")  # 名前の長さ, 型コード, バイト数
+_RAW = b"s"  # 配列ではない生バイト列のセクション
+_SWAP_BYTES = sys.byteorder != "little"  # ファイル上は常にリトルエンディアン
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NAIVE = -2 ** 31  # 日時列のタイムゾーン欄: tzinfo なし
+_NONE = 2 ** 31 - 1  # 日時列のタイムゾーン欄: 値が None
+
+# 列の種類
+STR = "str"  # 文字列表への参照（None 可）
+INT = "int"  # int64
+FLOAT = "float"  # float64
+DATETIME = "datetime"  # UNIX時刻（マイクロ秒）＋UTCオフセット（秒）
+VALUE = "value"  # 任意のJSON値（文字列表にJSON文字列として格納）
+STR_LIST = "str_list"  # 文字列リスト（件数列＋参照列）
+STR_INT_MAP = "str_int_map"  # 文字列→整数の辞書（キーのリスト＋値のリスト）
+
+# 入れ子のデータクラス（("nested"|"optional"|"list", クラス)）
+SCHEMA: Dict[type, Dict[str, Any]] = {
+    VideoMetadata: {
+        "id": STR, "title": STR, "description": STR, "published_at": DATETIME,
+        "channel_title": STR, "channel_id": STR, "duration": STR, "view_count": INT,
+        "like_count": INT, "comment_count": INT, "tags": STR_LIST, "category_id": STR,
+        "collected_at": DATETIME
+    },
+    CreatorInfo: {"name": STR, "role": STR, "confidence": FLOAT},
+    MusicInfo: {"lyrics": STR, "genre": STR, "bpm": VALUE, "key": STR, "mood": STR},
+    CreativeInsight: {
+        "creators": ("list", CreatorInfo), "music_info": ("optional", MusicInfo),
+        "tools_used": STR_LIST, "themes": STR_LIST, "visual_elements": STR_LIST,
+        "analysis_confidence": FLOAT, "analysis_timestamp": DATETIME,
+        "analysis_model": STR, "insights": STR
+    },
+    Video: {
+        "source": ContentSource, "metadata": ("nested", VideoMetadata), "playlists": STR_LIST,
+        "playlist_positions": STR_INT_MAP, "analysis_status": AnalysisStatus,
+        "creative_insight": ("optional", CreativeInsight), "analysis_error": STR,
+        "created_at": DATETIME, "updated_at": DATETIME, "retry_count": INT,
+        "last_analysis_error": STR
+    },
+    PlaylistMetadata: {
+        "id": STR, "title": STR, "description": STR, "channel_title": STR, "channel_id": STR,
+        "published_at": DATETIME, "item_count": INT, "collected_at": DATETIME
+    },
+    Playlist: {
+        "source": ContentSource, "metadata": ("nested", PlaylistMetadata), "video_ids": STR_LIST,
+        "last_full_sync": DATETIME, "last_incremental_sync": DATETIME, "sync_settings": VALUE,
+        "total_videos": INT, "analyzed_videos": INT, "analysis_success_rate": FLOAT,
+        "created_at": DATETIME, "updated_at": DATETIME
+    }
+}
+
+# to_dict() の標準キー（これ以外は付加情報として保存）
+_DATABASE_KEYS = ("videos", "playlists", "creator_index", "tag_index", "theme_index",
+                  "last_updated", "total_videos", "total_playlists", "database_version")
+
+
+class _ColumnWriter:
+    """列データの書き出し
+
+    列の型に合わない値（文字列の再生回数など）は、行番号ごとの例外値としてJSONで保存する。
+    """
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._string_refs: Dict[str, int] = {}
+        self.sections: Dict[str, array] = {}
+        self.exceptions: Dict[str, Dict[int, Any]] = {}
+
+    def _intern(self, value: str) -> int:
+        ref = self._string_refs.get(value)
+        if ref is None:
+            ref = self._string_refs[value] = len(self.strings)
+            self.strings.append(value)
+        return ref
+
+    def _pack(self, name: str, typecode: str, values: List[Any], fits) -> None:
+        try:
+            if all(map(fits, values)):
+                self.sections[name] = array(typecode, values)
+                return
+        except OverflowError:
+            pass
+
+        packed = array(typecode)
+        exceptions = self.exceptions.setdefault(name, {})
+        for row, value in enumerate(values):
+            if fits(value):
+                try:
+                    packed.append(value)
+                    continue
+                except OverflowError:
+                    pass
+            packed.append(0)
+            exceptions[row] = value
+        self.sections[name] = packed
+
+    def strs(self, name: str, values: List[Any]) -> None:
+        refs = array("i")
+        intern = self._intern
+        for row, value in enumerate(values):
+            if type(value) is str:
+                refs.append(intern(value))
+            else:
+                refs.append(-1)
+                if value is not None:
+                    self.exceptions.setdefault(name, {})[row] = value
+        self.sections[name] = refs
+
+    def ints(self, name: str, values: List[Any]) -> None:
+        self._pack(name, "q", values, lambda value: type(value) is int)
+
+    def floats(self, name: str, values: List[Any]) -> None:
+        self._pack(name, "d", values, lambda value: type(value) is float)
+
+    def datetimes(self, name: str, values: List[Any]) -> None:
+        micros = array("q")
+        offsets = array("i")
+        for row, value in enumerate(values):
+            if isinstance(value, datetime):
+                if value.tzinfo is None:
+                    micros.append((value - _EPOCH) // _MICROSECOND)
+                    offsets.append(_NAIVE)
+                    continue
+                offset = value.utcoffset()
+                if offset is not None and not offset.microseconds:
+                    micros.append((value.replace(tzinfo=None) - _EPOCH) // _MICROSECOND)
+                    offsets.append(offset.days * 86400 + offset.seconds)
+                    continue
+            micros.append(0)
+            offsets.append(_NONE)
+            if value is not None:
+                self.exceptions.setdefault(name, {})[row] = value
+        self.sections[name + ".us"] = micros
+        self.sections[name + ".tz"] = offsets
+
+    def values(self, name: str, values: List[Any]) -> None:
+        self.strs(name, [json.dumps(value, ensure_ascii=False) for value in values])
+
+    def _lists(self, name: str, values: List[Any], is_valid) -> List[Any]:
+        counts = array("I")
+        flat = []
+        for row, value in enumerate(values):
+            if type(value) is list and all(map(is_valid, value)):
+                counts.append(len(value))
+                flat.extend(value)
+            else:
+                counts.append(0)
+                self.exceptions.setdefault(name, {})[row] = value
+        self.sections[name + ".n"] = counts
+        return flat
+
+    def str_lists(self, name: str, values: List[Any]) -> None:
+        self.strs(name, self._lists(name, values, lambda item: type(item) is str))
+
+    def str_int_maps(self, name: str, values: List[Any]) -> None:
+        counts = array("I")
+        keys = []
+        items = []
+        for row, value in enumerate(values):
+            if (type(value) is dict and all(type(key) is str for key in value) and
+                    all(type(item) is int for item in value.values())):
+                counts.append(len(value))
+                keys.extend(value)
+                items.extend(value.values())
+            else:
+                counts.append(0)
+                self.exceptions.setdefault(name, {})[row] = value
+        self.sections[name + ".n"] = counts
+        self.strs(name + ".key", keys)
+        self.ints(name + ".value", items)
+
+    def to_bytes(self, meta: Dict[str, Any]) -> bytes:
+        text = "".join(self.strings)
+        sections = [
+            ("strings.n", array("I", map(len, self.strings))),
+            ("strings", text.encode("utf-8", "surrogatepass")),
+            ("meta", json.dumps(meta, ensure_ascii=False).encode("utf-8")),
+            ("exceptions", json.dumps(self.exceptions, ensure_ascii=False).encode("utf-8"))
+        ]
+        sections.extend(self.sections.items())
+
+        directory = [_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(sections))]
+        payload = []
+        for name, data in sections:
+            if isinstance(data, array):
+                typecode = data.typecode.encode("ascii")
+                if _SWAP_BYTES:
+                    data = array(data.typecode, data)
+                    data.byteswap()
+                data = data.tobytes()
+            else:
+                typecode = _RAW
+            encoded_name = name.encode("utf-8")
+            directory.append(_SECTION.pack(len(encoded_name), typecode, len(data)) + encoded_name)
+            payload.append(data)
+        return b"".join(directory + payload)
+
+
+class _ColumnReader:
+    """列データの読み込み"""
+
+    def __init__(self, blob: bytes):
+        view = memoryview(blob)
+        if len(view) < _HEADER.size:
+            raise ValueError("バイナリ形式ではありません（サイズ不足）")
+        magic, version, _, section_count = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("バイナリ形式ではありません（マジック不一致）")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"未対応の形式バージョンです: {version}（対応: {FORMAT_VERSION}以下）")
+
+        directory = []
+        offset = _HEADER.size
+        for _ in range(section_count):
+            name_length, typecode, size = _SECTION.unpack_from(view, offset)
+            offset += _SECTION.size
+            name = bytes(view[offset:offset + name_length]).decode("utf-8")
+            offset += name_length
+            directory.append((name, typecode, size))
+
+        self._sections: Dict[str, Any] = {}
+        for name, typecode, size in directory:
+            data = view[offset:offset + size]
+            offset += size
+            if typecode == _RAW:
+                self._sections[name] = data
+                continue
+            values = array(typecode.decode("ascii"))
+            values.frombytes(data)
+            if _SWAP_BYTES:
+                values.byteswap()
+            self._sections[name] = values
+        if offset != len(view):
+            raise ValueError("バイナリ形式のデータ長が一致しません")
+
+        text = bytes(self._sections.pop("strings")).decode("utf-8", "surrogatepass")
+        self.strings: List[Optional[str]] = []
+        position = 0
+        for length in self._sections.pop("strings.n"):
+            self.strings.append(text[position:position + length])
+            position += length
+        self.strings.append(None)  # 参照 -1（None）は末尾の要素を指す
+
+        self.meta = json.loads(bytes(self._sections.pop("meta")).decode("utf-8"))
+        self.exceptions = json.loads(bytes(self._sections.pop("exceptions")).decode("utf-8"))
+
+    def has(self, name: str) -> bool:
+        return name in self._sections or name + ".n" in self._sections or name + ".us" in self._sections
+
+    def _patch(self, name: str, values: List[Any]) -> List[Any]:
+        for row, value in self.exceptions.get(name, {}).items():
+            values[int(row)] = value
+        return values
+
+    def _section(self, name: str):
+        try:
+            return self._sections[name]
+        except KeyError:
+            raise ValueError(f"バイナリ形式に列がありません: {name}") from None
+
+    def _split(self, name: str, flat: List[Any]) -> List[List[Any]]:
+        rows = []
+        position = 0
+        for count in self._section(name + ".n"):
+            rows.append(flat[position:position + count])
+            position += count
+        return rows
+
+    def _refs(self, name: str) -> List[Optional[str]]:
+        return list(map(self.strings.__getitem__, self._section(name)))
+
+    def strs(self, name: str) -> List[Any]:
+        return self._patch(name, self._refs(name))
+
+    def ints(self, name: str) -> List[Any]:
+        return self._patch(name, self._section(name).tolist())
+
+    floats = ints
+
+    def datetimes(self, name: str) -> List[Any]:
+        zones: Dict[int, timezone] = {}
+        values = []
+        for micros, offset in zip(self._section(name + ".us"), self._section(name + ".tz")):
+            if offset == _NONE:
+                values.append(None)
+                continue
+            value = _EPOCH + timedelta(microseconds=micros)
+            if offset != _NAIVE:
+                zone = zones.get(offset)
+                if zone is None:
+                    zone = zones[offset] = timezone(timedelta(seconds=offset))
+                value = value.replace(tzinfo=zone)
+            values.append(value)
+        return self._patch(name, values)
+
+    def values(self, name: str) -> List[Any]:
+        # 同じJSON文字列は1回だけ解析（dict/list は共有しないよう毎回生成）
+        scalars: Dict[str, Any] = {}
+        values = []
+        for text in self.strs(name):
+            if text[:1] in ("{", "["):
+                values.append(json.loads(text))
+                continue
+            if text not in scalars:
+                scalars[text] = json.loads(text)
+            values.append(scalars[text])
+        return values
+
+    def str_lists(self, name: str) -> List[Any]:
+        return self._patch(name, self._split(name, self._refs(name)))
+
+    def str_int_maps(self, name: str) -> List[Any]:
+        keys = self._split(name, self.strs(name + ".key"))
+        items = self._split(name, self.ints(name + ".value"))
+        return self._patch(name, [dict(zip(row_keys, row_items)) for row_keys, row_items in zip(keys, items)])
+
+
+def _write_table(writer: _ColumnWriter, prefix: str, cls: type, rows: List[Any]) -> None:
+    """データクラスのリストを列ごとに書き出し"""
+    for name, kind in SCHEMA[cls].items():
+        column = f"{prefix}.{name}"
+        values = [getattr(row, name) for row in rows]
+        if isinstance(kind, tuple):
+            mode, child = kind
+            if mode == "nested":
+                _write_table(writer, column, child, values)
+            elif mode == "optional":
+                writer.sections[column + ".present"] = array("B", [value is not None for value in values])
+                _write_table(writer, column, child, [value for value in values if value is not None])
+            else:
+                writer.sections[column + ".n"] = array("I", map(len, values))
+                _write_table(writer, column, child, [item for value in values for item in value])
+        elif isinstance(kind, type) and issubclass(kind, Enum):
+            writer.strs(column, [value.value if isinstance(value, kind) else value for value in values])
+        else:
+            getattr(writer, kind + "s")(column, values)
+
+
+def _read_table(reader: _ColumnReader, prefix: str, cls: type, count: int) -> List[Any]:
+    """列ごとのデータからデータクラスのリストを復元"""
+    columns = []
+    for field_info in fields(cls):
+        name = field_info.name
+        kind = SCHEMA[cls][name]
+        column = f"{prefix}.{name}"
+
+        if isinstance(kind, tuple):
+            mode, child = kind
+            if mode == "nested":
+                columns.append(_read_table(reader, column, child, count))
+            elif mode == "optional":
+                present = reader._section(column + ".present")
+                children = iter(_read_table(reader, column, child, sum(present)))
+                columns.append([next(children) if flag else None for flag in present])
+            else:
+                children = _read_table(reader, column, child, sum(reader._section(column + ".n")))
+                columns.append(reader._split(column, children))
+        elif not reader.has(column):
+            # 旧バージョンの形式に無い列は既定値で補う
+            if field_info.default is not MISSING:
+                columns.append([field_info.default] * count)
+            elif field_info.default_factory is not MISSING:
+                columns.append([field_info.default_factory() for _ in range(count)])
+            else:
+                raise ValueError(f"バイナリ形式に列がありません: {column}")
+        elif isinstance(kind, type) and issubclass(kind, Enum):
+            members = {member.value: member for member in kind}
+            columns.append([members.get(value, value) for value in reader.strs(column)])
+        else:
+            columns.append(getattr(reader, kind + "s")(column))
+
+    return list(map(cls, *columns))
+
+
+def dumps_database(db: KnowledgeDatabase, extra: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    KnowledgeDatabase をバイナリ形式に変換
+
+    横断インデックスは動画から再構築できるため保存しない。
+
+    Args:
+        db: 変換するデータベース
+        extra: 一緒に保存する付加情報（journal_generation など、JSONで表せる値）
+    """
+    writer = _ColumnWriter()
+    writer.strs("video.key", list(db.videos))
+    _write_table(writer, "video", Video, list(db.videos.values()))
+    writer.strs("playlist.key", list(db.playlists))
+    _write_table(writer, "playlist", Playlist, list(db.playlists.values()))
+
+    meta = {
+        "database_version": db.database_version,
+        "last_updated": db.last_updated.isoformat(),
+        "extra": extra or {}
+    }
+    return writer.to_bytes(meta)
+
+
+def loads_snapshot(blob: bytes) -> Tuple[KnowledgeDatabase, Dict[str, Any]]:
+    """
+    バイナリ形式から KnowledgeDatabase と付加情報を復元
+
+    Raises:
+        ValueError: 形式が不正・未対応のバージョン
+    """
+    reader = _ColumnReader(blob)
+    video_keys = reader.strs("video.key")
+    playlist_keys = reader.strs("playlist.key")
+    videos = dict(zip(video_keys, _read_table(reader, "video", Video, len(video_keys))))
+    playlists = dict(zip(playlist_keys, _read_table(reader, "playlist", Playlist, len(playlist_keys))))
+
+    last_updated = datetime.fromisoformat(reader.meta["last_updated"])
+    db = KnowledgeDatabase(
+        videos=videos,
+        playlists=playlists,
+        creator_index={},
+        tag_index={},
+        theme_index={},
+        last_updated=last_updated,
+        total_videos=len(videos),
+        total_playlists=len(playlists),
+        database_version=reader.meta["database_version"]
+    )
+    db.last_updated = last_updated  # 索引構築時の統計更新で上書きされるため戻す
+    return db, reader.meta.get("extra", {})
+
+
+def loads_database(blob: bytes) -> KnowledgeDatabase:
+    """バイナリ形式から KnowledgeDatabase を復元"""
+    return loads_snapshot(blob)[0]
+
+
+def json_to_binary(json_file: Path, binary_file: Path) -> int:
+    """
+    JSON形式（unified_knowledge_db.json）をバイナリ形式に変換
+
+    Returns:
+        int: 変換した動画数
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    db = KnowledgeDatabase.from_dict(data)
+    db.last_updated = datetime.fromisoformat(data['last_updated'])
+    extra = {key: value for key, value in data.items() if key not in _DATABASE_KEYS}
+    with open(binary_file, 'wb') as f:
+        f.write(dumps_database(db, extra))
+    return len(db.videos)
+
+
+def binary_to_json(binary_file: Path, json_file: Path) -> int:
+    """
+    バイナリ形式をJSON形式（unified_knowledge_db.json と同じ構造）に変換
+
+    Returns:
+        int: 変換した動画数
+    """
+    with open(binary_file, 'rb') as f:
+        db, extra = loads_snapshot(f.read())
+    data = db.to_dict()
+    data.update(extra)
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return len(db.videos)
@@ -5,8 +5,8 @@
 """
 
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Union, Iterable, Tuple
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import json
 import re
@@ -218,7 +218,8 @@ class Video:
                 visual_elements=insight_data.get('visual_elements', []),
                 analysis_confidence=insight_data['analysis_confidence'],
                 analysis_timestamp=datetime.fromisoformat(insight_data['analysis_timestamp']),
-                analysis_model=insight_data['analysis_model']
+                analysis_model=insight_data['analysis_model'],
+                insights=insight_data.get('insights', '')
             )
         
         return cls(
@@ -467,10 +468,10 @@ class KnowledgeDatabase:
     videos: Dict[str, Video]  # video_id -> Video
     playlists: Dict[str, Playlist]  # playlist_id -> Playlist
     
-    # 横断インデックス
-    creator_index: Dict[str, List[str]]  # creator_name -> video_ids
-    tag_index: Dict[str, List[str]]  # tag -> video_ids
-    theme_index: Dict[str, List[str]]  # theme -> video_ids
+    # 横断インデックス（値は登録順を保持した重複なしの集合: video_id -> None）
+    creator_index: Dict[str, Dict[str, None]]  # creator_name -> video_ids
+    tag_index: Dict[str, Dict[str, None]]  # tag -> video_ids
+    theme_index: Dict[str, Dict[str, None]]  # theme -> video_ids
     
     # メタデータ
     last_updated: datetime
@@ -478,6 +479,11 @@ class KnowledgeDatabase:
     total_playlists: int
     database_version: str
     
+    # 動画ごとの索引済み項目（差分更新用）
+    _indexed_terms: Dict[str, Tuple[Tuple[str, ...], ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    
     def __post_init__(self):
         """インデックスを更新"""
         self.rebuild_indexes()
@@ -487,56 +493,122 @@ class KnowledgeDatabase:
         self.creator_index = {}
         self.tag_index = {}
         self.theme_index = {}
+        self._indexed_terms = {}
         
         for video_id, video in self.videos.items():
-            # クリエイターインデックス
-            if video.creative_insight:
-                for creator in video.creative_insight.creators:
-                    if creator.name not in self.creator_index:
-                        self.creator_index[creator.name] = []
-                    self.creator_index[creator.name].append(video_id)
-            
-            # タグインデックス
-            for tag in video.metadata.tags:
-                if tag not in self.tag_index:
-                    self.tag_index[tag] = []
-                self.tag_index[tag].append(video_id)
-            
-            # テーマインデックス
-            if video.creative_insight:
-                for theme in video.creative_insight.themes:
-                    if theme not in self.theme_index:
-                        self.theme_index[theme] = []
-                    self.theme_index[theme].append(video_id)
+            self._index_video(video_id, video)
         
-        # 統計更新
+        self._update_statistics()
+    
+    @staticmethod
+    def _video_terms(video: Video) -> Tuple[Tuple[str, ...], ...]:
+        """動画の索引項目（クリエイター・タグ・テーマ）"""
+        creators: Tuple[str, ...] = ()
+        themes: Tuple[str, ...] = ()
+        if video.creative_insight:
+            creators = tuple(dict.fromkeys(creator.name for creator in video.creative_insight.creators))
+            themes = tuple(dict.fromkeys(video.creative_insight.themes))
+        tags = tuple(dict.fromkeys(video.metadata.tags))
+        return creators, tags, themes
+    
+    def _indexes(self) -> Tuple[Dict[str, Dict[str, None]], ...]:
+        return self.creator_index, self.tag_index, self.theme_index
+    
+    def _index_video(self, video_id: str, video: Video):
+        """動画1件分の索引を差分更新（増えた項目を追加・消えた項目から除外）"""
+        new_terms = self._video_terms(video)
+        old_terms = self._indexed_terms.get(video_id, ((), (), ()))
+        
+        for index, old, new in zip(self._indexes(), old_terms, new_terms):
+            for term in set(old).difference(new):
+                self._remove_posting(index, term, video_id)
+            for term in new:
+                index.setdefault(term, {})[video_id] = None
+        
+        self._indexed_terms[video_id] = new_terms
+    
+    def _unindex_video(self, video_id: str):
+        """動画1件分を索引から除外"""
+        old_terms = self._indexed_terms.pop(video_id, ((), (), ()))
+        for index, terms in zip(self._indexes(), old_terms):
+            for term in terms:
+                self._remove_posting(index, term, video_id)
+    
+    @staticmethod
+    def _remove_posting(index: Dict[str, Dict[str, None]], term: str, video_id: str):
+        postings = index.get(term)
+        if postings is None:
+            return
+        postings.pop(video_id, None)
+        if not postings:
+            del index[term]
+    
+    def _update_statistics(self):
+        """統計更新"""
         self.total_videos = len(self.videos)
         self.total_playlists = len(self.playlists)
         self.last_updated = datetime.now()
     
     def add_video(self, video: Video):
-        """動画を追加"""
+        """動画を追加（既存動画の場合は索引を差分更新）"""
         self.videos[video.metadata.id] = video
-        self.rebuild_indexes()
+        self._index_video(video.metadata.id, video)
+        self._update_statistics()
+    
+    def add_videos(self, videos: Iterable[Video]) -> int:
+        """
+        動画をまとめて追加
+        
+        Args:
+            videos: 追加する動画
+            
+        Returns:
+            int: 追加（更新）した動画数
+        """
+        count = 0
+        for video in videos:
+            self.videos[video.metadata.id] = video
+            self._index_video(video.metadata.id, video)
+            count += 1
+        self._update_statistics()
+        return count
+    
+    def update_video(self, video_id: str) -> bool:
+        """登録済み動画をその場で変更した後に索引を更新"""
+        video = self.videos.get(video_id)
+        if video is None:
+            return False
+        self._index_video(video_id, video)
+        self.last_updated = datetime.now()
+        return True
+    
+    def remove_video(self, video_id: str) -> Optional[Video]:
+        """動画を削除（索引からも除外）"""
+        video = self.videos.pop(video_id, None)
+        if video is None:
+            return None
+        self._unindex_video(video_id)
+        self._update_statistics()
+        return video
     
     def add_playlist(self, playlist: Playlist):
         """プレイリストを追加"""
         self.playlists[playlist.metadata.id] = playlist
-        self.rebuild_indexes()
+        self._update_statistics()
     
     def get_videos_by_creator(self, creator_name: str) -> List[Video]:
         """クリエイター名で動画検索"""
-        video_ids = self.creator_index.get(creator_name, [])
+        video_ids = self.creator_index.get(creator_name, {})
         return [self.videos[vid] for vid in video_ids if vid in self.videos]
     
     def get_videos_by_tag(self, tag: str) -> List[Video]:
         """タグで動画検索"""
-        video_ids = self.tag_index.get(tag, [])
+        video_ids = self.tag_index.get(tag, {})
         return [self.videos[vid] for vid in video_ids if vid in self.videos]
     
     def get_videos_by_theme(self, theme: str) -> List[Video]:
         """テーマで動画検索"""
-        video_ids = self.theme_index.get(theme, [])
+        video_ids = self.theme_index.get(theme, {})
         return [self.videos[vid] for vid in video_ids if vid in self.videos]
     
     def to_dict(self) -> Dict[str, Any]:
@@ -544,9 +616,9 @@ class KnowledgeDatabase:
         return {
             'videos': {vid: video.to_dict() for vid, video in self.videos.items()},
             'playlists': {pid: playlist.to_dict() for pid, playlist in self.playlists.items()},
-            'creator_index': self.creator_index,
-            'tag_index': self.tag_index,
-            'theme_index': self.theme_index,
+            'creator_index': {name: list(video_ids) for name, video_ids in self.creator_index.items()},
+            'tag_index': {tag: list(video_ids) for tag, video_ids in self.tag_index.items()},
+            'theme_index': {theme: list(video_ids) for theme, video_ids in self.theme_index.items()},
             'last_updated': self.last_updated.isoformat(),
             'total_videos': self.total_videos,
             'total_playlists': self.total_playlists,
@@ -559,17 +631,19 @@ class KnowledgeDatabase:
         videos = {vid: Video.from_dict(vdata) for vid, vdata in data['videos'].items()}
         playlists = {pid: Playlist.from_dict(pdata) for pid, pdata in data['playlists'].items()}
         
+        last_updated = datetime.fromisoformat(data['last_updated'])
         db = cls(
             videos=videos,
             playlists=playlists,
             creator_index=data['creator_index'],
             tag_index=data['tag_index'],
             theme_index=data['theme_index'],
-            last_updated=datetime.fromisoformat(data['last_updated']),
+            last_updated=last_updated,
             total_videos=data['total_videos'],
             total_playlists=data['total_playlists'],
             database_version=data['database_version']
         )
+        db.last_updated = last_updated  # 索引構築時の統計更新で上書きされるため戻す
         return db
 
 
@@ -21,7 +21,7 @@ from gui.widgets.status_panel import StatusPanel
 from gui.widgets.progress_dialog import ProgressManager
 from gui.utils.async_worker import global_task_manager
 
-from storage.unified_storage import UnifiedStorage
+from storage.unified_storage import create_storage
 from analyzers.description_analyzer import DescriptionAnalyzer
 from config.settings import DATA_DIR
 from collectors.multi_playlist_collector import MultiPlaylistCollector
@@ -35,7 +35,7 @@ class VideoMainWindow:
         self.setup_window()
         
         # サービス初期化
-        self.storage = UnifiedStorage(DATA_DIR)
+        self.storage = create_storage(DATA_DIR)
         self.analyzer = DescriptionAnalyzer()
         self.collector = MultiPlaylistCollector()
         
@@ -12,7 +12,7 @@ from pathlib import Path
 # パス設定
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from storage.unified_storage import UnifiedStorage
+from storage.unified_storage import create_storage
 from config.settings import DATA_DIR
 
 
@@ -21,7 +21,7 @@ class StatusPanel(ttk.Frame):
     
     def __init__(self, parent, **kwargs):
         super().__init__(parent, **kwargs)
-        self.storage = UnifiedStorage(DATA_DIR)
+        self.storage = create_storage(DATA_DIR)
         
         # ウィジェット作成
         self.create_widgets()
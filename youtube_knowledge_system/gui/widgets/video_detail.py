@@ -16,7 +16,7 @@ import webbrowser
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from core.data_models import Video, AnalysisStatus
-from storage.unified_storage import UnifiedStorage
+from storage.unified_storage import create_storage
 from analyzers.description_analyzer import DescriptionAnalyzer
 from config.settings import DATA_DIR
 
@@ -32,7 +32,7 @@ class VideoDetailPanel(ttk.Frame):
         self.current_video_id: Optional[str] = None
         
         # サービス
-        self.storage = UnifiedStorage(DATA_DIR)
+        self.storage = create_storage(DATA_DIR)
         self.analyzer = DescriptionAnalyzer()
         
         # ウィジェット作成
@@ -408,7 +408,7 @@ def main():
     
     # テスト用：動画データを読み込んで表示
     try:
-        storage = UnifiedStorage(DATA_DIR)
+        storage = create_storage(DATA_DIR)
         videos = storage.get_all_videos()
         if videos:
             video_id, video = next(iter(videos.items()))
@@ -15,7 +15,7 @@ from datetime import datetime
 # パス設定
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from storage.unified_storage import UnifiedStorage
+from storage.unified_storage import create_storage
 from core.data_models import Video, AnalysisStatus
 from config.settings import DATA_DIR
 
@@ -27,7 +27,7 @@ class VideoListWidget(ttk.Frame):
         super().__init__(parent, **kwargs)
         
         # データストレージ
-        self.storage = UnifiedStorage(DATA_DIR)
+        self.storage = create_storage(DATA_DIR)
         self.videos: Dict[str, Video] = {}
         self.filtered_videos: List[str] = []  # フィルタリング済み動画IDリスト
         
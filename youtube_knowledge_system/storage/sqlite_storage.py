@@ -0,0 +1,566 @@
+"""
+SQLiteストレージバックエンド
+
+動画・プレイリスト・横断インデックスをSQLiteに保持し、
+動画は参照された時点で1件ずつ復元する（UnifiedStorageと同じAPI）。
+せつなBot側はJSONスナップショット＋ジャーナルを読むため、保存時は変更分を
+UnifiedStorageと同じ規則で unified_knowledge_db.journal.jsonl へも書き出す
+"""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+from core.data_models import KnowledgeDatabase, Video, Playlist, AnalysisStatus
+from storage.unified_storage import UnifiedStorage
+
+
+TERM_KINDS = ("creator", "tag", "theme")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    analysis_status TEXT,
+    retry_count INTEGER DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS playlists (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS video_terms (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    term TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    UNIQUE (kind, term, video_id)
+);
+CREATE INDEX IF NOT EXISTS idx_video_terms_video ON video_terms(video_id);
+CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(analysis_status, retry_count);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _serialize(record) -> str:
+    return json.dumps(record.to_dict(), ensure_ascii=False)
+
+
+class _LazyRecordMap(MutableMapping):
+    """SQLiteの行を参照時に復元する辞書互換プロキシ（登録順を保持）"""
+
+    def __init__(self, database: 'SQLiteKnowledgeDatabase', table: str, record_class):
+        self._database = database
+        self._table = table
+        self._record_class = record_class
+        self._cache: Dict[str, Any] = {}
+        self._stored_json: Dict[str, str] = {}  # 復元・書き込み時点の内容（未記録の変更検出用）
+
+    @property
+    def hydrated_count(self) -> int:
+        """復元済みの件数"""
+        return len(self._cache)
+
+    def _hydrate(self, key: str, data_json: str):
+        record = self._record_class.from_dict(json.loads(data_json))
+        self._cache[key] = record
+        self._stored_json[key] = data_json
+        return record
+
+    def _remember(self, key: str, record, data_json: str):
+        self._cache[key] = record
+        self._stored_json[key] = data_json
+
+    def _forget(self, key: str):
+        self._cache.pop(key, None)
+        self._stored_json.pop(key, None)
+
+    def _changed_records(self) -> List[Any]:
+        """復元後にその場で変更された（保存内容と異なる）レコード"""
+        return [record for key, record in self._cache.items()
+                if _serialize(record) != self._stored_json.get(key)]
+
+    def __getitem__(self, key: str):
+        record = self._cache.get(key)
+        if record is not None:
+            return record
+        rows = self._database._query(f"SELECT data FROM {self._table} WHERE id = ?", (key,))
+        if not rows:
+            raise KeyError(key)
+        return self._hydrate(key, rows[0][0])
+
+    def __contains__(self, key) -> bool:
+        if key in self._cache:
+            return True
+        return bool(self._database._query(f"SELECT 1 FROM {self._table} WHERE id = ?", (key,)))
+
+    def __iter__(self):
+        return iter([row[0] for row in self._database._query(f"SELECT id FROM {self._table} ORDER BY seq")])
+
+    def __len__(self) -> int:
+        return self._database._query(f"SELECT COUNT(*) FROM {self._table}")[0][0]
+
+    def __setitem__(self, key: str, record):
+        if self._table == "videos":
+            self._database.add_video(record)
+        else:
+            self._database.add_playlist(record)
+
+    def __delitem__(self, key: str):
+        if self._table == "videos":
+            removed = self._database.remove_video(key)
+        else:
+            removed = self._database.remove_playlist(key)
+        if removed is None:
+            raise KeyError(key)
+
+    def items(self) -> List[tuple]:
+        """全件を1回のクエリで取得（未復元分のみ復元）"""
+        result = []
+        for key, data_json in self._database._query(f"SELECT id, data FROM {self._table} ORDER BY seq"):
+            record = self._cache.get(key)
+            if record is None:
+                record = self._hydrate(key, data_json)
+            result.append((key, record))
+        return result
+
+    def values(self) -> List[Any]:
+        return [record for _, record in self.items()]
+
+
+class _TermIndexView(Mapping):
+    """横断インデックスの読み取りビュー（term -> 登録順のvideo_idリスト）"""
+
+    def __init__(self, database: 'SQLiteKnowledgeDatabase', kind: str):
+        self._database = database
+        self._kind = kind
+
+    def __getitem__(self, term: str) -> List[str]:
+        rows = self._database._query(
+            "SELECT video_id FROM video_terms WHERE kind = ? AND term = ? ORDER BY seq", (self._kind, term)
+        )
+        if not rows:
+            raise KeyError(term)
+        return [row[0] for row in rows]
+
+    def __iter__(self):
+        rows = self._database._query(
+            "SELECT term FROM video_terms WHERE kind = ? GROUP BY term ORDER BY MIN(seq)", (self._kind,)
+        )
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._database._query(
+            "SELECT COUNT(DISTINCT term) FROM video_terms WHERE kind = ?", (self._kind,)
+        )[0][0]
+
+    def items(self) -> List[tuple]:
+        """全項目を1回のクエリで取得"""
+        index: Dict[str, List[str]] = {}
+        for term, video_id in self._database._query(
+                "SELECT term, video_id FROM video_terms WHERE kind = ? ORDER BY seq", (self._kind,)):
+            index.setdefault(term, []).append(video_id)
+        return list(index.items())
+
+
+class SQLiteKnowledgeDatabase:
+    """KnowledgeDatabase互換のSQLiteビュー（動画・プレイリストは参照時に復元）"""
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.RLock):
+        self._connection = connection
+        self._lock = lock
+
+        self.videos = _LazyRecordMap(self, "videos", Video)
+        self.playlists = _LazyRecordMap(self, "playlists", Playlist)
+
+        # 横断インデックス
+        self.creator_index = _TermIndexView(self, "creator")
+        self.tag_index = _TermIndexView(self, "tag")
+        self.theme_index = _TermIndexView(self, "theme")
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._lock:
+            self._connection.execute(sql, params)
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def _set_meta(self, key: str, value: str):
+        self._execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                      "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    # メタデータ
+    @property
+    def total_videos(self) -> int:
+        return len(self.videos)
+
+    @property
+    def total_playlists(self) -> int:
+        return len(self.playlists)
+
+    @property
+    def last_updated(self) -> datetime:
+        value = self._get_meta("last_updated")
+        return datetime.fromisoformat(value) if value else datetime.now()
+
+    @last_updated.setter
+    def last_updated(self, value: datetime):
+        self._set_meta("last_updated", value.isoformat())
+
+    @property
+    def database_version(self) -> str:
+        return self._get_meta("database_version") or "1.0"
+
+    @database_version.setter
+    def database_version(self, value: str):
+        self._set_meta("database_version", value)
+
+    # 書き込み
+    def _write_video(self, video: Video):
+        """動画行と索引を書き込み（索引は差分のみ更新）"""
+        video_id = video.metadata.id
+        data_json = _serialize(video)
+        new_terms = KnowledgeDatabase._video_terms(video)
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO videos (id, analysis_status, retry_count, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET analysis_status = excluded.analysis_status, "
+                "retry_count = excluded.retry_count, data = excluded.data",
+                (video_id, video.analysis_status.value, video.retry_count, data_json)
+            )
+            old_terms = set(self._connection.execute(
+                "SELECT kind, term FROM video_terms WHERE video_id = ?", (video_id,)
+            ).fetchall())
+            wanted = [(kind, term) for kind, terms in zip(TERM_KINDS, new_terms) for term in terms]
+            stale = old_terms.difference(wanted)
+            if stale:
+                self._connection.executemany(
+                    "DELETE FROM video_terms WHERE kind = ? AND term = ? AND video_id = ?",
+                    [(kind, term, video_id) for kind, term in stale]
+                )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO video_terms (kind, term, video_id) VALUES (?, ?, ?)",
+                [(kind, term, video_id) for kind, term in wanted if (kind, term) not in old_terms]
+            )
+        self.videos._remember(video_id, video, data_json)
+
+    def _write_playlist(self, playlist: Playlist):
+        playlist_id = playlist.metadata.id
+        data_json = _serialize(playlist)
+        self._execute(
+            "INSERT INTO playlists (id, data) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data", (playlist_id, data_json)
+        )
+        self.playlists._remember(playlist_id, playlist, data_json)
+
+    def add_video(self, video: Video):
+        """動画を追加（既存動画の場合は更新）"""
+        self._write_video(video)
+
+    def add_videos(self, videos: Iterable[Video]) -> int:
+        """動画をまとめて追加"""
+        count = 0
+        with self._lock:
+            for video in videos:
+                self._write_video(video)
+                count += 1
+        return count
+
+    def update_video(self, video_id: str) -> bool:
+        """復元済み動画をその場で変更した後に行・索引を更新"""
+        video = self.videos._cache.get(video_id)
+        if video is None:
+            return video_id in self.videos
+        self._write_video(video)
+        return True
+
+    def update_playlist(self, playlist_id: str) -> bool:
+        """復元済みプレイリストをその場で変更した後に行を更新"""
+        playlist = self.playlists._cache.get(playlist_id)
+        if playlist is None:
+            return playlist_id in self.playlists
+        self._write_playlist(playlist)
+        return True
+
+    def remove_video(self, video_id: str) -> Optional[Video]:
+        """動画を削除（索引からも除外）"""
+        if video_id not in self.videos:
+            return None
+        video = self.videos[video_id]
+        with self._lock:
+            self._connection.execute("DELETE FROM videos WHERE id = ?", (video_id,))
+            self._connection.execute("DELETE FROM video_terms WHERE video_id = ?", (video_id,))
+        self.videos._forget(video_id)
+        return video
+
+    def add_playlist(self, playlist: Playlist):
+        """プレイリストを追加"""
+        self._write_playlist(playlist)
+
+    def remove_playlist(self, playlist_id: str) -> Optional[Playlist]:
+        """プレイリストを削除"""
+        if playlist_id not in self.playlists:
+            return None
+        playlist = self.playlists[playlist_id]
+        self._execute("DELETE FROM playlists WHERE id = ?", (playlist_id,))
+        self.playlists._forget(playlist_id)
+        return playlist
+
+    def flush_changes(self) -> int:
+        """復元済みレコードのうち、その場で変更されたものを書き戻す"""
+        videos = self.videos._changed_records()
+        playlists = self.playlists._changed_records()
+        with self._lock:
+            for video in videos:
+                self._write_video(video)
+            for playlist in playlists:
+                self._write_playlist(playlist)
+        return len(videos) + len(playlists)
+
+    def rebuild_indexes(self):
+        """インデックスを再構築"""
+        with self._lock:
+            self._connection.execute("DELETE FROM video_terms")
+            for _, video in self.videos.items():
+                self._write_video(video)
+
+    # 検索
+    def _videos_by_term(self, kind: str, term: str) -> List[Video]:
+        rows = self._query(
+            "SELECT v.id, v.data FROM video_terms t JOIN videos v ON v.id = t.video_id "
+            "WHERE t.kind = ? AND t.term = ? ORDER BY t.seq", (kind, term)
+        )
+        videos = []
+        for video_id, data_json in rows:
+            video = self.videos._cache.get(video_id)
+            videos.append(video if video is not None else self.videos._hydrate(video_id, data_json))
+        return videos
+
+    def get_videos_by_creator(self, creator_name: str) -> List[Video]:
+        """クリエイター名で動画検索"""
+        return self._videos_by_term("creator", creator_name)
+
+    def get_videos_by_tag(self, tag: str) -> List[Video]:
+        """タグで動画検索"""
+        return self._videos_by_term("tag", tag)
+
+    def get_videos_by_theme(self, theme: str) -> List[Video]:
+        """テーマで動画検索"""
+        return self._videos_by_term("theme", theme)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換（JSON形式のKnowledgeDatabase.to_dictと同じ構造）"""
+        def records(table: str, record_map: _LazyRecordMap) -> Dict[str, Any]:
+            result = {}
+            for key, data_json in self._query(f"SELECT id, data FROM {table} ORDER BY seq"):
+                record = record_map._cache.get(key)
+                result[key] = record.to_dict() if record is not None else json.loads(data_json)
+            return result
+
+        return {
+            'videos': records("videos", self.videos),
+            'playlists': records("playlists", self.playlists),
+            'creator_index': dict(self.creator_index.items()),
+            'tag_index': dict(self.tag_index.items()),
+            'theme_index': dict(self.theme_index.items()),
+            'last_updated': self.last_updated.isoformat(),
+            'total_videos': self.total_videos,
+            'total_playlists': self.total_playlists,
+            'database_version': self.database_version
+        }
+
+
+class SQLiteStorage(UnifiedStorage):
+    """SQLiteバックエンドの統一データストレージ（API・保存形式の変換はUnifiedStorage互換）"""
+
+    def __init__(self, data_dir: Path = None, db_name: str = "unified_knowledge_db.sqlite3"):
+        super().__init__(data_dir)
+        self.sqlite_file = self.data_dir / db_name
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(str(self.sqlite_file), check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            self._connection.commit()
+        return self._connection
+
+    def load_database(self) -> SQLiteKnowledgeDatabase:
+        """データベースを開く（動画本体は参照時に復元）"""
+        if self._database is None:
+            is_new = not self.sqlite_file.exists()
+            self._database = SQLiteKnowledgeDatabase(self._connect(), self._lock)
+            if is_new and self.json_file.exists():
+                print("JSONデータベースをSQLiteへ移行します...")
+                self.import_json(self.json_file)
+            elif not is_new:
+                self._load_journal_state()
+            print(f"SQLiteデータベースを開きました: {self._database.total_videos}動画, {self._database.total_playlists}プレイリスト")
+        return self._database
+
+    def save_database(self, create_backup: bool = True, compact: bool = False) -> None:
+        """変更を確定
+
+        Args:
+            create_backup: compact時にバックアップを作成するか
+            compact: その場で変更された復元済みレコードも書き戻し、バックアップを作成するか
+        """
+        if self._database is None:
+            return
+
+        try:
+            with self._lock:
+                if compact:
+                    self._database.flush_changes()
+                self._database.last_updated = datetime.now()
+                self._connection.commit()
+            if compact and create_backup:
+                self._backup()
+            print(f"統合データベースを保存しました: {self.sqlite_file}")
+
+            # せつなBot側の読み取り用にJSONスナップショット＋ジャーナルへ反映
+            super().save_database(create_backup=False, compact=compact)
+            self._save_journal_state()
+        except Exception as e:
+            print(f"データベース保存エラー: {e}")
+            raise
+
+    def _load_journal_state(self):
+        """JSONスナップショットの世代を復元し、未取り込みのせつなBot側の変更を取り込む"""
+        generation = self._database._get_meta("journal_generation")
+        if generation is None:
+            # JSONスナップショットへの反映を記録していないSQLiteは、次回保存時に全体を書き出す
+            self._snapshot_invalid = True
+            return
+
+        self._journal_generation = int(generation)
+        if self.journal_file.exists():
+            self._journal_entries = len(self._read_journal()[0])
+            with self._lock:
+                if self._merge_external_journal():
+                    self._connection.commit()
+
+    def _save_journal_state(self):
+        """JSONスナップショットの世代を記録"""
+        with self._lock:
+            self._database._set_meta("journal_generation", str(self._journal_generation))
+            self._connection.commit()
+
+    def _backup(self):
+        backup_file = self.backup_dir / f"unified_knowledge_db_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sqlite3"
+        with self._lock:
+            target = sqlite3.connect(str(backup_file))
+            try:
+                self._connection.backup(target)
+            finally:
+                target.close()
+        print(f"バックアップを作成しました: {backup_file}")
+
+    def mark_video_changed(self, video_id: str) -> None:
+        """その場で変更した動画を書き込む（次回保存のジャーナル対象にもする）"""
+        self.load_database().update_video(video_id)
+        self._pending_changes[("video", video_id)] = None
+
+    def mark_playlist_changed(self, playlist_id: str) -> None:
+        """その場で変更したプレイリストを書き込む（次回保存のジャーナル対象にもする）"""
+        self.load_database().update_playlist(playlist_id)
+        self._pending_changes[("playlist", playlist_id)] = None
+
+    def get_failed_videos_for_retry(self, max_retry_count: int = 3) -> List[Video]:
+        """再試行可能な失敗動画を取得（該当動画のみ復元）"""
+        db = self.load_database()
+        rows = db._query(
+            "SELECT id FROM videos WHERE analysis_status = ? AND retry_count < ? ORDER BY seq",
+            (AnalysisStatus.FAILED.value, max_retry_count)
+        )
+        failed_videos = [db.videos[row[0]] for row in rows]
+
+        print(f"🔄 再試行可能な失敗動画: {len(failed_videos)}件 (最大再試行回数: {max_retry_count})")
+        return failed_videos
+
+    def import_json(self, json_path: Path = None) -> int:
+        """JSON形式（unified_knowledge_db.json）から取り込み
+
+        同じデータディレクトリのスナップショットはUnifiedStorage経由で読み込み、
+        圧縮前のジャーナルに残っている変更も含めて取り込む（スナップショットの世代も引き継ぐ）。
+        他のファイルから取り込んだ場合は、次回保存時にJSONスナップショット全体を書き出す
+
+        Returns:
+            取り込んだ動画数
+        """
+        json_path = Path(json_path or self.json_file)
+        if json_path.resolve() == self.json_file.resolve():
+            json_storage = UnifiedStorage(self.data_dir)
+            source = json_storage.load_database()
+            self._journal_generation = json_storage._journal_generation
+            self._journal_entries = json_storage._journal_entries
+            self._snapshot_invalid = json_storage._snapshot_invalid
+        else:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                source = KnowledgeDatabase.from_dict(json.load(f))
+            self._snapshot_invalid = True
+
+        db = self.load_database()
+        with self._lock:
+            count = db.add_videos(source.videos.values())
+            for playlist in source.playlists.values():
+                db.add_playlist(playlist)
+            db.database_version = source.database_version
+            db._set_meta("last_updated", source.last_updated.isoformat())
+            db._set_meta("journal_generation", str(self._journal_generation))
+            self._connection.commit()
+
+        # 取り込み時に復元したオブジェクトは保持しない
+        db.videos._cache.clear()
+        db.videos._stored_json.clear()
+        print(f"JSONデータベースを取り込みました: {count}動画 ({json_path})")
+        return count
+
+    def export_json(self, json_path: Path = None) -> Path:
+        """JSON形式（UnifiedStorageのスナップショットと同じ構造）で書き出し
+
+        同じデータディレクトリのスナップショットへの書き出しは圧縮として行い、
+        世代を進めてジャーナルを空にする（書き出し済みの古いジャーナル行を再適用させない）
+        """
+        json_path = Path(json_path or self.json_file)
+        db = self.load_database()
+        if json_path.resolve() == self.json_file.resolve():
+            with self._lock:
+                self._compact_database(create_backup=False)
+                self._save_journal_state()
+            return json_path
+
+        data = db.to_dict()
+        data['journal_generation'] = self._journal_generation
+        temp_file = json_path.with_name(json_path.name + ".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        temp_file.replace(json_path)
+        print(f"JSONデータベースを書き出しました: {json_path}")
+        return json_path
+
+    def close(self) -> None:
+        """変更を確定して接続を閉じる"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+                self._database = None
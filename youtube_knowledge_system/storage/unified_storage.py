@@ -5,24 +5,41 @@
 """
 
 import json
+import os
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 from core.data_models import (
     KnowledgeDatabase, Video, Playlist, 
     create_empty_database, migrate_legacy_data
 )
-from config.settings import DATA_DIR
+from core.binary_serializer import dumps_database, loads_snapshot
+from config.settings import DATA_DIR, STORAGE_BACKEND
 
 
 class UnifiedStorage:
-    """統一データストレージ管理クラス"""
+    """統一データストレージ管理クラス
     
-    def __init__(self, data_dir: Path = None):
+    保存は変更のあった動画・プレイリストだけをジャーナル（JSONL）へ追記し、
+    ジャーナルが一定量を超えたらスナップショット（unified_knowledge_db.json）へ圧縮する。
+    読み込み時はスナップショットにジャーナルを再適用して復元する。
+    せつなBot側の読み取り（core/knowledge_db_snapshot.py）も同じ規則でジャーナルを再適用するため、
+    ジャーナルの形式を変える場合はそちらも合わせて更新すること。
+    せつなBot側の書き込みも同じジャーナルへ追記する（source付きの行）。圧縮の直前にその行を取り込み、
+    スナップショットの書き直しと journal_generation の更新はこのクラスだけが行う。
+    snapshot_format="binary" の場合、スナップショットはバイナリ形式（unified_knowledge_db.ykdb）で保存する。
+    せつなBot側はJSON形式のスナップショットを読むため、圧縮時はJSON形式も同じ世代で書き出す。
+    """
+    
+    def __init__(self, data_dir: Path = None, journal_compact_entries: int = 1000,
+                 journal_compact_ratio: float = 0.5, snapshot_format: str = "json"):
         self.data_dir = data_dir or DATA_DIR
-        self.db_file = self.data_dir / "unified_knowledge_db.json"
+        self.snapshot_format = snapshot_format
+        self.json_file = self.data_dir / "unified_knowledge_db.json"
+        self.db_file = self.data_dir / "unified_knowledge_db.ykdb" if snapshot_format == "binary" else self.json_file
+        self.journal_file = self.data_dir / "unified_knowledge_db.journal.jsonl"
         self.backup_dir = self.data_dir / "backups"
         self.legacy_dir = self.data_dir / "legacy"
         
@@ -32,20 +49,34 @@ class UnifiedStorage:
         self.legacy_dir.mkdir(parents=True, exist_ok=True)
         
         self._database: Optional[KnowledgeDatabase] = None
+        
+        # ジャーナル管理
+        self.journal_compact_entries = journal_compact_entries  # 圧縮するジャーナル件数
+        self.journal_compact_ratio = journal_compact_ratio  # 圧縮するジャーナルサイズ（スナップショット比）
+        self._journal_generation = 0  # スナップショットの世代（これより古いジャーナル行は適用済み）
+        self._journal_entries = 0
+        self._pending_changes: Dict[Tuple[str, str], None] = {}  # ("video"|"playlist", id)
+        self._snapshot_invalid = False  # スナップショットが読めなかった場合は次回保存で全体を書き直す
     
     def load_database(self) -> KnowledgeDatabase:
         """データベースを読み込み"""
         if self._database is None:
-            if self.db_file.exists():
+            # バイナリ形式のスナップショットがまだ無ければJSON形式から読み込み、次回保存時に移行する
+            snapshot_file = self.db_file if self.db_file.exists() else self.json_file
+            if snapshot_file.exists():
                 try:
-                    with open(self.db_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    self._database = KnowledgeDatabase.from_dict(data)
+                    self._database, self._journal_generation = self._read_snapshot(snapshot_file)
+                    if snapshot_file != self.db_file:
+                        print(f"JSON形式から読み込みました（次回保存時に{self.db_file.name}へ移行します）")
+                    replayed = self._replay_journal(self._database)
+                    if replayed:
+                        print(f"ジャーナルから{replayed}件の変更を復元しました")
                     print(f"統合データベースを読み込みました: {self._database.total_videos}動画, {self._database.total_playlists}プレイリスト")
                 except Exception as e:
                     print(f"データベース読み込みエラー: {e}")
                     print("新しいデータベースを作成します")
                     self._database = create_empty_database()
+                    self._snapshot_invalid = True
             else:
                 # 既存データがあるか確認
                 legacy_files = self._find_legacy_files()
@@ -58,22 +89,207 @@ class UnifiedStorage:
         
         return self._database
     
-    def save_database(self, create_backup: bool = True) -> None:
-        """データベースを保存"""
+    def save_database(self, create_backup: bool = True, compact: bool = False) -> None:
+        """データベースを保存
+        
+        Args:
+            create_backup: スナップショット圧縮時に直前のスナップショットをバックアップするか
+            compact: ジャーナル追記ではなくスナップショットへ圧縮するか
+        """
         if self._database is None:
             return
         
+        if compact or self._snapshot_invalid or not self.db_file.exists():
+            self._compact_database(create_backup)
+            return
+        
+        try:
+            self._append_journal()
+        except Exception as e:
+            print(f"ジャーナル書き込みエラー: {e}")
+            raise
+        
+        if self._needs_compaction():
+            self._compact_database(create_backup)
+    
+    def _read_snapshot(self, snapshot_file: Path) -> Tuple[KnowledgeDatabase, int]:
+        """スナップショットを読み込み（データベースとジャーナル世代）"""
+        if snapshot_file.suffix == ".ykdb":
+            with open(snapshot_file, 'rb') as f:
+                db, extra = loads_snapshot(f.read())
+            return db, extra.get('journal_generation', 0)
+        
+        with open(snapshot_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return KnowledgeDatabase.from_dict(data), data.get('journal_generation', 0)
+    
+    def mark_video_changed(self, video_id: str) -> None:
+        """動画の変更を次回保存のジャーナル対象にする（登録済み動画をその場で変更した場合は索引も更新）"""
+        if self._database is not None:
+            self._database.update_video(video_id)
+        self._pending_changes[("video", video_id)] = None
+    
+    def mark_playlist_changed(self, playlist_id: str) -> None:
+        """プレイリストの変更を次回保存のジャーナル対象にする"""
+        self._pending_changes[("playlist", playlist_id)] = None
+    
+    def _append_journal(self) -> int:
+        """未保存の変更をジャーナルへ追記（変更件数に比例したI/Oのみ）"""
+        if not self._pending_changes:
+            return 0
+        
+        db = self._database
+        lines = []
+        for kind, item_id in self._pending_changes:
+            entry = {'generation': self._journal_generation, 'id': item_id}
+            if kind == "video":
+                video = db.videos.get(item_id)
+                entry.update({'op': 'put_video', 'data': video.to_dict()} if video else {'op': 'delete_video'})
+            else:
+                playlist = db.playlists.get(item_id)
+                if playlist is None:
+                    continue
+                entry.update({'op': 'put_playlist', 'data': playlist.to_dict()})
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        self._pending_changes.clear()
+        self._journal_entries += len(lines)
+        print(f"統合データベースの変更をジャーナルに追記しました: {len(lines)}件")
+        return len(lines)
+    
+    def _read_journal(self) -> Tuple[List[Dict[str, Any]], int]:
+        """スナップショット以降のジャーナル行と、完結した行のバイト数を読み込み"""
+        entries = []
+        valid_bytes = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                
+                # 圧縮済み（スナップショットに反映済み）の世代は読み飛ばす
+                if entry.get('generation', 0) >= self._journal_generation:
+                    entries.append(entry)
+        return entries, valid_bytes
+    
+    def _replay_journal(self, db: KnowledgeDatabase) -> int:
+        """スナップショット以降のジャーナルを再適用（書き込み途中で途切れた末尾は破棄）"""
+        self._journal_entries = 0
+        if not self.journal_file.exists():
+            return 0
+        
+        applied = 0
+        entries, valid_bytes = self._read_journal()
+        for entry in entries:
+            self._journal_entries += 1
+            try:
+                self._apply_journal_entry(db, entry)
+                applied += 1
+            except Exception as e:
+                print(f"ジャーナル適用エラー {entry.get('id')}: {e}")
+        
+        if valid_bytes < self.journal_file.stat().st_size:
+            print("ジャーナル末尾の不完全な書き込みを破棄しました")
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_bytes)
+        
+        return applied
+    
+    @staticmethod
+    def _apply_journal_entry(db: KnowledgeDatabase, entry: Dict[str, Any]) -> None:
+        op = entry.get('op')
+        if op == 'put_video':
+            db.add_video(Video.from_dict(entry['data']))
+        elif op == 'delete_video':
+            db.remove_video(entry['id'])
+        elif op == 'put_playlist':
+            db.add_playlist(Playlist.from_dict(entry['data']))
+    
+    def _merge_external_journal(self) -> int:
+        """せつなBot側が追記したジャーナル行を読み込み済みのデータベースへ取り込む
+        
+        同じ動画・プレイリストの行はジャーナル順に後勝ちとし、最後の行がこのストレージ自身の追記の場合や
+        未保存の変更がある場合は取り込まない（どちらもメモリ上の内容の方が新しい）
+        """
+        if self._database is None or not self.journal_file.exists():
+            return 0
+        
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for entry in self._read_journal()[0]:
+            kind = "playlist" if entry.get('op') == 'put_playlist' else "video"
+            latest[(kind, entry.get('id'))] = entry
+        
+        merged = 0
+        for key, entry in latest.items():
+            if not entry.get('source') or key in self._pending_changes:
+                continue
+            try:
+                self._apply_journal_entry(self._database, entry)
+                merged += 1
+            except Exception as e:
+                print(f"ジャーナル適用エラー {entry.get('id')}: {e}")
+        if merged:
+            print(f"せつなBot側の変更を{merged}件取り込みました")
+        return merged
+    
+    def _needs_compaction(self) -> bool:
+        """ジャーナルが圧縮の閾値を超えたか"""
+        if self._journal_entries >= self.journal_compact_entries:
+            return True
+        try:
+            journal_size = self.journal_file.stat().st_size
+            snapshot_size = self.db_file.stat().st_size
+        except OSError:
+            return False
+        return journal_size > snapshot_size * self.journal_compact_ratio
+    
+    def _compact_database(self, create_backup: bool = True) -> None:
+        """全体をスナップショットへ書き出し、ジャーナルを空にする（一時ファイル経由で置き換え）"""
         # バックアップ作成
         if create_backup and self.db_file.exists():
-            backup_file = self.backup_dir / f"unified_knowledge_db_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            backup_file = self.backup_dir / f"unified_knowledge_db_{datetime.now().strftime('%Y%m%d_%H%M%S')}{self.db_file.suffix}"
             shutil.copy2(self.db_file, backup_file)
             print(f"バックアップを作成しました: {backup_file}")
         
         # データベース保存
         try:
+            # ジャーナルを空にする前に、せつなBot側が追記した変更を取り込む
+            self._merge_external_journal()
+            generation = self._journal_generation + 1
             self._database.last_updated = datetime.now()
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(self._database.to_dict(), f, ensure_ascii=False, indent=2)
+            
+            snapshots = []
+            if self.snapshot_format == "binary":
+                snapshots.append((self.db_file, dumps_database(self._database, {'journal_generation': generation})))
+            # バイナリ形式でも、せつなBot側の読み取り用にJSON形式のスナップショットを同じ世代で書き出す
+            data = self._database.to_dict()
+            data['journal_generation'] = generation
+            snapshots.append((self.json_file, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')))
+            
+            for snapshot_file, content in snapshots:
+                temp_file = snapshot_file.with_name(snapshot_file.name + ".tmp")
+                with open(temp_file, 'wb') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, snapshot_file)
+            
+            # 置き換え後に中断しても、旧世代のジャーナル行は次回読み込み時に読み飛ばされる
+            self._journal_generation = generation
+            with open(self.journal_file, 'w', encoding='utf-8'):
+                pass
+            self._journal_entries = 0
+            self._pending_changes.clear()
+            self._snapshot_invalid = False
             print(f"統合データベースを保存しました: {self.db_file}")
         except Exception as e:
             print(f"データベース保存エラー: {e}")
@@ -84,12 +300,23 @@ class UnifiedStorage:
         db = self.load_database()
         db.add_video(video)
         self._database = db
+        self._pending_changes[("video", video.metadata.id)] = None
+    
+    def add_videos(self, videos: List[Video]) -> int:
+        """動画をまとめて追加（プレイリスト取り込み用）"""
+        db = self.load_database()
+        count = db.add_videos(videos)
+        self._database = db
+        for video in videos:
+            self._pending_changes[("video", video.metadata.id)] = None
+        return count
     
     def add_playlist(self, playlist: Playlist) -> None:
         """プレイリストを追加"""
         db = self.load_database()
         db.add_playlist(playlist)
         self._database = db
+        self._pending_changes[("playlist", playlist.metadata.id)] = None
     
     def remove_video_completely(self, video_id: str) -> tuple[bool, str]:
         """動画を完全削除（すべてのプレイリストからも除外）
@@ -126,14 +353,12 @@ class UnifiedStorage:
                         playlist.total_videos = len(playlist.video_ids)
                         playlist.updated_at = datetime.now()
                         removed_from_playlists.append(playlist_id)
+                        self.mark_playlist_changed(playlist_id)
                         print(f"   📋 プレイリストから除外: {playlist.metadata.title}")
             
-            # 動画をデータベースから削除
-            del db.videos[video_id]
-            
-            # データベース統計更新
-            db.total_videos = len(db.videos)
-            db.updated_at = datetime.now()
+            # 動画をデータベース・横断インデックスから削除（統計も更新）
+            db.remove_video(video_id)
+            self._pending_changes[("video", video_id)] = None
             
             # データベース保存
             self._database = db
@@ -265,6 +490,7 @@ class UnifiedStorage:
                 
                 # 更新日時を設定
                 video.updated_at = datetime.now()
+                self.mark_video_changed(video_id)
                 
                 # データベースを保存
                 self.save_database()
@@ -311,7 +537,7 @@ class UnifiedStorage:
         """古いバックアップファイルを削除"""
         cutoff_time = datetime.now().timestamp() - (keep_days * 24 * 60 * 60)
         
-        for backup_file in self.backup_dir.glob("unified_knowledge_db_*.json"):
+        for backup_file in self.backup_dir.glob(f"unified_knowledge_db_*{self.db_file.suffix}"):
             if backup_file.stat().st_mtime < cutoff_time:
                 backup_file.unlink()
                 print(f"古いバックアップを削除しました: {backup_file}")
@@ -336,7 +562,7 @@ class UnifiedStorage:
                             'title': db.videos[vid].metadata.title,
                             'published_at': db.videos[vid].metadata.published_at.isoformat()
                         }
-                        for vid in video_ids[:5] if vid in db.videos
+                        for vid in list(video_ids)[:5] if vid in db.videos
                     ]
                 }
                 for name, video_ids in db.creator_index.items()
@@ -459,6 +685,7 @@ class UnifiedStorage:
                     
                     # 既存の分析結果を更新・強化
                     if self._enhance_video_analysis(video, analysis_result):
+                        db.update_video(video_id)
                         integrated_count += 1
                 else:
                     print(f"   ⚠️  動画が見つかりません: {video_id}")
@@ -717,6 +944,7 @@ class UnifiedStorage:
                 # 更新日時を設定
                 if enhanced_count > original_enhanced:
                     video.updated_at = datetime.now()
+                    self.mark_video_changed(video_id)
         
         # データベースを保存
         if enhanced_count > 0:
@@ -792,6 +1020,22 @@ class UnifiedStorage:
         return list(set(themes))
 
 
+def create_storage(data_dir: Path = None, backend: str = None) -> UnifiedStorage:
+    """設定されたバックエンドのストレージを作成
+    
+    Args:
+        data_dir: データディレクトリ
+        backend: "json"・"binary"・"sqlite"（省略時は設定値 STORAGE_BACKEND）
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == "sqlite":
+        from storage.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(data_dir)
+    if backend == "binary":
+        return UnifiedStorage(data_dir, snapshot_format="binary")
+    return UnifiedStorage(data_dir)
+
+
 # シングルトンインスタンス
 _storage_instance = None
 
@@ -799,5 +1043,5 @@ def get_storage() -> UnifiedStorage:
     """ストレージインスタンスを取得"""
     global _storage_instance
     if _storage_instance is None:
-        _storage_instance = UnifiedStorage()
+        _storage_instance = create_storage()
     return _storage_instance
\ No newline at end of file